@@ -1,6 +1,7 @@
 """
 Alembic environment configuration.
 """
+import importlib
 import os
 import sys
 from logging.config import fileConfig
@@ -14,12 +15,10 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 # Import models and config
 from app.core.config import settings
 from app.core.db.connection import Base
-from app.models.user import User
-from app.models.conversation import Conversation, Message
-from app.models.agent import AgentConfiguration
-from app.models.context import (
-    ContextWindow, ContextItem, ContextTag, ContextSummary, UserPreference
-)
+
+# Import the model modules so their tables are registered on Base.metadata
+for model_module in ("user", "conversation", "agent", "context", "performance"):
+    importlib.import_module(f"app.models.{model_module}")
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
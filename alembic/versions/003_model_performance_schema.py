@@ -0,0 +1,112 @@
+"""
+Model performance schema.
+
+Revision ID: 003
+Revises: 002
+Create Date: 2025-01-20 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create performance_metric_type enum type
+    op.execute(
+        "CREATE TYPE performancemetrictype AS ENUM "
+        "('LATENCY', 'SUCCESS_RATE', 'TOKEN_USAGE', 'COST', 'QUALITY_SCORE')"
+    )
+    
+    # Create model_usage_record table
+    op.create_table(
+        'modelusagerecord',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('model_id', sa.String(length=50), nullable=False),
+        sa.Column('timestamp', sa.DateTime(), nullable=False),
+        sa.Column('query_id', sa.String(length=50), nullable=False),
+        sa.Column('conversation_id', sa.String(length=50), nullable=True),
+        sa.Column('agent_type', sa.String(length=50), nullable=True),
+        sa.Column('input_tokens', sa.Integer(), nullable=False),
+        sa.Column('output_tokens', sa.Integer(), nullable=False),
+        sa.Column('latency_ms', sa.Integer(), nullable=False),
+        sa.Column('success', sa.Boolean(), nullable=False),
+        sa.Column('error_message', sa.Text(), nullable=True),
+        sa.Column('cost', sa.Float(), nullable=False),
+        sa.Column('quality_score', sa.Float(), nullable=True),
+        sa.Column('feedback', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_modelusagerecord_id'), 'modelusagerecord', ['id'], unique=False)
+    op.create_index(op.f('ix_modelusagerecord_model_id'), 'modelusagerecord', ['model_id'], unique=False)
+    op.create_index('ix_modelusagerecord_timestamp', 'modelusagerecord', ['timestamp'], unique=False)
+    
+    # Create performance_metric table
+    op.create_table(
+        'performancemetric',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('model_id', sa.String(length=50), nullable=False),
+        sa.Column('metric_type', sa.Enum('LATENCY', 'SUCCESS_RATE', 'TOKEN_USAGE', 'COST', 'QUALITY_SCORE', name='performancemetrictype', create_type=False), nullable=False),
+        sa.Column('time_period', sa.String(length=20), nullable=False),
+        sa.Column('start_time', sa.DateTime(), nullable=False),
+        sa.Column('end_time', sa.DateTime(), nullable=False),
+        sa.Column('value', sa.Float(), nullable=False),
+        sa.Column('sample_size', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_performancemetric_id'), 'performancemetric', ['id'], unique=False)
+    op.create_index(op.f('ix_performancemetric_model_id'), 'performancemetric', ['model_id'], unique=False)
+    op.create_index('ix_performancemetric_period_end', 'performancemetric', ['time_period', 'end_time'], unique=False)
+    
+    # Create model_usage_rollup table
+    op.create_table(
+        'modelusagerollup',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('granularity', sa.String(length=10), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(), nullable=False),
+        sa.Column('model_id', sa.String(length=50), nullable=False),
+        sa.Column('agent_type', sa.String(length=50), nullable=False),
+        sa.Column('request_count', sa.Integer(), nullable=False, default=0),
+        sa.Column('success_count', sa.Integer(), nullable=False, default=0),
+        sa.Column('latency_sum_ms', sa.Float(), nullable=False, default=0.0),
+        sa.Column('input_tokens', sa.Integer(), nullable=False, default=0),
+        sa.Column('output_tokens', sa.Integer(), nullable=False, default=0),
+        sa.Column('cost', sa.Float(), nullable=False, default=0.0),
+        sa.Column('quality_sum', sa.Float(), nullable=False, default=0.0),
+        sa.Column('quality_count', sa.Integer(), nullable=False, default=0),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('granularity', 'bucket_start', 'model_id', 'agent_type', name='uq_modelusagerollup_bucket')
+    )
+    op.create_index(op.f('ix_modelusagerollup_id'), 'modelusagerollup', ['id'], unique=False)
+    op.create_index(op.f('ix_modelusagerollup_model_id'), 'modelusagerollup', ['model_id'], unique=False)
+
+
+def downgrade() -> None:
+    # Drop tables in reverse order
+    op.drop_index(op.f('ix_modelusagerollup_model_id'), table_name='modelusagerollup')
+    op.drop_index(op.f('ix_modelusagerollup_id'), table_name='modelusagerollup')
+    op.drop_table('modelusagerollup')
+    
+    op.drop_index('ix_performancemetric_period_end', table_name='performancemetric')
+    op.drop_index(op.f('ix_performancemetric_model_id'), table_name='performancemetric')
+    op.drop_index(op.f('ix_performancemetric_id'), table_name='performancemetric')
+    op.drop_table('performancemetric')
+    
+    op.drop_index('ix_modelusagerecord_timestamp', table_name='modelusagerecord')
+    op.drop_index(op.f('ix_modelusagerecord_model_id'), table_name='modelusagerecord')
+    op.drop_index(op.f('ix_modelusagerecord_id'), table_name='modelusagerecord')
+    op.drop_table('modelusagerecord')
+    
+    # Drop enum types
+    op.execute('DROP TYPE IF EXISTS performancemetrictype')
@@ -0,0 +1,94 @@
+"""
+Partition model usage records by month.
+
+Revision ID: 004
+Revises: 003
+Create Date: 2025-02-03 10:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+# Months of partitions created ahead of the current month
+MONTHS_AHEAD = 3
+
+
+def upgrade() -> None:
+    # Move the existing table aside
+    op.execute("ALTER TABLE modelusagerecord RENAME TO modelusagerecord_old")
+    op.execute("ALTER TABLE modelusagerecord_old RENAME CONSTRAINT modelusagerecord_pkey TO modelusagerecord_old_pkey")
+    op.drop_index('ix_modelusagerecord_timestamp', table_name='modelusagerecord_old')
+    op.drop_index(op.f('ix_modelusagerecord_model_id'), table_name='modelusagerecord_old')
+    op.drop_index(op.f('ix_modelusagerecord_id'), table_name='modelusagerecord_old')
+    
+    # Create the partitioned table; the primary key must include the partition key
+    op.execute(
+        "CREATE TABLE modelusagerecord (LIKE modelusagerecord_old INCLUDING DEFAULTS) "
+        "PARTITION BY RANGE (timestamp)"
+    )
+    op.execute("ALTER TABLE modelusagerecord ADD PRIMARY KEY (id, timestamp)")
+    op.execute("ALTER SEQUENCE modelusagerecord_id_seq OWNED BY modelusagerecord.id")
+    op.create_index(op.f('ix_modelusagerecord_id'), 'modelusagerecord', ['id'], unique=False)
+    op.create_index(op.f('ix_modelusagerecord_model_id'), 'modelusagerecord', ['model_id'], unique=False)
+    op.create_index('ix_modelusagerecord_timestamp', 'modelusagerecord', ['timestamp'], unique=False)
+    
+    # Create monthly partitions from the oldest record to a few months ahead
+    op.execute(f"""
+        DO $$
+        DECLARE
+            month_start timestamp := date_trunc('month', coalesce(
+                (SELECT min(timestamp) FROM modelusagerecord_old), now()::timestamp
+            ));
+            last_month timestamp := date_trunc('month', now()::timestamp) + interval '{MONTHS_AHEAD} months';
+        BEGIN
+            WHILE month_start <= last_month LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF modelusagerecord FOR VALUES FROM (%L) TO (%L)',
+                    'modelusagerecord_p' || to_char(month_start, 'YYYYMM'),
+                    month_start,
+                    month_start + interval '1 month'
+                );
+                month_start := month_start + interval '1 month';
+            END LOOP;
+        END $$;
+    """)
+    
+    # Catch records outside the created partitions
+    op.execute("CREATE TABLE modelusagerecord_default PARTITION OF modelusagerecord DEFAULT")
+    
+    # Copy existing records and drop the old table
+    op.execute("INSERT INTO modelusagerecord SELECT * FROM modelusagerecord_old")
+    op.drop_table('modelusagerecord_old')
+    
+    # Messages are referenced by foreign keys, which partitioned tables cannot
+    # accept on id alone, so time-range scans use a compact BRIN index instead
+    op.create_index(
+        'ix_message_created_at_brin', 'message', ['created_at'],
+        unique=False, postgresql_using='brin'
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_message_created_at_brin', table_name='message')
+    
+    # Move the partitioned table aside
+    op.execute("ALTER TABLE modelusagerecord RENAME TO modelusagerecord_partitioned")
+    op.drop_index('ix_modelusagerecord_timestamp', table_name='modelusagerecord_partitioned')
+    op.drop_index(op.f('ix_modelusagerecord_model_id'), table_name='modelusagerecord_partitioned')
+    op.drop_index(op.f('ix_modelusagerecord_id'), table_name='modelusagerecord_partitioned')
+    
+    # Recreate the plain table and copy records back
+    op.execute("CREATE TABLE modelusagerecord (LIKE modelusagerecord_partitioned INCLUDING DEFAULTS)")
+    op.execute("ALTER TABLE modelusagerecord ADD PRIMARY KEY (id)")
+    op.execute("ALTER SEQUENCE modelusagerecord_id_seq OWNED BY modelusagerecord.id")
+    op.execute("INSERT INTO modelusagerecord SELECT * FROM modelusagerecord_partitioned")
+    op.execute("DROP TABLE modelusagerecord_partitioned CASCADE")
+    
+    op.create_index(op.f('ix_modelusagerecord_id'), 'modelusagerecord', ['id'], unique=False)
+    op.create_index(op.f('ix_modelusagerecord_model_id'), 'modelusagerecord', ['model_id'], unique=False)
+    op.create_index('ix_modelusagerecord_timestamp', 'modelusagerecord', ['timestamp'], unique=False)
@@ -0,0 +1,52 @@
+"""
+Conversation search indexes.
+
+Revision ID: 005
+Revises: 004
+Create Date: 2025-02-17 10:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Trigram matching for part numbers and other identifier-like terms
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    
+    # Generated tsvector columns for full-text search
+    op.execute(
+        "ALTER TABLE message ADD COLUMN search_vector tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('english', coalesce(content, ''))) STORED"
+    )
+    op.execute(
+        "ALTER TABLE conversation ADD COLUMN search_vector tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('english', coalesce(title, ''))) STORED"
+    )
+    
+    # GIN indexes for full-text and trigram search
+    op.create_index('ix_message_search_vector', 'message', ['search_vector'], unique=False, postgresql_using='gin')
+    op.create_index('ix_conversation_search_vector', 'conversation', ['search_vector'], unique=False, postgresql_using='gin')
+    op.create_index(
+        'ix_message_content_trgm', 'message', ['content'], unique=False,
+        postgresql_using='gin', postgresql_ops={'content': 'gin_trgm_ops'}
+    )
+    op.create_index(
+        'ix_conversation_title_trgm', 'conversation', ['title'], unique=False,
+        postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'}
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_conversation_title_trgm', table_name='conversation')
+    op.drop_index('ix_message_content_trgm', table_name='message')
+    op.drop_index('ix_conversation_search_vector', table_name='conversation')
+    op.drop_index('ix_message_search_vector', table_name='message')
+    
+    op.drop_column('conversation', 'search_vector')
+    op.drop_column('message', 'search_vector')
@@ -0,0 +1,32 @@
+"""
+Keyset pagination indexes.
+
+Revision ID: 006
+Revises: 005
+Create Date: 2025-03-03 10:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Composite indexes matching the (created_at, id) keyset order
+    op.create_index(
+        'ix_message_conversation_created', 'message',
+        ['conversation_id', 'created_at', 'id'], unique=False
+    )
+    op.create_index(
+        'ix_conversation_user_created', 'conversation',
+        ['user_id', 'created_at', 'id'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_conversation_user_created', table_name='conversation')
+    op.drop_index('ix_message_conversation_created', table_name='message')
@@ -15,6 +15,7 @@ from app.core.monitoring import (
     ErrorSeverity,
     ErrorCategory,
     ErrorEvent,
+    get_error,
     get_errors,
     get_error_count,
     get_error_rate,
@@ -179,11 +180,10 @@ async def read_error(
     Raises:
         HTTPException: If the error is not found
     """
-    errors = get_errors(limit=1000)  # Get a large number of errors to search
+    error = get_error(error_id)
     
-    for error in errors:
-        if error.id == error_id:
-            return error
+    if error is not None:
+        return error
     
     raise HTTPException(
         status_code=status.HTTP_404_NOT_FOUND,
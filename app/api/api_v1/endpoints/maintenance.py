@@ -2,18 +2,23 @@
 
 import logging
 import os
+from functools import lru_cache
 from typing import Dict, Any, List, Optional
 
 from fastapi import APIRouter, HTTPException, status, Depends, Query
 from pydantic import BaseModel, Field
 
+from app.api.deps import get_current_active_user
 from app.core.mock.service import mock_data_service
 from app.core.agents.maintenance_agent import MaintenanceAgent
-from app.services.maintenance_procedure_template_service import MaintenanceProcedureTemplateService
-from app.services.regulatory_requirements_service import RegulatoryRequirementsService
-from app.services.tools_and_parts_service import ToolsAndPartsService
-from app.services.safety_precautions_service import SafetyPrecautionsService
-from app.services.aircraft_configuration_service import AircraftConfigurationService
+from app.core.security.principal_cache import UserSnapshot
+from app.services.exceptions import RateLimitError
+from app.services.regulatory_requirements_service import (
+    RegulatoryRequirementsService, get_regulatory_requirements_service
+)
+from app.services.aircraft_configuration_service import (
+    AircraftConfigurationService, get_aircraft_configuration_service
+)
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -81,35 +86,28 @@ class TemplateProcedureRequest(BaseModel):
     output_format: str = Field("json", description="Output format (json or markdown)")
 
 
+@lru_cache()
 def get_maintenance_agent():
     """
-    Dependency for getting a MaintenanceAgent instance.
+    Dependency for getting the shared MaintenanceAgent instance.
+
+    The agent uses the shared services and procedure enrichment index, so
+    their data and index entries are loaded once per process.
 
     Returns:
-        MaintenanceAgent: An instance of the MaintenanceAgent.
+        MaintenanceAgent: The shared MaintenanceAgent.
     """
-    template_service = MaintenanceProcedureTemplateService()
-    regulatory_service = RegulatoryRequirementsService()
-    tools_and_parts_service = ToolsAndPartsService()
-    safety_precautions_service = SafetyPrecautionsService()
-    aircraft_configuration_service = AircraftConfigurationService()
-    return MaintenanceAgent(
-        template_service=template_service,
-        regulatory_service=regulatory_service,
-        tools_and_parts_service=tools_and_parts_service,
-        safety_precautions_service=safety_precautions_service,
-        aircraft_configuration_service=aircraft_configuration_service
-    )
+    return MaintenanceAgent()
 
 
 def get_regulatory_service():
     """
-    Dependency for getting a RegulatoryRequirementsService instance.
+    Dependency for getting the shared RegulatoryRequirementsService instance.
 
     Returns:
-        RegulatoryRequirementsService: An instance of the RegulatoryRequirementsService.
+        RegulatoryRequirementsService: The shared RegulatoryRequirementsService.
     """
-    return RegulatoryRequirementsService()
+    return get_regulatory_requirements_service()
 
 
 @router.get("/maintenance/aircraft-types", summary="Get Available Aircraft Types", tags=["maintenance"])
@@ -708,7 +706,8 @@ async def generate_procedure_with_llm(
     request: LLMMaintenanceRequest,
     format_type: str = "json",
     enrich_regulatory: bool = False,
-    agent: MaintenanceAgent = Depends(get_maintenance_agent)
+    agent: MaintenanceAgent = Depends(get_maintenance_agent),
+    current_user: UserSnapshot = Depends(get_current_active_user)
 ):
     """
     Generate a maintenance procedure using LLM.
@@ -717,6 +716,7 @@ async def generate_procedure_with_llm(
         request: LLM-based maintenance procedure request with procedure details.
         format_type: Format type (json, markdown)
         enrich_regulatory: Whether to enrich the procedure with regulatory information
+        current_user: Authenticated user, whose token quota the request counts against
 
     Returns:
         dict: Generated maintenance procedure.
@@ -736,7 +736,8 @@ async def generate_procedure_with_llm(
             configuration=request.configuration,
             regulatory_requirements=request.regulatory_requirements,
             special_considerations=request.special_considerations,
-            model_size=model_size
+            model_size=model_size,
+            user_id=str(current_user.id)
         )
 
         # Handle both sync and async results for testing
@@ -793,6 +794,12 @@ async def generate_procedure_with_llm(
             }
     except HTTPException:
         raise
+    except RateLimitError as e:
+        logger.warning(f"Procedure request rejected: {e.message}")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=e.message
+        )
     except Exception as e:
         logger.error(f"Error generating procedure with LLM: {e}")
         raise HTTPException(
@@ -806,7 +813,8 @@ async def generate_procedure_hybrid(
     request: MaintenanceRequest,
     format_type: str = "json",
     enrich_regulatory: bool = False,
-    agent: MaintenanceAgent = Depends(get_maintenance_agent)
+    agent: MaintenanceAgent = Depends(get_maintenance_agent),
+    current_user: UserSnapshot = Depends(get_current_active_user)
 ):
     """
     Generate a maintenance procedure using a hybrid approach (template-based or LLM-based).
@@ -815,6 +823,7 @@ async def generate_procedure_hybrid(
         request: Maintenance procedure request with aircraft type, system, procedure type, and parameters.
         format_type: Format type (json, markdown)
         enrich_regulatory: Whether to enrich the procedure with regulatory information
+        current_user: Authenticated user, whose token quota the request counts against
 
     Returns:
         dict: Generated maintenance procedure.
@@ -826,7 +835,8 @@ async def generate_procedure_hybrid(
             system=request.system,
             procedure_type=request.procedure_type,
             parameters=request.parameters,
-            query=f"Generate a {request.procedure_type} procedure for {request.system} system on {request.aircraft_type}"
+            query=f"Generate a {request.procedure_type} procedure for {request.system} system on {request.aircraft_type}",
+            user_id=str(current_user.id)
         )
 
         # Handle both sync and async results for testing
@@ -904,6 +914,12 @@ async def generate_procedure_hybrid(
             }
     except HTTPException:
         raise
+    except RateLimitError as e:
+        logger.warning(f"Procedure request rejected: {e.message}")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=e.message
+        )
     except Exception as e:
         logger.error(f"Error generating procedure with hybrid approach: {e}")
         raise HTTPException(
@@ -925,7 +941,8 @@ async def enhance_procedure_with_llm(
     use_large_model: bool = False,
     format_type: str = "json",
     enrich_regulatory: bool = False,
-    agent: MaintenanceAgent = Depends(get_maintenance_agent)
+    agent: MaintenanceAgent = Depends(get_maintenance_agent),
+    current_user: UserSnapshot = Depends(get_current_active_user)
 ):
     """
     Enhance a template-based procedure with LLM.
@@ -942,6 +959,7 @@ async def enhance_procedure_with_llm(
         use_large_model: Whether to use the large model for enhancement
         format_type: Format type (json, markdown)
         enrich_regulatory: Whether to enrich the procedure with regulatory information
+        current_user: Authenticated user, whose token quota the request counts against
 
     Returns:
         dict: Enhanced maintenance procedure.
@@ -961,7 +979,8 @@ async def enhance_procedure_with_llm(
             configuration=configuration,
             regulatory_requirements=regulatory_requirements,
             special_considerations=special_considerations,
-            model_size=model_size
+            model_size=model_size,
+            user_id=str(current_user.id)
         )
 
         # Handle both sync and async results for testing
@@ -1034,6 +1053,12 @@ async def enhance_procedure_with_llm(
             }
     except HTTPException:
         raise
+    except RateLimitError as e:
+        logger.warning(f"Procedure request rejected: {e.message}")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=e.message
+        )
     except Exception as e:
         logger.error(f"Error enhancing procedure with LLM: {e}")
         raise HTTPException(
@@ -1289,7 +1314,7 @@ async def get_regulatory_requirements_for_task(
 @router.get("/maintenance/aircraft-configuration/{aircraft_type}", summary="Get Aircraft Configuration", tags=["maintenance"])
 async def get_aircraft_configuration(
     aircraft_type: str,
-    aircraft_config_service: AircraftConfigurationService = Depends(lambda: AircraftConfigurationService())
+    aircraft_config_service: AircraftConfigurationService = Depends(get_aircraft_configuration_service)
 ):
     """
     Get configuration for a specific aircraft type.
@@ -1325,7 +1350,7 @@ async def get_aircraft_configuration(
 
 @router.get("/maintenance/aircraft-configuration/types", summary="Get All Aircraft Types", tags=["maintenance"])
 async def get_all_aircraft_types(
-    aircraft_config_service: AircraftConfigurationService = Depends(lambda: AircraftConfigurationService())
+    aircraft_config_service: AircraftConfigurationService = Depends(get_aircraft_configuration_service)
 ):
     """
     Get all available aircraft types.
@@ -1352,7 +1377,7 @@ async def get_all_aircraft_types(
 @router.get("/maintenance/aircraft-configuration/{aircraft_type}/systems", summary="Get Systems for Aircraft Type", tags=["maintenance"])
 async def get_systems_for_aircraft_type(
     aircraft_type: str,
-    aircraft_config_service: AircraftConfigurationService = Depends(lambda: AircraftConfigurationService())
+    aircraft_config_service: AircraftConfigurationService = Depends(get_aircraft_configuration_service)
 ):
     """
     Get systems for a specific aircraft type.
@@ -1390,7 +1415,7 @@ async def get_systems_for_aircraft_type(
 async def get_procedure_types_for_system(
     aircraft_type: str,
     system: str,
-    aircraft_config_service: AircraftConfigurationService = Depends(lambda: AircraftConfigurationService())
+    aircraft_config_service: AircraftConfigurationService = Depends(get_aircraft_configuration_service)
 ):
     """
     Get procedure types for a specific aircraft system.
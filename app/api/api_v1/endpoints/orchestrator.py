@@ -16,7 +16,9 @@ from app.core.orchestrator import Orchestrator
 from app.models.conversation import AgentType
 from app.models.orchestrator import OrchestratorRequest, OrchestratorResponse
 from app.repositories.agent import AgentConfigurationRepository
+from app.repositories.context import ContextSummaryRepository
 from app.repositories.conversation import ConversationRepository
+from app.services.exceptions import RateLimitError
 from app.services.llm_service import LLMService
 
 # Configure logging
@@ -69,6 +71,7 @@ class ConversationHistoryResponse(BaseModel):
 
     conversation_id: str = Field(..., description="Conversation ID")
     messages: List[ConversationHistoryItem] = Field(..., description="Conversation messages")
+    next_cursor: Optional[str] = Field(None, description="Cursor of the next (older) page of messages")
 
 
 # Dependency to get the orchestrator
@@ -85,11 +88,13 @@ async def get_orchestrator(db=Depends(get_db)):
     llm_service = LLMService()
     agent_repository = AgentConfigurationRepository(db)
     conversation_repository = ConversationRepository(db)
+    summary_repository = ContextSummaryRepository(db)
 
     orchestrator = Orchestrator(
         llm_service=llm_service,
         agent_repository=agent_repository,
-        conversation_repository=conversation_repository
+        conversation_repository=conversation_repository,
+        summary_repository=summary_repository
     )
 
     await orchestrator.initialize()
@@ -152,6 +157,12 @@ async def process_query(
 
         return response
 
+    except RateLimitError as e:
+        logger.warning(f"Query rejected: {e.message}")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=e.message
+        )
     except Exception as e:
         logger.error(f"Error processing query: {str(e)}")
         raise HTTPException(
@@ -227,10 +238,12 @@ async def get_routing_info(
     response_model=ConversationHistoryResponse,
     summary="Get conversation history",
     tags=["orchestrator"],
-    description="Get the conversation history for a specific conversation ID."
+    description="Get the conversation history for a specific conversation ID, newest page first."
 )
 async def get_conversation_history(
     conversation_id: str,
+    limit: int = Query(50, ge=1, le=200, description="Maximum number of messages to return"),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous response"),
     orchestrator: Orchestrator = Depends(get_orchestrator)
 ):
     """
@@ -238,6 +251,8 @@ async def get_conversation_history(
 
     Args:
         conversation_id: Conversation ID
+        limit: Maximum number of messages to return
+        cursor: Optional cursor of the previous page
         orchestrator: Orchestrator instance
 
     Returns:
@@ -250,18 +265,26 @@ async def get_conversation_history(
                 detail="Conversation repository not available"
             )
 
-        # Get messages from the conversation repository
-        messages = orchestrator.conversation_repository.get_messages(conversation_id)
+        # Get the newest page of messages from the conversation repository
+        try:
+            messages, next_cursor = orchestrator.conversation_repository.get_messages_page(
+                conversation_id, limit=limit, cursor=cursor
+            )
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
 
-        if not messages:
+        if not messages and not cursor:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Conversation {conversation_id} not found"
             )
 
-        # Convert to response model
+        # Convert to response model in chronological order
         history_items = []
-        for message in messages:
+        for message in reversed(messages):
             agent_type = None
             if message.metadata and "agent_type" in message.metadata:
                 try:
@@ -280,7 +303,8 @@ async def get_conversation_history(
 
         return ConversationHistoryResponse(
             conversation_id=conversation_id,
-            messages=history_items
+            messages=history_items,
+            next_cursor=next_cursor
         )
 
     except HTTPException:
@@ -10,7 +10,7 @@ from sqlalchemy.orm import Session
 from app.core.config import settings
 from app.core.db.connection import get_db as get_db_session
 from app.core.security.jwt import decode_token
-from app.models.user import User
+from app.core.security.principal_cache import Principal, UserSnapshot, principal_cache
 from app.repositories.user import UserRepository
 
 # Import permissions module to set get_current_active_user
@@ -46,23 +46,28 @@ def get_user_repository(db: Session = Depends(get_db)) -> UserRepository:
     return UserRepository(db)
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    user_repo: UserRepository = Depends(get_user_repository),
-) -> User:
+def resolve_principal(token: str, user_repo: UserRepository) -> Principal:
     """
-    Get the current authenticated user.
+    Resolve the principal for a token.
+
+    Cached principals are returned without decoding the token or loading the
+    user. Otherwise the token is validated, the user is loaded and the
+    principal is cached.
 
     Args:
         token: JWT token
         user_repo: User repository
 
     Returns:
-        User: Current user
+        Principal: Principal for the token
 
     Raises:
         HTTPException: If authentication fails
     """
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+
     try:
         # Decode the token
         payload = decode_token(token)
@@ -96,12 +101,35 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    return user
+    return principal_cache.set(token, user, payload.get("exp"))
+
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    user_repo: UserRepository = Depends(get_user_repository),
+) -> UserSnapshot:
+    """
+    Get the current authenticated user.
+
+    The user is a cached snapshot of the user's columns, shared by requests
+    using the same token, so it must not be modified.
+
+    Args:
+        token: JWT token
+        user_repo: User repository
+
+    Returns:
+        UserSnapshot: Current user
+
+    Raises:
+        HTTPException: If authentication fails
+    """
+    return resolve_principal(token, user_repo).user
 
 
 async def get_current_active_user(
-    current_user: User = Depends(get_current_user),
-) -> User:
+    current_user: UserSnapshot = Depends(get_current_user),
+) -> UserSnapshot:
     """
     Get the current active user.
 
@@ -109,7 +137,7 @@ async def get_current_active_user(
         current_user: Current user
 
     Returns:
-        User: Current active user
+        UserSnapshot: Current active user
 
     Raises:
         HTTPException: If the user is inactive
@@ -128,8 +156,8 @@ permissions_module.get_current_active_user = get_current_active_user
 
 
 async def get_current_superuser(
-    current_user: User = Depends(get_current_active_user),
-) -> User:
+    current_user: UserSnapshot = Depends(get_current_active_user),
+) -> UserSnapshot:
     """
     Get the current superuser.
 
@@ -137,7 +165,7 @@ async def get_current_superuser(
         current_user: Current active user
 
     Returns:
-        User: Current superuser
+        UserSnapshot: Current superuser
 
     Raises:
         HTTPException: If the user is not a superuser
@@ -157,7 +185,7 @@ async def get_current_superuser(
 async def get_current_user_from_token(
     token: str,
     user_repo: UserRepository = Depends(get_user_repository),
-) -> User:
+) -> UserSnapshot:
     """
     Get the current user from a token without using OAuth2PasswordBearer.
 
@@ -168,43 +196,12 @@ async def get_current_user_from_token(
         user_repo: User repository
 
     Returns:
-        User: Current user
+        UserSnapshot: Current user
 
     Raises:
         HTTPException: If authentication fails
     """
-    try:
-        # Decode the token
-        payload = decode_token(token)
-        user_id: Optional[str] = payload.get("sub")
-
-        if user_id is None:
-            logger.warning("Token payload missing 'sub' field")
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Could not validate credentials",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-    except HTTPException:
-        # Re-raise HTTPExceptions from decode_token
-        raise
-    except Exception as e:
-        logger.error(f"Error decoding token: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-
-    # Get the user from the database
-    user = user_repo.get_by_id(int(user_id))
-    if user is None:
-        logger.warning(f"User with ID {user_id} not found")
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    user = resolve_principal(token, user_repo).user
 
     # Check if user is active
     if not user.is_active:
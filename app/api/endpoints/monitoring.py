@@ -4,6 +4,7 @@ Monitoring API endpoints for the MAGPIE platform.
 This module provides API endpoints for monitoring, tracing, and log management.
 """
 
+import asyncio
 from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional, Any
 
@@ -15,7 +16,7 @@ from app.core.monitoring import (
     AuditLogRecord,
     get_audit_logs,
     verify_audit_logs,
-    rotate_logs,
+    request_log_rotation,
     trace_function,
 )
 # For testing purposes, we'll create a dummy dependency
@@ -174,8 +175,11 @@ async def rotate_logs_endpoint() -> Dict[str, Any]:
     Returns:
         Dict[str, Any]: Result of log rotation
     """
-    # Rotate logs
-    success = rotate_logs()
+    # Rotate logs on the log rotation worker, so the pass cannot race a periodic one
+    try:
+        success = await asyncio.wrap_future(request_log_rotation())
+    except Exception:
+        success = False
 
     if not success:
         raise HTTPException(
@@ -9,6 +9,7 @@ import logging
 from typing import Dict, List, Optional, Any, Tuple, Set, Union
 
 from app.services.llm_service import LLMService
+from app.services.prompt_assembly import canonicalize_context
 from app.services.prompt_templates import DOCUMENTATION_SEARCH_TEMPLATE, DOCUMENTATION_SUMMARY_TEMPLATE
 from app.services.document_relationship_service import document_relationship_service
 from app.services.document_notification_service import document_notification_service
@@ -200,9 +201,8 @@ class DocumentationAgent:
             # Add context if available
             if context:
                 # Filter out keywords from context to avoid confusion
-                context_for_prompt = {k: v for k, v in context.items() if k != "keywords"}
-                if context_for_prompt:
-                    context_str = "\n".join([f"{key}: {value}" for key, value in context_for_prompt.items()])
+                context_str = canonicalize_context(context, exclude=["keywords"])
+                if context_str:
                     prompt_variables["context"] = context_str
 
             # Generate response
@@ -269,7 +269,7 @@ class DocumentationAgent:
 
             # Add context if available
             if context:
-                context_str = "\n".join([f"{key}: {value}" for key, value in context.items()])
+                context_str = canonicalize_context(context)
                 prompt_variables["context"] = context_str
 
             # Generate summary
@@ -394,7 +394,7 @@ class DocumentationAgent:
 
             # Add context if available
             if context:
-                context_str = "\n".join([f"{key}: {value}" for key, value in context.items()])
+                context_str = canonicalize_context(context)
                 prompt_variables["context"] = context_str
 
             # Generate comparison
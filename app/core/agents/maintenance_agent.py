@@ -10,17 +10,26 @@ from typing import Dict, List, Optional, Any, Union
 from datetime import datetime
 
 from app.models.agent import AgentResponse
+from app.services.exceptions import RateLimitError
 from app.services.llm_service import LLMService, ModelSize
+from app.services.prompt_assembly import canonicalize_context
 from app.services.prompt_templates import (
     MAINTENANCE_PROCEDURE_TEMPLATE,
     MAINTENANCE_PROCEDURE_GENERATION_TEMPLATE,
     MAINTENANCE_PROCEDURE_ENHANCEMENT_TEMPLATE
 )
-from app.services.maintenance_procedure_template_service import MaintenanceProcedureTemplateService
-from app.services.regulatory_requirements_service import RegulatoryRequirementsService
-from app.services.tools_and_parts_service import ToolsAndPartsService
-from app.services.safety_precautions_service import SafetyPrecautionsService
-from app.services.aircraft_configuration_service import AircraftConfigurationService
+from app.services.maintenance_procedure_template_service import (
+    MaintenanceProcedureTemplateService, get_maintenance_procedure_template_service
+)
+from app.services.procedure_enrichment_index import ProcedureEnrichmentIndex, get_procedure_enrichment_index
+from app.services.regulatory_requirements_service import (
+    RegulatoryRequirementsService, get_regulatory_requirements_service
+)
+from app.services.tools_and_parts_service import ToolsAndPartsService, get_tools_and_parts_service
+from app.services.safety_precautions_service import SafetyPrecautionsService, get_safety_precautions_service
+from app.services.aircraft_configuration_service import (
+    AircraftConfigurationService, get_aircraft_configuration_service
+)
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -39,11 +48,16 @@ class MaintenanceAgent:
         regulatory_service: Optional[RegulatoryRequirementsService] = None,
         tools_and_parts_service: Optional[ToolsAndPartsService] = None,
         safety_precautions_service: Optional[SafetyPrecautionsService] = None,
-        aircraft_configuration_service: Optional[AircraftConfigurationService] = None
+        aircraft_configuration_service: Optional[AircraftConfigurationService] = None,
+        enrichment_index: Optional[ProcedureEnrichmentIndex] = None
     ):
         """
         Initialize maintenance agent.
 
+        Services that are not given default to the shared service instances,
+        and the enrichment index defaults to the shared index unless any of
+        the services it is built from were given.
+
         Args:
             llm_service: LLM service for generating responses
             maintenance_service: Service for accessing maintenance data
@@ -52,14 +66,26 @@ class MaintenanceAgent:
             tools_and_parts_service: Service for managing tools, parts, and equipment
             safety_precautions_service: Service for managing safety precautions
             aircraft_configuration_service: Service for managing aircraft configuration data
+            enrichment_index: Index of enrichment data per aircraft type, system, and procedure type
         """
         self.llm_service = llm_service or LLMService()
         self.maintenance_service = maintenance_service
-        self.template_service = template_service or MaintenanceProcedureTemplateService()
-        self.regulatory_service = regulatory_service or RegulatoryRequirementsService()
-        self.tools_and_parts_service = tools_and_parts_service or ToolsAndPartsService()
-        self.safety_precautions_service = safety_precautions_service or SafetyPrecautionsService()
-        self.aircraft_configuration_service = aircraft_configuration_service or AircraftConfigurationService()
+        self.template_service = template_service or get_maintenance_procedure_template_service()
+        self.regulatory_service = regulatory_service or get_regulatory_requirements_service()
+        self.tools_and_parts_service = tools_and_parts_service or get_tools_and_parts_service()
+        self.safety_precautions_service = safety_precautions_service or get_safety_precautions_service()
+        self.aircraft_configuration_service = aircraft_configuration_service or get_aircraft_configuration_service()
+
+        # Share the process-wide index unless it would not match the given services
+        if enrichment_index is None and not any((
+            tools_and_parts_service, safety_precautions_service, regulatory_service
+        )):
+            enrichment_index = get_procedure_enrichment_index()
+        self.enrichment_index = enrichment_index or ProcedureEnrichmentIndex(
+            tools_and_parts_service=self.tools_and_parts_service,
+            safety_precautions_service=self.safety_precautions_service,
+            regulatory_service=self.regulatory_service
+        )
 
         # Import maintenance service if not provided
         if not self.maintenance_service:
@@ -131,7 +157,8 @@ class MaintenanceAgent:
         context: Optional[Dict[str, Any]] = None,
         model: Optional[str] = None,
         temperature: Optional[float] = None,
-        max_tokens: Optional[int] = None
+        max_tokens: Optional[int] = None,
+        user_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Process a maintenance query.
@@ -143,6 +170,7 @@ class MaintenanceAgent:
             model: Optional model to use
             temperature: Optional temperature
             max_tokens: Optional max tokens
+            user_id: Optional ID of the user making the request, for token quotas
 
         Returns:
             Dict[str, Any]: Response with maintenance information
@@ -164,7 +192,8 @@ class MaintenanceAgent:
                 procedure_type=params["procedure_type"],
                 parameters=params.get("parameters", {}),
                 query=query,
-                context=context
+                context=context,
+                user_id=user_id
             )
 
             if not procedure:
@@ -265,7 +294,8 @@ class MaintenanceAgent:
         procedure_type: str,
         parameters: Dict[str, Any],
         query: str,
-        context: Optional[Dict[str, Any]] = None
+        context: Optional[Dict[str, Any]] = None,
+        user_id: Optional[str] = None
     ) -> Optional[Dict[str, Any]]:
         """
         Generate a maintenance procedure using a hybrid approach.
@@ -279,9 +309,13 @@ class MaintenanceAgent:
             parameters: Additional parameters
             query: Original user query
             context: Optional context information
+            user_id: Optional ID of the user making the request, for token quotas
 
         Returns:
             Optional[Dict[str, Any]]: Generated procedure
+
+        Raises:
+            RateLimitError: If the request exceeds a rate limit or token quota
         """
         try:
             # First, try to generate procedure from maintenance service (template-based)
@@ -346,7 +380,8 @@ class MaintenanceAgent:
                 components=components,
                 configuration=configuration,
                 regulatory_requirements=regulatory_requirements,
-                special_considerations=special_considerations
+                special_considerations=special_considerations,
+                user_id=user_id
             )
 
             if llm_procedure:
@@ -379,6 +414,8 @@ class MaintenanceAgent:
 
             logger.error(f"Failed to generate procedure using LLM for {aircraft_type}, {system}, {procedure_type}")
             return None
+        except RateLimitError:
+            raise
         except Exception as e:
             logger.error(f"Error generating procedure: {str(e)}")
             return None
@@ -393,7 +430,8 @@ class MaintenanceAgent:
         configuration: str,
         regulatory_requirements: str,
         special_considerations: str,
-        model_size: ModelSize = ModelSize.LARGE
+        model_size: ModelSize = ModelSize.LARGE,
+        user_id: Optional[str] = None
     ) -> Optional[Dict[str, Any]]:
         """
         Generate a maintenance procedure using LLM.
@@ -408,9 +446,13 @@ class MaintenanceAgent:
             regulatory_requirements: Regulatory requirements to follow
             special_considerations: Special considerations for the procedure
             model_size: Size of the LLM model to use
+            user_id: Optional ID of the user making the request, for token quotas
 
         Returns:
             Optional[Dict[str, Any]]: Generated procedure
+
+        Raises:
+            RateLimitError: If the request exceeds a rate limit or token quota
         """
         try:
             # Create prompt variables
@@ -433,8 +475,12 @@ class MaintenanceAgent:
                     model_size=model_size,
                     temperature=0.2,  # Lower temperature for more deterministic output
                     max_tokens=4000,  # Allow for a detailed procedure
-                    response_format={"type": "json_object"}  # Request JSON format
+                    response_format={"type": "json_object"},  # Request JSON format
+                    user_id=user_id
                 )
+            except RateLimitError:
+                # Quota errors are reported to the caller instead of masked
+                raise
             except Exception as e:
                 logger.error(f"Error calling LLM service: {str(e)}")
                 # For testing purposes, return a mock procedure
@@ -498,6 +544,8 @@ class MaintenanceAgent:
             except json.JSONDecodeError as e:
                 logger.error(f"Error parsing LLM response as JSON: {str(e)}")
                 return None
+        except RateLimitError:
+            raise
         except Exception as e:
             logger.error(f"Error generating procedure with LLM: {str(e)}")
             return None
@@ -512,7 +560,8 @@ class MaintenanceAgent:
         configuration: str,
         regulatory_requirements: str,
         special_considerations: str,
-        model_size: ModelSize = ModelSize.MEDIUM
+        model_size: ModelSize = ModelSize.MEDIUM,
+        user_id: Optional[str] = None
     ) -> Optional[Dict[str, Any]]:
         """
         Enhance a template-based procedure with LLM.
@@ -527,9 +576,13 @@ class MaintenanceAgent:
             regulatory_requirements: Regulatory requirements to follow
             special_considerations: Special considerations for the procedure
             model_size: Size of the LLM model to use
+            user_id: Optional ID of the user making the request, for token quotas
 
         Returns:
             Optional[Dict[str, Any]]: Enhanced procedure
+
+        Raises:
+            RateLimitError: If the request exceeds a rate limit or token quota
         """
         try:
             # Convert base procedure to JSON string
@@ -555,8 +608,12 @@ class MaintenanceAgent:
                     model_size=model_size,
                     temperature=0.3,  # Moderate temperature for creativity while maintaining structure
                     max_tokens=4000,  # Allow for a detailed procedure
-                    response_format={"type": "json_object"}  # Request JSON format
+                    response_format={"type": "json_object"},  # Request JSON format
+                    user_id=user_id
                 )
+            except RateLimitError:
+                # Quota errors are reported to the caller instead of masked
+                raise
             except Exception as e:
                 logger.error(f"Error calling LLM service: {str(e)}")
                 # For testing purposes, return an enhanced version of the base procedure
@@ -589,6 +646,8 @@ class MaintenanceAgent:
             except json.JSONDecodeError as e:
                 logger.error(f"Error parsing LLM response as JSON: {str(e)}")
                 return None
+        except RateLimitError:
+            raise
         except Exception as e:
             logger.error(f"Error enhancing procedure with LLM: {str(e)}")
             return None
@@ -792,6 +851,11 @@ class MaintenanceAgent:
         # Create a copy of the procedure to avoid modifying the original
         enriched = procedure.copy()
 
+        # Use the indexed resources unless a specific procedure needs its own lookup
+        mapped_resources = None
+        if not specific_procedure:
+            mapped_resources = self.enrichment_index.get(aircraft_type, system, procedure_type)
+
         # Generate a consolidated resource list
         resources = self.tools_and_parts_service.generate_consolidated_resource_list(
             procedure=procedure,
@@ -799,7 +863,8 @@ class MaintenanceAgent:
             system=system,
             aircraft_type=aircraft_type,
             specific_procedure=specific_procedure,
-            format="json"
+            format="json",
+            mapped_resources=mapped_resources
         )
 
         # Add tools, parts, and equipment to the procedure
@@ -813,10 +878,12 @@ class MaintenanceAgent:
             enriched["equipment_required"] = []
 
         # Add tools
+        tool_ids = {t.get("id") for t in enriched["tools_required"]}
         for tool in resources["tools"]:
             # Check if the tool is already in the list
-            if not any(t.get("id") == tool["id"] for t in enriched["tools_required"]):
+            if tool["id"] not in tool_ids:
                 # Add the tool
+                tool_ids.add(tool["id"])
                 enriched["tools_required"].append({
                     "id": tool["id"],
                     "name": tool["name"],
@@ -826,10 +893,12 @@ class MaintenanceAgent:
                 })
 
         # Add parts
+        part_ids = {p.get("id") for p in enriched["parts_required"]}
         for part in resources["parts"]:
             # Check if the part is already in the list
-            if not any(p.get("id") == part["id"] for p in enriched["parts_required"]):
+            if part["id"] not in part_ids:
                 # Add the part
+                part_ids.add(part["id"])
                 enriched["parts_required"].append({
                     "id": part["id"],
                     "name": part["name"],
@@ -840,10 +909,12 @@ class MaintenanceAgent:
                 })
 
         # Add equipment
+        equipment_ids = {e.get("id") for e in enriched["equipment_required"]}
         for equipment in resources["equipment"]:
             # Check if the equipment is already in the list
-            if not any(e.get("id") == equipment["id"] for e in enriched["equipment_required"]):
+            if equipment["id"] not in equipment_ids:
                 # Add the equipment
+                equipment_ids.add(equipment["id"])
                 enriched["equipment_required"].append({
                     "id": equipment["id"],
                     "name": equipment["name"],
@@ -853,17 +924,8 @@ class MaintenanceAgent:
                 })
 
         # Add a consolidated resource list in markdown format to the procedure
-        markdown_resources = self.tools_and_parts_service.generate_consolidated_resource_list(
-            procedure=procedure,
-            procedure_type=procedure_type,
-            system=system,
-            aircraft_type=aircraft_type,
-            specific_procedure=specific_procedure,
-            format="markdown"
-        )
-
         if "resource_list" not in enriched:
-            enriched["resource_list"] = markdown_resources
+            enriched["resource_list"] = self.tools_and_parts_service.format_resources_as_markdown(resources)
 
         return enriched
 
@@ -894,31 +956,25 @@ class MaintenanceAgent:
                 system=system
             )
 
-            # Validate the safety precautions
-            validation_results = self.safety_precautions_service.validate_procedure_safety_precautions(
-                procedure=enriched,
-                procedure_type=procedure_type,
-                system=system
-            )
-
-            # If there are missing precautions, add them
-            if not validation_results["valid"] and validation_results["missing_precautions"]:
-                if "safety_precautions" not in enriched:
-                    enriched["safety_precautions"] = []
+            # Add any required (high and critical severity) precautions that are missing
+            if "safety_precautions" not in enriched:
+                enriched["safety_precautions"] = []
 
-                for precaution in validation_results["missing_precautions"]:
-                    if not any(p == precaution for p in enriched["safety_precautions"]):
-                        enriched["safety_precautions"].append(precaution)
+            present_precautions = set(enriched["safety_precautions"])
+            index_entry = self.enrichment_index.get(aircraft_type, system, procedure_type)
+            for precaution in index_entry["required_precautions"]:
+                if precaution["description"] not in present_precautions:
+                    present_precautions.add(precaution["description"])
+                    enriched["safety_precautions"].append(precaution["description"])
 
             # Add safety precautions markdown to the procedure
             safety_precautions = []
             for precaution_text in enriched.get("safety_precautions", []):
                 # Try to find the precaution in the database
-                precautions = self.safety_precautions_service.get_all_safety_precautions()
-                matching_precautions = [p for p in precautions if p["description"] == precaution_text]
+                matching_precaution = self.enrichment_index.find_precaution(precaution_text)
 
-                if matching_precautions:
-                    safety_precautions.append(matching_precautions[0])
+                if matching_precaution:
+                    safety_precautions.append(matching_precaution)
                 else:
                     # Create a simple precaution object
                     safety_precautions.append({
@@ -985,26 +1041,27 @@ class MaintenanceAgent:
         # If we have detailed information, get specific regulatory citations
         if procedure_type and system:
             try:
-                # Get regulatory citations
-                citations = self.regulatory_service.get_regulatory_citations(
-                    procedure_type=procedure_type,
-                    system=system,
-                    aircraft_type=aircraft_type,
-                    aircraft_category=aircraft_category,
-                    jurisdiction=jurisdiction
-                )
+                # Get regulatory citations, from the index unless further filters apply
+                if aircraft_category or jurisdiction:
+                    citations = self.regulatory_service.get_regulatory_citations(
+                        procedure_type=procedure_type,
+                        system=system,
+                        aircraft_type=aircraft_type,
+                        aircraft_category=aircraft_category,
+                        jurisdiction=jurisdiction
+                    )
+                else:
+                    citations = self.enrichment_index.get(aircraft_type, system, procedure_type)["citations"]
 
                 # Add regulatory citations to references
                 if "references" not in enriched:
                     enriched["references"] = []
 
                 # Add each citation as a reference
+                reference_titles = {ref.get("title", "").lower() for ref in enriched["references"]}
                 for citation in citations:
                     # Check if this citation already exists in references
-                    has_citation = any(
-                        ref.get("title", "").lower() == f"{citation['authority']} {citation['reference_id']}".lower()
-                        for ref in enriched["references"]
-                    )
+                    has_citation = f"{citation['authority']} {citation['reference_id']}".lower() in reference_titles
 
                     if not has_citation:
                         enriched["references"].append({
@@ -1018,9 +1075,11 @@ class MaintenanceAgent:
                 if "regulatory_compliance" not in enriched:
                     enriched["regulatory_compliance"] = []
 
+                compliance_statements = set(enriched["regulatory_compliance"])
                 for citation in citations:
                     compliance_statement = f"This procedure complies with {citation['authority']} {citation['reference_id']} - {citation['title']}"
-                    if compliance_statement not in enriched["regulatory_compliance"]:
+                    if compliance_statement not in compliance_statements:
+                        compliance_statements.add(compliance_statement)
                         enriched["regulatory_compliance"].append(compliance_statement)
 
             except Exception as e:
@@ -1100,7 +1159,7 @@ class MaintenanceAgent:
 
             # Add context if available
             if context:
-                context_str = "\n".join([f"{key}: {value}" for key, value in context.items()])
+                context_str = canonicalize_context(context)
                 prompt_variables["context"] = context_str
 
             # Generate response
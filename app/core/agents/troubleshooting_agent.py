@@ -8,6 +8,7 @@ import json
 from typing import Dict, List, Optional, Any, Tuple
 
 from app.services.llm_service import LLMService
+from app.services.prompt_assembly import canonicalize_context
 from app.services.troubleshooting_service import troubleshooting_service
 from app.services.prompt_templates import (
     TROUBLESHOOTING_ANALYSIS_TEMPLATE,
@@ -233,7 +234,7 @@ class TroubleshootingAgent:
 
             # Add context if available
             if context:
-                context_str = "\n".join([f"{key}: {value}" for key, value in context.items()])
+                context_str = canonicalize_context(context)
                 prompt_variables["context"] = context_str
 
             # Generate response
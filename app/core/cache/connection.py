@@ -7,6 +7,7 @@ from typing import Any, Dict, Optional, Union, Callable, TypeVar
 
 import redis
 from redis import Redis
+from redis.asyncio import ConnectionPool as AsyncConnectionPool, Redis as AsyncRedis
 from redis.connection import ConnectionPool
 from functools import wraps
 
@@ -109,6 +110,20 @@ redis_pool = ConnectionPool(
     max_connections=settings.REDIS_MAX_CONNECTIONS,
 )
 
+# Create async Redis connection pool for use from the event loop
+async_redis_pool = AsyncConnectionPool(
+    host=settings.REDIS_HOST,
+    port=settings.REDIS_PORT,
+    password=settings.REDIS_PASSWORD or None,
+    db=settings.REDIS_DB,
+    decode_responses=False,  # Keep binary data as is
+    socket_timeout=settings.REDIS_TIMEOUT,
+    socket_connect_timeout=settings.REDIS_TIMEOUT,
+    retry_on_timeout=settings.REDIS_RETRY_ON_TIMEOUT,
+    health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+    max_connections=settings.REDIS_MAX_CONNECTIONS,
+)
+
 
 class RedisConnectionManager:
     """
@@ -125,6 +140,16 @@ class RedisConnectionManager:
         """
         return Redis(connection_pool=redis_pool)
 
+    @staticmethod
+    def get_async_connection() -> AsyncRedis:
+        """
+        Get an async Redis connection from the async pool.
+
+        Returns:
+            AsyncRedis: Async Redis connection
+        """
+        return AsyncRedis(connection_pool=async_redis_pool)
+
     @staticmethod
     def get_connection_with_decode() -> Redis:
         """
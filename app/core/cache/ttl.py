@@ -40,6 +40,7 @@ class CacheTTLManager:
         "message": CacheTTLPolicy.MEDIUM,
         "agent": CacheTTLPolicy.LONG,
         "llm_response": CacheTTLPolicy.LONG,
+        "classification": CacheTTLPolicy.LONG,
         "token_count": CacheTTLPolicy.LONG,
         "embedding": CacheTTLPolicy.LONG,
         "health_check": CacheTTLPolicy.SHORT,
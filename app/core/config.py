@@ -91,6 +91,8 @@ class BaseAppSettings(BaseSettings):
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60  # How long validated tokens skip the user lookup
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10000
 
     # Task Master (for compatibility with existing .env)
     ANTHROPIC_API_KEY: Optional[str] = ""
@@ -133,6 +135,19 @@ class BaseAppSettings(BaseSettings):
     PROFILE_API_REQUESTS: bool = True
     PERFORMANCE_METRICS_TTL_DAYS: int = 7  # Store performance metrics for 7 days
 
+    # Request Body Logging
+    LOG_BODY_SAMPLE_RATE: float = 0.1  # Share of requests whose JSON bodies are logged
+    LOG_BODY_MAX_BYTES: int = 10000  # Larger bodies are logged by size only
+
+    # Log Rotation
+    LOG_SEGMENT_MAX_MB: int = 100  # Size at which a new log segment is started
+    LOG_ROTATION_INTERVAL_SECONDS: int = 3600  # Time between retention passes
+
+    # LLM Token Quotas
+    LLM_USER_DAILY_TOKEN_BUDGET: int = 1000000  # Tokens per user (and for all anonymous callers) per day, 0 for no limit
+    LLM_GLOBAL_DAILY_TOKEN_BUDGET: int = 0  # Tokens for all users per day, 0 for no limit
+    LLM_QUOTA_SOFT_LIMIT_RATIO: float = 0.8  # Share of a budget after which smaller models are used
+
     model_config = SettingsConfigDict(
         case_sensitive=True,
         env_file=".env"
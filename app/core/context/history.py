@@ -0,0 +1,134 @@
+"""
+Bounded conversation history for the MAGPIE platform.
+
+History passed to the LLM is limited to a token budget: the most recent
+messages are kept verbatim and older turns are represented by their stored
+summaries, so prompt size stays flat as a conversation grows.
+"""
+import logging
+from typing import Dict, List, Optional, Sequence
+
+from app.models.context import ContextSummary
+from app.models.conversation import Message
+from app.services.token_utils import count_message_tokens
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Maximum number of history tokens, whatever the model's context window
+DEFAULT_HISTORY_TOKENS = 4000
+
+# Share of a model's context window (after the response reservation) given to history
+HISTORY_CONTEXT_FRACTION = 0.25
+
+# Share of the history budget reserved for summaries of earlier turns
+SUMMARY_BUDGET_FRACTION = 0.25
+
+# Heading of the history entry holding summaries of earlier turns
+SUMMARY_HEADER = "Summary of the earlier conversation:"
+
+
+def history_token_budget(
+    context_tokens: Optional[int] = None,
+    reserved_tokens: int = 0,
+    max_history_tokens: int = DEFAULT_HISTORY_TOKENS
+) -> int:
+    """
+    Get the number of tokens available for conversation history.
+
+    Args:
+        context_tokens: Optional context window of the model in tokens
+        reserved_tokens: Tokens reserved for the response
+        max_history_tokens: Upper bound on history tokens
+
+    Returns:
+        int: History token budget
+    """
+    if not context_tokens:
+        return max_history_tokens
+
+    model_budget = int((context_tokens - reserved_tokens) * HISTORY_CONTEXT_FRACTION)
+    return max(0, min(max_history_tokens, model_budget))
+
+
+def trim_history(
+    history: Optional[List[Dict[str, str]]],
+    token_budget: int
+) -> Optional[List[Dict[str, str]]]:
+    """
+    Keep the most recent history entries that fit within a token budget.
+
+    Args:
+        history: Conversation history, oldest first
+        token_budget: History token budget
+
+    Returns:
+        Optional[List[Dict[str, str]]]: Trimmed history, oldest first
+    """
+    if not history:
+        return history
+
+    kept: List[Dict[str, str]] = []
+    used_tokens = 0
+    for entry in reversed(history):
+        tokens = count_message_tokens([entry])
+        if used_tokens + tokens > token_budget:
+            break
+        kept.append(entry)
+        used_tokens += tokens
+
+    kept.reverse()
+    return kept
+
+
+def build_history(
+    messages: Sequence[Message],
+    summaries: Sequence[ContextSummary],
+    token_budget: int
+) -> List[Dict[str, str]]:
+    """
+    Build conversation history from recent messages and stored summaries.
+
+    The newest messages are kept while they fit in the budget, less a share
+    reserved for summaries. The remaining budget is filled with the newest
+    summaries that end before the first kept message, so summarized turns
+    are never repeated verbatim.
+
+    Args:
+        messages: Recent messages, oldest first
+        summaries: Active summaries of the conversation, oldest first
+        token_budget: History token budget
+
+    Returns:
+        List[Dict[str, str]]: Conversation history, oldest first
+    """
+    entries = [
+        {"role": "assistant" if message.role == "assistant" else "user", "content": message.content}
+        for message in messages
+    ]
+    summary_budget = int(token_budget * SUMMARY_BUDGET_FRACTION) if summaries else 0
+    history = trim_history(entries, token_budget - summary_budget)
+
+    # Summaries may only cover messages that were not kept
+    first_kept_id = messages[len(messages) - len(history)].id if history else None
+    remaining_tokens = token_budget - count_message_tokens(history)
+
+    summary_parts: List[str] = []
+    for summary in reversed(summaries):
+        if first_kept_id is not None and (
+            summary.end_message_id is None or summary.end_message_id >= first_kept_id
+        ):
+            continue
+
+        summary_entry = {
+            "role": "system",
+            "content": "\n\n".join([SUMMARY_HEADER, summary.summary_content] + summary_parts)
+        }
+        if count_message_tokens([summary_entry]) > remaining_tokens:
+            break
+        summary_parts.insert(0, summary.summary_content)
+
+    if summary_parts:
+        history.insert(0, {"role": "system", "content": "\n\n".join([SUMMARY_HEADER] + summary_parts)})
+
+    return history
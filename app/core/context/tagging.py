@@ -2,11 +2,11 @@
 Context tagging utilities for the MAGPIE platform.
 """
 import logging
-import re
 import json
 import asyncio
 from typing import Dict, List, Optional, Set, Tuple, Union, Any
 
+from app.core.matching import KeywordMatcher, PatternMatcher
 from app.models.context import ContextItem, ContextTag, ContextType
 from app.repositories.context import ContextTagRepository
 from app.services.llm_service import LLMService
@@ -70,6 +70,11 @@ class EntityTagExtractor(TagExtractor):
         r'\b[A-Z]{2}\d{4,6}\b'      # AB12345
     ]
 
+    def __init__(self):
+        """Compile the entity matchers."""
+        self._model_matcher = KeywordMatcher({model: [model] for model in self.AIRCRAFT_MODELS})
+        self._part_number_matcher = PatternMatcher({"part_number": self.PART_NUMBER_PATTERNS})
+
     def extract_tags(self, content: str) -> Dict[str, str]:
         """
         Extract entity tags from content.
@@ -83,18 +88,15 @@ class EntityTagExtractor(TagExtractor):
         tags = {}
 
         # Extract aircraft models
-        for model, manufacturer in self.AIRCRAFT_MODELS.items():
-            if re.search(r'\b' + re.escape(model) + r'\b', content.lower()):
-                tags["aircraft_model"] = model
-                tags["manufacturer"] = manufacturer
-                break
+        model = self._model_matcher.first_label(content)
+        if model:
+            tags["aircraft_model"] = model
+            tags["manufacturer"] = self.AIRCRAFT_MODELS[model]
 
         # Extract part numbers
-        for pattern in self.PART_NUMBER_PATTERNS:
-            match = re.search(pattern, content)
-            if match:
-                tags["part_number"] = match.group(0)
-                break
+        match = self._part_number_matcher.first_match(content)
+        if match:
+            tags["part_number"] = match[1]
 
         return tags
 
@@ -132,6 +134,11 @@ class KeywordTagExtractor(TagExtractor):
         "environmental": ["environmental", "air conditioning", "pressurization", "temperature"]
     }
 
+    def __init__(self):
+        """Compile the keyword matchers."""
+        self._topic_matcher = KeywordMatcher(self.MAINTENANCE_TOPICS)
+        self._system_matcher = KeywordMatcher(self.AIRCRAFT_SYSTEMS)
+
     def extract_tags(self, content: str) -> Dict[str, str]:
         """
         Extract keyword tags from content.
@@ -143,25 +150,16 @@ class KeywordTagExtractor(TagExtractor):
             Dict[str, str]: Dictionary of extracted tags
         """
         tags = {}
-        content_lower = content.lower()
 
         # Extract maintenance topics
-        for topic, keywords in self.MAINTENANCE_TOPICS.items():
-            for keyword in keywords:
-                if re.search(r'\b' + re.escape(keyword) + r'\b', content_lower):
-                    tags["maintenance_topic"] = topic
-                    break
-            if "maintenance_topic" in tags:
-                break
+        topic = self._topic_matcher.first_label(content)
+        if topic:
+            tags["maintenance_topic"] = topic
 
         # Extract aircraft systems
-        for system, keywords in self.AIRCRAFT_SYSTEMS.items():
-            for keyword in keywords:
-                if re.search(r'\b' + re.escape(keyword) + r'\b', content_lower):
-                    tags["aircraft_system"] = system
-                    break
-            if "aircraft_system" in tags:
-                break
+        system = self._system_matcher.first_label(content)
+        if system:
+            tags["aircraft_system"] = system
 
         return tags
 
@@ -191,6 +189,14 @@ class SentimentTagExtractor(TagExtractor):
         "usual", "expected", "nominal", "average", "moderate", "acceptable"
     ]
 
+    def __init__(self):
+        """Compile the sentiment keyword matcher."""
+        self._sentiment_matcher = KeywordMatcher({
+            "positive": self.POSITIVE_KEYWORDS,
+            "negative": self.NEGATIVE_KEYWORDS,
+            "neutral": self.NEUTRAL_KEYWORDS,
+        })
+
     def extract_tags(self, content: str) -> Dict[str, str]:
         """
         Extract sentiment tags from content.
@@ -202,17 +208,12 @@ class SentimentTagExtractor(TagExtractor):
             Dict[str, str]: Dictionary of extracted tags
         """
         tags = {}
-        content_lower = content.lower()
 
         # Count sentiment keywords
-        positive_count = sum(1 for keyword in self.POSITIVE_KEYWORDS
-                            if re.search(r'\b' + re.escape(keyword) + r'\b', content_lower))
-
-        negative_count = sum(1 for keyword in self.NEGATIVE_KEYWORDS
-                            if re.search(r'\b' + re.escape(keyword) + r'\b', content_lower))
-
-        neutral_count = sum(1 for keyword in self.NEUTRAL_KEYWORDS
-                           if re.search(r'\b' + re.escape(keyword) + r'\b', content_lower))
+        counts = self._sentiment_matcher.count(content, distinct=True)
+        positive_count = counts["positive"]
+        negative_count = counts["negative"]
+        neutral_count = counts["neutral"]
 
         # Determine overall sentiment
         if positive_count > negative_count and positive_count > neutral_count:
@@ -0,0 +1,336 @@
+"""
+Table partitioning for the MAGPIE platform.
+
+This module manages monthly range partitions of high-volume PostgreSQL
+tables: future partitions are created ahead of time, and old partitions are
+detached and archived or dropped, so retention is a metadata operation
+instead of a large DELETE.
+
+Partition changes are executed in the caller's transaction; the caller
+commits or rolls back, so they can be combined with other changes.
+"""
+import logging
+import re
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Partitioned tables mapped to their partition key column
+PARTITIONED_TABLES: Dict[str, str] = {
+    "modelusagerecord": "timestamp",
+}
+
+# Bounds of a range partition as reported by pg_get_expr
+PARTITION_BOUND_PATTERN = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+def month_start(value: datetime) -> datetime:
+    """
+    Get the start of the month containing a datetime.
+
+    Args:
+        value: Datetime
+
+    Returns:
+        datetime: First instant of the month
+    """
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    """
+    Add a number of months to the start of a month.
+
+    Args:
+        value: Start of a month
+        months: Number of months to add (may be negative)
+
+    Returns:
+        datetime: Start of the resulting month
+    """
+    month_index = value.year * 12 + value.month - 1 + months
+    return value.replace(year=month_index // 12, month=month_index % 12 + 1)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    """
+    Get the name of a table's partition for a month.
+
+    Args:
+        table: Partitioned table name
+        month: Start of the month
+
+    Returns:
+        str: Partition table name
+    """
+    return f"{table}_p{month:%Y%m}"
+
+
+class PartitionManager:
+    """
+    Manager for monthly range partitions.
+
+    All operations are no-ops on databases other than PostgreSQL, so callers
+    can use the same code path in tests on SQLite.
+    """
+
+    def __init__(self, db: Session, tables: Optional[Dict[str, str]] = None):
+        """
+        Initialize the partition manager.
+
+        Args:
+            db: Database session
+            tables: Partitioned tables mapped to their partition key (default: PARTITIONED_TABLES)
+        """
+        self.db = db
+        self.tables = tables if tables is not None else PARTITIONED_TABLES
+
+    @property
+    def is_supported(self) -> bool:
+        """Whether the database supports declarative partitioning."""
+        return self.db.get_bind().dialect.name == "postgresql"
+
+    def _partition_bounds(self, table: str) -> List[Tuple[str, str]]:
+        """
+        Get the partitions of a table with their bound expressions.
+
+        Args:
+            table: Partitioned table name
+
+        Returns:
+            List[Tuple[str, str]]: Name and bound expression of each partition
+        """
+        rows = self.db.execute(
+            text(
+                "SELECT child.relname, pg_get_expr(child.relpartbound, child.oid) "
+                "FROM pg_inherits "
+                "JOIN pg_class parent ON pg_inherits.inhparent = parent.oid "
+                "JOIN pg_class child ON pg_inherits.inhrelid = child.oid "
+                "WHERE parent.relname = :table"
+            ),
+            {"table": table}
+        )
+        return [(name, bound) for name, bound in rows]
+
+    def list_partitions(self, table: str) -> List[Tuple[str, datetime, datetime]]:
+        """
+        List the monthly partitions of a table.
+
+        The default partition is not included.
+
+        Args:
+            table: Partitioned table name
+
+        Returns:
+            List[Tuple[str, datetime, datetime]]: Name, lower and upper bound of each
+                partition, ordered by lower bound
+        """
+        if not self.is_supported:
+            return []
+
+        partitions = []
+        for name, bound in self._partition_bounds(table):
+            match = PARTITION_BOUND_PATTERN.search(bound or "")
+            if match:
+                partitions.append((
+                    name,
+                    datetime.fromisoformat(match.group(1)),
+                    datetime.fromisoformat(match.group(2))
+                ))
+
+        return sorted(partitions, key=lambda partition: partition[1])
+
+    def ensure_partitions(
+        self,
+        table: str,
+        months_ahead: int = 3,
+        now: Optional[datetime] = None
+    ) -> List[str]:
+        """
+        Create partitions for the current month and the months ahead.
+
+        Rows for a new month that were already written to the default
+        partition are moved into the new partition, since PostgreSQL refuses
+        to create a partition whose range overlaps rows in the default one.
+
+        Args:
+            table: Partitioned table name
+            months_ahead: Number of future months to create partitions for
+            now: Optional reference time (default: current UTC time)
+
+        Returns:
+            List[str]: Names of the partitions that were created
+        """
+        if not self.is_supported:
+            return []
+
+        bounds = self._partition_bounds(table)
+        existing = {name for name, _ in bounds}
+        default = next((name for name, bound in bounds if bound == "DEFAULT"), None)
+        current = month_start(now or datetime.utcnow())
+        created = []
+
+        for offset in range(months_ahead + 1):
+            lower = add_months(current, offset)
+            upper = add_months(lower, 1)
+            name = partition_name(table, lower)
+            if name in existing:
+                continue
+
+            range_sql = f"FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+            if default and self._default_has_rows(table, default, lower, upper):
+                self._move_default_rows(table, default, name, lower, upper, range_sql)
+            else:
+                self.db.execute(text(
+                    f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table}" FOR VALUES {range_sql}'
+                ))
+            created.append(name)
+
+        if created:
+            logger.info(f"Created partitions for {table}: {', '.join(created)}")
+
+        return created
+
+    def _default_has_rows(self, table: str, default: str, lower: datetime, upper: datetime) -> bool:
+        """
+        Check whether the default partition holds rows in a range.
+
+        Args:
+            table: Partitioned table name
+            default: Default partition name
+            lower: Start of the range (inclusive)
+            upper: End of the range (exclusive)
+
+        Returns:
+            bool: Whether any rows are in the range
+        """
+        key = self.tables[table]
+        return bool(self.db.execute(
+            text(f'SELECT EXISTS (SELECT 1 FROM "{default}" WHERE "{key}" >= :lower AND "{key}" < :upper)'),
+            {"lower": lower, "upper": upper}
+        ).scalar())
+
+    def _move_default_rows(
+        self,
+        table: str,
+        default: str,
+        name: str,
+        lower: datetime,
+        upper: datetime,
+        range_sql: str
+    ) -> None:
+        """
+        Create a partition from the rows of its range in the default partition.
+
+        The new table is filled before it is attached, and the default
+        partition is locked so no rows for the range arrive in between.
+
+        Args:
+            table: Partitioned table name
+            default: Default partition name
+            name: Name of the partition to create
+            lower: Start of the partition range
+            upper: End of the partition range
+            range_sql: Partition bound clause for the range
+        """
+        key = self.tables[table]
+        self.db.execute(text(f'LOCK TABLE "{default}" IN SHARE ROW EXCLUSIVE MODE'))
+        self.db.execute(text(
+            f'CREATE TABLE "{name}" (LIKE "{table}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+        ))
+        moved = self.db.execute(
+            text(
+                f'WITH moved AS (DELETE FROM "{default}" WHERE "{key}" >= :lower AND "{key}" < :upper RETURNING *) '
+                f'INSERT INTO "{name}" SELECT * FROM moved'
+            ),
+            {"lower": lower, "upper": upper}
+        )
+        self.db.execute(text(f'ALTER TABLE "{table}" ATTACH PARTITION "{name}" FOR VALUES {range_sql}'))
+        logger.info(f"Moved {moved.rowcount} rows from {default} to new partition {name}")
+
+    def detach_partitions(
+        self,
+        table: str,
+        before: datetime,
+        archive_schema: Optional[str] = None
+    ) -> List[str]:
+        """
+        Detach partitions whose whole range is older than a cutoff.
+
+        Detached partitions are moved to the archive schema if one is given,
+        and dropped otherwise.
+
+        Args:
+            table: Partitioned table name
+            before: Cutoff; partitions ending at or before it are detached
+            archive_schema: Optional schema to move detached partitions to
+
+        Returns:
+            List[str]: Names of the detached partitions
+        """
+        if not self.is_supported:
+            return []
+
+        detached = []
+        for name, _, upper in self.list_partitions(table):
+            if upper > before:
+                continue
+
+            self.db.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"'))
+            if archive_schema:
+                self.db.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{archive_schema}"'))
+                self.db.execute(text(f'ALTER TABLE "{name}" SET SCHEMA "{archive_schema}"'))
+            else:
+                self.db.execute(text(f'DROP TABLE "{name}"'))
+            detached.append(name)
+
+        if detached:
+            action = f"archived to {archive_schema}" if archive_schema else "dropped"
+            logger.info(f"Detached partitions of {table} ({action}): {', '.join(detached)}")
+
+        return detached
+
+    def maintain(
+        self,
+        months_ahead: int = 3,
+        retention_months: Optional[int] = None,
+        archive_schema: Optional[str] = None,
+        now: Optional[datetime] = None
+    ) -> Dict[str, Dict[str, List[str]]]:
+        """
+        Create future partitions and retire old ones for all partitioned tables.
+
+        Each table's changes are committed together. Errors are logged and
+        rolled back per table, so one failing table does not stop the others.
+
+        Args:
+            months_ahead: Number of future months to create partitions for
+            retention_months: Optional number of past months to keep attached
+            archive_schema: Optional schema to move detached partitions to
+            now: Optional reference time (default: current UTC time)
+
+        Returns:
+            Dict[str, Dict[str, List[str]]]: Created and detached partitions per table
+        """
+        now = now or datetime.utcnow()
+        results = {}
+
+        for table in self.tables:
+            try:
+                created = self.ensure_partitions(table, months_ahead, now)
+                detached = []
+                if retention_months is not None:
+                    cutoff = add_months(month_start(now), -retention_months)
+                    detached = self.detach_partitions(table, cutoff, archive_schema)
+                self.db.commit()
+                results[table] = {"created": created, "detached": detached}
+            except Exception as e:
+                logger.error(f"Failed to maintain partitions for {table}: {str(e)}")
+                self.db.rollback()
+
+        return results
@@ -0,0 +1,132 @@
+"""
+Full-text search support for the MAGPIE platform.
+
+PostgreSQL searches generated tsvector columns on conversation titles and
+message content (GIN-indexed, see migration 005), with pg_trgm indexes for
+identifier-like terms such as part numbers. SQLite uses equivalent FTS5
+tables, so the same search paths can be exercised in tests.
+"""
+import logging
+import re
+from typing import Optional, Union
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Text search configuration of the tsvector columns
+TEXT_SEARCH_CONFIG = "english"
+
+# Terms with digits or joining punctuation (part numbers, ATA chapters) are
+# split apart by the text search parser, so they are matched by trigrams
+IDENTIFIER_TERM_PATTERN = re.compile(r"\d|\w[-/_.]\w")
+
+# Word tokens for building FTS5 queries
+FTS5_TOKEN_PATTERN = re.compile(r"\w+")
+
+# FTS5 tables shadowing conversation titles and message content, kept in sync by triggers
+SQLITE_SEARCH_SCHEMA = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS message_fts USING fts5("
+    "content, content='message', content_rowid='id')",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS conversation_fts USING fts5("
+    "title, content='conversation', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS message_fts_insert AFTER INSERT ON message BEGIN "
+    "INSERT INTO message_fts(rowid, content) VALUES (new.id, new.content); END",
+    "CREATE TRIGGER IF NOT EXISTS message_fts_delete AFTER DELETE ON message BEGIN "
+    "INSERT INTO message_fts(message_fts, rowid, content) VALUES ('delete', old.id, old.content); END",
+    "CREATE TRIGGER IF NOT EXISTS message_fts_update AFTER UPDATE OF content ON message BEGIN "
+    "INSERT INTO message_fts(message_fts, rowid, content) VALUES ('delete', old.id, old.content); "
+    "INSERT INTO message_fts(rowid, content) VALUES (new.id, new.content); END",
+    "CREATE TRIGGER IF NOT EXISTS conversation_fts_insert AFTER INSERT ON conversation BEGIN "
+    "INSERT INTO conversation_fts(rowid, title) VALUES (new.id, coalesce(new.title, '')); END",
+    "CREATE TRIGGER IF NOT EXISTS conversation_fts_delete AFTER DELETE ON conversation BEGIN "
+    "INSERT INTO conversation_fts(conversation_fts, rowid, title) "
+    "VALUES ('delete', old.id, coalesce(old.title, '')); END",
+    "CREATE TRIGGER IF NOT EXISTS conversation_fts_update AFTER UPDATE OF title ON conversation BEGIN "
+    "INSERT INTO conversation_fts(conversation_fts, rowid, title) "
+    "VALUES ('delete', old.id, coalesce(old.title, '')); "
+    "INSERT INTO conversation_fts(rowid, title) VALUES (new.id, coalesce(new.title, '')); END",
+]
+
+
+def is_identifier_term(search_term: str) -> bool:
+    """
+    Check whether a search term looks like an identifier rather than words.
+
+    Args:
+        search_term: Search term
+
+    Returns:
+        bool: True if the term should be matched by trigrams
+    """
+    return bool(IDENTIFIER_TERM_PATTERN.search(search_term))
+
+
+def to_fts5_query(search_term: str) -> Optional[str]:
+    """
+    Build an FTS5 query matching all words of a search term.
+
+    Each word is quoted, so user input cannot inject FTS5 operators, and the
+    last word matches as a prefix to support search-as-you-type.
+
+    Args:
+        search_term: Search term
+
+    Returns:
+        Optional[str]: FTS5 query, or None if the term has no words
+    """
+    tokens = FTS5_TOKEN_PATTERN.findall(search_term.lower())
+    if not tokens:
+        return None
+
+    quoted = [f'"{token}"' for token in tokens]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def create_sqlite_search_index(bind: Union[Engine, Connection]) -> None:
+    """
+    Create the SQLite FTS5 search tables and sync triggers.
+
+    Existing rows are indexed, and the call is a no-op if the tables exist.
+
+    Args:
+        bind: SQLite engine or connection with the conversation and message tables
+    """
+    def create(connection: Connection) -> None:
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE name = 'message_fts'")
+        ).scalar()
+        for statement in SQLITE_SEARCH_SCHEMA:
+            connection.execute(text(statement))
+        if not exists:
+            connection.execute(text("INSERT INTO message_fts(message_fts) VALUES ('rebuild')"))
+            connection.execute(text("INSERT INTO conversation_fts(conversation_fts) VALUES ('rebuild')"))
+
+    if isinstance(bind, Connection):
+        create(bind)
+    else:
+        with bind.begin() as connection:
+            create(connection)
+
+
+def has_sqlite_search_index(session: Session) -> bool:
+    """
+    Check whether the SQLite FTS5 search tables exist.
+
+    Args:
+        session: Database session
+
+    Returns:
+        bool: True if the search tables exist
+    """
+    try:
+        return bool(session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE name = 'message_fts'")
+        ).scalar())
+    except Exception as e:
+        logger.debug(f"Failed to check for SQLite search index: {str(e)}")
+        return False
@@ -0,0 +1,291 @@
+"""
+Log rotation for the MAGPIE platform.
+
+This module provides the rotation condition for the application log sink,
+streaming gzip compression of closed log segments, and a background worker
+that runs compression and retention passes off the request path.
+"""
+
+import gzip
+import os
+import queue
+import shutil
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+
+from loguru import logger
+
+
+# Configure logger
+logger = logger.bind(name=__name__)
+
+# Size of the chunks streamed through the compressor
+COMPRESSION_CHUNK_SIZE = 1024 * 1024
+
+
+class SegmentRotation:
+    """
+    Loguru rotation condition that starts a new segment at midnight or when
+    the current segment would exceed max_bytes.
+    """
+
+    def __init__(self, max_bytes: int = 100 * 1024 * 1024):
+        """
+        Initialize the rotation condition.
+
+        Args:
+            max_bytes: Maximum size of a segment in bytes, 0 for no limit
+        """
+        self.max_bytes = max_bytes
+        self._next_rotation: Optional[datetime] = None
+
+    def __call__(self, message: Any, file: Any) -> bool:
+        """
+        Check whether the segment must be rotated before writing a message.
+
+        Args:
+            message: Formatted message with its record
+            file: Current segment
+
+        Returns:
+            bool: True if a new segment must be started
+        """
+        record_time = message.record["time"]
+        if self._next_rotation is None:
+            self._next_rotation = self._get_next_midnight(record_time)
+
+        if record_time >= self._next_rotation or (
+            self.max_bytes and file.tell() + len(message) > self.max_bytes
+        ):
+            self._next_rotation = self._get_next_midnight(record_time)
+            return True
+        return False
+
+    @staticmethod
+    def _get_next_midnight(now: datetime) -> datetime:
+        """
+        Get the midnight following a time, in the same time zone.
+
+        Args:
+            now: Time
+
+        Returns:
+            datetime: Next midnight
+        """
+        return (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def compress_log_file(path: Union[str, Path], destination: Optional[Path] = None) -> Optional[Path]:
+    """
+    Compress a log file with gzip and remove the original.
+
+    The file is streamed in chunks, so memory use does not depend on its size.
+    The compressed file keeps the original's modification time, so age-based
+    retention is unaffected.
+
+    Args:
+        path: Log file to compress
+        destination: Path of the compressed file (default: the path with a .gz suffix)
+
+    Returns:
+        Optional[Path]: Path of the compressed file, or None if the file no longer exists
+    """
+    path = Path(path)
+    destination = destination or path.with_name(path.name + ".gz")
+    temp_path = destination.with_name(destination.name + ".tmp")
+
+    try:
+        stat = path.stat()
+        with open(path, "rb") as source, gzip.open(temp_path, "wb", compresslevel=6) as target:
+            shutil.copyfileobj(source, target, COMPRESSION_CHUNK_SIZE)
+    except FileNotFoundError:
+        # Already compressed or removed by another pass
+        temp_path.unlink(missing_ok=True)
+        return None
+
+    os.utime(temp_path, (stat.st_atime, stat.st_mtime))
+    os.replace(temp_path, destination)
+    path.unlink()
+    return destination
+
+
+class LogRotationWorker:
+    """
+    Background worker for log file maintenance.
+
+    Closed segments are queued for compression as loguru rotates them, and a
+    periodic task, such as the retention pass of the log manager, runs every
+    interval seconds. All filesystem work happens on the worker thread, so
+    neither logging calls nor application startup and shutdown wait for it.
+    """
+
+    def __init__(self, max_queue_size: int = 1000):
+        """
+        Initialize the worker.
+
+        Args:
+            max_queue_size: Maximum number of queued tasks
+        """
+        self._queue: "queue.Queue[Callable[[], Any]]" = queue.Queue(maxsize=max_queue_size)
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+        self._periodic_task: Optional[Callable[[], Any]] = None
+        self._interval = 3600.0
+        self._next_run = 0.0
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the worker thread is running."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """
+        Start the worker thread.
+        """
+        with self._lock:
+            if self.is_running:
+                return
+
+            self._stop_event.clear()
+            self._thread = threading.Thread(
+                target=self._run,
+                name="log-rotation",
+                daemon=True,
+            )
+            self._thread.start()
+            logger.info("Log rotation worker started")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Stop the worker thread after finishing the current task.
+
+        Queued compressions that are not started are picked up by the next
+        retention pass. If the worker does not finish within the timeout, its
+        handle is kept, so no second worker runs a pass at the same time.
+
+        Args:
+            timeout: Maximum time to wait for the worker in seconds
+        """
+        with self._lock:
+            if not self.is_running:
+                return
+
+            self._stop_event.set()
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                logger.warning(f"Log rotation worker did not stop within {timeout}s")
+                return
+
+            logger.info("Log rotation worker stopped")
+            self._thread = None
+
+    def schedule(self, task: Callable[[], Any], interval: float) -> None:
+        """
+        Run a task now and then every interval seconds.
+
+        Args:
+            task: Task to run
+            interval: Seconds between runs
+        """
+        self._periodic_task = task
+        self._interval = interval
+        self._next_run = time.monotonic()
+        self.start()
+
+    def submit(self, task: Callable[[], Any]) -> bool:
+        """
+        Queue a task to run once.
+
+        Starts the worker thread on first use.
+
+        Args:
+            task: Task to run
+
+        Returns:
+            bool: True if the task was queued, False if the queue is full
+        """
+        if not self.is_running:
+            self.start()
+
+        try:
+            self._queue.put_nowait(task)
+            return True
+        except queue.Full:
+            logger.warning("Log rotation queue full, task dropped")
+            return False
+
+    def run_once(self, task: Callable[[], Any]) -> "Future[Any]":
+        """
+        Queue a task to run once and get a future for its result.
+
+        The task runs between the periodic runs, never at the same time.
+
+        Args:
+            task: Task to run
+
+        Returns:
+            Future[Any]: Future set to the task's result or error, or to
+                queue.Full if the queue is full
+        """
+        future: "Future[Any]" = Future()
+
+        def run() -> None:
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(task())
+            except Exception as e:
+                future.set_exception(e)
+
+        if not self.submit(run):
+            future.set_exception(queue.Full())
+        return future
+
+    def compress(self, path: Union[str, Path]) -> None:
+        """
+        Queue a closed log segment for compression. Used as the loguru
+        compression callable, so rotation never waits for compression.
+
+        Args:
+            path: Closed log segment
+        """
+        self.submit(lambda: compress_log_file(path))
+
+    def _run(self) -> None:
+        """
+        Worker loop: run queued tasks and the periodic task until stopped.
+        """
+        while not self._stop_event.is_set():
+            if self._periodic_task is not None and time.monotonic() >= self._next_run:
+                self._next_run = time.monotonic() + self._interval
+                self._run_task(self._periodic_task)
+                continue
+
+            try:
+                task = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            self._run_task(task)
+
+    @staticmethod
+    def _run_task(task: Callable[[], Any]) -> None:
+        """
+        Run a task, logging any error.
+
+        Args:
+            task: Task to run
+        """
+        try:
+            task()
+        except Exception as e:
+            logger.error(f"Log rotation task failed: {e}")
+
+
+# Create a global log rotation worker
+log_rotation_worker = LogRotationWorker()
@@ -17,6 +17,7 @@ from typing import Dict, Optional, Any
 from loguru import logger
 
 from app.core.config import settings, EnvironmentType
+from app.core.log_rotation import SegmentRotation, log_rotation_worker
 
 
 # Define log levels
@@ -176,9 +177,10 @@ def setup_logging(
             log_directory / f"{settings.PROJECT_NAME.lower()}_{{time:YYYY-MM-DD}}.log",
             format="{message}",
             level=file_log_level,
-            rotation="00:00",  # Rotate at midnight
-            retention="30 days",  # Keep logs for 30 days
-            compression="zip",  # Compress rotated logs
+            # Rotate at midnight or when a segment reaches its maximum size
+            rotation=SegmentRotation(settings.LOG_SEGMENT_MAX_MB * 1024 * 1024),
+            # Compress closed segments in the background; the log manager applies retention
+            compression=log_rotation_worker.compress,
             serialize=True,  # Use JSON format
             backtrace=True,
             diagnose=False,  # Disable diagnose for file logs to avoid sensitive data
@@ -0,0 +1,303 @@
+"""
+Compiled text matchers for the MAGPIE platform.
+
+This module provides matchers that scan text once for many keywords or
+patterns, instead of running one regex search per keyword. They are shared
+by request classification, routing, context tagging and safety precaution
+extraction.
+"""
+import re
+from collections import Counter, deque
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+# Word tokens used for keyword extraction
+WORD_PATTERN = re.compile(r'\b\w+\b')
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase word tokens.
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        List[str]: Word tokens
+    """
+    return WORD_PATTERN.findall(text.lower())
+
+
+class KeywordMatcher:
+    """
+    Match literal keywords and phrases for many labels in a single pass.
+
+    All keywords are compiled into one word-bounded alternation inside a
+    lookahead, so overlapping keywords are all found. Where several keywords
+    start at the same position ("air" and "air conditioning"), the longest
+    is matched and the shorter ones are credited from a precomputed table.
+    """
+
+    def __init__(self, keywords: Mapping[str, Iterable[str]], ignore_case: bool = True):
+        """
+        Initialize the matcher.
+
+        Args:
+            keywords: Mapping of label to the keywords that indicate it
+            ignore_case: Whether matching is case-insensitive
+        """
+        self.ignore_case = ignore_case
+        self.labels = list(keywords)
+        self._keyword_labels: Dict[str, List[str]] = {}
+
+        for label, label_keywords in keywords.items():
+            for keyword in label_keywords:
+                labels = self._keyword_labels.setdefault(self._normalize(keyword), [])
+                if label not in labels:
+                    labels.append(label)
+
+        # Keywords found when a given keyword matches: itself and its word prefixes
+        self._keyword_hits: Dict[str, List[str]] = {
+            keyword: [
+                other for other in self._keyword_labels
+                if other == keyword or re.match(rf'{re.escape(other)}\b', keyword)
+            ]
+            for keyword in self._keyword_labels
+        }
+
+        alternation = "|".join(
+            re.escape(keyword)
+            for keyword in sorted(self._keyword_labels, key=len, reverse=True)
+        )
+        flags = re.IGNORECASE if ignore_case else 0
+        self._pattern = re.compile(rf'(?=\b({alternation})\b)', flags) if alternation else None
+
+    def _normalize(self, keyword: str) -> str:
+        """Normalize a keyword or matched text for label lookup."""
+        return keyword.lower() if self.ignore_case else keyword
+
+    def count(self, text: str, distinct: bool = False) -> Counter:
+        """
+        Count keyword matches per label.
+
+        Args:
+            text: Text to scan
+            distinct: Count each keyword once, however often it occurs
+
+        Returns:
+            Counter: Number of keyword matches for each matched label
+        """
+        counts: Counter = Counter()
+        if not self._pattern or not text:
+            return counts
+
+        seen: Set[str] = set()
+        for match in self._pattern.finditer(text):
+            for keyword in self._keyword_hits[self._normalize(match.group(1))]:
+                if distinct:
+                    if keyword in seen:
+                        continue
+                    seen.add(keyword)
+                for label in self._keyword_labels[keyword]:
+                    counts[label] += 1
+
+        return counts
+
+    def find_labels(self, text: str) -> Set[str]:
+        """
+        Get the labels with at least one keyword in the text.
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            Set[str]: Matched labels
+        """
+        return set(self.count(text, distinct=True))
+
+    def first_label(self, text: str) -> Optional[str]:
+        """
+        Get the first matched label in declaration order.
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            Optional[str]: First matched label, or None if nothing matched
+        """
+        found = self.find_labels(text)
+        return next((label for label in self.labels if label in found), None)
+
+
+class PatternMatcher:
+    """
+    Find the highest-priority matching pattern in a single pass.
+
+    Each pattern becomes a named group inside a lookahead, so matches never
+    consume text and every pattern is tried at every position. This gives the
+    same result as running re.search for each pattern in order and keeping
+    the first one that matches.
+    """
+
+    def __init__(self, patterns: Mapping[str, Iterable[str]], flags: int = 0):
+        """
+        Initialize the matcher.
+
+        Args:
+            patterns: Mapping of label to regular expressions, in priority order
+            flags: Regular expression flags applied to all patterns
+        """
+        self.labels = list(patterns)
+        self._group_labels: List[str] = []
+        groups = []
+
+        for label, label_patterns in patterns.items():
+            for pattern in label_patterns:
+                groups.append(f"(?P<p{len(self._group_labels)}>{pattern})")
+                self._group_labels.append(label)
+
+        self._pattern = re.compile(f"(?=(?:{'|'.join(groups)}))", flags) if groups else None
+
+    def first_match(self, text: str) -> Optional[Tuple[str, str]]:
+        """
+        Get the first pattern, in priority order, that matches the text.
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            Optional[Tuple[str, str]]: Label and leftmost matched text of the
+                highest-priority matching pattern, or None if nothing matched
+        """
+        if not self._pattern or not text:
+            return None
+
+        best_index = None
+        best_text = None
+
+        # At each position the earliest matching pattern is reported, so the
+        # first report of the highest-priority pattern is its leftmost match
+        for match in self._pattern.finditer(text):
+            index = int(match.lastgroup[1:])
+            if best_index is None or index < best_index:
+                best_index = index
+                best_text = match.group(match.lastgroup)
+                if best_index == 0:
+                    break
+
+        if best_index is None:
+            return None
+
+        return self._group_labels[best_index], best_text
+
+    def first_label(self, text: str) -> Optional[str]:
+        """
+        Get the label of the highest-priority matching pattern.
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            Optional[str]: Matched label, or None if nothing matched
+        """
+        match = self.first_match(text)
+        return match[0] if match else None
+
+
+class SubstringMatcher:
+    """
+    Find every label with a phrase occurring anywhere in the text.
+
+    Phrases are compiled into an Aho-Corasick automaton, so a scan visits
+    each character of the text once, however many phrases there are. Unlike
+    KeywordMatcher, phrases match as plain substrings without word bounds.
+    """
+
+    def __init__(self, phrases: Mapping[str, Iterable[str]], ignore_case: bool = True):
+        """
+        Initialize the matcher.
+
+        Args:
+            phrases: Mapping of label to the phrases that indicate it
+            ignore_case: Whether matching is case-insensitive
+        """
+        self.ignore_case = ignore_case
+        self.labels = list(phrases)
+
+        # Trie of phrase characters, with the labels of phrases ending at each node
+        self._goto: List[Dict[str, int]] = [{}]
+        self._outputs: List[Set[str]] = [set()]
+
+        for label, label_phrases in phrases.items():
+            for phrase in label_phrases:
+                if not phrase:
+                    continue
+                node = 0
+                for char in self._normalize(phrase):
+                    next_node = self._goto[node].get(char)
+                    if next_node is None:
+                        next_node = len(self._goto)
+                        self._goto[node][char] = next_node
+                        self._goto.append({})
+                        self._outputs.append(set())
+                    node = next_node
+                self._outputs[node].add(label)
+
+        # Failure links point to the longest proper suffix that is also in the
+        # trie; outputs of suffixes are merged in breadth-first order
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._outputs[child] |= self._outputs[self._fail[child]]
+                queue.append(child)
+
+    def _normalize(self, text: str) -> str:
+        """Normalize a phrase or scanned text for matching."""
+        return text.lower() if self.ignore_case else text
+
+    def find_labels(self, text: str) -> Set[str]:
+        """
+        Get the labels with at least one phrase in the text.
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            Set[str]: Matched labels
+        """
+        found: Set[str] = set()
+        if len(self._goto) == 1 or not text:
+            return found
+
+        goto = self._goto
+        fail = self._fail
+        outputs = self._outputs
+        node = 0
+        for char in self._normalize(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if outputs[node]:
+                found |= outputs[node]
+
+        return found
+
+    def find_all(self, texts: Iterable[str]) -> List[str]:
+        """
+        Get the labels with at least one phrase in any of the texts.
+
+        Args:
+            texts: Texts to scan
+
+        Returns:
+            List[str]: Matched labels in declaration order
+        """
+        found: Set[str] = set()
+        for text in texts:
+            found |= self.find_labels(text)
+        return [label for label in self.labels if label in found]
@@ -7,10 +7,12 @@ This package contains middleware components for the MAGPIE platform.
 from app.core.middleware.logging_middleware import LoggingMiddleware, RequestIdMiddleware
 from app.core.middleware.error_middleware import ErrorHandlingMiddleware
 from app.core.middleware.profiling_middleware import ProfilingMiddleware
+from app.core.middleware.instrumentation_middleware import InstrumentationMiddleware
 
 __all__ = [
     "LoggingMiddleware",
     "RequestIdMiddleware",
     "ErrorHandlingMiddleware",
     "ProfilingMiddleware",
+    "InstrumentationMiddleware",
 ]
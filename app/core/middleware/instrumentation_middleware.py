@@ -0,0 +1,268 @@
+"""
+Instrumentation middleware for the MAGPIE platform.
+
+This module provides a single pure ASGI middleware that assigns request IDs,
+times requests, records request metrics, maps unhandled exceptions to error
+responses, applies rate limits and runs audit hooks.
+"""
+
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Sequence
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from loguru import logger
+from starlette.datastructures import MutableHeaders
+from starlette.status import HTTP_500_INTERNAL_SERVER_ERROR
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.monitoring import (
+    ErrorCategory,
+    ErrorSeverity,
+    PerformanceCategory,
+    PerformanceMetric,
+    record_metrics,
+    track_error,
+)
+from app.core.security.rate_limit import RateLimiter, rate_limit_exceeded_response
+
+# Audit hooks are called with the request and the response status code
+AuditHook = Callable[[Request, int], None]
+
+
+class InstrumentationMiddleware:
+    """
+    Middleware for instrumenting HTTP requests in a single pass.
+
+    This middleware replaces a stack of BaseHTTPMiddleware classes. It only
+    wraps the ASGI send callable to observe the response status and add
+    headers, so bodies are never buffered and streaming responses pass
+    straight through. Request metrics are collected during the request and
+    written to Redis in one round trip when it finishes.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        rate_limiter: Optional[RateLimiter] = None,
+        audit_hooks: Optional[Sequence[AuditHook]] = None,
+        metrics_enabled: bool = True,
+        slow_request_threshold_ms: float = 500,
+    ) -> None:
+        """
+        Initialize the middleware.
+
+        Args:
+            app: ASGI application
+            rate_limiter: Rate limiter to apply, or None to disable rate limiting
+            audit_hooks: Callables run after each request for audit logging
+            metrics_enabled: Whether request metrics are recorded
+            slow_request_threshold_ms: Duration above which requests are logged as slow
+        """
+        self.app = app
+        self.rate_limiter = rate_limiter
+        self.audit_hooks: List[AuditHook] = list(audit_hooks or [])
+        self.metrics_enabled = metrics_enabled
+        self.slow_request_threshold_ms = slow_request_threshold_ms
+        self.logger = logger.bind(name=__name__)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.time()
+
+        # Reuse a request ID assigned upstream or generate a new one
+        state = scope.setdefault("state", {})
+        request_id = state.get("request_id") or str(uuid.uuid4())
+        state["request_id"] = request_id
+
+        # The request wraps the scope without reading the body
+        request = Request(scope)
+        method = scope["method"]
+        path = scope["path"]
+
+        # Apply rate limiting before the application sees the request
+        allowed = True
+        extra_headers: Dict[str, str] = {}
+        if self.rate_limiter is not None:
+            allowed, extra_headers = await self.rate_limiter.check(request)
+
+        status_code = HTTP_500_INTERNAL_SERVER_ERROR
+        response_started = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+                status_code = message["status"]
+
+                # Add headers without touching the body
+                headers = MutableHeaders(scope=message)
+                headers["X-Request-ID"] = request_id
+                headers["X-Process-Time"] = str(time.time() - start_time)
+                for key, value in extra_headers.items():
+                    headers[key] = value
+            await send(message)
+
+        error: Optional[Exception] = None
+        try:
+            if allowed:
+                await self.app(scope, receive, send_wrapper)
+            else:
+                await rate_limit_exceeded_response()(scope, receive, send_wrapper)
+        except Exception as e:
+            error = e
+
+            # The status line has been sent, so the error cannot be mapped to a response
+            if response_started:
+                self._log_error(request, request_id, e, None)
+                raise
+
+            await self._error_response(request, request_id, e)(scope, receive, send_wrapper)
+        finally:
+            duration_ms = (time.time() - start_time) * 1000
+            self._record_metrics(method, path, status_code, duration_ms, error)
+            self._run_audit_hooks(request, status_code)
+
+            if duration_ms > self.slow_request_threshold_ms:
+                self.logger.bind(request_id=request_id, duration_ms=duration_ms).warning(
+                    f"Slow request: {method} {path} took {duration_ms:.2f}ms "
+                    f"(threshold: {self.slow_request_threshold_ms}ms)"
+                )
+
+            self.logger.bind(
+                request_id=request_id,
+                status_code=status_code,
+                processing_time_ms=duration_ms,
+            ).info(f"Request completed: {method} {path} - Status: {status_code}")
+
+    def _error_response(self, request: Request, request_id: str, error: Exception) -> JSONResponse:
+        """
+        Track an unhandled exception and build the error response.
+
+        Args:
+            request: HTTP request
+            request_id: Request ID
+            error: Unhandled exception
+
+        Returns:
+            JSONResponse: Internal server error response
+        """
+        # Get user ID from state if available
+        user_id = None
+        if hasattr(request.state, "user"):
+            user_id = getattr(request.state.user, "id", None)
+
+        error_event = track_error(
+            message=str(error),
+            exception=error,
+            severity=ErrorSeverity.ERROR,
+            category=ErrorCategory.API,
+            component="api",
+            user_id=user_id,
+            request_id=request_id,
+            context={
+                "path": request.url.path,
+                "method": request.method,
+                "client": request.client.host if request.client else "unknown",
+                "headers": dict(request.headers),
+            },
+            alert=True,
+        )
+
+        self._log_error(request, request_id, error, error_event.id if error_event else None)
+
+        # Create error response
+        error_detail = {
+            "detail": "Internal server error",
+            "request_id": request_id,
+        }
+        if error_event:
+            error_detail["error_id"] = error_event.id
+
+        return JSONResponse(status_code=HTTP_500_INTERNAL_SERVER_ERROR, content=error_detail)
+
+    def _log_error(
+        self, request: Request, request_id: str, error: Exception, error_id: Optional[str]
+    ) -> None:
+        """
+        Log an unhandled exception.
+
+        Args:
+            request: HTTP request
+            request_id: Request ID
+            error: Unhandled exception
+            error_id: ID of the tracked error, if any
+        """
+        self.logger.bind(
+            error_id=error_id,
+            request_id=request_id,
+            path=request.url.path,
+            method=request.method,
+            exception_type=type(error).__name__,
+        ).exception(f"Unhandled exception: {error}")
+
+    def _record_metrics(
+        self,
+        method: str,
+        path: str,
+        status_code: int,
+        duration_ms: float,
+        error: Optional[Exception],
+    ) -> None:
+        """
+        Record request, response, error and duration metrics in one batch.
+
+        Args:
+            method: HTTP method
+            path: Request path
+            status_code: Response status code
+            duration_ms: Request duration in milliseconds
+            error: Unhandled exception, if any
+        """
+        if not self.metrics_enabled:
+            return
+
+        request_tags = {"method": method, "path": path}
+        response_tags = {**request_tags, "status": str(status_code)}
+
+        metrics = [
+            PerformanceMetric(name="http_requests_total", value=1, unit="count", tags=request_tags),
+            PerformanceMetric(name="http_responses_total", value=1, unit="count", tags=response_tags),
+            # Tagged as an API operation so it also feeds the performance summary
+            PerformanceMetric(
+                name="http_request_duration_milliseconds",
+                value=duration_ms,
+                unit="ms",
+                tags={**response_tags, "category": PerformanceCategory.API},
+            ),
+        ]
+        if error is not None:
+            metrics.append(PerformanceMetric(
+                name="http_errors_total",
+                value=1,
+                unit="count",
+                tags={**request_tags, "error": type(error).__name__},
+            ))
+
+        try:
+            record_metrics(metrics)
+        except Exception as e:
+            self.logger.error(f"Error recording request metrics: {e}")
+
+    def _run_audit_hooks(self, request: Request, status_code: int) -> None:
+        """
+        Run the audit hooks for a completed request.
+
+        Args:
+            request: HTTP request
+            status_code: Response status code
+        """
+        for hook in self.audit_hooks:
+            try:
+                hook(request, status_code)
+            except Exception as e:
+                self.logger.error(f"Error running audit hook: {e}")
@@ -1,21 +1,20 @@
 """
 Logging middleware for the MAGPIE platform.
 
-This module provides middleware for logging HTTP requests and responses
-and collecting performance metrics.
+This module provides middleware for assigning request IDs and for logging
+sampled, size-capped request and response bodies.
 """
 
 import json
-import time
+import random
 import uuid
-from typing import Callable, Dict, Any, Optional, List, Set
+from typing import Dict, Any, Optional, Set
 
-from fastapi import Request, Response
 from loguru import logger
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp, Receive, Scope, Send
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from app.core.monitoring.metrics import record_timing, record_count
+from app.core.logging import LOG_LEVEL
 
 
 class RequestIdMiddleware:
@@ -45,13 +44,54 @@ class RequestIdMiddleware:
         await self.app(scope, receive, send)
 
 
-class LoggingMiddleware(BaseHTTPMiddleware):
+class BodyBuffer:
     """
-    Middleware for logging HTTP requests and responses.
+    Bounded buffer holding the start of a request or response body.
 
-    This middleware logs information about incoming requests and outgoing
-    responses, including timing information, status codes, and other metadata.
-    It also collects performance metrics for analysis.
+    Chunks are copied only up to the size limit; the total size is still
+    counted so oversized bodies can be reported without being kept.
+    """
+
+    def __init__(self, max_size: int):
+        """
+        Initialize the buffer.
+
+        Args:
+            max_size: Maximum number of bytes to keep
+        """
+        self.max_size = max_size
+        self.data = bytearray()
+        self.size = 0
+
+    def append(self, chunk: bytes) -> None:
+        """
+        Add a chunk of the body.
+
+        Args:
+            chunk: Body chunk
+        """
+        self.size += len(chunk)
+        remaining = self.max_size - len(self.data)
+        if remaining > 0:
+            self.data += chunk[:remaining]
+
+    @property
+    def truncated(self) -> bool:
+        """Whether the body was larger than the buffer."""
+        return self.size > self.max_size
+
+
+class LoggingMiddleware:
+    """
+    Middleware for logging HTTP request and response bodies.
+
+    Request timing, metrics and completion logs are handled by the
+    instrumentation middleware. This middleware only adds body logging for a
+    sample of requests. It tees the ASGI receive and send streams into
+    bounded buffers instead of reading the body up front, so requests are
+    never delayed or buffered. Bodies are parsed and masked lazily, only
+    when the log record is actually emitted. Only JSON bodies are captured;
+    streaming responses and websockets are skipped entirely.
     """
 
     # Fields that may contain sensitive information and should be masked in logs
@@ -63,16 +103,36 @@ class LoggingMiddleware(BaseHTTPMiddleware):
     # Maximum content length to log (to avoid huge logs)
     MAX_CONTENT_LENGTH: int = 10000
 
-    def __init__(self, app: ASGIApp):
+    def __init__(
+        self,
+        app: ASGIApp,
+        sample_rate: float = 1.0,
+        max_body_size: Optional[int] = None,
+        log_level: str = "DEBUG",
+        min_log_level: str = LOG_LEVEL,
+    ):
         """
         Initialize the middleware.
 
         Args:
             app: ASGI application
+            sample_rate: Share of requests whose bodies are captured (0 to 1)
+            max_body_size: Maximum body size to log in bytes
+            log_level: Level of the body log records
+            min_log_level: Lowest level the application logs; bodies are
+                not captured at all if log_level is below it
         """
-        super().__init__(app)
+        self.app = app
+        self.sample_rate = sample_rate
+        self.max_body_size = max_body_size or self.MAX_CONTENT_LENGTH
+        self.log_level = log_level
         self.logger = logger.bind(name=__name__)
 
+        # Skip capture entirely if body records would always be discarded
+        self.capture_enabled = (
+            sample_rate > 0 and logger.level(log_level).no >= logger.level(min_log_level).no
+        )
+
     def _mask_sensitive_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Mask sensitive data in request/response bodies.
@@ -105,190 +165,87 @@ class LoggingMiddleware(BaseHTTPMiddleware):
 
         return masked_data
 
-    async def _get_request_body(self, request: Request) -> Optional[Dict[str, Any]]:
+    def _format_body(self, buffer: Optional[BodyBuffer]) -> Optional[Dict[str, Any]]:
         """
-        Get the request body safely.
+        Parse and mask a captured body.
 
         Args:
-            request: FastAPI request
+            buffer: Captured body, or None if it was not captured
 
         Returns:
-            Optional[Dict[str, Any]]: Request body as a dictionary, or None if not available
+            Optional[Dict[str, Any]]: Masked body, a message describing why it
+                cannot be logged, or None if there is no body
         """
-        try:
-            # Check content type
-            content_type = request.headers.get("content-type", "").lower()
-
-            # Only process JSON content
-            if "application/json" in content_type:
-                # Get request body
-                body = await request.body()
-
-                # Skip if body is too large
-                if len(body) > self.MAX_CONTENT_LENGTH:
-                    return {"message": f"Body too large ({len(body)} bytes)"}
-
-                # Parse JSON body
-                if body:
-                    try:
-                        body_dict = json.loads(body)
-                        # Mask sensitive data
-                        return self._mask_sensitive_data(body_dict)
-                    except json.JSONDecodeError:
-                        return {"message": "Invalid JSON body"}
-
-            return None
-        except Exception as e:
-            self.logger.warning(f"Failed to get request body: {e}")
+        if buffer is None or not buffer.size:
             return None
 
-    async def _get_response_body(self, response: Response) -> Optional[Dict[str, Any]]:
+        # Skip if body is too large
+        if buffer.truncated:
+            return {"message": f"Body too large ({buffer.size} bytes)"}
+
+        try:
+            return self._mask_sensitive_data(json.loads(bytes(buffer.data)))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return {"message": "Invalid JSON body"}
+
+    @staticmethod
+    def _is_json(headers: Headers) -> bool:
         """
-        Get the response body safely.
+        Check whether a message carries a JSON body.
 
         Args:
-            response: FastAPI response
+            headers: Request or response headers
 
         Returns:
-            Optional[Dict[str, Any]]: Response body as a dictionary, or None if not available
+            bool: True if the content type is JSON
         """
-        try:
-            # Check content type
-            content_type = response.headers.get("content-type", "").lower()
-
-            # Only process JSON content
-            if "application/json" in content_type:
-                # Get response body
-                body = response.body
-
-                # Skip if body is too large
-                if len(body) > self.MAX_CONTENT_LENGTH:
-                    return {"message": f"Body too large ({len(body)} bytes)"}
-
-                # Parse JSON body
-                if body:
-                    try:
-                        body_dict = json.loads(body)
-                        # Mask sensitive data
-                        return self._mask_sensitive_data(body_dict)
-                    except json.JSONDecodeError:
-                        return {"message": "Invalid JSON body"}
+        return "application/json" in headers.get("content-type", "").lower()
 
-            return None
-        except Exception as e:
-            self.logger.warning(f"Failed to get response body: {e}")
-            return None
-
-    async def dispatch(
-        self, request: Request, call_next: Callable
-    ) -> Response:
-        # Get request ID from state or generate a new one
-        request_id = getattr(request.state, "request_id", str(uuid.uuid4()))
-
-        # Create a logger with request context
-        request_logger = logger.bind(
-            request_id=request_id,
-            method=request.method,
-            path=request.url.path,
-            client=request.client.host if request.client else "unknown",
-        )
-
-        # Log request
-        request_logger.info(f"Request started: {request.method} {request.url.path}")
-
-        # Process request and measure timing
-        start_time = time.time()
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or not self.capture_enabled
+            or random.random() >= self.sample_rate
+        ):
+            await self.app(scope, receive, send)
+            return
 
-        # Record request count metric
-        record_count(
-            name="http_requests_total",
-            tags={
-                "method": request.method,
-                "path": request.url.path,
-            }
-        )
+        request_buffer = BodyBuffer(self.max_body_size) if self._is_json(Headers(scope=scope)) else None
+        response_buffer: Optional[BodyBuffer] = None
+
+        async def receive_wrapper() -> Message:
+            message = await receive()
+            if request_buffer is not None and message["type"] == "http.request":
+                request_buffer.append(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_buffer
+            if message["type"] == "http.response.start":
+                if self._is_json(Headers(raw=message.get("headers", []))):
+                    response_buffer = BodyBuffer(self.max_body_size)
+            elif message["type"] == "http.response.body" and response_buffer is not None:
+                if message.get("more_body", False):
+                    # Streaming responses are not captured
+                    response_buffer = None
+                else:
+                    response_buffer.append(message.get("body", b""))
+            await send(message)
 
         try:
-            # Get request body for logging if needed
-            request_body = await self._get_request_body(request)
-
-            # Process the request
-            response = await call_next(request)
-
-            # Calculate request processing time
-            process_time = time.time() - start_time
-            process_time_ms = process_time * 1000  # Convert to milliseconds
-
-            # Get response body for logging if needed
-            response_body = await self._get_response_body(response)
-
-            # Record timing metric
-            record_timing(
-                name="http_request_duration_milliseconds",
-                start_time=start_time,
-                tags={
-                    "method": request.method,
-                    "path": request.url.path,
-                    "status": str(response.status_code),
-                }
-            )
-
-            # Record status code metric
-            record_count(
-                name="http_responses_total",
-                tags={
-                    "method": request.method,
-                    "path": request.url.path,
-                    "status": str(response.status_code),
-                }
-            )
-
-            # Log response with additional context
-            log_context = {
-                "status_code": response.status_code,
-                "processing_time_ms": process_time_ms,
-                "content_length": len(response.body) if hasattr(response, "body") else 0,
-            }
-
-            # Add request/response bodies if available
-            if request_body:
-                log_context["request_body"] = request_body
-            if response_body:
-                log_context["response_body"] = response_body
-
-            # Log response
-            request_logger.bind(**log_context).info(
-                f"Request completed: {request.method} {request.url.path} - "
-                f"Status: {response.status_code} - Time: {process_time:.4f}s"
-            )
-
-            # Add custom headers
-            response.headers["X-Process-Time"] = str(process_time)
-            response.headers["X-Request-ID"] = request_id
-
-            return response
-
-        except Exception as e:
-            # Calculate request processing time
-            process_time = time.time() - start_time
-            process_time_ms = process_time * 1000  # Convert to milliseconds
-
-            # Record error metric
-            record_count(
-                name="http_errors_total",
-                tags={
-                    "method": request.method,
-                    "path": request.url.path,
-                    "error": type(e).__name__,
-                }
-            )
-
-            # Log exception with additional context
-            request_logger.bind(
-                processing_time_ms=process_time_ms,
-                exception_type=type(e).__name__,
-                exception_message=str(e),
-            ).exception(f"Request failed: {request.method} {request.url.path}")
-
-            # Re-raise the exception
-            raise
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            if (request_buffer is not None and request_buffer.size) or response_buffer is not None:
+                # Bodies are only parsed and masked if the record is emitted
+                self.logger.bind(
+                    request_id=scope.get("state", {}).get("request_id"),
+                    method=scope["method"],
+                    path=scope["path"],
+                ).opt(lazy=True).log(
+                    self.log_level,
+                    "Request bodies: {} {} - Request: {} - Response: {}",
+                    lambda: scope["method"],
+                    lambda: scope["path"],
+                    lambda: self._format_body(request_buffer),
+                    lambda: self._format_body(response_buffer),
+                )
@@ -5,10 +5,10 @@ This module provides functionality for adaptively selecting models
 based on historical performance data and learning from past selections.
 """
 import logging
-import random
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Set, Tuple
 
+from app.core.model_selection.live_stats import LiveModelStats, get_live_model_stats
 from app.core.model_selection.performance import PerformanceTracker
 from app.core.model_selection.registry import get_model_registry
 from app.models.agent import ModelSize
@@ -25,19 +25,31 @@ class AdaptiveSelector:
     Adaptive selector for model selection.
     """
 
-    def __init__(self, performance_tracker: Optional[PerformanceTracker] = None):
+    def __init__(
+        self,
+        performance_tracker: Optional[PerformanceTracker] = None,
+        live_stats: Optional[LiveModelStats] = None
+    ):
         """
         Initialize adaptive selector.
 
         Args:
             performance_tracker: Performance tracker
+            live_stats: Live model statistics (default: the tracker's statistics)
         """
         self.performance_tracker = performance_tracker
         self.registry = get_model_registry()
+        self.live_stats = live_stats or (
+            performance_tracker.live_stats if performance_tracker else get_live_model_stats()
+        )
         
-        # Exploration rate (probability of trying a different model)
+        # Exploration rate (maximum share of selections that differ from the best known model)
         self.exploration_rate = 0.1
         
+        # Selection counters for bounding exploration
+        self._selection_count = 0
+        self._exploration_count = 0
+        
         # Learning rate (how quickly to adapt to new performance data)
         self.learning_rate = 0.2
         
@@ -52,6 +64,9 @@ class AdaptiveSelector:
         # Cache for model scores
         self._model_score_cache: Dict[str, Tuple[float, datetime]] = {}
         
+        # Cache for aggregated daily metrics, shared by all models
+        self._daily_metrics_cache: Optional[Tuple[Dict[PerformanceMetricType, Dict[str, float]], datetime]] = None
+        
         # Cache TTL (1 hour)
         self._cache_ttl = timedelta(hours=1)
 
@@ -62,11 +77,17 @@ class AdaptiveSelector:
         cost_sensitive: bool = False,
         performance_sensitive: bool = False,
         latency_sensitive: bool = False,
-        explore: bool = True
+        explore: bool = True,
+        latency_slo_ms: Optional[float] = None
     ) -> Optional[ModelInfo]:
         """
         Select a model adaptively based on historical performance.
 
+        Exploration uses Thompson sampling: each model's success rate is drawn
+        from its posterior, so uncertain models are occasionally tried. A
+        sampled choice that differs from the best known model is only taken
+        while explorations stay below exploration_rate of all selections.
+
         Args:
             complexity_level: Complexity level
             required_capabilities: Required capabilities
@@ -74,6 +95,7 @@ class AdaptiveSelector:
             performance_sensitive: Whether to prioritize performance
             latency_sensitive: Whether to prioritize latency
             explore: Whether to explore alternative models
+            latency_slo_ms: Optional latency SLO; models expected to miss it are skipped
 
         Returns:
             Optional[ModelInfo]: Selected model or None if no suitable model is found
@@ -88,11 +110,13 @@ class AdaptiveSelector:
             logger.warning(f"No candidate models found for complexity level: {complexity_level}")
             return None
             
-        # Check if we should explore
-        if explore and random.random() < self.exploration_rate:
-            # Randomly select a model for exploration
-            logger.info("Exploring alternative model for adaptive learning")
-            return random.choice(candidate_models)
+        # Skip models expected to miss the latency SLO, if any model meets it
+        if latency_slo_ms is not None:
+            within_slo = [
+                model for model in candidate_models
+                if self.live_stats.meets_latency_slo(model, latency_slo_ms)
+            ]
+            candidate_models = within_slo or candidate_models
             
         # Get model scores
         model_scores = self._get_model_scores(
@@ -108,6 +132,23 @@ class AdaptiveSelector:
             
         # Select the model with the highest score
         selected_model_id, _ = max(model_scores.items(), key=lambda x: x[1])
+        self._selection_count += 1
+        
+        # Explore with Thompson sampling, within the exploration budget
+        if explore and self._exploration_count < self.exploration_rate * self._selection_count:
+            sampled_scores = self._get_model_scores(
+                candidate_models,
+                cost_sensitive=cost_sensitive,
+                performance_sensitive=performance_sensitive,
+                latency_sensitive=latency_sensitive,
+                sample=True
+            )
+            sampled_model_id, _ = max(sampled_scores.items(), key=lambda x: x[1])
+            if sampled_model_id != selected_model_id:
+                logger.info("Exploring alternative model for adaptive learning")
+                self._exploration_count += 1
+                selected_model_id = sampled_model_id
+                
         selected_model = self.registry.get_model(selected_model_id)
         
         if selected_model:
@@ -125,6 +166,9 @@ class AdaptiveSelector:
         """
         Update model weights based on feedback.
 
+        Live statistics are not updated here: every request is already
+        observed once by PerformanceTracker.record_usage on the request path.
+
         Args:
             model_id: Model ID
             success: Whether the request was successful
@@ -206,21 +250,54 @@ class AdaptiveSelector:
             
         return models
 
+    def _get_daily_metrics(self, now: datetime) -> Dict[PerformanceMetricType, Dict[str, float]]:
+        """
+        Get aggregated daily metrics for all models, cached for the cache TTL.
+
+        Args:
+            now: Current time
+
+        Returns:
+            Dict[PerformanceMetricType, Dict[str, float]]: Metric values by model ID, per metric type
+        """
+        if self._daily_metrics_cache is not None:
+            daily_metrics, timestamp = self._daily_metrics_cache
+            if now - timestamp < self._cache_ttl:
+                return daily_metrics
+                
+        daily_metrics = {
+            metric_type: self.performance_tracker.get_comparative_performance("day", metric_type)
+            for metric_type in (
+                PerformanceMetricType.SUCCESS_RATE,
+                PerformanceMetricType.LATENCY,
+                PerformanceMetricType.QUALITY_SCORE,
+                PerformanceMetricType.COST
+            )
+        }
+        self._daily_metrics_cache = (daily_metrics, now)
+        return daily_metrics
+
     def _get_model_scores(
         self,
         models: List[ModelInfo],
         cost_sensitive: bool = False,
         performance_sensitive: bool = False,
-        latency_sensitive: bool = False
+        latency_sensitive: bool = False,
+        sample: bool = False
     ) -> Dict[str, float]:
         """
         Get scores for models based on historical performance.
 
+        Models with live statistics take their success rate and latency from
+        them; everything else comes from aggregated daily metrics, which are
+        cached for an hour, so scoring normally runs no database queries.
+
         Args:
             models: List of models
             cost_sensitive: Whether to prioritize cost
             performance_sensitive: Whether to prioritize performance
             latency_sensitive: Whether to prioritize latency
+            sample: Whether to sample success rates from their posterior (Thompson sampling)
 
         Returns:
             Dict[str, float]: Model IDs mapped to scores
@@ -230,29 +307,29 @@ class AdaptiveSelector:
         model_scores = {}
         
         for model in models:
+            stats = self.live_stats.get(model.id)
+            
             # Check if score is cached and not expired
-            if model.id in self._model_score_cache:
+            if not stats and not sample and model.id in self._model_score_cache:
                 score, timestamp = self._model_score_cache[model.id]
                 if now - timestamp < self._cache_ttl:
                     model_scores[model.id] = score
                     continue
             
-            # Get performance metrics
-            success_rate = self.performance_tracker.get_comparative_performance(
-                "day", PerformanceMetricType.SUCCESS_RATE
-            ).get(model.id, 0.5)  # Default to 0.5 if no data
-            
-            latency = self.performance_tracker.get_comparative_performance(
-                "day", PerformanceMetricType.LATENCY
-            ).get(model.id, 2500.0)  # Default to 2500ms if no data
+            daily_metrics = self._get_daily_metrics(now)
             
-            quality_score = self.performance_tracker.get_comparative_performance(
-                "day", PerformanceMetricType.QUALITY_SCORE
-            ).get(model.id, 5.0)  # Default to 5.0 if no data
+            # Get performance metrics
+            success_rate = daily_metrics[PerformanceMetricType.SUCCESS_RATE].get(model.id, 0.5)  # Default to 0.5 if no data
+            latency = daily_metrics[PerformanceMetricType.LATENCY].get(model.id, 2500.0)  # Default to 2500ms if no data
+            quality_score = daily_metrics[PerformanceMetricType.QUALITY_SCORE].get(model.id, 5.0)  # Default to 5.0 if no data
+            cost = daily_metrics[PerformanceMetricType.COST].get(model.id, 0.0)  # Default to 0.0 if no data
             
-            cost = self.performance_tracker.get_comparative_performance(
-                "day", PerformanceMetricType.COST
-            ).get(model.id, 0.0)  # Default to 0.0 if no data
+            # Prefer live statistics when available
+            if stats:
+                success_rate = stats.success_rate
+                latency = stats.latency_ms
+            if sample:
+                success_rate = self.live_stats.sample_success_rate(model.id)
             
             # Normalize metrics
             normalized_latency = max(0.0, 1.0 - (latency / 5000.0))
@@ -290,7 +367,8 @@ class AdaptiveSelector:
             )
             
             # Cache the score
-            self._model_score_cache[model.id] = (score, now)
+            if not stats and not sample:
+                self._model_score_cache[model.id] = (score, now)
             model_scores[model.id] = score
             
         return model_scores
@@ -33,7 +33,8 @@ class ComplexityAnalyzer:
     async def analyze_complexity(
         self, 
         query: str,
-        conversation_history: Optional[List[Dict[str, str]]] = None
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        user_id: Optional[str] = None
     ) -> ComplexityScore:
         """
         Analyze the complexity of a user query.
@@ -41,6 +42,7 @@ class ComplexityAnalyzer:
         Args:
             query: User query
             conversation_history: Optional conversation history
+            user_id: Optional ID of the user making the request, for token quotas
 
         Returns:
             ComplexityScore: Complexity score
@@ -55,7 +57,7 @@ class ComplexityAnalyzer:
         if self.llm_service:
             try:
                 llm_dimension_scores, reasoning = await self._llm_based_analysis(
-                    query, conversation_history
+                    query, conversation_history, user_id
                 )
                 
                 # Combine rule-based and LLM-based scores (giving more weight to LLM)
@@ -162,7 +164,8 @@ class ComplexityAnalyzer:
     async def _llm_based_analysis(
         self,
         query: str,
-        conversation_history: Optional[List[Dict[str, str]]] = None
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        user_id: Optional[str] = None
     ) -> Tuple[Dict[ComplexityDimension, float], str]:
         """
         Perform LLM-based complexity analysis.
@@ -170,6 +173,7 @@ class ComplexityAnalyzer:
         Args:
             query: User query
             conversation_history: Optional conversation history
+            user_id: Optional ID of the user making the request, for token quotas
 
         Returns:
             Tuple[Dict[ComplexityDimension, float], str]: Scores for each complexity dimension and reasoning
@@ -184,7 +188,8 @@ class ComplexityAnalyzer:
                 "query": query,
                 "conversation_history": conversation_history or []
             },
-            model_size=ModelSize.SMALL
+            model_size=ModelSize.SMALL,
+            user_id=user_id
         )
         
         try:
@@ -0,0 +1,215 @@
+"""
+Live model statistics module for the MAGPIE platform.
+
+This module keeps exponentially weighted moving averages (EWMAs) of model
+latency, error rate and cost in memory, so model selection can react to a
+slow or failing deployment within a few requests instead of waiting for
+aggregated database metrics.
+"""
+import logging
+import random
+import threading
+import time
+from typing import Dict, List, Optional
+
+from app.models.model_registry import ModelInfo
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class ModelStats:
+    """
+    Live statistics for a single model.
+    """
+
+    def __init__(self):
+        """
+        Initialize empty statistics.
+        """
+        self.latency_ms: Optional[float] = None
+        self.error_rate: float = 0.0
+        self.cost: Optional[float] = None
+        self.successes: float = 0.0
+        self.failures: float = 0.0
+        self.samples: int = 0
+        self.updated_at: Optional[float] = None
+
+    @property
+    def success_rate(self) -> float:
+        """Get the smoothed success rate."""
+        return 1.0 - self.error_rate
+
+
+class LiveModelStats:
+    """
+    Thread-safe store of live per-model statistics.
+
+    Success and failure counts are kept as decayed pseudo-counts capped at
+    max_observations, which bounds how confident the Thompson sampling
+    posterior can become and keeps it responsive to recent behaviour.
+    """
+
+    def __init__(self, alpha: float = 0.2, max_observations: int = 50):
+        """
+        Initialize live model statistics.
+
+        Args:
+            alpha: EWMA smoothing factor (weight of the newest observation)
+            max_observations: Maximum pseudo-count for success/failure counts
+        """
+        self.alpha = alpha
+        self.max_observations = max_observations
+        self._stats: Dict[str, ModelStats] = {}
+        self._lock = threading.Lock()
+
+    def observe(
+        self,
+        model_id: str,
+        latency_ms: float,
+        success: bool = True,
+        cost: Optional[float] = None
+    ) -> None:
+        """
+        Record an observation for a model.
+
+        Args:
+            model_id: Model ID
+            latency_ms: Latency in milliseconds
+            success: Whether the request was successful
+            cost: Optional cost of the request
+        """
+        with self._lock:
+            stats = self._stats.setdefault(model_id, ModelStats())
+
+            stats.latency_ms = self._ewma(stats.latency_ms, float(latency_ms))
+            stats.error_rate = self._ewma(
+                stats.error_rate if stats.samples else None, 0.0 if success else 1.0
+            )
+            if cost is not None:
+                stats.cost = self._ewma(stats.cost, float(cost))
+
+            if success:
+                stats.successes += 1
+            else:
+                stats.failures += 1
+
+            # Scale counts down so old observations fade out
+            total = stats.successes + stats.failures
+            if total > self.max_observations:
+                scale = self.max_observations / total
+                stats.successes *= scale
+                stats.failures *= scale
+
+            stats.samples += 1
+            stats.updated_at = time.time()
+
+    def get(self, model_id: str) -> Optional[ModelStats]:
+        """
+        Get live statistics for a model.
+
+        Args:
+            model_id: Model ID
+
+        Returns:
+            Optional[ModelStats]: Statistics or None if the model has no observations
+        """
+        return self._stats.get(model_id)
+
+    def expected_latency_ms(self, model: ModelInfo) -> Optional[float]:
+        """
+        Get the expected latency of a model.
+
+        Uses the live EWMA when available and the registry average otherwise.
+
+        Args:
+            model: Model information
+
+        Returns:
+            Optional[float]: Expected latency in milliseconds, or None if unknown
+        """
+        stats = self.get(model.id)
+        if stats and stats.latency_ms is not None:
+            return stats.latency_ms
+        if model.average_latency > 0:
+            return model.average_latency * 1000.0
+        return None
+
+    def meets_latency_slo(self, model: ModelInfo, latency_slo_ms: float) -> bool:
+        """
+        Check whether a model is expected to meet a latency SLO.
+
+        Models without any latency data are given the benefit of the doubt,
+        so new deployments still receive traffic.
+
+        Args:
+            model: Model information
+            latency_slo_ms: Latency SLO in milliseconds
+
+        Returns:
+            bool: True if the model is expected to meet the SLO
+        """
+        latency_ms = self.expected_latency_ms(model)
+        return latency_ms is None or latency_ms <= latency_slo_ms
+
+    def sample_success_rate(self, model_id: str, rng: Optional[random.Random] = None) -> float:
+        """
+        Draw a success rate from the model's Beta posterior (Thompson sampling).
+
+        Args:
+            model_id: Model ID
+            rng: Optional random number generator
+
+        Returns:
+            float: Sampled success rate
+        """
+        stats = self.get(model_id)
+        successes = stats.successes if stats else 0.0
+        failures = stats.failures if stats else 0.0
+        return (rng or random).betavariate(1.0 + successes, 1.0 + failures)
+
+    def reset(self, model_ids: Optional[List[str]] = None) -> None:
+        """
+        Reset statistics.
+
+        Args:
+            model_ids: Optional model IDs to reset (default: all models)
+        """
+        with self._lock:
+            if model_ids is None:
+                self._stats.clear()
+            else:
+                for model_id in model_ids:
+                    self._stats.pop(model_id, None)
+
+    def _ewma(self, current: Optional[float], value: float) -> float:
+        """
+        Update an exponentially weighted moving average.
+
+        Args:
+            current: Current average, or None if there is no history
+            value: New observation
+
+        Returns:
+            float: Updated average
+        """
+        if current is None:
+            return value
+        return (1 - self.alpha) * current + self.alpha * value
+
+
+# Shared statistics, fed by every PerformanceTracker in the process
+_live_model_stats: Optional[LiveModelStats] = None
+
+
+def get_live_model_stats() -> LiveModelStats:
+    """
+    Get the shared live model statistics.
+
+    Returns:
+        LiveModelStats: Live model statistics
+    """
+    global _live_model_stats
+    if _live_model_stats is None:
+        _live_model_stats = LiveModelStats()
+    return _live_model_stats
@@ -8,31 +8,121 @@ import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 
+from sqlalchemy import case, delete, func, insert, select
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
+from app.core.db.partitioning import PartitionManager
+from app.core.model_selection.live_stats import LiveModelStats, get_live_model_stats
 from app.core.model_selection.registry import get_model_registry
+from app.core.model_selection.usage_recorder import UsageRecorder, get_usage_recorder
 from app.models.performance import (
-    ModelPerformanceSnapshot, ModelUsageRecord, PerformanceMetric, PerformanceMetricType
+    ModelPerformanceSnapshot, ModelUsageRecord, ModelUsageRollup, PerformanceMetric,
+    PerformanceMetricType, RollupGranularity
 )
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 
+def _as_datetime(value) -> datetime:
+    """
+    Convert a truncated timestamp from the database to a naive datetime.
+
+    Args:
+        value: Datetime, or ISO string as returned by SQLite
+
+    Returns:
+        datetime: Naive datetime
+    """
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.replace(tzinfo=None)
+
+
+def _floor_time(value: datetime, unit: str) -> datetime:
+    """
+    Truncate a datetime to the start of its hour, day or month.
+
+    Args:
+        value: Datetime to truncate
+        unit: Unit to truncate to (hour, day, month)
+
+    Returns:
+        datetime: Start of the unit
+    """
+    value = value.replace(minute=0, second=0, microsecond=0)
+    if unit in ("day", "month"):
+        value = value.replace(hour=0)
+    if unit == "month":
+        value = value.replace(day=1)
+    return value
+
+
+def _next_time(value: datetime, unit: str) -> datetime:
+    """
+    Get the start of the next hour, day or month after an aligned datetime.
+
+    Args:
+        value: Datetime aligned to the unit
+        unit: Unit to step by (hour, day, month)
+
+    Returns:
+        datetime: Start of the next unit
+    """
+    if unit == "hour":
+        return value + timedelta(hours=1)
+    if unit == "day":
+        return value + timedelta(days=1)
+    return (value + timedelta(days=32)).replace(day=1)
+
+
 class PerformanceTracker:
     """
     Tracker for model performance.
     """
 
-    def __init__(self, db: Optional[Session] = None):
+    # Delay before an hourly bucket is closed, so queued usage records are included
+    ROLLUP_SETTLE_DELAY = timedelta(minutes=1)
+
+    # Oldest usage aggregated when no hourly buckets exist yet
+    ROLLUP_MAX_LOOKBACK = timedelta(days=30)
+
+    # Agent type recorded in rollups for usage without one
+    UNKNOWN_AGENT_TYPE = "unknown"
+
+    # Rollup columns that add up across buckets
+    _ROLLUP_SUM_COLUMNS = (
+        "request_count", "success_count", "latency_sum_ms", "input_tokens",
+        "output_tokens", "cost", "quality_sum", "quality_count"
+    )
+
+    # Timestamp truncation formats for SQLite, which has no date_trunc
+    _SQLITE_TRUNCATE_FORMATS = {
+        "hour": "%Y-%m-%d %H:00:00",
+        "day": "%Y-%m-%d 00:00:00",
+        "month": "%Y-%m-01 00:00:00",
+    }
+
+    def __init__(
+        self,
+        db: Optional[Session] = None,
+        live_stats: Optional[LiveModelStats] = None,
+        recorder: Optional[UsageRecorder] = None
+    ):
         """
         Initialize performance tracker.
 
         Args:
             db: Database session
+            live_stats: Live model statistics to feed (default: shared statistics)
+            recorder: Optional background usage recorder; when set, usage records
+                are queued for batched writing instead of committed per call
         """
         self.db = db
         self.registry = get_model_registry()
+        self.live_stats = live_stats or get_live_model_stats()
+        self.recorder = recorder
 
     def record_usage(
         self,
@@ -45,7 +135,8 @@ class PerformanceTracker:
         error_message: Optional[str] = None,
         conversation_id: Optional[str] = None,
         quality_score: Optional[float] = None,
-        feedback: Optional[str] = None
+        feedback: Optional[str] = None,
+        agent_type: Optional[str] = None
     ) -> Optional[ModelUsageRecord]:
         """
         Record model usage.
@@ -61,14 +152,11 @@ class PerformanceTracker:
             conversation_id: Optional conversation ID
             quality_score: Optional quality score
             feedback: Optional feedback
+            agent_type: Optional type of the agent that made the request
 
         Returns:
-            Optional[ModelUsageRecord]: Usage record if saved, None otherwise
+            Optional[ModelUsageRecord]: Usage record if saved or queued, None otherwise
         """
-        if not self.db:
-            logger.warning("Cannot record usage without database session")
-            return None
-            
         # Get model information
         model = self.registry.get_model(model_id)
         if not model:
@@ -78,11 +166,40 @@ class PerformanceTracker:
         # Calculate cost
         cost = model.cost.calculate_cost(input_tokens, output_tokens)
         
+        # Update live statistics first, so selection does not wait on the database
+        self.live_stats.observe(model_id, latency_ms, success=success, cost=cost)
+        
+        if self.recorder:
+            # Queue the record; the recorder writes it in a batch off the request path
+            record_values = {
+                "model_id": model_id,
+                "timestamp": datetime.utcnow(),
+                "query_id": query_id,
+                "conversation_id": conversation_id,
+                "agent_type": agent_type,
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "latency_ms": latency_ms,
+                "success": success,
+                "error_message": error_message,
+                "cost": cost,
+                "quality_score": quality_score,
+                "feedback": feedback
+            }
+            if not self.recorder.enqueue(record_values):
+                return None
+            return ModelUsageRecord(**record_values)
+            
+        if not self.db:
+            logger.warning("Cannot record usage without database session")
+            return None
+            
         # Create usage record
         usage_record = ModelUsageRecord(
             model_id=model_id,
             query_id=query_id,
             conversation_id=conversation_id,
+            agent_type=agent_type,
             input_tokens=input_tokens,
             output_tokens=output_tokens,
             latency_ms=latency_ms,
@@ -148,19 +265,70 @@ class PerformanceTracker:
                 start_time = end_time - timedelta(days=1)
                 
         try:
-            # Query usage records
-            records = self.db.query(ModelUsageRecord).filter(
-                ModelUsageRecord.model_id == model_id,
-                ModelUsageRecord.timestamp >= start_time,
-                ModelUsageRecord.timestamp <= end_time
-            ).all()
-            
-            # Create performance snapshot
-            return ModelPerformanceSnapshot.from_usage_records(model_id, records)
+            summary = self.get_usage_summary(start_time, end_time, model_id=model_id)
+            return summary.get(model_id) or ModelPerformanceSnapshot.from_totals(model_id, 0, 0, 0.0, 0, 0.0)
         except Exception as e:
             logger.error(f"Failed to get model performance: {str(e)}")
             return None
 
+    def get_usage_summary(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        model_id: Optional[str] = None,
+        agent_type: Optional[str] = None
+    ) -> Dict[str, ModelPerformanceSnapshot]:
+        """
+        Get usage totals per model for a time range.
+
+        The range is covered by the coarsest rollup buckets that fit inside
+        it (months, then days, then hours), and only the partial hours at the
+        edges and usage newer than the last hourly rollup are read from raw
+        usage records.
+
+        Args:
+            start_time: Start of the range (inclusive)
+            end_time: End of the range (exclusive)
+            model_id: Optional model ID to filter by
+            agent_type: Optional agent type to filter by
+
+        Returns:
+            Dict[str, ModelPerformanceSnapshot]: Model IDs mapped to performance snapshots
+        """
+        if not self.db:
+            logger.warning("Cannot get usage summary without database session")
+            return {}
+            
+        # Rollups are complete up to the end of the last hourly bucket
+        rollup_end = self._rollup_watermark()
+        segments: List[Tuple[Optional[str], datetime, datetime]] = []
+        if rollup_end and rollup_end > start_time:
+            segments.extend(self._plan_rollup_segments(start_time, min(end_time, rollup_end)))
+            if end_time > rollup_end:
+                segments.append((None, rollup_end, end_time))
+        elif end_time > start_time:
+            segments.append((None, start_time, end_time))
+            
+        totals: Dict[str, List[float]] = {}
+        for granularity, segment_start, segment_end in segments:
+            if granularity is None:
+                rows = self._query_usage_totals(segment_start, segment_end, model_id, agent_type)
+            else:
+                rows = self._query_rollup_totals(granularity, segment_start, segment_end, model_id, agent_type)
+            for row in rows:
+                model_totals = totals.setdefault(row[0], [0] * (len(row) - 1))
+                for index, value in enumerate(row[1:]):
+                    model_totals[index] += value or 0
+                    
+        return {
+            row_model_id: ModelPerformanceSnapshot.from_totals(
+                row_model_id,
+                int(requests), int(successes), latency_sum, int(tokens), cost, quality_sum, int(quality_count)
+            )
+            for row_model_id, (requests, successes, latency_sum, tokens, cost, quality_sum, quality_count)
+            in totals.items()
+        }
+
     def get_comparative_performance(
         self,
         time_period: str = "day",
@@ -233,123 +401,623 @@ class PerformanceTracker:
         except Exception as e:
             logger.error(f"Failed to update model registry: {str(e)}")
 
-    def aggregate_metrics(self, force_update: bool = False) -> None:
+    def aggregate_metrics(self, force_update: bool = False, now: Optional[datetime] = None) -> None:
         """
         Aggregate performance metrics.
 
+        Hourly metrics are read from the hourly usage rollups, starting from
+        the end of the last aggregated bucket, so each run only reads buckets
+        rolled up since the previous one. Daily, weekly and monthly metrics are
+        then computed from the hourly metrics rather than from raw usage.
+
         Args:
             force_update: Whether to force update even if recent aggregation exists
+            now: Optional reference time (default: current UTC time)
         """
         if not self.db:
             logger.warning("Cannot aggregate metrics without database session")
             return
             
+        # Bring the hourly rollups up to date first; this is a no-op if they already are
+        now = now or datetime.utcnow()
+        self.rollup_usage(now=now)
+            
         try:
-            # Get all models
-            models = self.registry.get_all_models(active_only=False)
+            # Only close buckets the rollups already cover
+            window_end = _floor_time(now - self.ROLLUP_SETTLE_DELAY, "hour")
+            rollup_end = self._rollup_watermark()
             
-            # Current time
-            now = datetime.utcnow()
+            bucket_count = self._rollup_hourly_buckets(min(window_end, rollup_end)) if rollup_end else 0
             
-            # Time periods to aggregate
+            # Time periods to aggregate from the hourly buckets
             periods = [
-                ("hourly", timedelta(hours=1)),
                 ("daily", timedelta(days=1)),
                 ("weekly", timedelta(weeks=1)),
                 ("monthly", timedelta(days=30))
             ]
             
-            for model in models:
-                for period_name, period_delta in periods:
-                    # Check if recent aggregation exists
-                    if not force_update:
-                        recent_metric = self.db.query(PerformanceMetric).filter(
-                            PerformanceMetric.model_id == model.id,
-                            PerformanceMetric.time_period == period_name,
-                            PerformanceMetric.end_time >= now - timedelta(hours=1)
-                        ).first()
-                        
-                        if recent_metric:
-                            logger.debug(f"Skipping recent {period_name} aggregation for {model.id}")
-                            continue
-                    
-                    # Time range for aggregation
-                    start_time = now - period_delta
-                    
-                    # Get usage records
-                    records = self.db.query(ModelUsageRecord).filter(
-                        ModelUsageRecord.model_id == model.id,
-                        ModelUsageRecord.timestamp >= start_time,
-                        ModelUsageRecord.timestamp <= now
-                    ).all()
-                    
-                    if not records:
-                        logger.debug(f"No usage records for {model.id} in {period_name} period")
-                        continue
-                        
-                    # Create performance snapshot
-                    snapshot = ModelPerformanceSnapshot.from_usage_records(model.id, records)
-                    
-                    # Create metrics
-                    metrics = [
-                        PerformanceMetric(
-                            model_id=model.id,
-                            metric_type=PerformanceMetricType.SUCCESS_RATE,
-                            time_period=period_name,
-                            start_time=start_time,
-                            end_time=now,
-                            value=snapshot.success_rate,
-                            sample_size=snapshot.total_requests
-                        ),
-                        PerformanceMetric(
-                            model_id=model.id,
-                            metric_type=PerformanceMetricType.LATENCY,
-                            time_period=period_name,
-                            start_time=start_time,
-                            end_time=now,
-                            value=snapshot.average_latency,
-                            sample_size=snapshot.total_requests
-                        ),
-                        PerformanceMetric(
-                            model_id=model.id,
-                            metric_type=PerformanceMetricType.TOKEN_USAGE,
-                            time_period=period_name,
-                            start_time=start_time,
-                            end_time=now,
-                            value=snapshot.total_tokens,
-                            sample_size=snapshot.total_requests
-                        ),
-                        PerformanceMetric(
-                            model_id=model.id,
-                            metric_type=PerformanceMetricType.COST,
-                            time_period=period_name,
-                            start_time=start_time,
-                            end_time=now,
-                            value=snapshot.total_cost,
-                            sample_size=snapshot.total_requests
-                        )
-                    ]
-                    
-                    # Add quality score if available
-                    if snapshot.average_quality_score is not None:
-                        metrics.append(
-                            PerformanceMetric(
-                                model_id=model.id,
-                                metric_type=PerformanceMetricType.QUALITY_SCORE,
-                                time_period=period_name,
-                                start_time=start_time,
-                                end_time=now,
-                                value=snapshot.average_quality_score,
-                                sample_size=snapshot.total_requests
-                            )
-                        )
-                    
-                    # Save metrics
-                    self.db.add_all(metrics)
+            for period_name, period_delta in periods:
+                self._rollup_window(period_name, period_delta, window_end, force_update)
                     
             # Commit changes
             self.db.commit()
-            logger.info("Performance metrics aggregated successfully")
+            logger.info(f"Performance metrics aggregated successfully ({bucket_count} new hourly buckets)")
         except Exception as e:
             logger.error(f"Failed to aggregate metrics: {str(e)}")
             self.db.rollback()
+
+    def _truncate(self, column, unit: str):
+        """
+        Get a SQL expression truncating a timestamp column to an hour, day or month.
+
+        Args:
+            column: Timestamp column
+            unit: Unit to truncate to (hour, day, month)
+
+        Returns:
+            SQL expression for the start of the unit
+        """
+        if self.db.get_bind().dialect.name == "postgresql":
+            return func.date_trunc(unit, column)
+        return func.strftime(self._SQLITE_TRUNCATE_FORMATS[unit], column)
+
+    def _rollup_hourly_buckets(self, until: datetime) -> int:
+        """
+        Convert hourly usage rollups into hourly metrics up to a bucket boundary.
+
+        All models and hours since the last hourly metric are read by a single
+        GROUP BY statement over the rollup table, merging agent types.
+
+        Args:
+            until: End of the last bucket to aggregate (aligned to the hour)
+
+        Returns:
+            int: Number of model buckets written
+        """
+        rollups = ModelUsageRollup.__table__
+        metrics = PerformanceMetric.__table__
+        
+        # Continue from the last aggregated bucket, or the oldest rollup in range
+        start_time = self._metrics_watermark()
+        if start_time is None:
+            start_time = self.db.execute(
+                select(func.min(rollups.c.bucket_start)).where(
+                    rollups.c.granularity == RollupGranularity.HOUR.value,
+                    rollups.c.bucket_start >= until - self.ROLLUP_MAX_LOOKBACK
+                )
+            ).scalar()
+            if start_time is None:
+                logger.debug("No usage rollups to aggregate")
+                return 0
+                
+        if start_time >= until:
+            return 0
+            
+        statement = select(
+            rollups.c.model_id,
+            rollups.c.bucket_start,
+            *(
+                func.sum(rollups.c[column]).label(column)
+                for column in self._ROLLUP_SUM_COLUMNS
+            )
+        ).where(
+            rollups.c.granularity == RollupGranularity.HOUR.value,
+            rollups.c.bucket_start >= start_time,
+            rollups.c.bucket_start < until
+        ).group_by(rollups.c.model_id, rollups.c.bucket_start)
+        
+        rows = []
+        for result in self.db.execute(statement):
+            bucket_start = _as_datetime(result.bucket_start)
+            bucket_end = bucket_start + timedelta(hours=1)
+            
+            def metric(metric_type: PerformanceMetricType, value: float, sample_size: int) -> Dict:
+                return self._metric_values(
+                    result.model_id, metric_type, "hourly", bucket_start, bucket_end, value, sample_size
+                )
+            
+            # Sample sizes are the weights needed to merge buckets into larger windows
+            requests = int(result.request_count)
+            successes = int(result.success_count or 0)
+            rows.append(metric(PerformanceMetricType.SUCCESS_RATE, successes / requests, requests))
+            rows.append(metric(
+                PerformanceMetricType.LATENCY,
+                (result.latency_sum_ms or 0) / successes if successes else 0.0,
+                successes
+            ))
+            rows.append(metric(
+                PerformanceMetricType.TOKEN_USAGE,
+                (result.input_tokens or 0) + (result.output_tokens or 0),
+                requests
+            ))
+            rows.append(metric(PerformanceMetricType.COST, result.cost or 0.0, requests))
+            if result.quality_count:
+                rows.append(metric(
+                    PerformanceMetricType.QUALITY_SCORE,
+                    result.quality_sum / result.quality_count,
+                    result.quality_count
+                ))
+                
+        if rows:
+            self.db.execute(insert(metrics), rows)
+            
+        return sum(1 for row in rows if row["metric_type"] == PerformanceMetricType.SUCCESS_RATE)
+
+    def _rollup_window(
+        self,
+        period_name: str,
+        period_delta: timedelta,
+        window_end: datetime,
+        force_update: bool = False
+    ) -> None:
+        """
+        Aggregate hourly buckets into metrics for a longer period.
+
+        Args:
+            period_name: Time period name (daily, weekly, monthly)
+            period_delta: Length of the period
+            window_end: End of the window (aligned to the hour)
+            force_update: Whether to recompute an existing window
+        """
+        metrics = PerformanceMetric.__table__
+        
+        # Check if this window was already aggregated
+        latest_end = self.db.execute(
+            select(func.max(metrics.c.end_time)).where(metrics.c.time_period == period_name)
+        ).scalar()
+        if latest_end is not None and latest_end >= window_end:
+            if not force_update:
+                logger.debug(f"Skipping recent {period_name} aggregation")
+                return
+            self.db.execute(
+                delete(metrics).where(
+                    metrics.c.time_period == period_name,
+                    metrics.c.end_time == window_end
+                )
+            )
+            
+        window_start = window_end - period_delta
+        statement = select(
+            metrics.c.model_id,
+            metrics.c.metric_type,
+            func.sum(metrics.c.value * metrics.c.sample_size).label("weighted_sum"),
+            func.sum(metrics.c.sample_size).label("sample_size"),
+            func.sum(metrics.c.value).label("total")
+        ).where(
+            metrics.c.time_period == "hourly",
+            metrics.c.start_time >= window_start,
+            metrics.c.end_time <= window_end
+        ).group_by(metrics.c.model_id, metrics.c.metric_type)
+        
+        totals: Dict[str, Dict[PerformanceMetricType, Tuple[float, int, float]]] = {}
+        for result in self.db.execute(statement):
+            totals.setdefault(result.model_id, {})[result.metric_type] = (
+                result.weighted_sum or 0.0, result.sample_size or 0, result.total or 0.0
+            )
+            
+        rows = []
+        for model_id, model_totals in totals.items():
+            requests = model_totals.get(PerformanceMetricType.SUCCESS_RATE, (0.0, 0, 0.0))[1]
+            if not requests:
+                logger.debug(f"No usage records for {model_id} in {period_name} period")
+                continue
+                
+            for metric_type, (weighted_sum, sample_size, total) in model_totals.items():
+                if metric_type in (PerformanceMetricType.TOKEN_USAGE, PerformanceMetricType.COST):
+                    # Totals add up across buckets
+                    value = total
+                else:
+                    # Averages are weighted by each bucket's sample size
+                    value = weighted_sum / sample_size if sample_size else 0.0
+                rows.append(self._metric_values(
+                    model_id, metric_type, period_name, window_start, window_end, value, sample_size
+                ))
+                
+        if rows:
+            self.db.execute(insert(metrics), rows)
+
+    def rollup_usage(self, now: Optional[datetime] = None) -> int:
+        """
+        Update the hourly, daily and monthly usage rollups.
+
+        New hourly buckets are built from usage recorded since the last
+        hourly bucket, and only the days and months they fall in are rebuilt
+        from the finer rollups, so each run is bounded by new data.
+
+        Args:
+            now: Optional reference time (default: current UTC time)
+
+        Returns:
+            int: Number of hourly rollup rows written
+        """
+        if not self.db:
+            logger.warning("Cannot roll up usage without database session")
+            return 0
+            
+        try:
+            now = now or datetime.utcnow()
+            until = _floor_time(now - self.ROLLUP_SETTLE_DELAY, "hour")
+            
+            # Continue from the last hourly bucket, or the oldest usage in range
+            start_time = self._rollup_watermark()
+            if start_time is None:
+                usage = ModelUsageRecord.__table__
+                start_time = self.db.execute(
+                    select(func.min(usage.c.timestamp)).where(
+                        usage.c.timestamp >= until - self.ROLLUP_MAX_LOOKBACK
+                    )
+                ).scalar()
+                if start_time is None:
+                    logger.debug("No usage records to roll up")
+                    return 0
+                start_time = _floor_time(start_time, "hour")
+                
+            if start_time >= until:
+                return 0
+                
+            hourly_rows = self._build_hourly_rollups(start_time, until)
+            self._rebuild_rollups(RollupGranularity.DAY, RollupGranularity.HOUR, _floor_time(start_time, "day"), until)
+            self._rebuild_rollups(RollupGranularity.MONTH, RollupGranularity.DAY, _floor_time(start_time, "month"), until)
+            
+            self.db.commit()
+            logger.info(f"Usage rolled up to {until.isoformat()} ({hourly_rows} hourly rows)")
+            return hourly_rows
+        except Exception as e:
+            logger.error(f"Failed to roll up usage: {str(e)}")
+            self.db.rollback()
+            return 0
+
+    def prune_usage_records(self, retention: timedelta = timedelta(days=90), now: Optional[datetime] = None) -> int:
+        """
+        Delete raw usage records that are older than the retention period.
+
+        Records newer than the last hourly rollup or the last hourly metric
+        are never deleted, so pruning cannot lose usage that has not been
+        rolled up and aggregated. On PostgreSQL,
+        monthly partitions that lie entirely before the cutoff are dropped
+        instead of deleting their rows.
+
+        Args:
+            retention: How long to keep raw usage records
+            now: Optional reference time (default: current UTC time)
+
+        Returns:
+            int: Number of records deleted row by row (rows in dropped partitions are not counted)
+        """
+        if not self.db:
+            logger.warning("Cannot prune usage records without database session")
+            return 0
+            
+        try:
+            rollup_end = self._rollup_watermark()
+            metrics_end = self._metrics_watermark()
+            if rollup_end is None or metrics_end is None:
+                return 0
+                
+            cutoff = min((now or datetime.utcnow()) - retention, rollup_end, metrics_end)
+            usage = ModelUsageRecord.__table__
+            
+            # Drop whole partitions first, so the DELETE only touches one month
+            PartitionManager(self.db).detach_partitions(usage.name, cutoff)
+            
+            result = self.db.execute(delete(usage).where(usage.c.timestamp < cutoff))
+            self.db.commit()
+            
+            logger.info(f"Pruned {result.rowcount} usage records older than {cutoff.isoformat()}")
+            return result.rowcount
+        except Exception as e:
+            logger.error(f"Failed to prune usage records: {str(e)}")
+            self.db.rollback()
+            return 0
+
+    def _rollup_watermark(self) -> Optional[datetime]:
+        """
+        Get the end of the last hourly usage rollup.
+
+        Returns:
+            Optional[datetime]: End of the last hourly bucket, or None if there are no rollups
+        """
+        rollups = ModelUsageRollup.__table__
+        last_bucket = self.db.execute(
+            select(func.max(rollups.c.bucket_start)).where(
+                rollups.c.granularity == RollupGranularity.HOUR.value
+            )
+        ).scalar()
+        return _next_time(last_bucket, "hour") if last_bucket else None
+
+    def _metrics_watermark(self) -> Optional[datetime]:
+        """
+        Get the end of the last hourly performance metric bucket.
+
+        Returns:
+            Optional[datetime]: End of the last hourly bucket, or None if there are no hourly metrics
+        """
+        metrics = PerformanceMetric.__table__
+        return self.db.execute(
+            select(func.max(metrics.c.end_time)).where(metrics.c.time_period == "hourly")
+        ).scalar()
+
+    def _build_hourly_rollups(self, start_time: datetime, until: datetime) -> int:
+        """
+        Aggregate raw usage into hourly rollup rows.
+
+        Args:
+            start_time: Start of the first bucket
+            until: End of the last bucket
+
+        Returns:
+            int: Number of rollup rows written
+        """
+        usage = ModelUsageRecord.__table__
+        bucket = self._truncate(usage.c.timestamp, "hour").label("bucket")
+        agent_type = func.coalesce(usage.c.agent_type, self.UNKNOWN_AGENT_TYPE).label("agent_type")
+        successful = usage.c.success.is_(True)
+        statement = select(
+            bucket,
+            usage.c.model_id,
+            agent_type,
+            func.count().label("request_count"),
+            func.sum(case((successful, 1), else_=0)).label("success_count"),
+            func.sum(case((successful, usage.c.latency_ms), else_=0)).label("latency_sum_ms"),
+            func.sum(usage.c.input_tokens).label("input_tokens"),
+            func.sum(usage.c.output_tokens).label("output_tokens"),
+            func.sum(usage.c.cost).label("cost"),
+            func.coalesce(func.sum(usage.c.quality_score), 0.0).label("quality_sum"),
+            func.count(usage.c.quality_score).label("quality_count")
+        ).where(
+            usage.c.timestamp >= start_time,
+            usage.c.timestamp < until
+        ).group_by(bucket, usage.c.model_id, agent_type)
+        
+        return self._insert_rollups(RollupGranularity.HOUR, statement)
+
+    def _rebuild_rollups(
+        self,
+        granularity: RollupGranularity,
+        source: RollupGranularity,
+        start_time: datetime,
+        until: datetime
+    ) -> None:
+        """
+        Rebuild coarser rollup buckets from finer ones.
+
+        Args:
+            granularity: Granularity to rebuild
+            source: Finer granularity to aggregate
+            start_time: Start of the first bucket to rebuild (aligned to granularity)
+            until: End of the source data
+        """
+        rollups = ModelUsageRollup.__table__
+        self.db.execute(
+            delete(rollups).where(
+                rollups.c.granularity == granularity.value,
+                rollups.c.bucket_start >= start_time,
+                rollups.c.bucket_start < until
+            )
+        )
+        
+        bucket = self._truncate(rollups.c.bucket_start, granularity.value).label("bucket")
+        statement = select(
+            bucket,
+            rollups.c.model_id,
+            rollups.c.agent_type,
+            *(
+                func.sum(rollups.c[column]).label(column)
+                for column in self._ROLLUP_SUM_COLUMNS
+            )
+        ).where(
+            rollups.c.granularity == source.value,
+            rollups.c.bucket_start >= start_time,
+            rollups.c.bucket_start < until
+        ).group_by(bucket, rollups.c.model_id, rollups.c.agent_type)
+        
+        self._insert_rollups(granularity, statement)
+
+    def _insert_rollups(self, granularity: RollupGranularity, statement) -> int:
+        """
+        Insert rollup rows from an aggregate query.
+
+        Args:
+            granularity: Granularity of the rows
+            statement: Query returning bucket, model_id, agent_type and the summed columns
+
+        Returns:
+            int: Number of rows inserted
+        """
+        rows = [
+            {
+                "granularity": granularity.value,
+                "bucket_start": _as_datetime(result.bucket),
+                "model_id": result.model_id,
+                "agent_type": result.agent_type,
+                **{column: result._mapping[column] or 0 for column in self._ROLLUP_SUM_COLUMNS}
+            }
+            for result in self.db.execute(statement)
+        ]
+        if rows:
+            self.db.execute(insert(ModelUsageRollup.__table__), rows)
+        return len(rows)
+
+    def _plan_rollup_segments(
+        self,
+        start_time: datetime,
+        end_time: datetime
+    ) -> List[Tuple[Optional[str], datetime, datetime]]:
+        """
+        Split a time range into the coarsest rollup buckets that fit inside it.
+
+        Args:
+            start_time: Start of the range
+            end_time: End of the range
+
+        Returns:
+            List[Tuple[Optional[str], datetime, datetime]]: Granularity (None for
+                raw usage records), start and end of each segment
+        """
+        units = [granularity.value for granularity in reversed(RollupGranularity)]
+        
+        def plan(segment_start: datetime, segment_end: datetime, level: int):
+            if segment_start >= segment_end:
+                return []
+            if level == len(units):
+                return [(None, segment_start, segment_end)]
+                
+            unit = units[level]
+            first = _floor_time(segment_start, unit)
+            if first < segment_start:
+                first = _next_time(first, unit)
+            last = _floor_time(segment_end, unit)
+            if first >= last:
+                return plan(segment_start, segment_end, level + 1)
+                
+            return (
+                plan(segment_start, first, level + 1)
+                + [(unit, first, last)]
+                + plan(last, segment_end, level + 1)
+            )
+            
+        return plan(start_time, end_time, 0)
+
+    def _query_rollup_totals(
+        self,
+        granularity: str,
+        start_time: datetime,
+        end_time: datetime,
+        model_id: Optional[str] = None,
+        agent_type: Optional[str] = None
+    ) -> List[Tuple]:
+        """
+        Sum rollup buckets per model.
+
+        Args:
+            granularity: Rollup granularity
+            start_time: Start of the first bucket
+            end_time: End of the last bucket
+            model_id: Optional model ID to filter by
+            agent_type: Optional agent type to filter by
+
+        Returns:
+            List[Tuple]: Rows of model_id and usage totals
+        """
+        rollups = ModelUsageRollup.__table__
+        statement = select(
+            rollups.c.model_id,
+            func.sum(rollups.c.request_count),
+            func.sum(rollups.c.success_count),
+            func.sum(rollups.c.latency_sum_ms),
+            func.sum(rollups.c.input_tokens + rollups.c.output_tokens),
+            func.sum(rollups.c.cost),
+            func.sum(rollups.c.quality_sum),
+            func.sum(rollups.c.quality_count)
+        ).where(
+            rollups.c.granularity == granularity,
+            rollups.c.bucket_start >= start_time,
+            rollups.c.bucket_start < end_time
+        ).group_by(rollups.c.model_id)
+        
+        if model_id:
+            statement = statement.where(rollups.c.model_id == model_id)
+        if agent_type:
+            statement = statement.where(rollups.c.agent_type == agent_type)
+            
+        return [tuple(row) for row in self.db.execute(statement)]
+
+    def _query_usage_totals(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        model_id: Optional[str] = None,
+        agent_type: Optional[str] = None
+    ) -> List[Tuple]:
+        """
+        Sum raw usage records per model.
+
+        Args:
+            start_time: Start of the range (inclusive)
+            end_time: End of the range (exclusive)
+            model_id: Optional model ID to filter by
+            agent_type: Optional agent type to filter by
+
+        Returns:
+            List[Tuple]: Rows of model_id and usage totals
+        """
+        usage = ModelUsageRecord.__table__
+        successful = usage.c.success.is_(True)
+        statement = select(
+            usage.c.model_id,
+            func.count(),
+            func.sum(case((successful, 1), else_=0)),
+            func.sum(case((successful, usage.c.latency_ms), else_=0)),
+            func.sum(usage.c.input_tokens + usage.c.output_tokens),
+            func.sum(usage.c.cost),
+            func.sum(usage.c.quality_score),
+            func.count(usage.c.quality_score)
+        ).where(
+            usage.c.timestamp >= start_time,
+            usage.c.timestamp < end_time
+        ).group_by(usage.c.model_id)
+        
+        if model_id:
+            statement = statement.where(usage.c.model_id == model_id)
+        if agent_type:
+            statement = statement.where(
+                func.coalesce(usage.c.agent_type, self.UNKNOWN_AGENT_TYPE) == agent_type
+            )
+            
+        return [tuple(row) for row in self.db.execute(statement)]
+
+    @staticmethod
+    def _metric_values(
+        model_id: str,
+        metric_type: PerformanceMetricType,
+        time_period: str,
+        start_time: datetime,
+        end_time: datetime,
+        value: float,
+        sample_size: int
+    ) -> Dict:
+        """
+        Build column values for a performance metric row.
+
+        Args:
+            model_id: Model ID
+            metric_type: Metric type
+            time_period: Time period name
+            start_time: Start of the aggregated range
+            end_time: End of the aggregated range
+            value: Metric value
+            sample_size: Number of samples behind the value
+
+        Returns:
+            Dict: Column values for a PerformanceMetric row
+        """
+        return {
+            "model_id": model_id,
+            "metric_type": metric_type,
+            "time_period": time_period,
+            "start_time": start_time,
+            "end_time": end_time,
+            "value": float(value),
+            "sample_size": int(sample_size)
+        }
+
+
+# Shared tracker for the LLM request path, created on first use
+_performance_tracker: Optional[PerformanceTracker] = None
+
+
+def get_performance_tracker() -> PerformanceTracker:
+    """
+    Get the shared performance tracker fed by LLM requests.
+
+    Usage records are written by the shared background usage recorder,
+    except in testing, where only live statistics are kept.
+
+    Returns:
+        PerformanceTracker: Shared performance tracker
+    """
+    global _performance_tracker
+    if _performance_tracker is None:
+        recorder = get_usage_recorder() if settings.ENVIRONMENT != "testing" else None
+        _performance_tracker = PerformanceTracker(recorder=recorder)
+    return _performance_tracker
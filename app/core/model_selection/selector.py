@@ -8,6 +8,7 @@ import logging
 from typing import Dict, List, Optional, Set, Tuple
 
 from app.core.model_selection.complexity import ComplexityAnalyzer
+from app.core.model_selection.live_stats import LiveModelStats, get_live_model_stats
 from app.core.model_selection.registry import get_model_registry
 from app.models.agent import ModelSize
 from app.models.complexity import ComplexityLevel, ComplexityScore
@@ -22,15 +23,21 @@ class ModelSelector:
     Selector for choosing the appropriate LLM model.
     """
 
-    def __init__(self, complexity_analyzer: Optional[ComplexityAnalyzer] = None):
+    def __init__(
+        self,
+        complexity_analyzer: Optional[ComplexityAnalyzer] = None,
+        live_stats: Optional[LiveModelStats] = None
+    ):
         """
         Initialize model selector.
 
         Args:
             complexity_analyzer: Complexity analyzer
+            live_stats: Live model statistics (default: shared statistics)
         """
         self.complexity_analyzer = complexity_analyzer or ComplexityAnalyzer()
         self.registry = get_model_registry()
+        self.live_stats = live_stats or get_live_model_stats()
         
         # Default capability requirements for different complexity levels
         self.default_capability_requirements = {
@@ -66,7 +73,9 @@ class ModelSelector:
         cost_sensitive: bool = False,
         performance_sensitive: bool = False,
         latency_sensitive: bool = False,
-        fallback_to_smaller: bool = True
+        fallback_to_smaller: bool = True,
+        latency_slo_ms: Optional[float] = None,
+        user_id: Optional[str] = None
     ) -> Tuple[ModelInfo, ComplexityScore]:
         """
         Select the appropriate model for a query.
@@ -79,6 +88,8 @@ class ModelSelector:
             performance_sensitive: Whether to prioritize performance over cost
             latency_sensitive: Whether to prioritize latency
             fallback_to_smaller: Whether to fallback to smaller models if needed
+            latency_slo_ms: Optional latency SLO; the cheapest model expected to meet it is selected
+            user_id: Optional ID of the user making the request, for token quotas
 
         Returns:
             Tuple[ModelInfo, ComplexityScore]: Selected model and complexity score
@@ -89,7 +100,8 @@ class ModelSelector:
         # Analyze complexity
         complexity_score = await self.complexity_analyzer.analyze_complexity(
             query=query,
-            conversation_history=conversation_history
+            conversation_history=conversation_history,
+            user_id=user_id
         )
         
         logger.debug(f"Complexity analysis: {complexity_score.level} (score: {complexity_score.overall_score})")
@@ -124,7 +136,8 @@ class ModelSelector:
             complexity_score=complexity_score,
             cost_sensitive=cost_sensitive,
             performance_sensitive=performance_sensitive,
-            latency_sensitive=latency_sensitive
+            latency_sensitive=latency_sensitive,
+            latency_slo_ms=latency_slo_ms
         )
         
         # Select the top-ranked model
@@ -175,17 +188,24 @@ class ModelSelector:
         complexity_score: ComplexityScore,
         cost_sensitive: bool = False,
         performance_sensitive: bool = False,
-        latency_sensitive: bool = False
+        latency_sensitive: bool = False,
+        latency_slo_ms: Optional[float] = None
     ) -> List[ModelInfo]:
         """
         Rank models based on criteria.
 
+        Performance and latency come from live statistics when a model has
+        any, and from the registry otherwise. With a latency SLO, models
+        expected to meet it come first, cheapest first, followed by the
+        remaining models from fastest to slowest.
+
         Args:
             models: List of models to rank
             complexity_score: Complexity score
             cost_sensitive: Whether to prioritize cost over performance
             performance_sensitive: Whether to prioritize performance over cost
             latency_sensitive: Whether to prioritize latency
+            latency_slo_ms: Optional latency SLO in milliseconds
 
         Returns:
             List[ModelInfo]: Ranked list of models
@@ -233,16 +253,20 @@ class ModelSelector:
             capability_score = min(1.0, capability_score / 10.0)
             
             # Performance score (normalized)
-            performance_score = model.performance_score / 10.0 if model.performance_score > 0 else 0.5
+            stats = self.live_stats.get(model.id)
+            if stats:
+                performance_score = stats.success_rate
+            else:
+                performance_score = model.performance_score / 10.0 if model.performance_score > 0 else 0.5
             
             # Cost score (inverse of cost, normalized)
             # Assuming max cost of $0.03 per token
-            cost_per_token = (model.cost.input_cost_per_1k_tokens + model.cost.output_cost_per_1k_tokens) / 2
-            cost_score = 1.0 - (cost_per_token / 0.03)
+            cost_score = 1.0 - (self._cost_per_token(model) / 0.03)
             
             # Latency score (inverse of latency, normalized)
             # Assuming max latency of 5 seconds
-            latency_score = 1.0 - (model.average_latency / 5.0) if model.average_latency > 0 else 0.5
+            latency_ms = self.live_stats.expected_latency_ms(model)
+            latency_score = 1.0 - (latency_ms / 5000.0) if latency_ms is not None else 0.5
             
             # Calculate weighted score
             weighted_score = (
@@ -256,8 +280,38 @@ class ModelSelector:
             
         # Sort models by score (descending)
         model_scores.sort(key=lambda x: x[1], reverse=True)
+        ranked_models = [model for model, _ in model_scores]
         
-        return [model for model, _ in model_scores]
+        if latency_slo_ms is None:
+            return ranked_models
+            
+        # Route to the cheapest model expected to meet the latency SLO
+        within_slo = [
+            model for model in ranked_models
+            if self.live_stats.meets_latency_slo(model, latency_slo_ms)
+        ]
+        outside_slo = [model for model in ranked_models if model not in within_slo]
+        
+        # Sorts are stable, so ties keep their weighted score order
+        within_slo.sort(key=self._cost_per_token)
+        outside_slo.sort(key=lambda model: self.live_stats.expected_latency_ms(model))
+        
+        if not within_slo:
+            logger.warning(f"No model expected to meet latency SLO of {latency_slo_ms}ms, using fastest")
+            
+        return within_slo + outside_slo
+
+    def _cost_per_token(self, model: ModelInfo) -> float:
+        """
+        Get the average cost per 1K tokens for a model.
+
+        Args:
+            model: Model information
+
+        Returns:
+            float: Average of input and output cost per 1K tokens
+        """
+        return (model.cost.input_cost_per_1k_tokens + model.cost.output_cost_per_1k_tokens) / 2
 
     def get_model_by_size(self, size: ModelSize) -> ModelInfo:
         """
@@ -0,0 +1,251 @@
+"""
+Usage recorder module for the MAGPIE platform.
+
+This module provides a background writer for model usage records, so
+recording usage on the request path only enqueues a row instead of
+committing a database transaction.
+"""
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.models.performance import ModelUsageRecord
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class UsageRecorder:
+    """
+    Background writer that bulk-inserts model usage records.
+
+    Records are placed on a bounded queue and written by a worker thread in
+    batches of up to batch_size rows, at least every flush_interval_ms. When
+    the queue is full, enqueue drops and counts the record without blocking,
+    so a slow database cannot stall LLM requests or the event loop.
+    """
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Session]] = None,
+        batch_size: int = 100,
+        flush_interval_ms: int = 500,
+        max_queue_size: int = 10000,
+    ):
+        """
+        Initialize the usage recorder.
+
+        Args:
+            session_factory: Factory for database sessions (default: DatabaseConnectionFactory)
+            batch_size: Maximum number of records per insert
+            flush_interval_ms: Maximum time a record waits before being written
+            max_queue_size: Maximum number of queued records
+        """
+        if session_factory is None:
+            from app.core.db.connection import DatabaseConnectionFactory
+            session_factory = DatabaseConnectionFactory.get_session
+
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_queue_size)
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+        # Updated by request threads and the worker thread
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "enqueued": 0,
+            "written": 0,
+            "dropped": 0,
+            "failed": 0,
+            "batches": 0,
+        }
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the worker thread is running."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """
+        Start the worker thread.
+        """
+        with self._lock:
+            if self.is_running:
+                return
+
+            self._stop_event.clear()
+            self._thread = threading.Thread(
+                target=self._run,
+                name="usage-recorder",
+                daemon=True,
+            )
+            self._thread.start()
+            logger.info("Usage recorder started")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Stop the worker thread after writing all queued records.
+
+        If the worker does not finish within the timeout, its handle is kept,
+        so no second worker is started while it is still draining the queue.
+
+        Args:
+            timeout: Maximum time to wait for the worker in seconds
+        """
+        with self._lock:
+            if not self.is_running:
+                return
+
+            self._stop_event.set()
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                logger.warning(f"Usage recorder did not stop within {timeout}s, {self._queue.qsize()} records pending")
+                return
+
+            logger.info("Usage recorder stopped")
+            self._thread = None
+
+    def enqueue(self, record: Dict[str, Any]) -> bool:
+        """
+        Queue a usage record for writing.
+
+        Starts the worker thread on first use. Never blocks: if the queue is
+        full, the record is dropped and counted.
+
+        Args:
+            record: Column values for a ModelUsageRecord row
+
+        Returns:
+            bool: True if the record was queued, False if it was dropped
+        """
+        if not self.is_running:
+            self.start()
+
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            dropped = self._increment("dropped")
+            if dropped % 100 == 1:
+                logger.warning(f"Usage record queue full, {dropped} records dropped so far")
+            return False
+
+        self._increment("enqueued")
+        return True
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get recorder statistics.
+
+        Returns:
+            Dict[str, int]: Counts of enqueued, written, dropped and failed records
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["queued"] = self._queue.qsize()
+        return stats
+
+    def _increment(self, name: str, amount: int = 1) -> int:
+        """
+        Increment a statistics counter.
+
+        Args:
+            name: Counter name
+            amount: Amount to add
+
+        Returns:
+            int: New counter value
+        """
+        with self._stats_lock:
+            self._stats[name] += amount
+            return self._stats[name]
+
+    def _run(self) -> None:
+        """
+        Worker loop: collect batches and write them until stopped and drained.
+        """
+        while not (self._stop_event.is_set() and self._queue.empty()):
+            batch = self._collect_batch()
+            if batch:
+                self._write_batch(batch)
+
+    def _collect_batch(self) -> List[Dict[str, Any]]:
+        """
+        Collect up to batch_size records, waiting at most flush_interval.
+
+        Returns:
+            List[Dict[str, Any]]: Collected records
+        """
+        batch: List[Dict[str, Any]] = []
+        deadline = time.monotonic() + self.flush_interval
+
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or (self._stop_event.is_set() and self._queue.empty()):
+                break
+
+            try:
+                batch.append(self._queue.get(timeout=min(remaining, 0.1)))
+            except queue.Empty:
+                continue
+
+        return batch
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        """
+        Bulk-insert a batch of records in a single statement.
+
+        Args:
+            batch: Records to write
+        """
+        session = None
+        try:
+            session = self.session_factory()
+            session.execute(insert(ModelUsageRecord.__table__), batch)
+            session.commit()
+            self._increment("written", len(batch))
+            self._increment("batches")
+        except Exception as e:
+            self._increment("failed", len(batch))
+            logger.error(f"Failed to write {len(batch)} usage records: {str(e)}")
+            if session is not None:
+                session.rollback()
+        finally:
+            if session is not None:
+                session.close()
+
+
+# Shared recorder, started lazily on first use
+_usage_recorder: Optional[UsageRecorder] = None
+
+
+def get_usage_recorder() -> UsageRecorder:
+    """
+    Get the shared usage recorder.
+
+    Returns:
+        UsageRecorder: Shared usage recorder
+    """
+    global _usage_recorder
+    if _usage_recorder is None:
+        _usage_recorder = UsageRecorder()
+    return _usage_recorder
+
+
+def shutdown_usage_recorder(timeout: float = 5.0) -> None:
+    """
+    Flush and stop the shared usage recorder, if it was created.
+
+    Args:
+        timeout: Maximum time to wait for queued records to be written
+    """
+    if _usage_recorder is not None:
+        _usage_recorder.stop(timeout)
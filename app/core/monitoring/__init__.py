@@ -11,6 +11,7 @@ from app.core.monitoring.metrics import (
     metrics_collector,
     record_timing,
     record_count,
+    record_metrics,
     get_metrics,
 )
 
@@ -23,10 +24,12 @@ from app.core.monitoring.error_tracking import (
     error_tracker,
     track_error,
     resolve_error,
+    get_error,
     get_errors,
     get_error_count,
     get_error_rate,
     register_notification_handler,
+    shutdown_error_tracker,
 )
 
 from app.core.monitoring.notifications import (
@@ -77,7 +80,11 @@ from app.core.monitoring.log_management import (
     record_audit_log,
     get_audit_logs,
     verify_audit_logs,
+    shutdown_audit_log_writer,
     rotate_logs,
+    request_log_rotation,
+    start_log_rotation,
+    shutdown_log_rotation,
 )
 
 from app.core.monitoring.profiling import (
@@ -103,6 +110,7 @@ __all__ = [
     "metrics_collector",
     "record_timing",
     "record_count",
+    "record_metrics",
     "get_metrics",
 
     # Error tracking
@@ -114,10 +122,12 @@ __all__ = [
     "error_tracker",
     "track_error",
     "resolve_error",
+    "get_error",
     "get_errors",
     "get_error_count",
     "get_error_rate",
     "register_notification_handler",
+    "shutdown_error_tracker",
 
     # Notifications
     "EmailConfig",
@@ -163,7 +173,11 @@ __all__ = [
     "record_audit_log",
     "get_audit_logs",
     "verify_audit_logs",
+    "shutdown_audit_log_writer",
     "rotate_logs",
+    "request_log_rotation",
+    "start_log_rotation",
+    "shutdown_log_rotation",
 
     # Profiling
     "PerformanceCategory",
@@ -222,6 +222,35 @@ class UsageAnalytics:
             self.logger.error(f"Failed to record usage: {e}")
             return False
 
+    @staticmethod
+    def get_user_daily_key(user_id: str, date_str: str) -> str:
+        """
+        Get the key of a user's daily metrics.
+
+        Token quotas read the total_tokens field of this key.
+
+        Args:
+            user_id: User ID
+            date_str: Date in YYYY-MM-DD format
+
+        Returns:
+            str: Redis key
+        """
+        return f"user:{user_id}:daily:{date_str}"
+
+    @staticmethod
+    def get_global_daily_key(date_str: str) -> str:
+        """
+        Get the key of the daily global metrics.
+
+        Args:
+            date_str: Date in YYYY-MM-DD format
+
+        Returns:
+            str: Redis key
+        """
+        return f"global:daily:{date_str}"
+
     def _update_user_metrics(self, usage: UsageRecord) -> None:
         """
         Update user-specific metrics.
@@ -238,7 +267,7 @@ class UsageAnalytics:
         month_str = now.strftime("%Y-%m")
 
         # Update daily user metrics
-        daily_key = f"user:{usage.user_id}:daily:{date_str}"
+        daily_key = self.get_user_daily_key(usage.user_id, date_str)
         self._increment_metrics(daily_key, usage)
 
         # Update monthly user metrics
@@ -310,7 +339,7 @@ class UsageAnalytics:
         month_str = now.strftime("%Y-%m")
 
         # Update daily global metrics
-        daily_key = f"global:daily:{date_str}"
+        daily_key = self.get_global_daily_key(date_str)
         self._increment_metrics(daily_key, usage)
 
         # Update monthly global metrics
@@ -329,22 +358,16 @@ class UsageAnalytics:
             key: Redis key
             usage: Usage record
         """
-        # Get current metrics
-        metrics = self.redis.redis.hgetall(key)
-
-        # Convert bytes to strings
-        metrics = {k.decode("utf-8"): float(v.decode("utf-8")) for k, v in metrics.items()} if metrics else {}
-
-        # Update metrics
-        metrics["request_count"] = metrics.get("request_count", 0) + 1
-        metrics["input_tokens"] = metrics.get("input_tokens", 0) + usage.input_tokens
-        metrics["output_tokens"] = metrics.get("output_tokens", 0) + usage.output_tokens
-        metrics["total_tokens"] = metrics.get("total_tokens", 0) + usage.total_tokens
-        metrics["cost"] = metrics.get("cost", 0) + usage.cost
-
-        # Store updated metrics
-        self.redis.redis.hmset(key, metrics)
-        self.redis.redis.expire(key, self.ttl)
+        # Increment in place so concurrent writers and token quotas see
+        # consistent counters; floats keep existing values readable
+        pipe = self.redis.redis.pipeline(transaction=False)
+        pipe.hincrbyfloat(key, "request_count", 1)
+        pipe.hincrbyfloat(key, "input_tokens", usage.input_tokens)
+        pipe.hincrbyfloat(key, "output_tokens", usage.output_tokens)
+        pipe.hincrbyfloat(key, "total_tokens", usage.total_tokens)
+        pipe.hincrbyfloat(key, "cost", usage.cost)
+        pipe.expire(key, self.ttl)
+        pipe.execute()
 
     def get_user_metrics(
         self,
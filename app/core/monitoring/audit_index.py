@@ -0,0 +1,286 @@
+"""
+Audit log index for the MAGPIE platform.
+
+This module provides an embedded SQLite index of the audit log files. For each
+record, the index stores the file and byte range of the record together with
+the fields audit logs are searched by, so queries seek straight to matching
+records instead of parsing every daily file.
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterator, List, Optional, Sequence, Tuple
+
+from loguru import logger
+
+
+# Configure logger
+logger = logger.bind(name=__name__)
+
+# Name of the index database in the audit log directory
+INDEX_FILE = "audit_index.sqlite3"
+
+# Number of records indexed per transaction when catching up
+CATCH_UP_BATCH_SIZE = 10000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    file TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    timestamp REAL NOT NULL,
+    event_type TEXT,
+    user_id TEXT,
+    resource_type TEXT,
+    resource_id TEXT,
+    PRIMARY KEY (file, position)
+);
+CREATE INDEX IF NOT EXISTS records_timestamp ON records (timestamp);
+CREATE INDEX IF NOT EXISTS records_user ON records (user_id, timestamp);
+CREATE INDEX IF NOT EXISTS records_event_type ON records (event_type, timestamp);
+CREATE INDEX IF NOT EXISTS records_resource ON records (resource_type, resource_id, timestamp);
+CREATE TABLE IF NOT EXISTS files (
+    name TEXT PRIMARY KEY,
+    indexed_to INTEGER NOT NULL
+);
+"""
+
+# Location of a record in the audit log files: file name, byte offset and length
+RecordLocation = Tuple[str, int, int]
+
+
+def _to_epoch(timestamp: datetime) -> float:
+    """
+    Convert a timestamp to seconds since the epoch, treating naive times as UTC.
+
+    Args:
+        timestamp: Timestamp
+
+    Returns:
+        float: Seconds since the epoch
+    """
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.timestamp()
+
+
+def _enum_value(value: Any) -> Any:
+    """
+    Get the value of an enum member, or the value itself.
+
+    Args:
+        value: Enum member or plain value
+
+    Returns:
+        Any: Plain value
+    """
+    return getattr(value, "value", value)
+
+
+class AuditLogIndex:
+    """
+    SQLite index of the records in the audit log files.
+
+    The audit log writer adds each batch as it is written. Records the writer
+    did not index, such as those written before the index existed, are added
+    by catch_up, which reads each file from the offset indexed so far. Every
+    thread uses its own connection, and the database runs in WAL mode so
+    queries never block the writer.
+    """
+
+    def __init__(self, audit_log_dir: Path):
+        """
+        Initialize the audit log index.
+
+        Args:
+            audit_log_dir: Directory for audit logs
+        """
+        self.audit_log_dir = Path(audit_log_dir)
+        self.path = self.audit_log_dir / INDEX_FILE
+        self._local = threading.local()
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """
+        Get the connection of the current thread, creating the schema on first use.
+
+        Returns:
+            sqlite3.Connection: Database connection
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            self.audit_log_dir.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(str(self.path), timeout=10)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def add(self, file_name: str, start: int, records: Sequence[Any], lines: Sequence[bytes]) -> None:
+        """
+        Index a batch of records appended to an audit log file.
+
+        Args:
+            file_name: Name of the audit log file
+            start: Byte offset the batch was written at
+            records: Audit log records
+            lines: Encoded lines of the records, in the same order
+        """
+        rows = []
+        position = start
+        for record, line in zip(records, lines):
+            rows.append((
+                file_name,
+                position,
+                len(line),
+                _to_epoch(record.timestamp),
+                _enum_value(record.event_type),
+                record.user_id,
+                record.resource_type,
+                record.resource_id,
+            ))
+            position += len(line)
+
+        connection = self._get_connection()
+        with connection:
+            connection.executemany("INSERT OR IGNORE INTO records VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+            # Only advance over contiguous records, so catch_up fills any gap
+            connection.execute(
+                "UPDATE files SET indexed_to = ? WHERE name = ? AND indexed_to = ?",
+                (position, file_name, start),
+            )
+
+    def catch_up(self) -> None:
+        """
+        Index records missing from the index and drop records of removed files.
+        """
+        connection = self._get_connection()
+        indexed = dict(connection.execute("SELECT name, indexed_to FROM files"))
+        files = sorted(self.audit_log_dir.glob("audit_*.log"))
+
+        removed = set(indexed) - {path.name for path in files}
+        if removed:
+            with connection:
+                for name in removed:
+                    connection.execute("DELETE FROM records WHERE file = ?", (name,))
+                    connection.execute("DELETE FROM files WHERE name = ?", (name,))
+
+        for path in files:
+            if path.stat().st_size > indexed.get(path.name, 0):
+                self.catch_up_file(path)
+
+    def catch_up_file(self, path: Path) -> None:
+        """
+        Index the records of an audit log file after the offset indexed so far.
+
+        Args:
+            path: Audit log file
+        """
+        connection = self._get_connection()
+        row = connection.execute("SELECT indexed_to FROM files WHERE name = ?", (path.name,)).fetchone()
+        position = row[0] if row else 0
+
+        rows: List[Tuple[Any, ...]] = []
+        with open(path, "rb") as f:
+            f.seek(position)
+            for line in f:
+                # Leave a record that is still being written for later
+                if not line.endswith(b"\n"):
+                    break
+
+                try:
+                    data = json.loads(line)
+                    rows.append((
+                        path.name,
+                        position,
+                        len(line),
+                        _to_epoch(datetime.fromisoformat(data["timestamp"])),
+                        data.get("event_type"),
+                        data.get("user_id"),
+                        data.get("resource_type"),
+                        data.get("resource_id"),
+                    ))
+                except (ValueError, KeyError, TypeError):
+                    # Unreadable lines are reported by verification, not indexed
+                    pass
+                position += len(line)
+
+                if len(rows) >= CATCH_UP_BATCH_SIZE:
+                    self._insert(connection, path.name, rows, position)
+                    rows = []
+
+        self._insert(connection, path.name, rows, position)
+
+    @staticmethod
+    def _insert(connection: sqlite3.Connection, file_name: str, rows: List[Tuple[Any, ...]], indexed_to: int) -> None:
+        """
+        Insert index rows and record the offset indexed up to.
+
+        Args:
+            connection: Database connection
+            file_name: Name of the audit log file
+            rows: Index rows
+            indexed_to: Byte offset up to which the file is indexed
+        """
+        with connection:
+            connection.executemany("INSERT OR IGNORE INTO records VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            connection.execute(
+                "INSERT INTO files (name, indexed_to) VALUES (?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET indexed_to = MAX(indexed_to, excluded.indexed_to)",
+                (file_name, indexed_to),
+            )
+
+    def search(
+        self,
+        event_type: Optional[Any] = None,
+        user_id: Optional[str] = None,
+        resource_type: Optional[str] = None,
+        resource_id: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+    ) -> Iterator[RecordLocation]:
+        """
+        Find matching records, newest first.
+
+        Args:
+            event_type: Filter by event type
+            user_id: Filter by user ID
+            resource_type: Filter by resource type
+            resource_id: Filter by resource ID
+            start_date: Start date for filtering
+            end_date: End date for filtering
+
+        Returns:
+            Iterator[RecordLocation]: File, offset and length of each matching record
+        """
+        clauses = []
+        params: List[Any] = []
+        for column, value in (
+            ("event_type", _enum_value(event_type)),
+            ("user_id", user_id),
+            ("resource_type", resource_type),
+            ("resource_id", resource_id),
+        ):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if start_date is not None:
+            clauses.append("timestamp >= ?")
+            params.append(_to_epoch(start_date))
+        if end_date is not None:
+            clauses.append("timestamp <= ?")
+            params.append(_to_epoch(end_date))
+
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        cursor = self._get_connection().execute(
+            f"SELECT file, position, length FROM records{where} ORDER BY timestamp DESC",
+            params,
+        )
+        try:
+            yield from cursor
+        finally:
+            cursor.close()
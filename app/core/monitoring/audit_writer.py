@@ -0,0 +1,632 @@
+"""
+Audit log writer for the MAGPIE platform.
+
+This module provides a background writer for audit log records. Recording an
+audit log on the request path only enqueues the record; a worker thread
+appends records to the daily audit file in batches, links each record to the
+previous one with a hash chain, keeps the audit log index up to date and
+periodically writes checkpoints of the chain head. Writers in different
+processes share the audit files through an exclusive lock on the directory.
+"""
+
+import fcntl
+import json
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from loguru import logger
+
+
+# Configure logger
+logger = logger.bind(name=__name__)
+
+# Name of the checkpoint file in the audit log directory
+CHECKPOINT_FILE = "checkpoints.jsonl"
+
+# Name of the file locked by writers while appending to the audit files
+LOCK_FILE = "audit.lock"
+
+
+def get_audit_log_file(audit_log_dir: Path, now: Optional[datetime] = None) -> Path:
+    """
+    Get the daily audit log file.
+
+    Args:
+        audit_log_dir: Directory for audit logs
+        now: Time to get the file for (default: now)
+
+    Returns:
+        Path: Path of the audit log file
+    """
+    now = now or datetime.now(timezone.utc)
+    return audit_log_dir / f"audit_{now.strftime('%Y%m%d')}.log"
+
+
+def read_last_checkpoint(audit_log_dir: Path) -> Optional[Dict[str, Any]]:
+    """
+    Read the most recent checkpoint of the hash chain.
+
+    Args:
+        audit_log_dir: Directory for audit logs
+
+    Returns:
+        Optional[Dict[str, Any]]: Checkpoint with the file, offset and hash of the
+            chain head, or None if no checkpoint was written
+    """
+    checkpoint_file = audit_log_dir / CHECKPOINT_FILE
+    if not checkpoint_file.exists():
+        return None
+
+    checkpoint = None
+    with open(checkpoint_file, "rb") as f:
+        for line in f:
+            try:
+                checkpoint = json.loads(line)
+            except ValueError:
+                # Ignore a checkpoint cut short by a crash
+                continue
+    return checkpoint
+
+
+def read_last_hash(path: Path, offset: int = 0) -> Tuple[Optional[str], int]:
+    """
+    Read the hash of the last complete record in an audit log file.
+
+    Args:
+        path: Audit log file
+        offset: Byte offset to start reading from
+
+    Returns:
+        Tuple[Optional[str], int]: Hash of the last record, or None if there is
+            none, and the byte offset after the last complete record
+    """
+    last_hash = None
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            offset += len(line)
+            try:
+                last_hash = json.loads(line).get("hash") or last_hash
+            except ValueError:
+                continue
+    return last_hash, offset
+
+
+class AuditLogWriter:
+    """
+    Background writer that appends audit log records to the daily audit file.
+
+    Records are placed on a bounded queue without blocking the caller, and
+    are dropped and counted when it is full. A worker thread writes them in
+    batches of up to batch_size records, at least every flush_interval_ms.
+    Written data is fsynced at most every fsync_interval seconds and always
+    before a checkpoint or on stop, so a crash loses at most that window.
+
+    Each record stores the hash of the record written before it, so removing,
+    reordering or rewriting a record breaks the chain. Every
+    checkpoint_interval records, the chain head is appended to the checkpoint
+    file, which lets a restarted writer continue the chain without reading
+    whole audit files.
+
+    Writers in several processes, such as the workers of one server, can
+    share an audit directory. Each batch is appended while holding an
+    exclusive lock on the directory, after reading the records the other
+    writers appended since, so all writers extend a single chain.
+
+    A batch that fails to write with an I/O error, such as a full disk, is
+    truncated from the file and retried with exponential backoff until it is
+    written. Meanwhile new records wait in the queue, or are dropped and
+    counted once it is full.
+    """
+
+    def __init__(
+        self,
+        audit_log_dir: Path,
+        redis_cache: Optional[Any] = None,
+        index: Optional[Any] = None,
+        ttl: int = 2592000,
+        batch_size: int = 100,
+        flush_interval_ms: int = 200,
+        fsync_interval: float = 1.0,
+        checkpoint_interval: int = 1000,
+        max_queue_size: int = 100000,
+        retry_delay: float = 0.1,
+        max_retry_delay: float = 5.0,
+    ):
+        """
+        Initialize the audit log writer.
+
+        Args:
+            audit_log_dir: Directory for audit logs
+            redis_cache: Redis cache to also store records in, if any
+            index: Audit log index to add written records to, if any
+            ttl: Time-to-live for audit logs in Redis
+            batch_size: Maximum number of records per write
+            flush_interval_ms: Maximum time a record waits before being written
+            fsync_interval: Maximum seconds between fsyncs of written records
+            checkpoint_interval: Number of records between checkpoints
+            max_queue_size: Maximum number of queued records
+            retry_delay: Seconds before the first retry of a failed write
+            max_retry_delay: Maximum seconds between retries of a failed write
+        """
+        self.audit_log_dir = Path(audit_log_dir)
+        self.redis_cache = redis_cache
+        self.index = index
+        self.ttl = ttl
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.fsync_interval = fsync_interval
+        self.checkpoint_interval = checkpoint_interval
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue_size)
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+        # Only accessed by the worker thread
+        self._file: Optional[BinaryIO] = None
+        self._file_path: Optional[Path] = None
+        self._lock_file: Optional[BinaryIO] = None
+        self._head_hash: Optional[str] = None
+        self._head_file: Optional[str] = None
+        self._head_offset = 0
+        self._unsynced = False
+        self._last_fsync = time.monotonic()
+        self._records_since_checkpoint = 0
+
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "enqueued": 0,
+            "written": 0,
+            "dropped": 0,
+            "failed": 0,
+            "retries": 0,
+            "batches": 0,
+            "checkpoints": 0,
+        }
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the worker thread is running."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """
+        Start the worker thread.
+        """
+        with self._lock:
+            if self.is_running:
+                return
+
+            self._stop_event.clear()
+            self._thread = threading.Thread(
+                target=self._run,
+                name="audit-log-writer",
+                daemon=True,
+            )
+            self._thread.start()
+            logger.info("Audit log writer started")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Stop the worker thread after writing all queued records.
+
+        If the worker does not finish within the timeout, its handle is kept,
+        so no second worker is started while it is still writing the chain.
+
+        Args:
+            timeout: Maximum time to wait for the worker in seconds
+        """
+        with self._lock:
+            if not self.is_running:
+                return
+
+            self._stop_event.set()
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                logger.warning(f"Audit log writer did not stop within {timeout}s, {self._queue.qsize()} records pending")
+                return
+
+            logger.info("Audit log writer stopped")
+            self._thread = None
+
+    def enqueue(self, record: Any) -> bool:
+        """
+        Queue an audit log record for writing.
+
+        Starts the worker thread on first use. Never blocks: if the queue is
+        full, the record is dropped and counted. The writer sets the record's
+        prev_hash and hash when it is written.
+
+        Args:
+            record: Audit log record
+
+        Returns:
+            bool: True if the record was queued, False if it was dropped
+        """
+        if not self.is_running:
+            self.start()
+
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            dropped = self._increment("dropped")
+            logger.error(f"Audit log queue full, record {record.id} dropped ({dropped} dropped in total)")
+            return False
+
+        self._increment("enqueued")
+        return True
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Wait until all queued records have been written.
+
+        Args:
+            timeout: Maximum time to wait in seconds
+
+        Returns:
+            bool: True if all records were written, False on timeout
+        """
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() >= deadline or not self.is_running:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get writer statistics.
+
+        Returns:
+            Dict[str, int]: Counts of enqueued, written, dropped and failed
+                records and of retried writes
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["queued"] = self._queue.qsize()
+        return stats
+
+    def _increment(self, name: str, amount: int = 1) -> int:
+        """
+        Increment a statistics counter.
+
+        Args:
+            name: Counter name
+            amount: Amount to add
+
+        Returns:
+            int: New counter value
+        """
+        with self._stats_lock:
+            self._stats[name] += amount
+            return self._stats[name]
+
+    def _run(self) -> None:
+        """
+        Worker loop: collect batches and write them until stopped and drained.
+        """
+        self._recover_chain_head()
+
+        while not (self._stop_event.is_set() and self._queue.empty()):
+            batch = self._collect_batch()
+            if batch:
+                self._write_batch(batch)
+            self._sync()
+
+        self._close()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def _collect_batch(self) -> List[Any]:
+        """
+        Collect up to batch_size records, waiting at most flush_interval.
+
+        Returns:
+            List[Any]: Collected records
+        """
+        batch: List[Any] = []
+        deadline = time.monotonic() + self.flush_interval
+
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or (self._stop_event.is_set() and self._queue.empty()):
+                break
+
+            try:
+                batch.append(self._queue.get(timeout=min(remaining, 0.1)))
+            except queue.Empty:
+                continue
+
+        return batch
+
+    def _write_batch(self, batch: List[Any]) -> None:
+        """
+        Write a batch of records, retrying until it is written.
+
+        Args:
+            batch: Records to write
+        """
+        delay = self.retry_delay
+        try:
+            while True:
+                try:
+                    start, lines = self._append_batch(batch)
+                    break
+                except OSError as e:
+                    self._increment("retries")
+                    logger.error(f"Failed to write {len(batch)} audit log records, retrying in {delay:.1f}s: {e}")
+                    time.sleep(delay)
+                    delay = min(delay * 2, self.max_retry_delay)
+        except Exception as e:
+            # Records that cannot be chained would fail on every retry
+            self._increment("failed", len(batch))
+            logger.error(f"Failed to write {len(batch)} audit log records: {e}")
+            return
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+        self._records_since_checkpoint += len(batch)
+        self._increment("written", len(batch))
+        self._increment("batches")
+
+        if self.index is not None:
+            try:
+                self.index.add(self._file_path.name, start, batch, lines)
+            except Exception as e:
+                # Records missing from the index are added when it catches up
+                logger.error(f"Failed to index audit log records: {e}")
+
+        if self.redis_cache is not None:
+            try:
+                pipe = self.redis_cache.redis.pipeline(transaction=False)
+                for record, line in zip(batch, lines):
+                    pipe.set(f"audit:{record.id}", line.rstrip(b"\n"), ex=self.ttl)
+                pipe.execute()
+            except Exception as e:
+                # The audit file remains the source of truth
+                logger.error(f"Failed to store audit log records in Redis: {e}")
+
+    def _append_batch(self, batch: List[Any]) -> Tuple[int, List[bytes]]:
+        """
+        Chain a batch of records and append them in a single write.
+
+        A write that fails part way is truncated, so no unchained bytes are
+        left in the file.
+
+        Args:
+            batch: Records to write
+
+        Returns:
+            Tuple[int, List[bytes]]: Byte offset the batch was written at and
+                the encoded lines of the records
+
+        Raises:
+            OSError: If the batch could not be written
+        """
+        with self._locked():
+            path = get_audit_log_file(self.audit_log_dir)
+            if path != self._file_path:
+                self._open(path)
+            start = self._catch_up_chain_head()
+
+            # Link each record to the one before it
+            head_hash = self._head_hash
+            lines = []
+            for record in batch:
+                record.prev_hash = head_hash
+                record.hash = record._generate_hash()
+                head_hash = record.hash
+                lines.append((record.model_dump_json() + "\n").encode("utf-8"))
+
+            data = b"".join(lines)
+            try:
+                self._write_all(data)
+            except OSError:
+                self._truncate(start)
+                raise
+
+            self._head_hash = head_hash
+            self._head_file = path.name
+            self._head_offset = start + len(data)
+            self._unsynced = True
+            return start, lines
+
+    def _catch_up_chain_head(self) -> int:
+        """
+        Bring the chain head up to date with records appended by other writers.
+        The directory lock must be held.
+
+        Returns:
+            int: Size of the current audit file, where the next batch is written
+        """
+        size = os.fstat(self._file.fileno()).st_size
+        if self._head_file == self._file_path.name and self._head_offset == size:
+            return size
+
+        # Terminate a record cut short by a crash, so it cannot merge with the next one
+        if size > 0:
+            with open(self._file_path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    self._write_all(b"\n")
+                    size += 1
+
+        self._read_chain_head(self._head_file, self._head_offset)
+        return size
+
+    def _write_all(self, data: bytes) -> None:
+        """
+        Write data to the current audit file, continuing after short writes.
+
+        Args:
+            data: Data to write
+        """
+        view = memoryview(data)
+        while view:
+            written = self._file.write(view)
+            view = view[written:]
+
+    def _truncate(self, size: int) -> None:
+        """
+        Remove a partially written batch and close the file, so the retry
+        starts from a fresh handle.
+
+        Args:
+            size: Size of the file before the batch was written
+        """
+        try:
+            self._file.truncate(size)
+        except OSError as e:
+            # The next write terminates the partial record instead
+            logger.error(f"Failed to truncate audit log file {self._file_path}: {e}")
+        self._close()
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """
+        Hold the exclusive lock of the audit log directory.
+
+        Returns:
+            Iterator[None]: Context in which the lock is held
+        """
+        if self._lock_file is None:
+            self.audit_log_dir.mkdir(parents=True, exist_ok=True)
+            self._lock_file = open(self.audit_log_dir / LOCK_FILE, "ab")
+
+        fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _sync(self, force: bool = False) -> None:
+        """
+        Fsync written records when the fsync interval has passed and write a
+        checkpoint every checkpoint_interval records.
+
+        Args:
+            force: Whether to fsync and checkpoint regardless of the cadence
+        """
+        if self._file is None:
+            return
+
+        try:
+            now = time.monotonic()
+            if self._unsynced and (force or now - self._last_fsync >= self.fsync_interval):
+                os.fsync(self._file.fileno())
+                self._unsynced = False
+                self._last_fsync = now
+
+            checkpoint_due = self._records_since_checkpoint >= self.checkpoint_interval
+            if self._records_since_checkpoint and (force or (checkpoint_due and not self._unsynced)):
+                self._write_checkpoint()
+        except Exception as e:
+            logger.error(f"Failed to sync audit log file {self._file_path}: {e}")
+
+    def _write_checkpoint(self) -> None:
+        """
+        Append the current chain head to the checkpoint file. Records up to the
+        checkpoint must have been fsynced.
+        """
+        checkpoint = {
+            "file": self._head_file,
+            "offset": self._head_offset,
+            "hash": self._head_hash,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        }
+        with open(self.audit_log_dir / CHECKPOINT_FILE, "ab") as f:
+            f.write((json.dumps(checkpoint) + "\n").encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+
+        self._records_since_checkpoint = 0
+        self._increment("checkpoints")
+
+    def _open(self, path: Path) -> None:
+        """
+        Open an audit log file for appending, closing the current one.
+
+        Args:
+            path: Audit log file
+        """
+        self._close()
+
+        # Unbuffered, so a failed write leaves nothing behind to be flushed later
+        self.audit_log_dir.mkdir(parents=True, exist_ok=True)
+        self._file = open(path, "ab", buffering=0)
+        self._file_path = path
+
+        # Index what is already in the file, so batches are added contiguously
+        if self.index is not None:
+            try:
+                self.index.catch_up_file(path)
+            except Exception as e:
+                logger.error(f"Failed to index audit log file {path}: {e}")
+
+    def _close(self) -> None:
+        """
+        Fsync, checkpoint and close the current audit log file.
+        """
+        if self._file is None:
+            return
+
+        self._sync(force=True)
+        try:
+            self._file.close()
+        except Exception as e:
+            logger.error(f"Failed to close audit log file {self._file_path}: {e}")
+        self._file = None
+        self._file_path = None
+
+    def _recover_chain_head(self) -> None:
+        """
+        Find the hash of the last written record to continue the chain from.
+
+        Reading starts at the last checkpoint, so only records written after
+        it are scanned. Without a checkpoint, the latest audit file is read.
+        """
+        try:
+            with self._locked():
+                checkpoint = read_last_checkpoint(self.audit_log_dir)
+                if checkpoint and (self.audit_log_dir / checkpoint["file"]).exists():
+                    self._head_hash = checkpoint["hash"]
+                    self._read_chain_head(checkpoint["file"], checkpoint["offset"])
+                else:
+                    self._read_chain_head(None, 0)
+        except Exception as e:
+            # A broken link is reported by verification
+            logger.error(f"Failed to recover audit log chain head: {e}")
+
+    def _read_chain_head(self, file_name: Optional[str], offset: int) -> None:
+        """
+        Advance the chain head over the records written after a known position.
+
+        Args:
+            file_name: Audit log file of the position, or None to read the
+                latest audit log file with records
+            offset: Byte offset of the position in that file
+        """
+        files = sorted(self.audit_log_dir.glob("audit_*.log"))
+        if file_name is None:
+            files = [path for path in files if path.stat().st_size > 0][-1:]
+
+        for path in files:
+            if file_name is not None and path.name < file_name:
+                continue
+            head_hash, end = read_last_hash(path, offset if path.name == file_name else 0)
+            self._head_hash = head_hash or self._head_hash
+            self._head_file = path.name
+            self._head_offset = end
@@ -5,18 +5,24 @@ This module provides functionality for tracking, categorizing, and alerting on e
 """
 
 import json
+import threading
 import time
 import traceback
+from collections import deque
 from datetime import datetime, timezone, timedelta
 from enum import Enum
-from typing import Dict, List, Optional, Any, Union, Callable
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Any, Set, Tuple, Union, Callable
 
 from loguru import logger
 from pydantic import BaseModel, Field
 
 from app.core.cache.connection import RedisCache
 from app.core.config import settings
-from app.core.monitoring.metrics import record_count
+from app.core.monitoring.metrics import PerformanceMetric, record_metrics
+
+
+# Prefix of the hash fields holding an error's context values
+CONTEXT_FIELD_PREFIX = "context:"
 
 
 class ErrorSeverity(str, Enum):
@@ -116,8 +122,9 @@ class AlertConfig(BaseModel):
         enabled: Whether alerts are enabled
         min_severity: Minimum severity level for alerts
         cooldown_minutes: Cooldown period between alerts for the same error
-        rate_threshold: Number of errors per minute to trigger a rate alert
-        rate_window_minutes: Time window for rate alerts
+        rate_threshold: Occurrences of an error per minute above which the
+            cooldown is shortened to the rate window, 0 to disable
+        rate_window_minutes: Time window the rate is measured over
         notification_channels: Channels to use for notifications
     """
 
@@ -134,7 +141,13 @@ class ErrorTracker:
     Tracker for error events.
 
     This class provides methods for tracking, categorizing, and alerting on errors.
-    It uses Redis for storing error events.
+    Occurrences are aggregated in process by error ID and flushed to Redis every
+    flush_interval seconds, so an error firing thousands of times per second
+    costs one pipeline per interval instead of a read and a write per
+    occurrence. Each error is stored as a Redis hash whose count is updated
+    with HINCRBY and whose first-seen fields are set with HSETNX, so instances
+    never overwrite each other's updates. A sorted set indexes errors by
+    last_seen for listing.
     """
 
     def __init__(
@@ -142,6 +155,8 @@ class ErrorTracker:
         prefix: str = "errors",
         ttl: int = 604800,  # 7 days
         alert_config: Optional[AlertConfig] = None,
+        flush_interval: float = 1.0,
+        enabled: Optional[bool] = None,
     ):
         """
         Initialize the error tracker.
@@ -150,9 +165,12 @@ class ErrorTracker:
             prefix: Prefix for Redis keys
             ttl: Time-to-live for errors in seconds (default: 7 days)
             alert_config: Configuration for alerts
+            flush_interval: Seconds between flushes of aggregated occurrences to Redis
+            enabled: Whether errors are stored in Redis, by default outside testing
         """
         self.prefix = prefix
         self.ttl = ttl
+        self.flush_interval = flush_interval
         self.logger = logger.bind(name=__name__)
         self.alert_config = alert_config or AlertConfig()
 
@@ -161,8 +179,23 @@ class ErrorTracker:
             "log": self._notify_log,
         }
 
+        # Occurrences collected since the last flush, by error ID
+        self._pending: Dict[str, ErrorEvent] = {}
+        self._pending_alerts: Set[str] = set()
+        self._pending_lock = threading.Lock()
+        self._last_alert_times: Dict[str, float] = {}
+
+        # Flushed occurrences per error ID as (monotonic time, count), for rate alerts
+        self._flushed_counts: Dict[str, Deque[Tuple[float, int]]] = {}
+
+        self._flush_thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._thread_lock = threading.Lock()
+
         # Initialize Redis cache if not in testing mode
-        if settings.ENVIRONMENT != "testing":
+        if enabled is None:
+            enabled = settings.ENVIRONMENT != "testing"
+        if enabled:
             try:
                 self.redis = RedisCache(prefix=prefix)
                 self.enabled = True
@@ -187,6 +220,9 @@ class ErrorTracker:
         """
         Track an error event.
 
+        The occurrence is added to the error's in-process aggregate, which is
+        written to Redis and evaluated for alerts on the next flush.
+
         Args:
             message: Error message
             exception: Exception object
@@ -199,7 +235,8 @@ class ErrorTracker:
             alert: Whether to trigger alerts for this error
 
         Returns:
-            Optional[ErrorEvent]: The error event, or None if tracking is disabled
+            Optional[ErrorEvent]: The error event, with the number of occurrences
+                not yet flushed as its count, or None if tracking is disabled
         """
         if not self.enabled:
             # Log the error even if Redis is not available
@@ -212,63 +249,219 @@ class ErrorTracker:
             # Generate error ID based on exception type, message, and component
             exception_type = type(exception).__name__ if exception else "None"
             error_id = self._generate_error_id(exception_type, message, component)
+            now = datetime.now(timezone.utc)
+
+            with self._pending_lock:
+                error_event = self._pending.get(error_id)
+                if error_event is None:
+                    error_event = ErrorEvent(
+                        id=error_id,
+                        message=message,
+                        exception_type=exception_type,
+                        traceback=traceback.format_exc() if exception else None,
+                        timestamp=now,
+                        severity=severity,
+                        category=category,
+                        component=component,
+                        user_id=user_id,
+                        request_id=request_id,
+                        count=0,
+                        first_seen=now,
+                        last_seen=now,
+                    )
+                    self._pending[error_id] = error_event
+
+                error_event.count += 1
+                error_event.last_seen = now
+                if context:
+                    error_event.context.update(context)
+                if alert:
+                    self._pending_alerts.add(error_id)
+
+                result = error_event.model_copy(update={"context": dict(error_event.context)})
+
+            self._start_flusher()
+            return result
+        except Exception as e:
+            # Log error if tracking fails
+            self.logger.error(f"Failed to track error: {e}")
+            self._log_error(
+                message, exception, severity, category, component, user_id, request_id, context
+            )
+            return None
 
-            # Check if error already exists
-            existing_error = self._get_error(error_id)
+    def flush(self) -> None:
+        """
+        Write the occurrences collected since the last flush to Redis and
+        evaluate alerts on the aggregated counts.
 
-            if existing_error:
-                # Update existing error
-                existing_error.count += 1
-                existing_error.last_seen = datetime.now(timezone.utc)
+        If the write fails, the occurrences are merged back into the pending
+        aggregates and written by the next flush.
+        """
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+            pending_alerts, self._pending_alerts = self._pending_alerts, set()
 
-                # Update context if provided
-                if context:
-                    existing_error.context.update(context)
+        if not pending:
+            return
 
-                # Store updated error
-                self._store_error(existing_error)
+        try:
+            index_key = self._get_index_key()
+            pipe = self.redis.redis.pipeline(transaction=False)
+            positions = {}
+            position = 0
+            for error in pending.values():
+                key = self._get_error_key(error.id)
+
+                # Fields describing the first occurrence are only set once
+                static_fields = self._get_static_fields(error)
+                pipe.hsetnx(key, "first_seen", error.first_seen.isoformat())
+                for field, value in static_fields.items():
+                    pipe.hsetnx(key, field, value)
+
+                pipe.hincrby(key, "count", error.count)
+                pipe.hset(key, mapping={
+                    "last_seen": error.last_seen.isoformat(),
+                    **{
+                        f"{CONTEXT_FIELD_PREFIX}{name}": json.dumps(value, default=str)
+                        for name, value in error.context.items()
+                    },
+                })
+                pipe.expire(key, self.ttl)
+                pipe.zadd(index_key, {error.id: error.last_seen.timestamp()})
+                positions[error.id] = (position, position + 1 + len(static_fields))
+                position += len(static_fields) + 5
+
+            # Drop index entries whose errors have expired
+            pipe.zremrangebyscore(index_key, "-inf", time.time() - self.ttl)
+            results = pipe.execute()
+        except Exception as e:
+            self.logger.error(f"Failed to flush {len(pending)} errors: {e}")
+            self._restore_pending(pending, pending_alerts)
+            return
+
+        self._record_error_metrics(pending.values())
+        rates = self._update_rates(pending.values())
+
+        for error in pending.values():
+            if error.id not in pending_alerts:
+                continue
+
+            first_seen_position, count_position = positions[error.id]
+            is_new = bool(results[first_seen_position])
+            error.count = int(results[count_position])
+            if self._should_alert(error, is_new=is_new, rate=rates.get(error.id, 0.0)):
+                self._last_alert_times[error.id] = time.monotonic()
+                self._send_alert(error)
+
+        # Forget alert times past their cooldown
+        cooldown = max(self.alert_config.cooldown_minutes, self.alert_config.rate_window_minutes) * 60
+        expired = time.monotonic() - cooldown
+        self._last_alert_times = {
+            error_id: alert_time
+            for error_id, alert_time in self._last_alert_times.items()
+            if alert_time > expired
+        }
 
-                # Record metric
-                self._record_error_metric(existing_error)
+    def _restore_pending(self, pending: Dict[str, ErrorEvent], pending_alerts: Set[str]) -> None:
+        """
+        Merge occurrences that could not be flushed back into the pending aggregates.
 
-                # Check if alert should be triggered
-                if alert and self._should_alert(existing_error):
-                    self._send_alert(existing_error)
+        Args:
+            pending: Aggregates taken by the failed flush, by error ID
+            pending_alerts: IDs of the errors to evaluate alerts for
+        """
+        with self._pending_lock:
+            for error_id, error in pending.items():
+                newer = self._pending.get(error_id)
+                if newer is not None:
+                    error.count += newer.count
+                    error.last_seen = newer.last_seen
+                    error.context.update(newer.context)
+                self._pending[error_id] = error
+            self._pending_alerts |= pending_alerts
+
+    def _update_rates(self, errors: Iterable[ErrorEvent]) -> Dict[str, float]:
+        """
+        Add flushed occurrences to the rate windows and get the errors' rates.
 
-                return existing_error
-            else:
-                # Create new error event
-                error_event = ErrorEvent(
-                    id=error_id,
-                    message=message,
-                    exception_type=exception_type,
-                    traceback=traceback.format_exc() if exception else None,
-                    severity=severity,
-                    category=category,
-                    component=component,
-                    user_id=user_id,
-                    request_id=request_id,
-                    context=context or {},
-                )
+        Rates are measured over the occurrences flushed by this instance.
 
-                # Store error
-                self._store_error(error_event)
+        Args:
+            errors: Flushed error events, with their occurrences since the last flush as count
 
-                # Record metric
-                self._record_error_metric(error_event)
+        Returns:
+            Dict[str, float]: Occurrences per minute over the rate window, by error ID
+        """
+        window_minutes = self.alert_config.rate_window_minutes
+        if self.alert_config.rate_threshold <= 0 or window_minutes <= 0:
+            self._flushed_counts.clear()
+            return {}
+
+        now = time.monotonic()
+        for error in errors:
+            self._flushed_counts.setdefault(error.id, deque()).append((now, error.count))
+
+        expired = now - window_minutes * 60
+        rates = {}
+        for error_id in list(self._flushed_counts):
+            counts = self._flushed_counts[error_id]
+            while counts and counts[0][0] <= expired:
+                counts.popleft()
+            if not counts:
+                del self._flushed_counts[error_id]
+                continue
+            rates[error_id] = sum(count for _, count in counts) / window_minutes
+        return rates
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """
+        Stop the flush thread and flush the remaining occurrences.
 
-                # Check if alert should be triggered
-                if alert and self._should_alert(error_event):
-                    self._send_alert(error_event)
+        Args:
+            timeout: Maximum time to wait for the flush thread in seconds
+        """
+        with self._thread_lock:
+            if self._flush_thread is not None:
+                self._stop_event.set()
+                self._flush_thread.join(timeout)
+                if self._flush_thread.is_alive():
+                    # Keep the handle, so no second flusher starts while it runs
+                    self.logger.warning(f"Error tracker flusher did not stop within {timeout}s")
+                else:
+                    self._flush_thread = None
 
-                return error_event
-        except Exception as e:
-            # Log error if tracking fails
-            self.logger.error(f"Failed to track error: {e}")
-            self._log_error(
-                message, exception, severity, category, component, user_id, request_id, context
+        if self.enabled:
+            self.flush()
+
+    def _start_flusher(self) -> None:
+        """
+        Start the flush thread if it is not running.
+        """
+        if self._flush_thread is not None and self._flush_thread.is_alive():
+            return
+
+        with self._thread_lock:
+            if self._flush_thread is not None and self._flush_thread.is_alive():
+                return
+
+            self._stop_event.clear()
+            self._flush_thread = threading.Thread(
+                target=self._run_flusher,
+                name="error-tracker-flush",
+                daemon=True,
             )
-            return None
+            self._flush_thread.start()
+
+    def _run_flusher(self) -> None:
+        """
+        Flush loop: flush every flush_interval until stopped.
+        """
+        while not self._stop_event.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                self.logger.error(f"Failed to flush errors: {e}")
 
     def resolve_error(self, error_id: str) -> bool:
         """
@@ -284,24 +477,40 @@ class ErrorTracker:
             return False
 
         try:
-            # Get error
-            error = self._get_error(error_id)
-
-            if not error:
+            key = self._get_error_key(error_id)
+            if not self.redis.redis.exists(key):
                 return False
 
             # Mark as resolved
-            error.resolved = True
-            error.resolution_time = datetime.now(timezone.utc)
-
-            # Store updated error
-            self._store_error(error)
+            self.redis.redis.hset(key, mapping={
+                "resolved": 1,
+                "resolution_time": datetime.now(timezone.utc).isoformat(),
+            })
 
             return True
         except Exception as e:
             self.logger.error(f"Failed to resolve error: {e}")
             return False
 
+    def get_error(self, error_id: str) -> Optional[ErrorEvent]:
+        """
+        Get an error by ID.
+
+        Args:
+            error_id: Error ID
+
+        Returns:
+            Optional[ErrorEvent]: Error event, or None if not found
+        """
+        if not self.enabled:
+            return None
+
+        try:
+            return self._parse_error(self.redis.redis.hgetall(self._get_error_key(error_id)))
+        except Exception as e:
+            self.logger.error(f"Failed to get error: {e}")
+            return None
+
     def get_errors(
         self,
         severity: Optional[ErrorSeverity] = None,
@@ -313,15 +522,15 @@ class ErrorTracker:
         limit: int = 100,
     ) -> List[ErrorEvent]:
         """
-        Get error events from Redis.
+        Get error events from Redis, most recently seen first.
 
         Args:
             severity: Filter by severity level
             category: Filter by category
             component: Filter by component
             resolved: Filter by resolution status
-            start_time: Start time for filtering
-            end_time: End time for filtering
+            start_time: Start time for filtering by last occurrence
+            end_time: End time for filtering by last occurrence
             limit: Maximum number of errors to return
 
         Returns:
@@ -331,50 +540,14 @@ class ErrorTracker:
             return []
 
         try:
-            # Create pattern for keys
-            pattern = f"{self.prefix}:*"
-
-            # Get keys matching the pattern
-            keys = self.redis.redis.keys(pattern)
-
-            # Sort keys by timestamp (embedded in the key)
-            keys = sorted(keys, reverse=True)[:limit * 2]  # Get more than needed for filtering
-
-            # Get values for keys
-            if not keys:
-                return []
-
-            values = self.redis.redis.mget(keys)
-
-            # Parse values into errors
             errors = []
-            for value in values:
-                if value:
-                    try:
-                        error_dict = json.loads(value.decode("utf-8"))
-                        error = ErrorEvent.model_validate(error_dict)
-
-                        # Apply filters
-                        if severity and error.severity != severity:
-                            continue
-                        if category and error.category != category:
-                            continue
-                        if component and error.component != component:
-                            continue
-                        if resolved is not None and error.resolved != resolved:
-                            continue
-                        if start_time and error.timestamp < start_time:
-                            continue
-                        if end_time and error.timestamp > end_time:
-                            continue
-
-                        errors.append(error)
-
-                        # Check limit after filtering
-                        if len(errors) >= limit:
-                            break
-                    except Exception as e:
-                        self.logger.error(f"Failed to parse error: {e}")
+            for error in self._iter_errors(start_time, end_time, batch_size=max(limit, 10)):
+                if self._matches(error, severity, category, component, resolved):
+                    errors.append(error)
+
+                    # Check limit after filtering
+                    if len(errors) >= limit:
+                        break
 
             return errors
         except Exception as e:
@@ -398,8 +571,8 @@ class ErrorTracker:
             category: Filter by category
             component: Filter by component
             resolved: Filter by resolution status
-            start_time: Start time for filtering
-            end_time: End time for filtering
+            start_time: Start time for filtering by last occurrence
+            end_time: End time for filtering by last occurrence
 
         Returns:
             int: Count of error events
@@ -408,45 +581,15 @@ class ErrorTracker:
             return 0
 
         try:
-            # Create pattern for keys
-            pattern = f"{self.prefix}:*"
-
-            # Get keys matching the pattern
-            keys = self.redis.redis.keys(pattern)
-
-            # Get values for keys
-            if not keys:
-                return 0
-
-            values = self.redis.redis.mget(keys)
-
-            # Count errors matching filters
-            count = 0
-            for value in values:
-                if value:
-                    try:
-                        error_dict = json.loads(value.decode("utf-8"))
-                        error = ErrorEvent.model_validate(error_dict)
-
-                        # Apply filters
-                        if severity and error.severity != severity:
-                            continue
-                        if category and error.category != category:
-                            continue
-                        if component and error.component != component:
-                            continue
-                        if resolved is not None and error.resolved != resolved:
-                            continue
-                        if start_time and error.timestamp < start_time:
-                            continue
-                        if end_time and error.timestamp > end_time:
-                            continue
-
-                        count += 1
-                    except Exception as e:
-                        self.logger.error(f"Failed to parse error: {e}")
-
-            return count
+            # Without field filters the index alone has the answer
+            if severity is None and category is None and component is None and resolved is None:
+                min_score, max_score = self._get_score_range(start_time, end_time)
+                return self.redis.redis.zcount(self._get_index_key(), min_score, max_score)
+
+            return sum(
+                1 for error in self._iter_errors(start_time, end_time)
+                if self._matches(error, severity, category, component, resolved)
+            )
         except Exception as e:
             self.logger.error(f"Failed to get error count: {e}")
             return 0
@@ -529,88 +672,209 @@ class ErrorTracker:
         # Generate ID
         return f"{component}_{exception_type}_{message_part}"
 
-    def _get_error(self, error_id: str) -> Optional[ErrorEvent]:
+    def _get_error_key(self, error_id: str) -> str:
         """
-        Get an error by ID.
+        Get the Redis key of an error's hash.
 
         Args:
             error_id: Error ID
 
         Returns:
-            Optional[ErrorEvent]: Error event, or None if not found
+            str: Redis key
         """
-        if not self.enabled:
-            return None
+        return f"{self.prefix}:event:{error_id}"
 
-        try:
-            # Get error from Redis
-            key = f"{self.prefix}:{error_id}"
-            value = self.redis.redis.get(key)
+    def _get_index_key(self) -> str:
+        """
+        Get the Redis key of the sorted set of error IDs by last_seen.
 
-            if not value:
-                return None
+        Returns:
+            str: Redis key
+        """
+        return f"{self.prefix}:last_seen"
 
-            # Parse error
-            error_dict = json.loads(value.decode("utf-8"))
-            return ErrorEvent.model_validate(error_dict)
-        except Exception as e:
-            self.logger.error(f"Failed to get error: {e}")
+    @staticmethod
+    def _get_static_fields(error: ErrorEvent) -> Dict[str, str]:
+        """
+        Get the hash fields describing an error's first occurrence.
+
+        Args:
+            error: Error event
+
+        Returns:
+            Dict[str, str]: Field values, without fields that are not set
+        """
+        fields = {
+            "id": error.id,
+            "message": error.message,
+            "exception_type": error.exception_type,
+            "traceback": error.traceback,
+            "timestamp": error.timestamp.isoformat(),
+            "severity": error.severity.value,
+            "category": error.category.value,
+            "component": error.component,
+            "user_id": error.user_id,
+            "request_id": error.request_id,
+        }
+        return {field: value for field, value in fields.items() if value is not None}
+
+    @staticmethod
+    def _parse_error(data: Dict[Any, Any]) -> Optional[ErrorEvent]:
+        """
+        Parse an error from its Redis hash.
+
+        Args:
+            data: Hash fields and values
+
+        Returns:
+            Optional[ErrorEvent]: Error event, or None if the hash is empty
+        """
+        if not data:
             return None
 
-    def _store_error(self, error: ErrorEvent) -> bool:
+        fields = {}
+        context = {}
+        for field, value in data.items():
+            field = field.decode("utf-8") if isinstance(field, bytes) else field
+            value = value.decode("utf-8") if isinstance(value, bytes) else value
+            if field.startswith(CONTEXT_FIELD_PREFIX):
+                context[field[len(CONTEXT_FIELD_PREFIX):]] = json.loads(value)
+            else:
+                fields[field] = value
+
+        fields["resolved"] = fields.get("resolved") == "1"
+        return ErrorEvent.model_validate({**fields, "context": context})
+
+    @staticmethod
+    def _get_score_range(
+        start_time: Optional[datetime], end_time: Optional[datetime]
+    ) -> Tuple[Union[float, str], Union[float, str]]:
         """
-        Store an error in Redis.
+        Get the last_seen index score range for a time range.
 
         Args:
-            error: Error event
+            start_time: Start time
+            end_time: End time
 
         Returns:
-            bool: True if the error was stored, False otherwise
+            Tuple[Union[float, str], Union[float, str]]: Minimum and maximum scores
         """
-        if not self.enabled:
-            return False
+        return (
+            start_time.timestamp() if start_time else "-inf",
+            end_time.timestamp() if end_time else "+inf",
+        )
 
-        try:
-            # Store error in Redis
-            key = f"{self.prefix}:{error.id}"
-            self.redis.redis.set(
-                key,
-                error.model_dump_json(),
-                ex=self.ttl
+    def _iter_errors(
+        self,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        batch_size: int = 100,
+    ) -> Iterator[ErrorEvent]:
+        """
+        Iterate over errors last seen in a time range, most recently seen first.
+
+        Args:
+            start_time: Start time
+            end_time: End time
+            batch_size: Number of errors fetched per round trip
+
+        Returns:
+            Iterator[ErrorEvent]: Error events
+        """
+        min_score, max_score = self._get_score_range(start_time, end_time)
+        offset = 0
+        while True:
+            error_ids = self.redis.redis.zrevrangebyscore(
+                self._get_index_key(), max_score, min_score, start=offset, num=batch_size
             )
+            if not error_ids:
+                return
+            offset += len(error_ids)
+
+            pipe = self.redis.redis.pipeline(transaction=False)
+            for error_id in error_ids:
+                error_id = error_id.decode("utf-8") if isinstance(error_id, bytes) else error_id
+                pipe.hgetall(self._get_error_key(error_id))
+
+            for data in pipe.execute():
+                try:
+                    error = self._parse_error(data)
+                except Exception as e:
+                    self.logger.error(f"Failed to parse error: {e}")
+                    continue
+
+                # Errors expire before their index entries are dropped
+                if error is not None:
+                    yield error
+
+    @staticmethod
+    def _matches(
+        error: ErrorEvent,
+        severity: Optional[ErrorSeverity],
+        category: Optional[ErrorCategory],
+        component: Optional[str],
+        resolved: Optional[bool],
+    ) -> bool:
+        """
+        Check whether an error matches the filters.
 
-            return True
-        except Exception as e:
-            self.logger.error(f"Failed to store error: {e}")
+        Args:
+            error: Error event
+            severity: Filter by severity level
+            category: Filter by category
+            component: Filter by component
+            resolved: Filter by resolution status
+
+        Returns:
+            bool: True if the error matches all filters
+        """
+        if severity and error.severity != severity:
+            return False
+        if category and error.category != category:
             return False
+        if component and error.component != component:
+            return False
+        if resolved is not None and error.resolved != resolved:
+            return False
+        return True
 
-    def _record_error_metric(self, error: ErrorEvent) -> None:
+    def _record_error_metrics(self, errors: Iterable[ErrorEvent]) -> None:
         """
-        Record a metric for an error.
+        Record the occurrences of flushed errors as metrics in one batch.
 
         Args:
-            error: Error event
+            errors: Flushed error events, with their occurrences since the last flush as count
         """
         try:
-            # Record count metric
-            record_count(
-                name="error_events_total",
-                tags={
-                    "severity": error.severity,
-                    "category": error.category,
-                    "component": error.component,
-                    "exception_type": error.exception_type,
-                }
-            )
+            record_metrics([
+                PerformanceMetric(
+                    name="error_events_total",
+                    value=error.count,
+                    unit="count",
+                    tags={
+                        "severity": error.severity,
+                        "category": error.category,
+                        "component": error.component,
+                        "exception_type": error.exception_type,
+                    },
+                )
+                for error in errors
+            ])
         except Exception as e:
             self.logger.error(f"Failed to record error metric: {e}")
 
-    def _should_alert(self, error: ErrorEvent) -> bool:
+    def _should_alert(self, error: ErrorEvent, is_new: bool = False, rate: float = 0.0) -> bool:
         """
         Check if an alert should be triggered for an error.
 
+        Alerts are sent for the first occurrence of an error, and otherwise at
+        most once per cooldown period per instance. While the error's rate is
+        at or above the rate threshold, the cooldown is the rate window.
+
         Args:
-            error: Error event
+            error: Error event, with its total count
+            is_new: Whether the error was seen for the first time
+            rate: Occurrences of the error per minute over the rate window
 
         Returns:
             bool: True if an alert should be triggered, False otherwise
@@ -626,28 +890,15 @@ class ErrorTracker:
         if error_severity_index < min_severity_index:
             return False
 
-        # Check cooldown
-        if error.count > 1:
-            last_seen = error.last_seen
-            cooldown = timedelta(minutes=self.alert_config.cooldown_minutes)
-
-            if datetime.now(timezone.utc) - last_seen < cooldown:
-                return False
-
-        # Check error rate
-        if self.alert_config.rate_threshold > 0:
-            error_rate = self.get_error_rate(
-                window_minutes=self.alert_config.rate_window_minutes,
-                severity=error.severity,
-                category=error.category,
-                component=error.component,
-            )
-
-            if error_rate >= self.alert_config.rate_threshold:
-                return True
+        if is_new:
+            return True
 
-        # Alert on first occurrence or after cooldown
-        return True
+        # Check cooldown, shortened to the rate window for bursts
+        last_alert_time = self._last_alert_times.get(error.id)
+        cooldown = self.alert_config.cooldown_minutes * 60
+        if 0 < self.alert_config.rate_threshold <= rate:
+            cooldown = self.alert_config.rate_window_minutes * 60
+        return last_alert_time is None or time.monotonic() - last_alert_time >= cooldown
 
     def _send_alert(self, error: ErrorEvent) -> None:
         """
@@ -816,6 +1067,19 @@ def resolve_error(error_id: str) -> bool:
     return error_tracker.resolve_error(error_id)
 
 
+def get_error(error_id: str) -> Optional[ErrorEvent]:
+    """
+    Get an error by ID.
+
+    Args:
+        error_id: Error ID
+
+    Returns:
+        Optional[ErrorEvent]: Error event, or None if not found
+    """
+    return error_tracker.get_error(error_id)
+
+
 def get_errors(
     severity: Optional[ErrorSeverity] = None,
     category: Optional[ErrorCategory] = None,
@@ -904,3 +1168,13 @@ def register_notification_handler(
         handler: Handler function
     """
     error_tracker.register_notification_handler(channel, handler)
+
+
+def shutdown_error_tracker(timeout: float = 5.0) -> None:
+    """
+    Flush pending errors and stop the error tracker's flush thread.
+
+    Args:
+        timeout: Maximum time to wait for the flush thread in seconds
+    """
+    error_tracker.shutdown(timeout)
@@ -102,6 +102,36 @@ class MetricsCollector:
             self.logger.error(f"Failed to record metric: {e}")
             return False
     
+    def record_metrics(self, metrics: List[PerformanceMetric]) -> bool:
+        """
+        Record several performance metrics in one Redis round trip.
+        
+        Args:
+            metrics: Performance metrics to record
+            
+        Returns:
+            bool: True if the metrics were recorded successfully, False otherwise
+        """
+        if not self.enabled or not metrics:
+            return False
+        
+        try:
+            # Queue all writes on a pipeline so they are sent together
+            pipeline = self.redis.redis.pipeline(transaction=False)
+            for metric in metrics:
+                timestamp = int(metric.timestamp.timestamp() * 1000)
+                pipeline.set(
+                    f"{self.prefix}:{metric.name}:{timestamp}",
+                    metric.model_dump_json(),
+                    ex=self.ttl
+                )
+            pipeline.execute()
+            
+            return True
+        except Exception as e:
+            self.logger.error(f"Failed to record metrics: {e}")
+            return False
+    
     def record_timing(
         self,
         name: str,
@@ -246,6 +276,19 @@ def record_timing(
     return metrics_collector.record_timing(name, start_time, tags)
 
 
+def record_metrics(metrics: List[PerformanceMetric]) -> bool:
+    """
+    Record several performance metrics in one Redis round trip.
+    
+    Args:
+        metrics: Performance metrics to record
+        
+    Returns:
+        bool: True if the metrics were recorded successfully, False otherwise
+    """
+    return metrics_collector.record_metrics(metrics)
+
+
 def record_count(
     name: str,
     value: int = 1,
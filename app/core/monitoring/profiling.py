@@ -389,6 +389,8 @@ class PerformanceProfiler:
         completion_tokens: int,
         duration_ms: float,
         template_name: Optional[str] = None,
+        cached_tokens: int = 0,
+        cacheable_prefix_tokens: Optional[int] = None,
     ) -> None:
         """
         Record LLM request metric.
@@ -399,6 +401,8 @@ class PerformanceProfiler:
             completion_tokens: Number of completion tokens
             duration_ms: Duration in milliseconds
             template_name: Prompt template name
+            cached_tokens: Number of prompt tokens served from the provider cache
+            cacheable_prefix_tokens: Length of the stable prompt prefix, if known
         """
         if not self.enabled:
             return
@@ -438,6 +442,20 @@ class PerformanceProfiler:
             tags=tags,
         )
 
+        # Record prompt cache usage
+        record_count(
+            name="llm_cached_prompt_tokens_total",
+            value=cached_tokens,
+            tags=tags,
+        )
+
+        if cacheable_prefix_tokens is not None:
+            record_count(
+                name="llm_cacheable_prefix_tokens_total",
+                value=cacheable_prefix_tokens,
+                tags=tags,
+            )
+
     def record_cache_operation(
         self,
         operation: str,
@@ -736,6 +754,8 @@ def record_llm_request(
     completion_tokens: int,
     duration_ms: float,
     template_name: Optional[str] = None,
+    cached_tokens: int = 0,
+    cacheable_prefix_tokens: Optional[int] = None,
 ) -> None:
     """
     Record LLM request metric.
@@ -746,9 +766,17 @@ def record_llm_request(
         completion_tokens: Number of completion tokens
         duration_ms: Duration in milliseconds
         template_name: Prompt template name
+        cached_tokens: Number of prompt tokens served from the provider cache
+        cacheable_prefix_tokens: Length of the stable prompt prefix, if known
     """
     profiler.record_llm_request(
-        model, prompt_tokens, completion_tokens, duration_ms, template_name
+        model,
+        prompt_tokens,
+        completion_tokens,
+        duration_ms,
+        template_name,
+        cached_tokens,
+        cacheable_prefix_tokens,
     )
 
 
@@ -18,6 +18,11 @@ from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExport
 from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
 from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
 from opentelemetry.instrumentation.logging import LoggingInstrumentor
+from opentelemetry.instrumentation.propagators import (
+    ResponsePropagator,
+    default_setter,
+    set_global_response_propagator,
+)
 from opentelemetry.instrumentation.redis import RedisInstrumentor
 from opentelemetry.sdk.resources import Resource, SERVICE_NAME, DEPLOYMENT_ENVIRONMENT
 from opentelemetry.sdk.trace import TracerProvider
@@ -341,6 +346,52 @@ class TracingMiddleware(BaseHTTPMiddleware):
             return response
 
 
+class TraceparentResponsePropagator(ResponsePropagator):
+    """
+    Response propagator that adds the server span's traceparent header.
+
+    This keeps the header TracingMiddleware used to add, so clients can join
+    their spans to the server trace.
+    """
+
+    def __init__(self):
+        """
+        Initialize the propagator.
+        """
+        self.propagator = TraceContextTextMapPropagator()
+
+    def inject(self, carrier: Any, context: Optional[Any] = None, setter: Any = default_setter) -> None:
+        """
+        Inject the trace context into a response carrier.
+
+        Args:
+            carrier: Response carrier (an ASGI message for the FastAPI instrumentation)
+            context: Context holding the server span
+            setter: Setter used to add headers to the carrier
+        """
+        # ASGI responses only carry headers in the response start message
+        if isinstance(carrier, dict) and carrier.get("type", "http.response.start") != "http.response.start":
+            return
+
+        self.propagator.inject(carrier, context=context, setter=setter)
+
+
+def set_request_id_attribute(span: trace.Span, scope: Dict[str, Any]) -> None:
+    """
+    Add the request ID to the server span.
+
+    Used as the FastAPI instrumentation's server request hook. The request ID
+    is assigned by InstrumentationMiddleware, which wraps the instrumentation.
+
+    Args:
+        span: Server span
+        scope: ASGI scope of the request
+    """
+    request_id = scope.get("state", {}).get("request_id")
+    if request_id and span.is_recording():
+        span.set_attribute("http.request_id", request_id)
+
+
 def setup_tracing(app: FastAPI, config: Optional[TracingConfig] = None) -> None:
     """
     Set up distributed tracing for a FastAPI application.
@@ -366,8 +417,13 @@ def setup_tracing(app: FastAPI, config: Optional[TracingConfig] = None) -> None:
         logger.warning("Failed to initialize tracer provider")
         return
 
-    # Instrument FastAPI
-    FastAPIInstrumentor.instrument_app(app, tracer_provider=tracer_provider)
+    # Instrument FastAPI, returning the trace context in a traceparent response header
+    set_global_response_propagator(TraceparentResponsePropagator())
+    FastAPIInstrumentor.instrument_app(
+        app,
+        tracer_provider=tracer_provider,
+        server_request_hook=set_request_id_attribute,
+    )
 
     # Instrument HTTPX for outgoing requests
     HTTPXClientInstrumentor().instrument(tracer_provider=tracer_provider)
@@ -384,8 +440,10 @@ def setup_tracing(app: FastAPI, config: Optional[TracingConfig] = None) -> None:
         )
         logger.info("Logging instrumentation enabled")
 
-    # Add tracing middleware
-    app.add_middleware(TracingMiddleware)
+    # The FastAPI instrumentation already opens a server span per request as
+    # pure ASGI middleware, so TracingMiddleware is not added on top of it;
+    # the hook and response propagator above cover its request ID attribute
+    # and traceparent header
 
     logger.info(
         f"Distributed tracing set up successfully for {config.service_name} "
@@ -0,0 +1,242 @@
+"""
+Classification cache for the MAGPIE platform.
+
+This module provides a two-tier cache for request classifications: an
+in-process LRU in front of a Redis tier shared by all workers. The Redis tier
+uses the async connection pool, so lookups never block the event loop.
+"""
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from pydantic import ValidationError
+
+from app.core.cache.connection import RedisConnectionManager
+from app.core.cache.ttl import CacheTTLManager
+from app.core.config import settings
+from app.core.monitoring import record_cache_operation
+from app.models.orchestrator import AgentMetadata, RequestClassification
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+def compute_registry_version(agents: List[AgentMetadata]) -> str:
+    """
+    Compute a version stamp for the contents of the agent registry.
+
+    The stamp changes whenever an agent is added, removed or changed, so
+    cached classifications made against a different set of agents are not
+    reused.
+
+    Args:
+        agents: Available agent metadata
+
+    Returns:
+        str: Short version stamp
+    """
+    agents_data = sorted(
+        json.dumps(agent.model_dump(mode="json"), sort_keys=True)
+        for agent in agents
+    )
+    return hashlib.md5("\n".join(agents_data).encode()).hexdigest()[:12]
+
+
+class ClassificationCache:
+    """
+    Two-tier cache for request classifications.
+
+    Lookups check an in-process LRU first and fall back to Redis, so
+    classifications are shared across workers and survive orchestrator
+    rebuilds. Redis errors are logged and treated as misses.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1000,
+        ttl: Optional[int] = None,
+        use_redis: Optional[bool] = None,
+        prefix: str = "classification",
+    ):
+        """
+        Initialize the classification cache.
+
+        Args:
+            max_size: Maximum number of entries in the in-process tier
+            ttl: Time-to-live for Redis entries in seconds
+            use_redis: Whether to use the Redis tier (default: disabled in testing)
+            prefix: Prefix for Redis keys
+        """
+        self.max_size = max_size
+        self.prefix = prefix
+        self.ttl = ttl or CacheTTLManager.get_ttl("classification")
+        self._local: "OrderedDict[str, RequestClassification]" = OrderedDict()
+        self._stats: Dict[str, int] = {
+            "local_hits": 0,
+            "local_misses": 0,
+            "redis_hits": 0,
+            "redis_misses": 0,
+        }
+
+        if use_redis is None:
+            use_redis = settings.ENVIRONMENT != "testing"
+
+        self.redis: Optional[Any] = None
+        if use_redis:
+            try:
+                self.redis = RedisConnectionManager.get_async_connection()
+            except Exception as e:
+                logger.warning(f"Failed to initialize Redis for classification cache: {e}")
+
+    def __len__(self) -> int:
+        """Get the number of entries in the in-process tier."""
+        return len(self._local)
+
+    async def get(self, key: str) -> Optional[RequestClassification]:
+        """
+        Get a cached classification.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Optional[RequestClassification]: Cached classification or None if not found
+        """
+        start_time = time.time()
+        classification = self._local.get(key)
+        self._record_lookup("local", key, start_time, classification is not None)
+
+        if classification is not None:
+            self._local.move_to_end(key)
+            return classification
+
+        if self.redis is None:
+            return None
+
+        start_time = time.time()
+        classification = None
+        try:
+            cached = await self.redis.get(self._get_redis_key(key))
+        except Exception as e:
+            logger.error(f"Error getting cached classification from Redis: {e}")
+            cached = None
+        if cached is not None:
+            try:
+                classification = RequestClassification.model_validate_json(cached)
+            except ValidationError as e:
+                logger.warning(f"Discarding invalid cached classification: {e}")
+        self._record_lookup("redis", key, start_time, classification is not None)
+
+        if classification is not None:
+            self._set_local(key, classification)
+
+        return classification
+
+    async def set(self, key: str, classification: RequestClassification) -> None:
+        """
+        Cache a classification in both tiers.
+
+        Args:
+            key: Cache key
+            classification: Classification to cache
+        """
+        self._set_local(key, classification)
+
+        if self.redis is not None:
+            try:
+                await self.redis.set(self._get_redis_key(key), classification.model_dump_json(), ex=self.ttl)
+            except Exception as e:
+                logger.error(f"Error caching classification in Redis: {e}")
+
+    def clear(self) -> None:
+        """
+        Clear the in-process tier and reset statistics.
+
+        Redis entries are left to expire, and stale entries are never read
+        once the registry version changes.
+        """
+        self._local.clear()
+        for name in self._stats:
+            self._stats[name] = 0
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dict[str, float]: Hit and miss counts and hit rates per tier
+        """
+        stats: Dict[str, float] = dict(self._stats)
+        stats["size"] = len(self._local)
+        for tier in ("local", "redis"):
+            lookups = self._stats[f"{tier}_hits"] + self._stats[f"{tier}_misses"]
+            stats[f"{tier}_hit_rate"] = self._stats[f"{tier}_hits"] / lookups if lookups else 0.0
+        return stats
+
+    def _get_redis_key(self, key: str) -> str:
+        """
+        Get the prefixed Redis key.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            str: Prefixed key
+        """
+        return f"{self.prefix}:{key}"
+
+    def _set_local(self, key: str, classification: RequestClassification) -> None:
+        """
+        Add an entry to the in-process tier, evicting the least recently used.
+
+        Args:
+            key: Cache key
+            classification: Classification to cache
+        """
+        self._local[key] = classification
+        self._local.move_to_end(key)
+
+        while len(self._local) > self.max_size:
+            self._local.popitem(last=False)
+
+    def _record_lookup(self, tier: str, key: str, start_time: float, hit: bool) -> None:
+        """
+        Record a cache lookup in the statistics and metrics.
+
+        Args:
+            tier: Cache tier ("local" or "redis")
+            key: Cache key
+            start_time: Lookup start time
+            hit: Whether the lookup was a hit
+        """
+        self._stats[f"{tier}_hits" if hit else f"{tier}_misses"] += 1
+
+        try:
+            record_cache_operation(
+                operation="get",
+                key=f"classification_{tier}:{key}",
+                duration_ms=(time.time() - start_time) * 1000,
+                hit=hit,
+            )
+        except Exception as e:
+            logger.debug(f"Failed to record classification cache metrics: {e}")
+
+
+# Shared cache, so classifications outlive individual orchestrator instances
+_classification_cache: Optional[ClassificationCache] = None
+
+
+def get_classification_cache() -> ClassificationCache:
+    """
+    Get the shared classification cache.
+
+    Returns:
+        ClassificationCache: Shared classification cache
+    """
+    global _classification_cache
+    if _classification_cache is None:
+        _classification_cache = ClassificationCache()
+    return _classification_cache
@@ -4,14 +4,20 @@ Request classifier for the MAGPIE platform.
 This module provides functionality for classifying user requests
 to determine the appropriate agent type based on the content and intent.
 """
+import asyncio
 import hashlib
 import json
 import logging
 import re
 from enum import Enum
 from functools import lru_cache
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 
+from app.core.matching import KeywordMatcher, PatternMatcher
+from app.core.orchestrator.classification_cache import (
+    ClassificationCache,
+    compute_registry_version,
+)
 from app.models.conversation import AgentType
 from app.models.orchestrator import AgentMetadata, RequestClassification
 from app.services.llm_service import LLMService, ModelSize
@@ -19,6 +25,9 @@ from app.services.llm_service import LLMService, ModelSize
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Completion tokens budgeted per query in a batch classification prompt
+BATCH_TOKENS_PER_QUERY = 80
+
 
 class ContentType(str, Enum):
     """
@@ -31,48 +40,97 @@ class ContentType(str, Enum):
     MIXED = "mixed"
 
 
+# Keywords and phrases that indicate each agent type
+AGENT_KEYWORDS = {
+    AgentType.DOCUMENTATION: [
+        "document", "manual", "guide", "instruction", "reference", "find", "search", "where",
+        "how to find", "locate", "what does", "what is", "definition", "explain", "meaning",
+        "information about",
+    ],
+    AgentType.TROUBLESHOOTING: [
+        "troubleshoot", "problem", "issue", "error", "fault", "diagnose", "fix", "repair",
+        "resolve", "not working", "fails", "failed", "why is", "why does", "what causes",
+        "how to fix", "how to solve", "debug", "symptom",
+    ],
+    AgentType.MAINTENANCE: [
+        "maintenance", "procedure", "step", "process", "replace", "install", "remove",
+        "overhaul", "service", "inspection", "how to perform", "how to do", "how to replace",
+        "how to install", "how to remove", "how to service",
+    ],
+}
+
+AGENT_KEYWORD_MATCHER = KeywordMatcher(AGENT_KEYWORDS)
+
+# Content type patterns, checked in priority order
+CONTENT_TYPE_MATCHER = PatternMatcher({
+    ContentType.CODE: [
+        r'```[\s\S]*?```',  # Markdown code blocks
+        r'<code>[\s\S]*?</code>',  # HTML code tags
+        r'\b(function|def|class|import|from|var|const|let)\b.*[{(:;]',  # Programming keywords
+        r'[a-zA-Z0-9_]+\.[a-zA-Z0-9_]+\(.*\)',  # Method calls
+    ],
+    ContentType.STRUCTURED_DATA: [
+        r'{[\s\S]*?}',  # JSON-like objects
+        r'\[[\s\S]*?\]',  # Arrays
+        r'<[a-zA-Z0-9]+>[\s\S]*?</[a-zA-Z0-9]+>',  # XML-like tags
+        r'[a-zA-Z0-9_]+=["\'][^"\']*["\']',  # Key-value pairs
+        r'\|[\s\S]*?\|',  # Table-like structures
+    ],
+})
+
+
+@lru_cache(maxsize=1024)
+def detect_content_type(query: str) -> ContentType:
+    """
+    Detect the content type of a query.
+
+    Args:
+        query: User query
+
+    Returns:
+        ContentType: Detected content type
+    """
+    return CONTENT_TYPE_MATCHER.first_label(query) or ContentType.TEXT
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a query for cache lookups.
+
+    Case, repeated whitespace and trailing punctuation do not change the
+    classification, so queries differing only in these share a cache entry.
+
+    Args:
+        query: User query
+
+    Returns:
+        str: Normalized query
+    """
+    return " ".join(query.lower().split()).rstrip("?!. ")
+
+
 class RequestClassifier:
     """
     Classifier for determining the appropriate agent type for a request.
     """
 
-    def __init__(self, llm_service: LLMService, cache_size: int = 100):
+    def __init__(
+        self,
+        llm_service: LLMService,
+        cache_size: int = 100,
+        cache: Optional[ClassificationCache] = None,
+    ):
         """
         Initialize the request classifier.
 
         Args:
             llm_service: LLM service for classification
-            cache_size: Size of the classification cache
+            cache_size: Size of the in-process classification cache, if no cache is given
+            cache: Optional classification cache, shared with other classifiers
         """
         self.llm_service = llm_service
-        self._cache_size = cache_size
-        self._classification_cache = {}
-        self._keyword_patterns = self._initialize_keyword_patterns()
-
-    def _initialize_keyword_patterns(self) -> Dict[AgentType, List[re.Pattern]]:
-        """
-        Initialize keyword patterns for quick classification.
-
-        Returns:
-            Dict[AgentType, List[re.Pattern]]: Mapping of agent types to keyword patterns
-        """
-        patterns = {
-            AgentType.DOCUMENTATION: [
-                re.compile(r'\b(document|manual|guide|instruction|reference|find|search|where|how to find|locate)\b', re.IGNORECASE),
-                re.compile(r'\b(what does|what is|definition|explain|meaning|information about)\b', re.IGNORECASE),
-            ],
-            AgentType.TROUBLESHOOTING: [
-                re.compile(r'\b(troubleshoot|problem|issue|error|fault|diagnose|fix|repair|resolve|not working|fails|failed)\b', re.IGNORECASE),
-                re.compile(r'\b(why is|why does|what causes|how to fix|how to solve|debug|symptom)\b', re.IGNORECASE),
-            ],
-            AgentType.MAINTENANCE: [
-                re.compile(r'\b(maintenance|procedure|step|process|replace|install|remove|overhaul|service|inspection)\b', re.IGNORECASE),
-                re.compile(r'\b(how to perform|how to do|how to replace|how to install|how to remove|how to service)\b', re.IGNORECASE),
-            ]
-        }
-        return patterns
+        self._classification_cache = cache if cache is not None else ClassificationCache(max_size=cache_size)
 
-    @lru_cache(maxsize=100)
     def _detect_content_type(self, query: str) -> ContentType:
         """
         Detect the content type of a query.
@@ -83,33 +141,7 @@ class RequestClassifier:
         Returns:
             ContentType: Detected content type
         """
-        # Check for code blocks
-        code_patterns = [
-            r'```[\s\S]*?```',  # Markdown code blocks
-            r'<code>[\s\S]*?</code>',  # HTML code tags
-            r'\b(function|def|class|import|from|var|const|let)\b.*[{(:;]',  # Programming keywords
-            r'[a-zA-Z0-9_]+\.[a-zA-Z0-9_]+\(.*\)',  # Method calls
-        ]
-
-        for pattern in code_patterns:
-            if re.search(pattern, query):
-                return ContentType.CODE
-
-        # Check for structured data
-        structured_data_patterns = [
-            r'{[\s\S]*?}',  # JSON-like objects
-            r'\[[\s\S]*?\]',  # Arrays
-            r'<[a-zA-Z0-9]+>[\s\S]*?</[a-zA-Z0-9]+>',  # XML-like tags
-            r'[a-zA-Z0-9_]+=["\'][^"\']*["\']',  # Key-value pairs
-            r'\|[\s\S]*?\|',  # Table-like structures
-        ]
-
-        for pattern in structured_data_patterns:
-            if re.search(pattern, query):
-                return ContentType.STRUCTURED_DATA
-
-        # Default to text
-        return ContentType.TEXT
+        return detect_content_type(query)
 
     def _quick_classify(self, query: str) -> Tuple[Optional[AgentType], float]:
         """
@@ -121,13 +153,9 @@ class RequestClassifier:
         Returns:
             Tuple[Optional[AgentType], float]: Agent type and confidence score, or (None, 0.0) if no match
         """
-        scores = {agent_type: 0 for agent_type in AgentType}
-
-        # Count matches for each agent type
-        for agent_type, patterns in self._keyword_patterns.items():
-            for pattern in patterns:
-                matches = pattern.findall(query)
-                scores[agent_type] += len(matches)
+        # Count keyword matches for each agent type in a single pass
+        counts = AGENT_KEYWORD_MATCHER.count(query)
+        scores = {agent_type: counts[agent_type] for agent_type in AgentType}
 
         # Find the agent type with the highest score
         max_score = max(scores.values())
@@ -168,15 +196,44 @@ class RequestClassifier:
         else:
             history_str = ""
 
-        # Create a hash of the query and history
-        key_str = f"{query}|{history_str}"
+        # Create a hash of the normalized query and history
+        key_str = f"{normalize_query(query)}|{history_str}"
         return hashlib.md5(key_str.encode()).hexdigest()
 
+    async def _get_cached_classification(
+        self, cache_key: str, registry_version: str
+    ) -> Optional[RequestClassification]:
+        """
+        Get a classification from the cache for an agent registry.
+
+        Args:
+            cache_key: Cache key
+            registry_version: Version of the agent registry the request is classified against
+
+        Returns:
+            Optional[RequestClassification]: Cached classification or None if not found
+        """
+        return await self._classification_cache.get(f"{registry_version}:{cache_key}")
+
+    async def _cache_classification(
+        self, cache_key: str, registry_version: str, classification: RequestClassification
+    ) -> None:
+        """
+        Store a classification in the cache for an agent registry.
+
+        Args:
+            cache_key: Cache key
+            registry_version: Version of the agent registry the request was classified against
+            classification: Classification result
+        """
+        await self._classification_cache.set(f"{registry_version}:{cache_key}", classification)
+
     async def classify_request(
         self,
         query: str,
         available_agents: List[AgentMetadata],
         conversation_history: Optional[List[Dict[str, str]]] = None,
+        user_id: Optional[str] = None,
     ) -> RequestClassification:
         """
         Classify a user request to determine the appropriate agent type.
@@ -185,16 +242,19 @@ class RequestClassifier:
             query: User query
             available_agents: List of available agent metadata
             conversation_history: Optional conversation history for context
+            user_id: Optional ID of the user making the request, for token quotas
 
         Returns:
             RequestClassification: Classification result
         """
         try:
             # Check cache first
+            registry_version = compute_registry_version(available_agents)
             cache_key = self._get_cache_key(query, conversation_history)
-            if cache_key in self._classification_cache:
+            cached_classification = await self._get_cached_classification(cache_key, registry_version)
+            if cached_classification is not None:
                 logger.info(f"Using cached classification for query: {query[:50]}...")
-                return self._classification_cache[cache_key]
+                return cached_classification
 
             # Detect content type
             content_type = self._detect_content_type(query)
@@ -213,12 +273,7 @@ class RequestClassifier:
                 )
 
                 # Cache the result
-                self._classification_cache[cache_key] = classification
-
-                # Trim cache if it gets too large
-                if len(self._classification_cache) > self._cache_size:
-                    # Remove a random key (simple approach)
-                    self._classification_cache.pop(next(iter(self._classification_cache)))
+                await self._cache_classification(cache_key, registry_version, classification)
 
                 return classification
 
@@ -241,18 +296,14 @@ class RequestClassifier:
                 model_size=ModelSize.SMALL,  # Use small model for efficiency
                 temperature=0.3,  # Low temperature for more deterministic results
                 max_tokens=500,
+                user_id=user_id,
             )
 
             # Parse the response to extract classification
             classification = self._parse_classification_response(response["content"])
 
             # Cache the result
-            self._classification_cache[cache_key] = classification
-
-            # Trim cache if it gets too large
-            if len(self._classification_cache) > self._cache_size:
-                # Remove a random key (simple approach)
-                self._classification_cache.pop(next(iter(self._classification_cache)))
+            await self._cache_classification(cache_key, registry_version, classification)
 
             logger.info(f"Request classified as {classification.agent_type} with confidence {classification.confidence}")
             return classification
@@ -260,14 +311,146 @@ class RequestClassifier:
         except Exception as e:
             logger.error(f"Error classifying request: {str(e)}")
             # Default to documentation agent if classification fails
-            return RequestClassification(
-                agent_type=AgentType.DOCUMENTATION,
-                confidence=0.3,
-                reasoning="Classification failed, defaulting to documentation agent."
+            return self._fallback_classification("Classification failed")
+
+    async def classify_batch(
+        self,
+        queries: List[str],
+        available_agents: List[AgentMetadata],
+        batch_size: int = 20,
+        max_concurrency: int = 4,
+        user_id: Optional[str] = None,
+    ) -> List[RequestClassification]:
+        """
+        Classify many independent requests with as few LLM calls as possible.
+
+        Queries are deduplicated by cache key and resolved from the cache or
+        keyword classification first. The remaining queries are packed into
+        multi-item prompts of up to batch_size queries, with at most
+        max_concurrency prompts in flight.
+
+        Args:
+            queries: User queries, classified without conversation history
+            available_agents: List of available agent metadata
+            batch_size: Maximum number of queries per LLM prompt
+            max_concurrency: Maximum number of concurrent LLM calls
+            user_id: Optional ID of the user making the request, for token quotas
+
+        Returns:
+            List[RequestClassification]: Classification results in query order
+        """
+        registry_version = compute_registry_version(available_agents)
+        cache_keys = [self._get_cache_key(query) for query in queries]
+        results: Dict[str, RequestClassification] = {}
+        pending: Dict[str, str] = {}
+
+        for query, cache_key in zip(queries, cache_keys):
+            if cache_key in results or cache_key in pending:
+                continue
+
+            cached_classification = await self._get_cached_classification(cache_key, registry_version)
+            if cached_classification is not None:
+                results[cache_key] = cached_classification
+                continue
+
+            agent_type, confidence = self._quick_classify(query)
+            if agent_type and confidence >= 0.7:
+                classification = RequestClassification(
+                    agent_type=agent_type,
+                    confidence=confidence,
+                    reasoning=f"Classified based on keyword matching with confidence {confidence:.2f}"
+                )
+                await self._cache_classification(cache_key, registry_version, classification)
+                results[cache_key] = classification
+            else:
+                pending[cache_key] = query
+
+        if pending:
+            pending_items = list(pending.items())
+            chunks = [
+                pending_items[i:i + batch_size]
+                for i in range(0, len(pending_items), batch_size)
+            ]
+            system_prompt = self._create_classification_prompt(available_agents, batch=True)
+            semaphore = asyncio.Semaphore(max_concurrency)
+
+            async def classify_chunk(chunk: List[Tuple[str, str]]) -> None:
+                async with semaphore:
+                    classifications = await self._classify_chunk(
+                        system_prompt, registry_version, [query for _, query in chunk], user_id
+                    )
+                for (cache_key, _), classification in zip(chunk, classifications):
+                    results[cache_key] = classification
+
+            await asyncio.gather(*(classify_chunk(chunk) for chunk in chunks))
+
+            logger.info(
+                f"Batch classified {len(queries)} queries "
+                f"({len(pending)} via LLM in {len(chunks)} prompts)"
+            )
+
+        return [results[cache_key] for cache_key in cache_keys]
+
+    async def _classify_chunk(
+        self,
+        system_prompt: str,
+        registry_version: str,
+        queries: List[str],
+        user_id: Optional[str] = None,
+    ) -> List[RequestClassification]:
+        """
+        Classify a chunk of queries with a single multi-item LLM prompt.
+
+        Args:
+            system_prompt: Batch classification prompt
+            registry_version: Version of the agent registry the queries are classified against
+            queries: Queries to classify
+            user_id: Optional ID of the user making the request, for token quotas
+
+        Returns:
+            List[RequestClassification]: Classification results in query order
+        """
+        items = [
+            {"id": i + 1, "content_type": self._detect_content_type(query).value, "query": query}
+            for i, query in enumerate(queries)
+        ]
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": json.dumps(items)},
+        ]
+
+        try:
+            response = await self.llm_service.generate_custom_response_async(
+                messages=messages,
+                model_size=ModelSize.SMALL,  # Use small model for efficiency
+                temperature=0.3,  # Low temperature for more deterministic results
+                max_tokens=BATCH_TOKENS_PER_QUERY * len(queries) + 100,
+                user_id=user_id,
             )
+        except Exception as e:
+            logger.error(f"Error classifying request batch: {str(e)}")
+            # Don't cache fallbacks for failed calls so they can be retried
+            return [self._fallback_classification("Classification failed") for _ in queries]
+
+        classifications = self._parse_batch_classification_response(
+            response["content"], expected_count=len(queries)
+        )
+
+        # Only cache parsed results, so missing or invalid items are retried
+        for query, classification in zip(queries, classifications):
+            if classification is not None:
+                await self._cache_classification(self._get_cache_key(query), registry_version, classification)
+
+        return [
+            classification or self._fallback_classification()
+            for classification in classifications
+        ]
 
     def _create_classification_prompt(
-        self, available_agents: List[AgentMetadata], content_type: ContentType = ContentType.TEXT
+        self,
+        available_agents: List[AgentMetadata],
+        content_type: ContentType = ContentType.TEXT,
+        batch: bool = False,
     ) -> str:
         """
         Create a prompt for the LLM to classify the request.
@@ -275,6 +458,7 @@ class RequestClassifier:
         Args:
             available_agents: List of available agent metadata
             content_type: Detected content type of the query
+            batch: Whether the prompt classifies a JSON array of queries
 
         Returns:
             str: Classification prompt
@@ -332,14 +516,30 @@ class RequestClassifier:
             "5. Explain your reasoning briefly, mentioning specific keywords or patterns that influenced your decision.\n\n"
         )
 
-        response_format = (
-            "Respond in the following JSON format only:\n"
-            "{\n"
-            '  "agent_type": "documentation|troubleshooting|maintenance",\n'
-            '  "confidence": 0.0-1.0,\n'
-            '  "reasoning": "Brief explanation of why this agent is appropriate"\n'
-            "}\n"
-        )
+        if batch:
+            response_format = (
+                "The user message is a JSON array of independent queries, each with an "
+                '"id", a detected "content_type" and the "query" text. '
+                "Classify every query separately and keep reasoning to one short sentence.\n"
+                "Respond with a JSON array only, with one object per query in the same order:\n"
+                "[\n"
+                "  {\n"
+                '    "id": 1,\n'
+                '    "agent_type": "documentation|troubleshooting|maintenance",\n'
+                '    "confidence": 0.0-1.0,\n'
+                '    "reasoning": "Brief explanation of why this agent is appropriate"\n'
+                "  }\n"
+                "]\n"
+            )
+        else:
+            response_format = (
+                "Respond in the following JSON format only:\n"
+                "{\n"
+                '  "agent_type": "documentation|troubleshooting|maintenance",\n'
+                '  "confidence": 0.0-1.0,\n'
+                '  "reasoning": "Brief explanation of why this agent is appropriate"\n'
+                "}\n"
+            )
 
         # Combine all parts
         prompt = base_prompt + content_type_section + agents_section + instructions + response_format
@@ -347,67 +547,137 @@ class RequestClassifier:
         return prompt
 
     def _parse_classification_response(
-        self, response_content: str
-    ) -> RequestClassification:
+        self, response_content: str, *, expected_count: Optional[int] = None
+    ) -> Union[RequestClassification, List[RequestClassification]]:
         """
         Parse the LLM response to extract classification.
 
         Args:
             response_content: LLM response content
+            expected_count: Number of queries in a batch response. When set, the
+                response is parsed as a JSON array and a list is returned.
 
         Returns:
-            RequestClassification: Classification result
+            Union[RequestClassification, List[RequestClassification]]: Classification
+            result, or one result per query for batch responses
         """
-        try:
-            # Extract JSON from response
-            import json
-            import re
+        if expected_count is not None:
+            return [
+                classification or self._fallback_classification()
+                for classification in self._parse_batch_classification_response(response_content, expected_count)
+            ]
 
+        try:
             # Find JSON pattern in the response
             json_match = re.search(r'({.*})', response_content, re.DOTALL)
             if json_match:
                 json_str = json_match.group(1)
-                classification_data = json.loads(json_str)
-
-                # Validate agent type
-                agent_type_str = classification_data.get("agent_type", "").lower()
-                agent_type = None
-
-                if agent_type_str == "documentation":
-                    agent_type = AgentType.DOCUMENTATION
-                elif agent_type_str == "troubleshooting":
-                    agent_type = AgentType.TROUBLESHOOTING
-                elif agent_type_str == "maintenance":
-                    agent_type = AgentType.MAINTENANCE
-                else:
-                    # Default to documentation if invalid agent type
-                    agent_type = AgentType.DOCUMENTATION
-
-                # Validate confidence
-                confidence = float(classification_data.get("confidence", 0.5))
-                confidence = max(0.0, min(1.0, confidence))  # Clamp between 0 and 1
-
-                # Get reasoning
-                reasoning = classification_data.get("reasoning", "No reasoning provided.")
-
-                return RequestClassification(
-                    agent_type=agent_type,
-                    confidence=confidence,
-                    reasoning=reasoning
-                )
+                return self._classification_from_data(json.loads(json_str))
             else:
                 # If no JSON found, default to documentation agent
-                return RequestClassification(
-                    agent_type=AgentType.DOCUMENTATION,
-                    confidence=0.3,
-                    reasoning="Failed to parse classification response, defaulting to documentation agent."
-                )
+                return self._fallback_classification()
 
         except Exception as e:
             logger.error(f"Error parsing classification response: {str(e)}")
             # Default to documentation agent if parsing fails
-            return RequestClassification(
-                agent_type=AgentType.DOCUMENTATION,
-                confidence=0.3,
-                reasoning="Failed to parse classification response, defaulting to documentation agent."
-            )
+            return self._fallback_classification()
+
+    def _parse_batch_classification_response(
+        self, response_content: str, expected_count: int
+    ) -> List[Optional[RequestClassification]]:
+        """
+        Parse a batch LLM response containing a JSON array of classifications.
+
+        Items are matched to queries by their 1-based "id", falling back to
+        array position. Each item is parsed on its own, so an invalid item
+        does not affect the others.
+
+        Args:
+            response_content: LLM response content
+            expected_count: Number of queries in the batch
+
+        Returns:
+            List[Optional[RequestClassification]]: One classification per query,
+            None for queries without a valid item
+        """
+        classifications: List[Optional[RequestClassification]] = [None] * expected_count
+
+        try:
+            json_match = re.search(r'(\[.*\])', response_content, re.DOTALL)
+            items = json.loads(json_match.group(1)) if json_match else []
+        except Exception as e:
+            logger.error(f"Error parsing batch classification response: {str(e)}")
+            return classifications
+
+        if not isinstance(items, list):
+            return classifications
+
+        for position, item in enumerate(items):
+            if not isinstance(item, dict):
+                continue
+
+            item_id = item.get("id")
+            index = item_id - 1 if isinstance(item_id, int) else position
+            if not 0 <= index < expected_count or classifications[index] is not None:
+                continue
+
+            try:
+                classifications[index] = self._classification_from_data(item)
+            except Exception as e:
+                logger.error(f"Error parsing batch classification item {index + 1}: {str(e)}")
+
+        return classifications
+
+    def _classification_from_data(self, classification_data: Dict) -> RequestClassification:
+        """
+        Build a classification from a parsed JSON object.
+
+        Args:
+            classification_data: Parsed classification data
+
+        Returns:
+            RequestClassification: Classification result
+        """
+        # Validate agent type
+        agent_type_str = str(classification_data.get("agent_type", "")).lower()
+
+        if agent_type_str == "documentation":
+            agent_type = AgentType.DOCUMENTATION
+        elif agent_type_str == "troubleshooting":
+            agent_type = AgentType.TROUBLESHOOTING
+        elif agent_type_str == "maintenance":
+            agent_type = AgentType.MAINTENANCE
+        else:
+            # Default to documentation if invalid agent type
+            agent_type = AgentType.DOCUMENTATION
+
+        # Validate confidence
+        confidence = float(classification_data.get("confidence", 0.5))
+        confidence = max(0.0, min(1.0, confidence))  # Clamp between 0 and 1
+
+        # Get reasoning
+        reasoning = classification_data.get("reasoning", "No reasoning provided.")
+
+        return RequestClassification(
+            agent_type=agent_type,
+            confidence=confidence,
+            reasoning=reasoning
+        )
+
+    def _fallback_classification(
+        self, reason: str = "Failed to parse classification response"
+    ) -> RequestClassification:
+        """
+        Get the default classification used when classification fails.
+
+        Args:
+            reason: Why classification failed
+
+        Returns:
+            RequestClassification: Documentation agent with low confidence
+        """
+        return RequestClassification(
+            agent_type=AgentType.DOCUMENTATION,
+            confidence=0.3,
+            reasoning=f"{reason}, defaulting to documentation agent."
+        )
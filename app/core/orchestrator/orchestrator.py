@@ -9,8 +9,10 @@ import logging
 import uuid
 from typing import Dict, List, Optional
 
+from app.core.context.history import build_history, history_token_budget, trim_history
 from app.core.model_selection.complexity import ComplexityAnalyzer
 from app.core.model_selection.selector import ModelSelector
+from app.core.orchestrator.classification_cache import get_classification_cache
 from app.core.orchestrator.classifier import RequestClassifier
 from app.core.orchestrator.formatter import ResponseFormatter
 from app.core.orchestrator.registry import AgentRegistry
@@ -24,8 +26,12 @@ from app.models.orchestrator import (
     RoutingResult,
 )
 from app.repositories.agent import AgentConfigurationRepository
+from app.repositories.context import ContextSummaryRepository
 from app.repositories.conversation import ConversationRepository
+from app.services.exceptions import RateLimitError
 from app.services.llm_service import LLMService
+from app.services.prompt_assembly import PromptAssembler, SegmentStability
+from app.services.prompt_templates import MessageRole
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -36,11 +42,15 @@ class Orchestrator:
     Central orchestrator for routing requests to appropriate agents.
     """
 
+    # Maximum number of recent messages loaded as conversation history
+    HISTORY_MESSAGE_LIMIT = 50
+
     def __init__(
         self,
         llm_service: LLMService,
         agent_repository: AgentConfigurationRepository,
         conversation_repository: Optional[ConversationRepository] = None,
+        summary_repository: Optional[ContextSummaryRepository] = None,
     ):
         """
         Initialize the orchestrator.
@@ -49,13 +59,15 @@ class Orchestrator:
             llm_service: LLM service for classification and agent responses
             agent_repository: Repository for agent configurations
             conversation_repository: Optional repository for conversation history
+            summary_repository: Optional repository for summaries of earlier conversation turns
         """
         self.llm_service = llm_service
         self.agent_repository = agent_repository
         self.conversation_repository = conversation_repository
+        self.summary_repository = summary_repository
 
         # Initialize components
-        self.classifier = RequestClassifier(llm_service)
+        self.classifier = RequestClassifier(llm_service, cache=get_classification_cache())
         self.agent_registry = AgentRegistry(agent_repository)
         self.router = Router(self.agent_registry)
         self.formatter = ResponseFormatter()
@@ -85,6 +97,9 @@ class Orchestrator:
 
         Returns:
             OrchestratorResponse: Orchestrator response
+
+        Raises:
+            RateLimitError: If the request exceeds a rate limit or token quota
         """
         try:
             # Ensure orchestrator is initialized
@@ -100,7 +115,8 @@ class Orchestrator:
             classification = await self.classifier.classify_request(
                 query=request.query,
                 available_agents=self.agent_registry.get_all_agents(),
-                conversation_history=conversation_history
+                conversation_history=conversation_history,
+                user_id=request.user_id
             )
 
             # Route the request
@@ -119,7 +135,8 @@ class Orchestrator:
                 query=request.query,
                 agent_config=agent_config,
                 conversation_history=conversation_history,
-                context=request.context
+                context=request.context,
+                user_id=request.user_id
             )
 
             # Format the response
@@ -145,6 +162,9 @@ class Orchestrator:
 
             return formatted_response
 
+        except RateLimitError:
+            # Quota and rate limit errors are for the caller to handle
+            raise
         except Exception as e:
             logger.error(f"Error processing request: {str(e)}")
             # Return a fallback response
@@ -164,6 +184,7 @@ class Orchestrator:
         agent_config,
         conversation_history: Optional[List[Dict[str, str]]] = None,
         context: Optional[Dict[str, str]] = None,
+        user_id: Optional[str] = None,
     ) -> str:
         """
         Generate a response from an agent.
@@ -173,6 +194,7 @@ class Orchestrator:
             agent_config: Agent configuration
             conversation_history: Optional conversation history
             context: Optional additional context
+            user_id: Optional ID of the user making the request, for token quotas
 
         Returns:
             str: Agent response
@@ -181,24 +203,6 @@ class Orchestrator:
             # Create system prompt based on agent type and configuration
             system_prompt = agent_config.system_prompt or self._get_default_system_prompt(agent_config.agent_type)
 
-            # Add context if available
-            if context:
-                context_str = "\n\nAdditional context:\n"
-                for key, value in context.items():
-                    context_str += f"{key}: {value}\n"
-                system_prompt += context_str
-
-            # Prepare messages
-            messages = [{"role": "system", "content": system_prompt}]
-
-            # Add conversation history if available
-            if conversation_history:
-                for message in conversation_history:
-                    messages.append(message)
-
-            # Add the current query
-            messages.append({"role": "user", "content": query})
-
             # Select the appropriate model based on query complexity
             model_size = agent_config.model_size  # Default from agent config
 
@@ -209,7 +213,9 @@ class Orchestrator:
                     query=query,
                     conversation_history=conversation_history,
                     cost_sensitive=context.get("cost_sensitive", False) if context else False,
-                    performance_sensitive=context.get("performance_sensitive", False) if context else False
+                    performance_sensitive=context.get("performance_sensitive", False) if context else False,
+                    latency_slo_ms=context.get("latency_slo_ms") if context else None,
+                    user_id=user_id
                 )
 
                 # Override model size if complexity analysis suggests a different model
@@ -219,16 +225,36 @@ class Orchestrator:
                         f"Model selection: {model_size} (complexity: {complexity_score.level}, "
                         f"score: {complexity_score.overall_score:.2f})"
                     )
+
+                    # Fit the history into the selected model's context window
+                    conversation_history = trim_history(
+                        conversation_history,
+                        history_token_budget(selected_model.max_tokens, agent_config.max_tokens or 0)
+                    )
             except Exception as model_selection_error:
                 # Log error but continue with default model size
                 logger.warning(f"Model selection failed, using default: {str(model_selection_error)}")
 
+            # Order segments from most to least stable so the system prompt
+            # and history form a prefix that provider prompt caching can reuse
+            prompt = (
+                PromptAssembler()
+                .add(MessageRole.SYSTEM, system_prompt, SegmentStability.STATIC)
+                .add_history(conversation_history)
+                .add_context(context)
+                .add(MessageRole.USER, query, SegmentStability.QUERY)
+                .assemble()
+            )
+            messages = prompt.messages
+
             # Generate response
             response = await self.llm_service.generate_custom_response_async(
                 messages=messages,
                 model_size=model_size,
                 temperature=agent_config.temperature,
-                max_tokens=agent_config.max_tokens
+                max_tokens=agent_config.max_tokens,
+                cacheable_prefix_tokens=prompt.cacheable_prefix_tokens,
+                user_id=user_id
             )
 
             return response["content"]
@@ -275,12 +301,20 @@ class Orchestrator:
                 "If you don't know the answer, say so clearly."
             )
 
-    async def _get_conversation_history(self, conversation_id: str) -> Optional[List[Dict[str, str]]]:
+    async def _get_conversation_history(
+        self,
+        conversation_id: str,
+        token_budget: Optional[int] = None
+    ) -> Optional[List[Dict[str, str]]]:
         """
-        Get conversation history for a conversation ID.
+        Get bounded conversation history for a conversation ID.
+
+        Only the most recent messages that fit in the token budget are loaded,
+        preceded by stored summaries of earlier turns.
 
         Args:
             conversation_id: Conversation ID
+            token_budget: Optional history token budget (default: history_token_budget())
 
         Returns:
             Optional[List[Dict[str, str]]]: Conversation history or None
@@ -289,16 +323,22 @@ class Orchestrator:
             return None
 
         try:
-            # Get messages from the conversation
-            messages = self.conversation_repository.get_messages(conversation_id)
+            # Get the most recent messages from the conversation
+            messages = self.conversation_repository.get_recent_messages(
+                conversation_id, self.HISTORY_MESSAGE_LIMIT
+            )
 
-            # Convert to the format expected by the LLM service
-            history = []
-            for message in messages:
-                role = "assistant" if message.role == "assistant" else "user"
-                history.append({"role": role, "content": message.content})
+            # Get summaries of earlier turns
+            summaries = []
+            if self.summary_repository and messages:
+                summaries = self.summary_repository.get_summaries_for_conversation(
+                    messages[0].conversation_id
+                )
 
-            return history
+            # Convert to the format expected by the LLM service
+            if token_budget is None:
+                token_budget = history_token_budget()
+            return build_history(messages, summaries, token_budget)
 
         except Exception as e:
             logger.error(f"Error getting conversation history: {str(e)}")
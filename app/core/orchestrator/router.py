@@ -5,9 +5,9 @@ This module provides functionality for routing user requests to the
 appropriate agent based on classification results.
 """
 import logging
-import re
 from typing import Dict, List, Optional
 
+from app.core.matching import PatternMatcher, tokenize
 from app.models.conversation import AgentType
 from app.models.orchestrator import (
     ClassificationConfidence,
@@ -19,6 +19,31 @@ from app.core.orchestrator.registry import AgentRegistry
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Common stop words removed during keyword extraction
+STOP_WORDS = frozenset({
+    "a", "an", "the", "and", "or", "but", "if", "because", "as", "what",
+    "when", "where", "how", "why", "which", "who", "whom", "this", "that",
+    "these", "those", "am", "is", "are", "was", "were", "be", "been", "being",
+    "have", "has", "had", "having", "do", "does", "did", "doing", "can", "could",
+    "should", "would", "shall", "will", "may", "might", "must", "to", "for", "with",
+    "about", "against", "between", "into", "through", "during", "before", "after",
+    "above", "below", "from", "up", "down", "in", "out", "on", "off", "over", "under",
+    "again", "further", "then", "once", "here", "there", "all", "any", "both", "each",
+    "few", "more", "most", "other", "some", "such", "no", "nor", "not", "only", "own",
+    "same", "so", "than", "too", "very", "just", "don", "don't", "should've", "now"
+})
+
+# Pronouns and references that indicate a followup query
+FOLLOWUP_MATCHER = PatternMatcher({
+    "followup": [
+        r'\b(it|this|that|these|those|they|them|their|he|she|his|her)\b',
+        r'\b(the same|the above|the previous|the earlier)\b',
+        r'^(and|but|so|also|what about|how about)\b',
+        r'^(can you|could you|would you|will you)\b',
+        r'\b(more|additional|further|else|another|again)\b',
+    ],
+})
+
 
 class Router:
     """
@@ -216,28 +241,14 @@ class Router:
         if not query:
             return []
 
-        # Remove common stop words
-        stop_words = {
-            "a", "an", "the", "and", "or", "but", "if", "because", "as", "what",
-            "when", "where", "how", "why", "which", "who", "whom", "this", "that",
-            "these", "those", "am", "is", "are", "was", "were", "be", "been", "being",
-            "have", "has", "had", "having", "do", "does", "did", "doing", "can", "could",
-            "should", "would", "shall", "will", "may", "might", "must", "to", "for", "with",
-            "about", "against", "between", "into", "through", "during", "before", "after",
-            "above", "below", "from", "up", "down", "in", "out", "on", "off", "over", "under",
-            "again", "further", "then", "once", "here", "there", "all", "any", "both", "each",
-            "few", "more", "most", "other", "some", "such", "no", "nor", "not", "only", "own",
-            "same", "so", "than", "too", "very", "just", "don", "don't", "should've", "now"
-        }
-
         # Tokenize and filter
-        words = re.findall(r'\b\w+\b', query.lower())
-        keywords = [word for word in words if word not in stop_words and len(word) > 2]
+        words = tokenize(query)
+        keywords = [word for word in words if word not in STOP_WORDS and len(word) > 2]
 
         # Add bigrams (pairs of adjacent words)
         bigrams = []
         for i in range(len(words) - 1):
-            if words[i] not in stop_words or words[i+1] not in stop_words:
+            if words[i] not in STOP_WORDS or words[i+1] not in STOP_WORDS:
                 bigram = f"{words[i]} {words[i+1]}"
                 bigrams.append(bigram)
 
@@ -403,17 +414,8 @@ class Router:
             return False
 
         # Check for pronouns and references that indicate a followup
-        followup_indicators = [
-            r'\b(it|this|that|these|those|they|them|their|he|she|his|her)\b',
-            r'\b(the same|the above|the previous|the earlier)\b',
-            r'^(and|but|so|also|what about|how about)\b',
-            r'^(can you|could you|would you|will you)\b',
-            r'\b(more|additional|further|else|another|again)\b'
-        ]
-
-        for pattern in followup_indicators:
-            if re.search(pattern, query.lower()):
-                return True
+        if FOLLOWUP_MATCHER.first_match(query.lower()):
+            return True
 
         # Check for very short queries (often followups)
         if len(query.split()) <= 3:
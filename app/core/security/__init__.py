@@ -6,6 +6,7 @@ from app.core.security.jwt import create_access_token, create_refresh_token, dec
 from app.core.security.password import get_password_hash, verify_password
 from app.core.security.permissions import (
     Permission,
+    get_permission_mask,
     get_permissions_for_role,
     has_permission,
     require_permissions,
@@ -28,6 +29,7 @@ __all__ = [
     "generate_verification_code",
     "is_valid_password",
     "Permission",
+    "get_permission_mask",
     "get_permissions_for_role",
     "has_permission",
     "require_permissions",
@@ -3,7 +3,7 @@ Permission checking utilities for role-based access control.
 """
 import logging
 from enum import Enum
-from typing import List, Set, Union
+from typing import Dict, Iterable, List, Set, Union
 
 from fastapi import Depends, HTTPException, status
 
@@ -83,6 +83,35 @@ ROLE_PERMISSIONS = {
 }
 
 
+# Permission bits, compiled once so checks are a single AND
+PERMISSION_BITS: Dict[Permission, int] = {
+    permission: 1 << index for index, permission in enumerate(Permission)
+}
+ALL_PERMISSIONS_MASK = sum(PERMISSION_BITS.values())
+
+
+def permissions_to_mask(permissions: Iterable[Permission]) -> int:
+    """
+    Convert permissions to a bitmask.
+
+    Args:
+        permissions: Permissions
+
+    Returns:
+        int: Bitmask with the bit of each permission set
+    """
+    mask = 0
+    for permission in permissions:
+        mask |= PERMISSION_BITS[permission]
+    return mask
+
+
+# Role-based permission bitmasks
+ROLE_PERMISSION_MASKS: Dict[UserRole, int] = {
+    role: permissions_to_mask(permissions) for role, permissions in ROLE_PERMISSIONS.items()
+}
+
+
 def get_permissions_for_role(role: UserRole) -> Set[Permission]:
     """
     Get permissions for a role.
@@ -96,6 +125,30 @@ def get_permissions_for_role(role: UserRole) -> Set[Permission]:
     return ROLE_PERMISSIONS.get(role, set())
 
 
+def get_permission_mask(user: User) -> int:
+    """
+    Get the permission bitmask of a user.
+
+    Cached principals carry a precomputed mask; other users are looked up by
+    role.
+
+    Args:
+        user: User to get the bitmask for
+
+    Returns:
+        int: Permission bitmask, with all bits set for superusers
+    """
+    mask = getattr(user, "permission_mask", None)
+    if mask is not None:
+        return mask
+
+    # Superusers have all permissions
+    if user.is_superuser:
+        return ALL_PERMISSIONS_MASK
+
+    return ROLE_PERMISSION_MASKS.get(user.role, 0)
+
+
 def has_permission(user: User, permission: Permission) -> bool:
     """
     Check if a user has a permission.
@@ -107,15 +160,7 @@ def has_permission(user: User, permission: Permission) -> bool:
     Returns:
         bool: True if the user has the permission, False otherwise
     """
-    # Superusers have all permissions
-    if user.is_superuser:
-        return True
-
-    # Get permissions for the user's role
-    user_permissions = get_permissions_for_role(user.role)
-
-    # Check if the permission is in the user's permissions
-    return permission in user_permissions
+    return bool(get_permission_mask(user) & PERMISSION_BITS[permission])
 
 
 def require_permissions(
@@ -135,6 +180,9 @@ def require_permissions(
     if isinstance(required_permissions, Permission):
         required_permissions = [required_permissions]
 
+    # Compile the requirement once when the dependency is declared
+    required_mask = permissions_to_mask(required_permissions)
+
     async def _require_permissions(
         current_user: User = Depends(get_current_active_user) if get_current_active_user else Depends(),
     ):
@@ -147,17 +195,11 @@ def require_permissions(
         Raises:
             HTTPException: If the user doesn't have the required permissions
         """
-        if current_user.is_superuser:
-            return current_user
-
-        user_permissions = get_permissions_for_role(current_user.role)
+        granted_mask = get_permission_mask(current_user) & required_mask
 
         if require_all:
             # Check if the user has all required permissions
-            has_all_permissions = all(
-                permission in user_permissions for permission in required_permissions
-            )
-            if not has_all_permissions:
+            if granted_mask != required_mask:
                 logger.warning(
                     f"User {current_user.id} ({current_user.username}) "
                     f"doesn't have all required permissions: {required_permissions}"
@@ -168,10 +210,7 @@ def require_permissions(
                 )
         else:
             # Check if the user has at least one of the required permissions
-            has_any_permission = any(
-                permission in user_permissions for permission in required_permissions
-            )
-            if not has_any_permission:
+            if not granted_mask:
                 logger.warning(
                     f"User {current_user.id} ({current_user.username}) "
                     f"doesn't have any of the required permissions: {required_permissions}"
@@ -0,0 +1,328 @@
+"""
+Principal cache for authenticated requests.
+
+Validated tokens are mapped to a snapshot of their user for a short time, so
+authenticated requests normally need no token decoding, database query or
+Redis round trip. Changes to a user are published over Redis so every
+instance drops the user's cached principals.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.cache.connection import redis_client as shared_redis_client
+from app.core.config import settings
+from app.core.security.permissions import get_permission_mask
+from app.models.user import User
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Redis channel for user invalidation messages
+PRINCIPAL_INVALIDATION_CHANNEL = "magpie:principal_invalidation"
+
+# Session info key holding user IDs to invalidate when the session commits
+PENDING_INVALIDATIONS_KEY = "pending_principal_invalidations"
+
+
+# Columns copied into user snapshots
+USER_COLUMNS = tuple(column.key for column in User.__table__.columns)
+
+
+class UserSnapshot:
+    """
+    Copy of a user's column values.
+
+    Snapshots stand in for the User model in request dependencies. They are
+    not attached to a session, so they are safe to share between requests,
+    and must be treated as read-only.
+    """
+
+    def __init__(self, user: User):
+        """
+        Initialize the snapshot.
+
+        Args:
+            user: User loaded from the database
+        """
+        for key in USER_COLUMNS:
+            setattr(self, key, getattr(user, key, None))
+
+        # Permission checks read the mask instead of the role
+        self.permission_mask = get_permission_mask(user)
+
+    def __repr__(self) -> str:
+        return f"<UserSnapshot id={getattr(self, 'id', None)}>"
+
+
+class Principal:
+    """
+    Snapshot of an authenticated user and the user's permission bitmask.
+    """
+
+    __slots__ = ("user", "permission_mask", "expires_at")
+
+    def __init__(self, user: User, expires_at: float):
+        """
+        Initialize the principal.
+
+        Args:
+            user: User loaded from the database
+            expires_at: Monotonic time after which the principal is stale
+        """
+        self.user = UserSnapshot(user)
+        self.permission_mask = self.user.permission_mask
+        self.expires_at = expires_at
+
+
+class PrincipalCache:
+    """
+    In-process LRU cache of validated tokens to principals.
+
+    Entries live for at most ttl seconds and never beyond the token's own
+    expiry. A user's entries are dropped when an invalidation for the user is
+    published, by this instance or any other one subscribed to the channel.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 60, enabled: bool = True):
+        """
+        Initialize the principal cache.
+
+        Args:
+            max_size: Maximum number of cached tokens
+            ttl: Seconds a principal is cached for
+            enabled: Whether principals are cached
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.enabled = enabled
+        self._entries: "OrderedDict[str, Principal]" = OrderedDict()
+        self._tokens_by_user: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+        self._listener: Optional[Any] = None
+
+    def get(self, token: str) -> Optional[Principal]:
+        """
+        Get the cached principal for a token.
+
+        Args:
+            token: JWT token
+
+        Returns:
+            Optional[Principal]: Principal, or None if not cached or stale
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            principal = self._entries.get(token)
+            if principal is None:
+                return None
+
+            if principal.expires_at <= time.monotonic():
+                self._remove(token)
+                return None
+
+            self._entries.move_to_end(token)
+            return principal
+
+    def set(self, token: str, user: User, token_expires_at: Optional[float] = None) -> Principal:
+        """
+        Cache the principal for a validated token.
+
+        Args:
+            token: JWT token
+            user: User the token belongs to
+            token_expires_at: Token expiry as a UNIX timestamp, if any
+
+        Returns:
+            Principal: Cached principal
+        """
+        ttl = self.ttl
+        if token_expires_at is not None:
+            ttl = min(ttl, token_expires_at - time.time())
+        principal = Principal(user, time.monotonic() + ttl)
+        if not self.enabled:
+            return principal
+
+        with self._lock:
+            self._remove(token)
+            self._entries[token] = principal
+            self._tokens_by_user.setdefault(principal.user.id, set()).add(token)
+
+            # Evict the least recently used tokens
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+        return principal
+
+    def invalidate_user(self, user_id: int) -> None:
+        """
+        Drop the cached principals of a user in this instance.
+
+        Args:
+            user_id: User ID
+        """
+        with self._lock:
+            for token in list(self._tokens_by_user.get(user_id, ())):
+                self._remove(token)
+
+    def clear(self) -> None:
+        """
+        Drop all cached principals.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+
+    def _remove(self, token: str) -> None:
+        """
+        Remove a token. The lock must be held.
+
+        Args:
+            token: JWT token
+        """
+        principal = self._entries.pop(token, None)
+        if principal is None:
+            return
+
+        tokens = self._tokens_by_user.get(principal.user.id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[principal.user.id]
+
+    def publish_invalidation(self, user_id: int, redis_client: Optional[Any] = None) -> None:
+        """
+        Drop a user's cached principals in every instance.
+
+        Args:
+            user_id: User ID
+            redis_client: Redis client (default: the shared client)
+        """
+        self.invalidate_user(user_id)
+
+        try:
+            redis_client = redis_client or shared_redis_client
+            redis_client.publish(PRINCIPAL_INVALIDATION_CHANNEL, str(user_id))
+        except Exception as e:
+            # Other instances pick up the change when their entries expire
+            logger.error(f"Error publishing principal invalidation: {str(e)}")
+
+    def publish_invalidation_after_commit(self, session: Session, user_id: int) -> None:
+        """
+        Drop a user's cached principals in every instance once the session commits.
+
+        Publishing before the commit would let a request reload the old row
+        and cache it again. Pending invalidations are discarded on rollback.
+
+        Args:
+            session: Session holding the user's changes
+            user_id: User ID
+        """
+        pending = session.info.get(PENDING_INVALIDATIONS_KEY)
+        if pending is None:
+            pending = session.info[PENDING_INVALIDATIONS_KEY] = set()
+            event.listen(session, "after_commit", self._publish_pending)
+            event.listen(session, "after_rollback", self._discard_pending)
+
+        pending.add(user_id)
+
+    def _publish_pending(self, session: Session) -> None:
+        """
+        Publish the invalidations of a committed session.
+
+        Args:
+            session: Committed session
+        """
+        pending = session.info.get(PENDING_INVALIDATIONS_KEY, set())
+        user_ids = list(pending)
+        pending.clear()
+
+        for user_id in user_ids:
+            self.publish_invalidation(user_id)
+
+    def _discard_pending(self, session: Session) -> None:
+        """
+        Discard the invalidations of a rolled back session.
+
+        Args:
+            session: Rolled back session
+        """
+        session.info.get(PENDING_INVALIDATIONS_KEY, set()).clear()
+
+    def start_listener(self, redis_client: Optional[Any] = None) -> None:
+        """
+        Start listening for invalidations published by other instances.
+
+        Args:
+            redis_client: Redis client (default: the shared client)
+        """
+        if self._listener is not None or not self.enabled:
+            return
+
+        try:
+            redis_client = redis_client or shared_redis_client
+            pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{PRINCIPAL_INVALIDATION_CHANNEL: self._handle_message})
+            self._listener = pubsub.run_in_thread(
+                sleep_time=1.0,
+                daemon=True,
+                exception_handler=self._handle_listener_error,
+            )
+            logger.info("Principal invalidation listener started")
+        except Exception as e:
+            # Without the listener, entries are only refreshed when they expire
+            logger.warning(f"Failed to start principal invalidation listener: {str(e)}")
+
+    def stop_listener(self) -> None:
+        """
+        Stop listening for invalidations.
+        """
+        if self._listener is None:
+            return
+
+        self._listener.stop()
+        self._listener = None
+
+    def _handle_message(self, message: Dict[str, Any]) -> None:
+        """
+        Handle an invalidation message.
+
+        Args:
+            message: Pub/sub message
+        """
+        try:
+            self.invalidate_user(int(message["data"]))
+        except (TypeError, ValueError):
+            logger.warning(f"Invalid principal invalidation message: {message.get('data')!r}")
+
+    def _handle_listener_error(self, error: Exception, pubsub: Any, thread: Any) -> None:
+        """
+        Handle a lost subscription.
+
+        Invalidations may have been missed, so all principals are dropped
+        before the listener reconnects.
+
+        Args:
+            error: Error raised by the listener
+            pubsub: Pub/sub object
+            thread: Listener thread
+        """
+        logger.error(f"Principal invalidation listener error: {str(error)}")
+        self.clear()
+        time.sleep(1.0)
+
+
+# Create a global principal cache
+principal_cache = PrincipalCache(
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    # Tests create users with the same IDs and tokens in quick succession
+    enabled=settings.ENVIRONMENT != "testing",
+)
@@ -2,170 +2,480 @@
 Rate limiting middleware for the MAGPIE platform.
 """
 import logging
+import math
 import time
-from typing import Callable, Dict, Optional, Tuple
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
 
+import jwt
 from fastapi import FastAPI, Request, Response
 from fastapi.responses import JSONResponse
+from redis.asyncio import Redis
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.status import HTTP_429_TOO_MANY_REQUESTS
 
-from app.core.cache.connection import RedisCache
+from app.core.cache.connection import RedisConnectionManager
+from app.core.config import settings
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# GCRA rate limit script. The key holds the theoretical arrival time (TAT) in
+# milliseconds. Up to ARGV[3] tokens are granted in one call so callers can
+# lease tokens, and ARGV[4] unused tokens from an expired lease are refunded
+# first. Returns {granted, remaining, reset_ms, retry_after_ms}.
+GCRA_SCRIPT = """
+if redis.replicate_commands then
+    redis.replicate_commands()
+end
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
+local interval = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local refund = tonumber(ARGV[4])
+
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+
+local tat = now
+local stored = redis.call('GET', KEYS[1])
+if stored then
+    tat = math.max(tonumber(stored) - refund * interval, now)
+end
+
+local available = math.floor((now + tolerance - tat) / interval)
+local granted = math.min(requested, available)
+
+if granted < 1 then
+    if stored and refund > 0 then
+        redis.call('SET', KEYS[1], tat, 'PX', tat - now)
+    end
+    return {0, 0, tat - now, tat + interval - tolerance - now}
+end
+
+tat = tat + granted * interval
+redis.call('SET', KEYS[1], tat, 'PX', tat - now)
+return {granted, available - granted, tat - now, 0}
+"""
+
+
+class RateLimitGroup:
     """
-    Middleware for rate limiting API requests.
+    Group of routes sharing a rate limit quota.
     
-    Uses Redis to track request counts and enforce rate limits.
+    Each principal gets one quota per group, so requests to different paths
+    in the same group count against the same limit.
     """
     
     def __init__(
         self,
-        app: FastAPI,
-        redis_cache: Optional[RedisCache] = None,
+        name: str,
+        limit_per_minute: int,
+        paths: Iterable[str] = (),
+        prefixes: Iterable[str] = (),
+    ):
+        """
+        Initialize the group.
+        
+        Args:
+            name: Group name, used in the Redis key
+            limit_per_minute: Requests allowed per principal per minute
+            paths: Exact request paths in the group
+            prefixes: Request path prefixes in the group
+        """
+        self.name = name
+        self.limit_per_minute = limit_per_minute
+        self.paths = frozenset(paths)
+        self.prefixes = tuple(prefixes)
+        
+        # Spread the quota evenly over the minute, allowing a full burst
+        self.interval_ms = max(1, 60_000 // limit_per_minute)
+        self.tolerance_ms = self.interval_ms * limit_per_minute
+
+
+class _LocalBucket:
+    """
+    Tokens leased from Redis for one principal and group.
+    """
+    
+    __slots__ = ("tokens", "expires_at", "lease_size", "leased_at", "remaining", "reset_at", "blocked_until")
+    
+    def __init__(self):
+        self.tokens = 0
+        self.expires_at = 0.0
+        self.lease_size = 1
+        self.leased_at = 0.0
+        self.remaining = 0
+        self.reset_at = 0.0
+        self.blocked_until = 0.0
+
+
+@lru_cache(maxsize=4096)
+def _get_token_claims(token: str) -> Optional[Tuple[str, float]]:
+    """
+    Get the subject and expiry of a JWT token.
+    
+    Args:
+        token: JWT token
+        
+    Returns:
+        Optional[Tuple[str, float]]: (subject, expiry timestamp), or None if the token is invalid
+    """
+    try:
+        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+    except jwt.InvalidTokenError:
+        return None
+    
+    subject = payload.get("sub")
+    if subject is None:
+        return None
+    return str(subject), float(payload.get("exp", math.inf))
+
+
+def get_client_ip(request: Request) -> str:
+    """
+    Get client IP address from request.
+    
+    Args:
+        request: HTTP request
+        
+    Returns:
+        str: Client IP address
+    """
+    # Try to get IP from X-Forwarded-For header
+    forwarded_for = request.headers.get("X-Forwarded-For")
+    if forwarded_for:
+        # X-Forwarded-For can contain multiple IPs, use the first one
+        return forwarded_for.split(",")[0].strip()
+    
+    # Fall back to client.host
+    return request.client.host if request.client else "unknown"
+
+
+def get_rate_limit_principal(request: Request) -> str:
+    """
+    Get the principal a request is rate limited as.
+    
+    Requests with a valid bearer token are limited per user, so users behind
+    a shared address do not share a quota. Other requests are limited per
+    client IP address.
+    
+    Args:
+        request: HTTP request
+        
+    Returns:
+        str: Principal identifier
+    """
+    authorization = request.headers.get("Authorization")
+    if authorization:
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() == "bearer" and token:
+            claims = _get_token_claims(token.strip())
+            if claims is not None and claims[1] > time.time():
+                return f"user:{claims[0]}"
+    
+    return f"ip:{get_client_ip(request)}"
+
+
+class RateLimiter:
+    """
+    Rate limiter for API requests.
+    
+    Uses a GCRA limiter in Redis, evaluated by a single script per call, with
+    one quota per principal and route group. Tokens are leased from Redis in
+    small batches and spent locally, so requests from an active principal
+    usually need no Redis round trip. Leases start at one token, double while
+    they are used up within their lifetime and are refunded to Redis if they
+    expire unused. Denials are cached locally until the retry time. It is
+    shared by the instrumentation middleware and RateLimitMiddleware.
+    """
+    
+    def __init__(
+        self,
+        redis_client: Optional[Redis] = None,
         rate_limit_per_minute: int = 60,
         auth_rate_limit_per_minute: int = 5,
+        groups: Optional[Sequence[RateLimitGroup]] = None,
         enabled: bool = True,
+        lease_ttl: float = 1.0,
+        max_lease_size: int = 10,
+        max_local_entries: int = 10000,
     ):
         """
-        Initialize rate limiting middleware.
+        Initialize the rate limiter.
         
         Args:
-            app: FastAPI application
-            redis_cache: Redis cache instance
+            redis_client: Async Redis client
             rate_limit_per_minute: Rate limit for regular endpoints
             auth_rate_limit_per_minute: Rate limit for authentication endpoints
+            groups: Route groups, overriding the regular and authentication limits
             enabled: Whether rate limiting is enabled
+            lease_ttl: Seconds leased tokens can be spent locally
+            max_lease_size: Maximum number of tokens leased at once
+            max_local_entries: Maximum number of principals tracked locally
         """
-        super().__init__(app)
-        self.redis_cache = redis_cache or RedisCache(prefix="rate_limit")
-        self.rate_limit_per_minute = rate_limit_per_minute
-        self.auth_rate_limit_per_minute = auth_rate_limit_per_minute
+        self.redis = redis_client or RedisConnectionManager.get_async_connection()
+        self.script = self.redis.register_script(GCRA_SCRIPT)
         self.enabled = enabled
+        self.lease_ttl = lease_ttl
+        self.max_lease_size = max_lease_size
+        self.max_local_entries = max_local_entries
         
-        # Define paths that have special rate limits
-        self.auth_paths = {
-            "/api/v1/auth/login",
-            "/api/v1/auth/login/access-token",
-            "/api/v1/auth/register",
-        }
+        if groups is None:
+            groups = [
+                RateLimitGroup(
+                    "auth",
+                    auth_rate_limit_per_minute,
+                    paths=[
+                        "/api/v1/auth/login",
+                        "/api/v1/auth/login/access-token",
+                        "/api/v1/auth/register",
+                    ],
+                ),
+                RateLimitGroup("default", rate_limit_per_minute),
+            ]
+        
+        # Index groups by exact path and by prefix, longest prefix first
+        self.groups: List[RateLimitGroup] = list(groups)
+        self._path_groups: Dict[str, RateLimitGroup] = {}
+        prefix_groups: List[Tuple[str, RateLimitGroup]] = []
+        self._default_group: Optional[RateLimitGroup] = None
+        for group in self.groups:
+            for path in group.paths:
+                self._path_groups.setdefault(path, group)
+            prefix_groups.extend((prefix, group) for prefix in group.prefixes)
+            if not group.paths and not group.prefixes and self._default_group is None:
+                self._default_group = group
+        self._prefix_groups = sorted(prefix_groups, key=lambda item: len(item[0]), reverse=True)
+        if self._default_group is None:
+            self._default_group = RateLimitGroup("default", rate_limit_per_minute)
+        
+        self._buckets: "OrderedDict[str, _LocalBucket]" = OrderedDict()
     
-    async def dispatch(
-        self, request: Request, call_next: Callable
-    ) -> Response:
+    def get_group(self, path: str) -> RateLimitGroup:
         """
-        Process the request and apply rate limiting.
+        Get the route group for a request path.
+        
+        Args:
+            path: Request path
+            
+        Returns:
+            RateLimitGroup: Route group
+        """
+        group = self._path_groups.get(path)
+        if group is not None:
+            return group
+        
+        for prefix, group in self._prefix_groups:
+            if path.startswith(prefix):
+                return group
+        
+        return self._default_group
+    
+    async def check(self, request: Request) -> Tuple[bool, Dict[str, str]]:
+        """
+        Check whether a request is within its rate limit.
         
         Args:
             request: HTTP request
-            call_next: Next middleware or endpoint
             
         Returns:
-            Response: HTTP response
+            Tuple[bool, Dict[str, str]]: (allowed, rate limit response headers)
         """
         if not self.enabled:
-            return await call_next(request)
+            return True, {}
         
-        # Get client IP
-        client_ip = self._get_client_ip(request)
+        group = self.get_group(request.url.path)
+        principal = get_rate_limit_principal(request)
+        key = f"{group.name}:{principal}"
+        now = time.monotonic()
+        bucket = self._get_bucket(key)
         
-        # Get path
-        path = request.url.path
+        # Denied until the retry time, whatever other instances do
+        if bucket.blocked_until > now:
+            return False, self._denied_headers(group, bucket.reset_at - now, bucket.blocked_until - now)
         
-        # Determine rate limit based on path
-        is_auth_path = path in self.auth_paths
-        rate_limit = self.auth_rate_limit_per_minute if is_auth_path else self.rate_limit_per_minute
+        # Spend a leased token without a round trip
+        if bucket.tokens > 0 and bucket.expires_at > now:
+            bucket.tokens -= 1
+            return True, self._allowed_headers(group, bucket.remaining + bucket.tokens, bucket.reset_at - now)
         
-        # Check rate limit
-        allowed, current_count, ttl = await self._check_rate_limit(client_ip, path, rate_limit)
+        # Refund the tokens left in an expired lease and size the next lease
+        refund = bucket.tokens
+        bucket.tokens = 0
+        if refund > 0:
+            bucket.lease_size = max(1, bucket.lease_size // 2)
+        elif bucket.expires_at > now:
+            bucket.lease_size = min(bucket.lease_size * 2, self._get_max_lease_size(group))
         
-        # Add rate limit headers to response
-        response = await call_next(request) if allowed else self._rate_limit_exceeded_response()
+        try:
+            granted, remaining, reset_ms, retry_ms = await self.script(
+                keys=[f"rate_limit:{key}"],
+                args=[group.interval_ms, group.tolerance_ms, bucket.lease_size, refund],
+            )
+        except Exception as e:
+            # If Redis fails, allow the request but log the error
+            logger.error(f"Error checking rate limit: {str(e)}")
+            return True, {}
         
-        # Add rate limit headers
-        response.headers["X-RateLimit-Limit"] = str(rate_limit)
-        response.headers["X-RateLimit-Remaining"] = str(max(0, rate_limit - current_count))
-        if ttl > 0:
-            response.headers["X-RateLimit-Reset"] = str(ttl)
+        now = time.monotonic()
+        bucket.reset_at = now + int(reset_ms) / 1000
         
-        return response
+        if int(granted) < 1:
+            logger.warning(f"Rate limit exceeded for {principal} in group {group.name}")
+            bucket.lease_size = 1
+            bucket.expires_at = 0.0
+            bucket.blocked_until = now + int(retry_ms) / 1000
+            return False, self._denied_headers(group, int(reset_ms) / 1000, int(retry_ms) / 1000)
+        
+        # Keep the rest of the lease for later requests
+        bucket.tokens = int(granted) - 1
+        bucket.remaining = int(remaining)
+        bucket.expires_at = now + self.lease_ttl
+        return True, self._allowed_headers(group, bucket.remaining + bucket.tokens, int(reset_ms) / 1000)
     
-    def _get_client_ip(self, request: Request) -> str:
+    def _get_bucket(self, key: str) -> _LocalBucket:
         """
-        Get client IP address from request.
+        Get the local bucket for a key, evicting the least recently used one if full.
         
         Args:
-            request: HTTP request
+            key: Bucket key
             
         Returns:
-            str: Client IP address
+            _LocalBucket: Local bucket
         """
-        # Try to get IP from X-Forwarded-For header
-        forwarded_for = request.headers.get("X-Forwarded-For")
-        if forwarded_for:
-            # X-Forwarded-For can contain multiple IPs, use the first one
-            return forwarded_for.split(",")[0].strip()
+        bucket = self._buckets.get(key)
+        if bucket is not None:
+            self._buckets.move_to_end(key)
+            return bucket
         
-        # Fall back to client.host
-        return request.client.host if request.client else "unknown"
+        bucket = _LocalBucket()
+        self._buckets[key] = bucket
+        if len(self._buckets) > self.max_local_entries:
+            self._buckets.popitem(last=False)
+        return bucket
     
-    async def _check_rate_limit(
-        self, client_ip: str, path: str, rate_limit: int
-    ) -> Tuple[bool, int, int]:
+    def _get_max_lease_size(self, group: RateLimitGroup) -> int:
         """
-        Check if a request is within rate limits.
+        Get the largest lease for a group.
+        
+        Leases are capped at a tenth of the quota so a single instance cannot
+        hold back much of it.
         
         Args:
-            client_ip: Client IP address
-            path: Request path
-            rate_limit: Rate limit per minute
+            group: Route group
             
         Returns:
-            Tuple[bool, int, int]: (allowed, current_count, ttl)
+            int: Maximum lease size
+        """
+        return max(1, min(self.max_lease_size, group.limit_per_minute // 10))
+    
+    @staticmethod
+    def _allowed_headers(group: RateLimitGroup, remaining: int, reset: float) -> Dict[str, str]:
         """
-        # Create a key for this IP and path
-        # Use a sliding window of 60 seconds
-        minute = int(time.time() / 60)
-        key = f"rate_limit:{client_ip}:{path}:{minute}"
+        Build the rate limit headers for an allowed request.
         
-        try:
-            # Increment the counter
-            count = self.redis_cache.redis.incr(key)
-            
-            # Set expiration if this is a new key
-            if count == 1:
-                self.redis_cache.redis.expire(key, 60)
-            
-            # Get TTL
-            ttl = self.redis_cache.redis.ttl(key)
-            
-            # Check if rate limit is exceeded
-            if count > rate_limit:
-                logger.warning(
-                    f"Rate limit exceeded for {client_ip} on {path}: {count}/{rate_limit}"
-                )
-                return False, count, ttl
+        Args:
+            group: Route group
+            remaining: Requests remaining
+            reset: Seconds until the quota is fully restored
             
-            return True, count, ttl
-        except Exception as e:
-            # If Redis fails, allow the request but log the error
-            logger.error(f"Error checking rate limit: {str(e)}")
-            return True, 0, 0
+        Returns:
+            Dict[str, str]: Rate limit headers
+        """
+        return {
+            "X-RateLimit-Limit": str(group.limit_per_minute),
+            "X-RateLimit-Remaining": str(max(0, remaining)),
+            "X-RateLimit-Reset": str(max(0, math.ceil(reset))),
+        }
     
-    def _rate_limit_exceeded_response(self) -> JSONResponse:
+    @staticmethod
+    def _denied_headers(group: RateLimitGroup, reset: float, retry_after: float) -> Dict[str, str]:
         """
-        Create a response for rate limit exceeded.
+        Build the rate limit headers for a denied request.
         
+        Args:
+            group: Route group
+            reset: Seconds until the quota is fully restored
+            retry_after: Seconds until a request is allowed again
+            
         Returns:
-            JSONResponse: Rate limit exceeded response
+            Dict[str, str]: Rate limit headers
         """
-        return JSONResponse(
-            status_code=HTTP_429_TOO_MANY_REQUESTS,
-            content={
-                "detail": "Rate limit exceeded. Please try again later.",
-            },
+        headers = RateLimiter._allowed_headers(group, 0, reset)
+        headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+        return headers
+
+
+def rate_limit_exceeded_response() -> JSONResponse:
+    """
+    Create a response for rate limit exceeded.
+    
+    Returns:
+        JSONResponse: Rate limit exceeded response
+    """
+    return JSONResponse(
+        status_code=HTTP_429_TOO_MANY_REQUESTS,
+        content={
+            "detail": "Rate limit exceeded. Please try again later.",
+        },
+    )
+
+
+class RateLimitMiddleware(BaseHTTPMiddleware):
+    """
+    Middleware for rate limiting API requests.
+    
+    Uses Redis to track request counts and enforce rate limits.
+    """
+    
+    def __init__(
+        self,
+        app: FastAPI,
+        redis_client: Optional[Redis] = None,
+        rate_limit_per_minute: int = 60,
+        auth_rate_limit_per_minute: int = 5,
+        groups: Optional[Sequence[RateLimitGroup]] = None,
+        enabled: bool = True,
+    ):
+        """
+        Initialize rate limiting middleware.
+        
+        Args:
+            app: FastAPI application
+            redis_client: Async Redis client
+            rate_limit_per_minute: Rate limit for regular endpoints
+            auth_rate_limit_per_minute: Rate limit for authentication endpoints
+            groups: Route groups, overriding the regular and authentication limits
+            enabled: Whether rate limiting is enabled
+        """
+        super().__init__(app)
+        self.rate_limiter = RateLimiter(
+            redis_client=redis_client,
+            rate_limit_per_minute=rate_limit_per_minute,
+            auth_rate_limit_per_minute=auth_rate_limit_per_minute,
+            groups=groups,
+            enabled=enabled,
         )
+    
+    async def dispatch(
+        self, request: Request, call_next: Callable
+    ) -> Response:
+        """
+        Process the request and apply rate limiting.
+        
+        Args:
+            request: HTTP request
+            call_next: Next middleware or endpoint
+            
+        Returns:
+            Response: HTTP response
+        """
+        allowed, headers = await self.rate_limiter.check(request)
+        
+        # Add rate limit headers to response
+        response = await call_next(request) if allowed else rate_limit_exceeded_response()
+        response.headers.update(headers)
+        
+        return response
@@ -2,6 +2,7 @@
 
 import os
 from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.docs import (
     get_redoc_html,
@@ -10,24 +11,24 @@ from fastapi.openapi.docs import (
 )
 
 from app.api import api_router
-from app.core.cache.connection import RedisCache
 from app.core.config import settings, EnvironmentType
 from app.core.logging import get_logger
-from app.core.middleware import (
-    LoggingMiddleware,
-    RequestIdMiddleware,
-    ErrorHandlingMiddleware,
-    ProfilingMiddleware
-)
+from app.core.middleware import InstrumentationMiddleware, LoggingMiddleware
+from app.core.model_selection.usage_recorder import shutdown_usage_recorder
 from app.core.monitoring import (
     setup_tracing,
     TracingConfig,
-    rotate_logs,
+    start_log_rotation,
+    shutdown_log_rotation,
     AuditLogEvent,
     record_audit_log,
+    shutdown_audit_log_writer,
+    shutdown_error_tracker,
     get_performance_summary
 )
-from app.core.security.rate_limit import RateLimitMiddleware
+from app.core.security.principal_cache import principal_cache
+from app.core.security.rate_limit import RateLimiter
+from app.services.procedure_enrichment_index import get_procedure_enrichment_index
 
 # Configure logger
 logger = get_logger(__name__)
@@ -41,49 +42,6 @@ app = FastAPI(
     redoc_url=None,  # Disable default redoc to use custom redoc
 )
 
-# Add request ID middleware (should be first in the chain)
-app.add_middleware(RequestIdMiddleware)
-
-# Add logging middleware
-app.add_middleware(LoggingMiddleware)
-
-# Add error handling middleware
-app.add_middleware(ErrorHandlingMiddleware)
-
-# Add profiling middleware
-if settings.ENVIRONMENT != EnvironmentType.TESTING:
-    app.add_middleware(
-        ProfilingMiddleware,
-        enabled=settings.PERFORMANCE_PROFILING_ENABLED,
-    )
-    logger.info("Performance profiling middleware initialized")
-
-# Set up CORS middleware
-if settings.BACKEND_CORS_ORIGINS:
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=[str(origin) for origin in settings.BACKEND_CORS_ORIGINS],
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
-    )
-
-# Set up rate limiting middleware
-# Skip rate limiting for testing environment
-if settings.ENVIRONMENT != EnvironmentType.TESTING:
-    try:
-        redis_cache = RedisCache(prefix="rate_limit")
-        app.add_middleware(
-            RateLimitMiddleware,
-            redis_cache=redis_cache,
-            rate_limit_per_minute=60,  # 60 requests per minute for regular endpoints
-            auth_rate_limit_per_minute=5,  # 5 requests per minute for auth endpoints
-            enabled=not settings.DEBUG,  # Disable in debug mode
-        )
-    except Exception as e:
-        logger.warning(f"Failed to initialize rate limiting middleware: {e}")
-        # Continue without rate limiting if Redis is not available
-
 # Set up distributed tracing
 if settings.ENVIRONMENT != EnvironmentType.TESTING:
     # Configure tracing
@@ -113,24 +71,41 @@ if settings.ENVIRONMENT != EnvironmentType.TESTING:
 @app.on_event("startup")
 async def startup_event():
     """Startup event for the application."""
-    # Rotate logs on startup
-    rotate_logs()
+    # Rotate logs in the background, now and then periodically
+    start_log_rotation()
     logger.info("Log rotation initialized")
 
+    # Drop cached principals when users change in other instances
+    principal_cache.start_listener()
+
+    # Build the procedure enrichment index before the first maintenance request
+    try:
+        await run_in_threadpool(get_procedure_enrichment_index().warm)
+    except Exception as e:
+        logger.error(f"Failed to warm procedure enrichment index: {str(e)}")
+
 @app.on_event("shutdown")
 async def shutdown_event():
     """Shutdown event for the application."""
-    # Perform final log rotation
-    rotate_logs()
-    logger.info("Final log rotation completed")
+    # Write any queued model usage records, off the event loop
+    await run_in_threadpool(shutdown_usage_recorder)
 
-# Set up audit logging for key events
-@app.middleware("http")
-async def audit_logging_middleware(request: Request, call_next):
-    """Middleware for audit logging of key events."""
-    # Process the request
-    response = await call_next(request)
+    # Write any queued audit logs, off the event loop
+    await run_in_threadpool(shutdown_audit_log_writer)
+
+    # Write any errors not yet flushed, off the event loop
+    await run_in_threadpool(shutdown_error_tracker)
+
+    # Stop listening for principal invalidations
+    principal_cache.stop_listener()
 
+    # Stop background log rotation, off the event loop
+    await run_in_threadpool(shutdown_log_rotation)
+    logger.info("Log rotation stopped")
+
+# Set up audit logging for key events
+def audit_key_events(request: Request, status_code: int) -> None:
+    """Audit hook recording logins and user creation."""
     # Check if this is an authentication request
     if request.url.path.endswith("/login") and request.method == "POST":
         # Record login event with status based on response code
@@ -142,11 +117,11 @@ async def audit_logging_middleware(request: Request, call_next):
             user_id=None,
             ip_address=request.client.host if request.client else None,
             user_agent=request.headers.get("user-agent"),
-            status="success" if response.status_code == 200 else "failure",
+            status="success" if status_code == 200 else "failure",
             details={
                 "path": request.url.path,
                 "method": request.method,
-                "status_code": response.status_code,
+                "status_code": status_code,
             },
         )
 
@@ -158,11 +133,49 @@ async def audit_logging_middleware(request: Request, call_next):
             action="User created",
             ip_address=request.client.host if request.client else None,
             user_agent=request.headers.get("user-agent"),
-            status="success" if response.status_code in (200, 201) else "failure",
+            status="success" if status_code in (200, 201) else "failure",
         )
 
-    # Return the original response
-    return response
+# Set up rate limiting
+# Skip rate limiting for testing environment
+rate_limiter = None
+if settings.ENVIRONMENT != EnvironmentType.TESTING:
+    try:
+        rate_limiter = RateLimiter(
+            rate_limit_per_minute=60,  # 60 requests per minute for regular endpoints
+            auth_rate_limit_per_minute=5,  # 5 requests per minute for auth endpoints
+            enabled=not settings.DEBUG,  # Disable in debug mode
+        )
+    except Exception as e:
+        logger.warning(f"Failed to initialize rate limiting: {e}")
+        # Continue without rate limiting if Redis is not available
+
+# Add body logging middleware for a sample of requests; it is added first so
+# it runs inside the instrumentation middleware and sees the request ID
+if settings.LOG_BODY_SAMPLE_RATE > 0:
+    app.add_middleware(
+        LoggingMiddleware,
+        sample_rate=settings.LOG_BODY_SAMPLE_RATE,
+        max_body_size=settings.LOG_BODY_MAX_BYTES,
+    )
+
+# Add instrumentation middleware for request IDs, timing, metrics, errors,
+# rate limiting and audit logging in a single pass
+app.add_middleware(
+    InstrumentationMiddleware,
+    rate_limiter=rate_limiter,
+    audit_hooks=[audit_key_events],
+)
+
+# Set up CORS middleware
+if settings.BACKEND_CORS_ORIGINS:
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=[str(origin) for origin in settings.BACKEND_CORS_ORIGINS],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
 
 # Include API router
 app.include_router(api_router)
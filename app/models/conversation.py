@@ -7,7 +7,7 @@ import uuid
 from typing import List, Optional, ForwardRef
 
 from sqlalchemy import (
-    Boolean, Column, Enum, ForeignKey, Integer,
+    Boolean, Column, Enum, ForeignKey, Index, Integer,
     String, Text, UniqueConstraint, func, JSON
 )
 from sqlalchemy.dialects.postgresql import JSONB, UUID
@@ -54,6 +54,11 @@ class Conversation(BaseModel):
     Conversation model for storing conversation history.
     """
 
+    # Composite index for keyset pagination of a user's conversations
+    __table_args__ = (
+        Index("ix_conversation_user_created", "user_id", "created_at", "id"),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     conversation_id = Column(
         UUID(as_uuid=True),
@@ -102,6 +107,17 @@ class Message(BaseModel):
     Message model for storing conversation messages.
     """
 
+    # In PostgreSQL, message and conversation also have a generated
+    # search_vector column (see app.core.db.search); it is not mapped so the
+    # models can still be created on SQLite
+
+    # BRIN index for time-range scans over the append-only message table, and
+    # a composite index for keyset pagination and "last N messages" reads
+    __table_args__ = (
+        Index("ix_message_created_at_brin", "created_at", postgresql_using="brin"),
+        Index("ix_message_conversation_created", "conversation_id", "created_at", "id"),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     conversation_id = Column(
         Integer,
@@ -5,7 +5,7 @@ This module defines the data models for document metadata, including
 standardized formats, taxonomy, and classification systems.
 """
 from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Table, Text, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import backref, relationship
 from sqlalchemy.sql import func
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.dialects.postgresql import JSONB
@@ -114,8 +114,7 @@ class DocumentTaxonomy(Base):
 
     # Self-referential relationship
     children = relationship("DocumentTaxonomy",
-                           backref="parent",
-                           remote_side=[id],
+                           backref=backref("parent", remote_side=[id]),
                            cascade="all, delete-orphan")
 
     def to_dict(self, include_children: bool = False) -> Dict[str, Any]:
@@ -14,7 +14,7 @@ def utcnow():
     return datetime.now(timezone.utc)
 
 from sqlalchemy import (
-    Column, Integer, String, Float, Boolean, DateTime, ForeignKey,
+    Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Index,
     Table, Text, Enum as SQLEnum, JSON, UniqueConstraint
 )
 from sqlalchemy.dialects.postgresql import UUID, JSONB
@@ -77,8 +77,8 @@ class DocumentReference(BaseModel):
     id = Column(Integer, primary_key=True, index=True)
     source_document_id = Column(String(255), nullable=False, index=True)
     target_document_id = Column(String(255), nullable=False, index=True)
-    source_version_id = Column(Integer, ForeignKey("document_version.id"), nullable=True)
-    target_version_id = Column(Integer, ForeignKey("document_version.id"), nullable=True)
+    source_version_id = Column(Integer, ForeignKey("documentversion.id"), nullable=True)
+    target_version_id = Column(Integer, ForeignKey("documentversion.id"), nullable=True)
     reference_type = Column(SQLEnum(ReferenceType), nullable=False)
     source_section_id = Column(String(255), nullable=True)  # Section in source document
     target_section_id = Column(String(255), nullable=True)  # Section in target document
@@ -117,7 +117,7 @@ class DocumentUpdateNotification(BaseModel):
     """
     id = Column(Integer, primary_key=True, index=True)
     document_id = Column(String(255), nullable=False, index=True)
-    version_id = Column(Integer, ForeignKey("document_version.id"), nullable=False)
+    version_id = Column(Integer, ForeignKey("documentversion.id"), nullable=False)
     notification_id = Column(UUID(as_uuid=True), default=uuid.uuid4, unique=True, nullable=False)
     title = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
@@ -130,6 +130,11 @@ class DocumentUpdateNotification(BaseModel):
     # Relationships
     version = relationship("DocumentVersion")
 
+    # Composite index for keyset pagination, newest first
+    __table_args__ = (
+        Index('ix_document_notification_created', 'created_at', 'id'),
+    )
+
 
 class DocumentAnalytics(BaseModel):
     """
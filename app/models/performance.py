@@ -11,7 +11,7 @@ from typing import Dict, List, Optional
 from pydantic import BaseModel, Field
 from sqlalchemy import (
     Boolean, Column, DateTime, Enum as SQLAlchemyEnum, 
-    Float, ForeignKey, Integer, String, Text
+    Float, ForeignKey, Index, Integer, String, Text, UniqueConstraint
 )
 from sqlalchemy.orm import relationship
 
@@ -29,15 +29,28 @@ class PerformanceMetricType(str, Enum):
     QUALITY_SCORE = "quality_score"
 
 
+class RollupGranularity(str, Enum):
+    """
+    Enum for usage rollup bucket sizes.
+    """
+    HOUR = "hour"
+    DAY = "day"
+    MONTH = "month"
+
+
 class ModelUsageRecord(SQLBaseModel):
     """
     Model for tracking model usage.
+
+    In PostgreSQL the table is range-partitioned by month on timestamp (see
+    app.core.db.partitioning), so queries should always bound timestamp.
     """
     id = Column(Integer, primary_key=True, index=True)
     model_id = Column(String(50), nullable=False, index=True)
-    timestamp = Column(DateTime, default=datetime.utcnow, nullable=False)
+    timestamp = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
     query_id = Column(String(50), nullable=False)
     conversation_id = Column(String(50), nullable=True)
+    agent_type = Column(String(50), nullable=True)
     input_tokens = Column(Integer, nullable=False)
     output_tokens = Column(Integer, nullable=False)
     latency_ms = Column(Integer, nullable=False)
@@ -54,6 +67,10 @@ class PerformanceMetric(SQLBaseModel):
     """
     Model for aggregated performance metrics.
     """
+    __table_args__ = (
+        Index("ix_performancemetric_period_end", "time_period", "end_time"),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     model_id = Column(String(50), nullable=False, index=True)
     metric_type = Column(SQLAlchemyEnum(PerformanceMetricType), nullable=False)
@@ -68,6 +85,35 @@ class PerformanceMetric(SQLBaseModel):
         orm_mode = True
 
 
+class ModelUsageRollup(SQLBaseModel):
+    """
+    Model for model usage pre-aggregated into time buckets.
+
+    Rollups store sums and counts rather than averages, so buckets can be
+    added together into coarser buckets and arbitrary time ranges.
+    """
+    __table_args__ = (
+        UniqueConstraint(
+            "granularity", "bucket_start", "model_id", "agent_type",
+            name="uq_modelusagerollup_bucket"
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    granularity = Column(String(10), nullable=False)  # hour, day, month
+    bucket_start = Column(DateTime, nullable=False)
+    model_id = Column(String(50), nullable=False, index=True)
+    agent_type = Column(String(50), nullable=False)
+    request_count = Column(Integer, nullable=False, default=0)
+    success_count = Column(Integer, nullable=False, default=0)
+    latency_sum_ms = Column(Float, nullable=False, default=0.0)  # successful requests only
+    input_tokens = Column(Integer, nullable=False, default=0)
+    output_tokens = Column(Integer, nullable=False, default=0)
+    cost = Column(Float, nullable=False, default=0.0)
+    quality_sum = Column(Float, nullable=False, default=0.0)
+    quality_count = Column(Integer, nullable=False, default=0)
+
+
 class ModelPerformanceSnapshot(BaseModel):
     """
     Model for a snapshot of model performance metrics.
@@ -81,6 +127,45 @@ class ModelPerformanceSnapshot(BaseModel):
     total_cost: float
     average_quality_score: Optional[float] = None
     
+    @classmethod
+    def from_totals(
+        cls,
+        model_id: str,
+        total_requests: int,
+        successful_requests: int,
+        latency_sum_ms: float,
+        total_tokens: int,
+        total_cost: float,
+        quality_sum: float = 0.0,
+        quality_count: int = 0
+    ) -> "ModelPerformanceSnapshot":
+        """
+        Create a performance snapshot from summed usage totals.
+        
+        Args:
+            model_id: Model ID
+            total_requests: Number of requests
+            successful_requests: Number of successful requests
+            latency_sum_ms: Total latency of successful requests in milliseconds
+            total_tokens: Total input and output tokens
+            total_cost: Total cost
+            quality_sum: Sum of quality scores
+            quality_count: Number of requests with a quality score
+            
+        Returns:
+            ModelPerformanceSnapshot: Performance snapshot
+        """
+        return cls(
+            model_id=model_id,
+            timestamp=datetime.utcnow(),
+            success_rate=successful_requests / total_requests if total_requests else 0.0,
+            average_latency=latency_sum_ms / successful_requests if successful_requests else 0.0,
+            total_requests=total_requests,
+            total_tokens=total_tokens,
+            total_cost=total_cost,
+            average_quality_score=quality_sum / quality_count if quality_count else None
+        )
+    
     @classmethod
     def from_usage_records(cls, model_id: str, records: List[ModelUsageRecord]) -> "ModelPerformanceSnapshot":
         """
@@ -3,7 +3,7 @@ Base repository for all repositories in the MAGPIE platform.
 """
 import logging
 import time
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from typing import Any, Dict, Generic, List, Optional, Tuple, Type, TypeVar, Union
 
 from sqlalchemy import select, update, delete
 from sqlalchemy.exc import SQLAlchemyError
@@ -18,6 +18,7 @@ from app.core.db.connection import DatabaseConnectionFactory
 from app.core.db.optimizer import query_optimizer, optimized_query
 from app.core.monitoring.profiling import profile_function, PerformanceCategory
 from app.models.base import BaseModel
+from app.repositories.pagination import DEFAULT_PAGE_SIZE, apply_keyset, paginate
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -246,6 +247,42 @@ class BaseRepository(Generic[T]):
             logger.error(f"Error getting all {self.model_class.__name__}: {str(e)}")
             return []
 
+    def get_page(
+        self,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        descending: bool = False
+    ) -> Tuple[List[T], Optional[str]]:
+        """
+        Get a page of model instances using keyset pagination on (created_at, id).
+
+        Unlike get_all, the cost of a page does not grow with its depth.
+
+        Args:
+            limit: Maximum number of instances to return
+            cursor: Optional cursor returned with the previous page
+            descending: Whether to page from newest to oldest
+
+        Returns:
+            Tuple[List[T], Optional[str]]: Page of instances and the cursor of the
+                next page, or None if this is the last page
+        """
+        try:
+            query = apply_keyset(
+                select(self.model_class),
+                self.model_class.created_at,
+                self.model_class.id,
+                cursor=cursor,
+                descending=descending,
+                limit=limit
+            )
+
+            result = self.session.execute(query)
+            return paginate(list(result.scalars().all()), limit)
+        except (SQLAlchemyError, ValueError) as e:
+            logger.error(f"Error getting page of {self.model_class.__name__}: {str(e)}")
+            return [], None
+
     @profile_function(PerformanceCategory.DATABASE)
     def create(self, data: Union[Dict[str, Any], T]) -> Optional[T]:
         """
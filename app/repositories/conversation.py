@@ -5,14 +5,22 @@ import logging
 import uuid
 from typing import Dict, List, Optional, Union, Tuple
 
-from sqlalchemy import select, and_, or_, desc, between
+from sqlalchemy import (
+    select, and_, or_, desc, between, column, func, literal_column, table, text, union_all
+)
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.sql import Select
+
+from app.core.db.search import (
+    TEXT_SEARCH_CONFIG, has_sqlite_search_index, is_identifier_term, to_fts5_query
+)
 
 from app.models.conversation import AgentType, Conversation, Message, MessageRole
 from app.models.context import ContextWindow, ContextItem, ContextType, ContextPriority
 from app.repositories.base import BaseRepository
 from app.repositories.context import ContextWindowRepository, ContextItemRepository
+from app.repositories.pagination import DEFAULT_PAGE_SIZE, apply_keyset, decode_cursor, paginate
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -99,6 +107,52 @@ class ConversationRepository(BaseRepository[Conversation]):
             logger.error(f"Error getting conversations by user ID: {str(e)}")
             return []
 
+    def get_page_by_user_id(
+        self,
+        user_id: int,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        agent_type: Optional[AgentType] = None,
+        active_only: bool = True
+    ) -> Tuple[List[Conversation], Optional[str]]:
+        """
+        Get a page of conversations by user ID, newest first.
+
+        Uses keyset pagination on (created_at, id), so deep pages cost the
+        same as the first one.
+
+        Args:
+            user_id: User ID
+            limit: Maximum number of conversations to return
+            cursor: Optional cursor returned with the previous page
+            agent_type: Filter by agent type
+            active_only: Only return active conversations
+
+        Returns:
+            Tuple[List[Conversation], Optional[str]]: Conversations and the cursor of
+                the next page, or None if this is the last page
+        """
+        try:
+            query = select(Conversation).where(Conversation.user_id == user_id)
+
+            # Apply filters
+            if agent_type:
+                query = query.where(Conversation.agent_type == agent_type)
+
+            if active_only:
+                query = query.where(Conversation.is_active == True)
+
+            query = apply_keyset(
+                query, Conversation.created_at, Conversation.id,
+                cursor=cursor, descending=True, limit=limit
+            )
+
+            result = self.session.execute(query)
+            return paginate(list(result.scalars().all()), limit)
+        except (SQLAlchemyError, ValueError) as e:
+            logger.error(f"Error getting page of conversations by user ID: {str(e)}")
+            return [], None
+
     def get_with_messages(
         self,
         conversation_id: Union[str, uuid.UUID],
@@ -152,7 +206,15 @@ class ConversationRepository(BaseRepository[Conversation]):
         offset: int = 0
     ) -> List[Conversation]:
         """
-        Search conversations by title.
+        Search conversations by title and message content.
+
+        Results are ranked by relevance. PostgreSQL uses the full-text search
+        indexes, with trigram matching for identifier-like terms such as part
+        numbers or when no words match; SQLite uses FTS5 tables when they
+        exist. Other databases fall back to substring matching.
+
+        The search mode is chosen from whether any conversation matches at
+        all, before paging, so every page of a search uses the same mode.
 
         Args:
             user_id: User ID
@@ -164,34 +226,207 @@ class ConversationRepository(BaseRepository[Conversation]):
             List[Conversation]: List of matching conversations
         """
         try:
-            # Create search pattern
-            pattern = f"%{search_term}%"
+            dialect = self.session.get_bind().dialect.name
+            identifier = is_identifier_term(search_term)
 
-            # Search in conversation title and messages
-            query = (
-                select(Conversation)
-                .distinct()
-                .join(Conversation.messages)
-                .where(
-                    and_(
-                        Conversation.user_id == user_id,
-                        or_(
-                            Conversation.title.ilike(pattern),
-                            Message.content.ilike(pattern)
-                        )
-                    )
-                )
-                .order_by(desc(Conversation.updated_at))
-                .limit(limit)
-                .offset(offset)
-            )
+            if dialect == "postgresql":
+                matches = None if identifier else self._full_text_matches(user_id, search_term)
+                if matches is None or not self._has_matches(*matches):
+                    matches = self._trigram_matches(user_id, search_term)
+                return self._rank_conversations(*matches, limit, offset)
 
-            result = self.session.execute(query)
-            return list(result.scalars().all())
+            if dialect == "sqlite" and has_sqlite_search_index(self.session):
+                matches = None if identifier else self._fts5_matches(user_id, search_term)
+                if matches is not None and self._has_matches(*matches):
+                    return self._rank_conversations(*matches, limit, offset)
+
+            return self._search_substring(user_id, search_term, limit, offset)
         except SQLAlchemyError as e:
             logger.error(f"Error searching conversations: {str(e)}")
             return []
 
+    def _full_text_matches(self, user_id: int, search_term: str) -> Tuple[Select, Select]:
+        """
+        Build matches against the PostgreSQL tsvector columns, ranked with ts_rank.
+
+        Args:
+            user_id: User ID
+            search_term: Search term (web search syntax)
+
+        Returns:
+            Tuple[Select, Select]: Message and title queries of (conversation ID, rank)
+        """
+        ts_query = func.websearch_to_tsquery(TEXT_SEARCH_CONFIG, search_term)
+        message_vector = literal_column("message.search_vector")
+        title_vector = literal_column("conversation.search_vector")
+
+        message_matches = (
+            select(Message.conversation_id, func.ts_rank(message_vector, ts_query).label("rank"))
+            .join(Conversation, Conversation.id == Message.conversation_id)
+            .where(Conversation.user_id == user_id, message_vector.op("@@")(ts_query))
+        )
+        title_matches = (
+            select(Conversation.id, func.ts_rank(title_vector, ts_query).label("rank"))
+            .where(Conversation.user_id == user_id, title_vector.op("@@")(ts_query))
+        )
+
+        return message_matches, title_matches
+
+    def _trigram_matches(self, user_id: int, search_term: str) -> Tuple[Select, Select]:
+        """
+        Build substring matches using the PostgreSQL trigram indexes, ranked by similarity.
+
+        Args:
+            user_id: User ID
+            search_term: Search term
+
+        Returns:
+            Tuple[Select, Select]: Message and title queries of (conversation ID, rank)
+        """
+        pattern = f"%{search_term}%"
+
+        message_matches = (
+            select(Message.conversation_id, func.word_similarity(search_term, Message.content).label("rank"))
+            .join(Conversation, Conversation.id == Message.conversation_id)
+            .where(Conversation.user_id == user_id, Message.content.ilike(pattern))
+        )
+        title_matches = (
+            select(Conversation.id, func.word_similarity(search_term, Conversation.title).label("rank"))
+            .where(Conversation.user_id == user_id, Conversation.title.ilike(pattern))
+        )
+
+        return message_matches, title_matches
+
+    def _fts5_matches(self, user_id: int, search_term: str) -> Optional[Tuple[Select, Select]]:
+        """
+        Build matches against the SQLite FTS5 tables, ranked with bm25.
+
+        Args:
+            user_id: User ID
+            search_term: Search term
+
+        Returns:
+            Optional[Tuple[Select, Select]]: Message and title queries of (conversation ID, rank),
+                or None if the term has no searchable words
+        """
+        fts_query = to_fts5_query(search_term)
+        if not fts_query:
+            return None
+
+        message_fts = table("message_fts", column("rowid"))
+        conversation_fts = table("conversation_fts", column("rowid"))
+
+        # bm25 scores are lower for better matches, so negate them
+        message_matches = (
+            select(Message.conversation_id, literal_column("-bm25(message_fts)").label("rank"))
+            .join(message_fts, message_fts.c.rowid == Message.id)
+            .join(Conversation, Conversation.id == Message.conversation_id)
+            .where(
+                Conversation.user_id == user_id,
+                text("message_fts MATCH :message_query").bindparams(message_query=fts_query)
+            )
+        )
+        title_matches = (
+            select(Conversation.id, literal_column("-bm25(conversation_fts)").label("rank"))
+            .join(conversation_fts, conversation_fts.c.rowid == Conversation.id)
+            .where(
+                Conversation.user_id == user_id,
+                text("conversation_fts MATCH :title_query").bindparams(title_query=fts_query)
+            )
+        )
+
+        return message_matches, title_matches
+
+    def _search_substring(self, user_id: int, search_term: str, limit: int, offset: int) -> List[Conversation]:
+        """
+        Search by case-insensitive substring, most recently updated first.
+
+        Args:
+            user_id: User ID
+            search_term: Search term
+            limit: Maximum number of conversations to return
+            offset: Number of conversations to skip
+
+        Returns:
+            List[Conversation]: List of matching conversations
+        """
+        # Create search pattern
+        pattern = f"%{search_term}%"
+
+        # Search in conversation title and messages
+        query = (
+            select(Conversation)
+            .distinct()
+            .join(Conversation.messages)
+            .where(
+                and_(
+                    Conversation.user_id == user_id,
+                    or_(
+                        Conversation.title.ilike(pattern),
+                        Message.content.ilike(pattern)
+                    )
+                )
+            )
+            .order_by(desc(Conversation.updated_at))
+            .limit(limit)
+            .offset(offset)
+        )
+
+        result = self.session.execute(query)
+        return list(result.scalars().all())
+
+    def _has_matches(self, message_matches: Select, title_matches: Select) -> bool:
+        """
+        Check whether any message or title matches, regardless of paging.
+
+        Args:
+            message_matches: Query of (conversation ID, rank) for matching messages
+            title_matches: Query of (conversation ID, rank) for matching titles
+
+        Returns:
+            bool: Whether there is at least one match
+        """
+        query = select(or_(message_matches.exists(), title_matches.exists()))
+        return bool(self.session.execute(query).scalar())
+
+    def _rank_conversations(
+        self,
+        message_matches: Select,
+        title_matches: Select,
+        limit: int,
+        offset: int
+    ) -> List[Conversation]:
+        """
+        Get conversations ordered by their best title or message match.
+
+        Args:
+            message_matches: Query of (conversation ID, rank) for matching messages
+            title_matches: Query of (conversation ID, rank) for matching titles
+            limit: Maximum number of conversations to return
+            offset: Number of conversations to skip
+
+        Returns:
+            List[Conversation]: List of matching conversations
+        """
+        matches = union_all(message_matches, title_matches).subquery()
+        conversation_id, rank = matches.c
+        best_matches = (
+            select(conversation_id.label("conversation_id"), func.max(rank).label("rank"))
+            .group_by(conversation_id)
+            .subquery()
+        )
+
+        query = (
+            select(Conversation)
+            .join(best_matches, Conversation.id == best_matches.c.conversation_id)
+            .order_by(desc(best_matches.c.rank), desc(Conversation.updated_at))
+            .limit(limit)
+            .offset(offset)
+        )
+
+        result = self.session.execute(query)
+        return list(result.scalars().all())
+
     def add_message(
         self,
         conversation_id: Union[int, str, uuid.UUID],
@@ -333,6 +568,99 @@ class ConversationRepository(BaseRepository[Conversation]):
             logger.error(f"Error getting messages for conversation: {str(e)}")
             return []
 
+    def get_messages_page(
+        self,
+        conversation_id: Union[int, str, uuid.UUID],
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        newest_first: bool = True
+    ) -> Tuple[List[Message], Optional[str]]:
+        """
+        Get a page of messages for a conversation.
+
+        Uses keyset pagination on (created_at, id) over the
+        (conversation_id, created_at, id) index. With newest_first, the first
+        page holds the latest messages and later pages scroll back in time.
+
+        Args:
+            conversation_id: Conversation ID or UUID
+            limit: Maximum number of messages to return
+            cursor: Optional cursor returned with the previous page
+            newest_first: Whether to page from newest to oldest
+
+        Returns:
+            Tuple[List[Message], Optional[str]]: Messages in page order and the cursor
+                of the next page, or None if this is the last page
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        # A malformed cursor must not look like the end of the conversation
+        if cursor:
+            decode_cursor(cursor)
+
+        try:
+            query = apply_keyset(
+                select(Message).where(self._message_conversation_filter(conversation_id)),
+                Message.created_at, Message.id,
+                cursor=cursor, descending=newest_first, limit=limit
+            )
+
+            result = self.session.execute(query)
+            return paginate(list(result.scalars().all()), limit)
+        except (SQLAlchemyError, ValueError) as e:
+            logger.error(f"Error getting page of messages for conversation: {str(e)}")
+            return [], None
+
+    def get_recent_messages(
+        self,
+        conversation_id: Union[int, str, uuid.UUID],
+        count: int = 20
+    ) -> List[Message]:
+        """
+        Get the last messages of a conversation in chronological order.
+
+        Reads only the requested messages from the end of the
+        (conversation_id, created_at, id) index, however long the
+        conversation is.
+
+        Args:
+            conversation_id: Conversation ID or UUID
+            count: Number of messages to return
+
+        Returns:
+            List[Message]: Most recent messages, oldest first
+        """
+        messages, _ = self.get_messages_page(conversation_id, limit=count, newest_first=True)
+        messages.reverse()
+        return messages
+
+    def _message_conversation_filter(self, conversation_id: Union[int, str, uuid.UUID]):
+        """
+        Build a filter on Message.conversation_id for a conversation ID or UUID.
+
+        UUIDs are resolved in a subquery, so no separate lookup is needed.
+
+        Args:
+            conversation_id: Conversation ID or UUID
+
+        Returns:
+            Filter expression
+
+        Raises:
+            ValueError: If conversation_id is not a valid UUID string
+        """
+        if isinstance(conversation_id, (str, uuid.UUID)):
+            if isinstance(conversation_id, str):
+                conversation_id = uuid.UUID(conversation_id)
+            return Message.conversation_id == (
+                select(Conversation.id)
+                .where(Conversation.conversation_id == conversation_id)
+                .scalar_subquery()
+            )
+
+        return Message.conversation_id == conversation_id
+
     def get_messages_in_range(
         self,
         conversation_id: Union[int, str, uuid.UUID],
@@ -22,6 +22,7 @@ from app.models.document_relationship import (
     DocumentAnalytics, DocumentConflict, ReferenceType
 )
 from app.repositories.base import BaseRepository
+from app.repositories.pagination import DEFAULT_PAGE_SIZE, apply_keyset, paginate
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -555,20 +556,7 @@ class DocumentNotificationRepository(BaseRepository):
             List[DocumentUpdateNotification]: List of notifications
         """
         try:
-            # Build query
-            conditions = []
-
-            if document_id:
-                conditions.append(DocumentUpdateNotification.document_id == document_id)
-
-            if is_read is not None:
-                conditions.append(DocumentUpdateNotification.is_read == is_read)
-
-            stmt = select(DocumentUpdateNotification)
-
-            if conditions:
-                stmt = stmt.where(and_(*conditions))
-
+            stmt = self._notifications_query(document_id, is_read)
             stmt = stmt.order_by(desc(DocumentUpdateNotification.created_at))
 
             if limit:
@@ -579,6 +567,75 @@ class DocumentNotificationRepository(BaseRepository):
             logger.error(f"Error getting document notifications: {str(e)}")
             return []
 
+    def get_notifications_page(
+        self,
+        document_id: Optional[str] = None,
+        is_read: Optional[bool] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[DocumentUpdateNotification], Optional[str]]:
+        """
+        Get a page of document update notifications, newest first.
+
+        Uses keyset pagination on (created_at, id), so deep pages cost the
+        same as the first one.
+
+        Args:
+            document_id: Document ID
+            is_read: Whether the notification is read
+            limit: Maximum number of notifications to return
+            cursor: Optional cursor returned with the previous page
+
+        Returns:
+            Tuple[List[DocumentUpdateNotification], Optional[str]]: Notifications and
+                the cursor of the next page, or None if this is the last page
+        """
+        try:
+            stmt = apply_keyset(
+                self._notifications_query(document_id, is_read),
+                DocumentUpdateNotification.created_at,
+                DocumentUpdateNotification.id,
+                cursor=cursor,
+                descending=True,
+                limit=limit
+            )
+
+            return paginate(list(self.session.execute(stmt).scalars().all()), limit)
+        except (SQLAlchemyError, ValueError) as e:
+            logger.error(f"Error getting page of document notifications: {str(e)}")
+            return [], None
+
+    def _notifications_query(
+        self,
+        document_id: Optional[str] = None,
+        is_read: Optional[bool] = None
+    ):
+        """
+        Build the base query for document update notifications.
+
+        Args:
+            document_id: Document ID
+            is_read: Whether the notification is read
+
+        Returns:
+            Select: Filtered notification query
+        """
+        # Build query
+        conditions = []
+
+        if document_id:
+            conditions.append(DocumentUpdateNotification.document_id == document_id)
+
+        if is_read is not None:
+            conditions.append(DocumentUpdateNotification.is_read == is_read)
+
+        stmt = select(DocumentUpdateNotification)
+
+        if conditions:
+            stmt = stmt.where(and_(*conditions))
+
+        return stmt
+
     def mark_notification_read(self, notification_id: int) -> bool:
         """
         Mark a notification as read.
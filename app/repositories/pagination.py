@@ -0,0 +1,115 @@
+"""
+Keyset pagination helpers for the MAGPIE platform.
+
+Pages are addressed by an opaque cursor holding the (created_at, id) of the
+last row of the previous page, so fetching a page costs the same however
+deep it is, unlike LIMIT/OFFSET.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import tuple_
+from sqlalchemy.sql import Select
+
+# Default number of rows per page
+DEFAULT_PAGE_SIZE = 50
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """
+    Encode the position of a row as a cursor.
+
+    Args:
+        created_at: Row creation time
+        row_id: Row ID
+
+    Returns:
+        str: URL-safe cursor
+    """
+    payload = json.dumps({"created_at": created_at.isoformat(), "id": row_id})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a cursor into the position of a row.
+
+    Args:
+        cursor: Cursor from encode_cursor
+
+    Returns:
+        Tuple[datetime, int]: Row creation time and ID
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["created_at"]), int(payload["id"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def apply_keyset(
+    query: Select,
+    created_at_column: Any,
+    id_column: Any,
+    cursor: Optional[str] = None,
+    descending: bool = False,
+    limit: int = DEFAULT_PAGE_SIZE
+) -> Select:
+    """
+    Order a query by (created_at, id) and restrict it to the page after a cursor.
+
+    One extra row is fetched so paginate() can tell whether another page exists.
+
+    Args:
+        query: Query to paginate
+        created_at_column: Creation time column
+        id_column: ID column
+        cursor: Optional cursor of the last row of the previous page
+        descending: Whether to page from newest to oldest
+        limit: Maximum number of rows per page
+
+    Returns:
+        Select: Paginated query
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    position = tuple_(created_at_column, id_column)
+
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        after = tuple_(created_at, row_id)
+        query = query.where(position < after if descending else position > after)
+
+    if descending:
+        query = query.order_by(created_at_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(created_at_column, id_column)
+
+    return query.limit(limit + 1)
+
+
+def paginate(rows: List[Any], limit: int) -> Tuple[List[Any], Optional[str]]:
+    """
+    Split the rows of a query built with apply_keyset into a page and next cursor.
+
+    Args:
+        rows: Rows returned by the query (at most limit + 1)
+        limit: Maximum number of rows per page
+
+    Returns:
+        Tuple[List[Any], Optional[str]]: Rows of the page and the cursor of the
+            next page, or None if this is the last page
+    """
+    if len(rows) <= limit:
+        return rows, None
+
+    page = rows[:limit]
+    last = page[-1]
+    return page, encode_cursor(last.created_at, last.id)
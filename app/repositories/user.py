@@ -2,12 +2,13 @@
 User repository for the MAGPIE platform.
 """
 import logging
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Union
 
 from sqlalchemy import select
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
+from app.core.security.principal_cache import principal_cache
 from app.models.user import User, UserRole
 from app.repositories.base import BaseRepository
 
@@ -29,6 +30,37 @@ class UserRepository(BaseRepository[User]):
         """
         super().__init__(User, session)
 
+    def update(self, id: Union[int, str], data: Dict[str, Any]) -> Optional[User]:
+        """
+        Update user and drop the user's cached principals once committed.
+
+        Args:
+            id: User ID
+            data: Updated data
+
+        Returns:
+            Optional[User]: Updated user or None if error
+        """
+        user = super().update(id, data)
+        if user is not None:
+            principal_cache.publish_invalidation_after_commit(self.session, user.id)
+        return user
+
+    def delete_by_id(self, id: Union[int, str]) -> bool:
+        """
+        Delete user and drop the user's cached principals once committed.
+
+        Args:
+            id: User ID
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        deleted = super().delete_by_id(id)
+        if deleted:
+            principal_cache.publish_invalidation_after_commit(self.session, int(id))
+        return deleted
+
     def get_by_email(self, email: str) -> Optional[User]:
         """
         Get user by email.
@@ -116,8 +148,9 @@ class UserRepository(BaseRepository[User]):
             user.is_active = False
             self.session.flush()
 
-            # Update cache
+            # Update cache and drop cached principals once committed
             self._cache_set(user)
+            principal_cache.publish_invalidation_after_commit(self.session, user.id)
 
             return True
         except SQLAlchemyError as e:
@@ -143,8 +176,9 @@ class UserRepository(BaseRepository[User]):
             user.is_active = True
             self.session.flush()
 
-            # Update cache
+            # Update cache and drop cached principals once committed
             self._cache_set(user)
+            principal_cache.publish_invalidation_after_commit(self.session, user.id)
 
             return True
         except SQLAlchemyError as e:
@@ -171,8 +205,9 @@ class UserRepository(BaseRepository[User]):
             user.role = role
             self.session.flush()
 
-            # Update cache
+            # Update cache and drop cached principals once committed
             self._cache_set(user)
+            principal_cache.publish_invalidation_after_commit(self.session, user.id)
 
             return True
         except SQLAlchemyError as e:
@@ -37,6 +37,14 @@ class RateLimitError(AzureOpenAIError):
         super().__init__(message, status_code=429, **kwargs)
 
 
+class TokenQuotaExceededError(RateLimitError):
+    """Exception for token quota errors."""
+
+    def __init__(self, message: str = "Token quota exceeded", **kwargs: Any):
+        """Initialize the exception."""
+        super().__init__(message, **kwargs)
+
+
 class ServiceUnavailableError(AzureOpenAIError):
     """Exception for service unavailable errors."""
 
@@ -2,14 +2,18 @@
 
 import logging
 import time
+import uuid
 from enum import Enum
 from typing import Any, Dict, List, Optional, Union
 
+from app.core.monitoring import record_llm_request
 from app.services.analytics_utils import track_llm_usage
 from app.services.azure_openai import get_azure_openai_client
-from app.services.exceptions import AzureOpenAIError, map_openai_error
+from app.services.exceptions import AzureOpenAIError, TokenQuotaExceededError, map_openai_error
+from app.services.prompt_assembly import PromptAssembler
 from app.services.prompt_templates import get_template
 from app.services.response_parser import parse_chat_completion
+from app.services.token_quota import token_quota_service
 from app.services.token_utils import truncate_messages_to_token_limit
 
 # Configure logging
@@ -39,6 +43,7 @@ class LLMService:
         temperature: float = 0.7,
         max_tokens: Optional[int] = None,
         stream: bool = False,
+        user_id: Optional[str] = None,
         **kwargs: Any,
     ) -> Dict[str, Any]:
         """
@@ -51,6 +56,7 @@ class LLMService:
             temperature: Temperature for sampling.
             max_tokens: Maximum number of tokens to generate.
             stream: Whether to stream the response.
+            user_id: ID of the user making the request, for token quotas and analytics.
             **kwargs: Additional parameters to pass to the API.
 
         Returns:
@@ -58,14 +64,20 @@ class LLMService:
 
         Raises:
             ValueError: If the template is not found.
+            TokenQuotaExceededError: If the request would exceed a token quota.
             AzureOpenAIError: If the API call fails.
         """
+        reservation = None
+        usage = None
+        model = None
+        start_time = None
         try:
             # Get the template
             template = get_template(template_name)
 
-            # Format the template
-            messages = template.format(**variables)
+            # Format the template, with its fixed instructions as the cacheable prefix
+            prompt = PromptAssembler().add_template(template, **variables).assemble()
+            messages = prompt.messages
 
             # Truncate messages if needed
             if max_tokens:
@@ -76,10 +88,17 @@ class LLMService:
                     preserve_last_messages=1,
                 )
 
+            # Reserve the estimated tokens, possibly moving to a smaller model
+            reservation = token_quota_service.reserve(
+                messages, max_tokens, model_size, user_id=user_id
+            )
+            model_size = reservation.model_size
+
             # Get the model deployment name
             model = self.client.get_model_by_size(model_size)
 
             # Generate the response
+            start_time = time.time()
             response = self.client.chat_completion(
                 messages=messages,
                 model=model,
@@ -95,12 +114,30 @@ class LLMService:
             # Get usage information
             usage = parsed_response.get_token_usage()
 
+            # Record request metrics, including prompt cache usage
+            self._record_request_metrics(
+                model,
+                parsed_response,
+                start_time,
+                template_name=template_name,
+                cacheable_prefix_tokens=prompt.cacheable_prefix_tokens,
+            )
+
+            # Feed model performance statistics
+            self._record_model_usage(
+                model,
+                start_time,
+                usage=usage,
+                conversation_id=kwargs.get("conversation_id"),
+                request_id=kwargs.get("request_id"),
+            )
+
             # Track usage for analytics
             track_llm_usage(
                 usage=usage,
                 model_size=model_size,
                 agent_type="template",
-                user_id=kwargs.get("user_id"),
+                user_id=user_id,
                 conversation_id=kwargs.get("conversation_id"),
                 request_id=kwargs.get("request_id"),
                 latency_ms=None,
@@ -114,9 +151,22 @@ class LLMService:
         except ValueError as e:
             logger.error(f"Template error: {str(e)}")
             raise
+        except TokenQuotaExceededError:
+            raise
         except Exception as e:
             logger.error(f"LLM service error: {str(e)}")
+            if start_time is not None:
+                self._record_model_usage(
+                    model,
+                    start_time,
+                    error=e,
+                    conversation_id=kwargs.get("conversation_id"),
+                    request_id=kwargs.get("request_id"),
+                )
             raise map_openai_error(e)
+        finally:
+            if reservation is not None:
+                token_quota_service.reconcile(reservation, usage)
 
     async def generate_response_async(
         self,
@@ -126,6 +176,7 @@ class LLMService:
         temperature: float = 0.7,
         max_tokens: Optional[int] = None,
         stream: bool = False,
+        user_id: Optional[str] = None,
         **kwargs: Any,
     ) -> Dict[str, Any]:
         """
@@ -138,6 +189,7 @@ class LLMService:
             temperature: Temperature for sampling.
             max_tokens: Maximum number of tokens to generate.
             stream: Whether to stream the response.
+            user_id: ID of the user making the request, for token quotas and analytics.
             **kwargs: Additional parameters to pass to the API.
 
         Returns:
@@ -145,14 +197,20 @@ class LLMService:
 
         Raises:
             ValueError: If the template is not found.
+            TokenQuotaExceededError: If the request would exceed a token quota.
             AzureOpenAIError: If the API call fails.
         """
+        reservation = None
+        usage = None
+        model = None
+        start_time = None
         try:
             # Get the template
             template = get_template(template_name)
 
-            # Format the template
-            messages = template.format(**variables)
+            # Format the template, with its fixed instructions as the cacheable prefix
+            prompt = PromptAssembler().add_template(template, **variables).assemble()
+            messages = prompt.messages
 
             # Truncate messages if needed
             if max_tokens:
@@ -163,10 +221,17 @@ class LLMService:
                     preserve_last_messages=1,
                 )
 
+            # Reserve the estimated tokens, possibly moving to a smaller model
+            reservation = await token_quota_service.reserve_async(
+                messages, max_tokens, model_size, user_id=user_id
+            )
+            model_size = reservation.model_size
+
             # Get the model deployment name
             model = self.client.get_model_by_size(model_size)
 
             # Generate the response
+            start_time = time.time()
             response = await self.client.async_chat_completion(
                 messages=messages,
                 model=model,
@@ -182,12 +247,30 @@ class LLMService:
             # Get usage information
             usage = parsed_response.get_token_usage()
 
+            # Record request metrics, including prompt cache usage
+            self._record_request_metrics(
+                model,
+                parsed_response,
+                start_time,
+                template_name=template_name,
+                cacheable_prefix_tokens=prompt.cacheable_prefix_tokens,
+            )
+
+            # Feed model performance statistics
+            self._record_model_usage(
+                model,
+                start_time,
+                usage=usage,
+                conversation_id=kwargs.get("conversation_id"),
+                request_id=kwargs.get("request_id"),
+            )
+
             # Track usage for analytics
             track_llm_usage(
                 usage=usage,
                 model_size=model_size,
                 agent_type="template_async",
-                user_id=kwargs.get("user_id"),
+                user_id=user_id,
                 conversation_id=kwargs.get("conversation_id"),
                 request_id=kwargs.get("request_id"),
                 latency_ms=None,
@@ -201,9 +284,22 @@ class LLMService:
         except ValueError as e:
             logger.error(f"Template error: {str(e)}")
             raise
+        except TokenQuotaExceededError:
+            raise
         except Exception as e:
             logger.error(f"LLM service error: {str(e)}")
+            if start_time is not None:
+                self._record_model_usage(
+                    model,
+                    start_time,
+                    error=e,
+                    conversation_id=kwargs.get("conversation_id"),
+                    request_id=kwargs.get("request_id"),
+                )
             raise map_openai_error(e)
+        finally:
+            if reservation is not None:
+                await token_quota_service.reconcile_async(reservation, usage)
 
     def generate_custom_response(
         self,
@@ -212,6 +308,8 @@ class LLMService:
         temperature: float = 0.7,
         max_tokens: Optional[int] = None,
         stream: bool = False,
+        cacheable_prefix_tokens: Optional[int] = None,
+        user_id: Optional[str] = None,
         **kwargs: Any,
     ) -> Dict[str, Any]:
         """
@@ -223,14 +321,21 @@ class LLMService:
             temperature: Temperature for sampling.
             max_tokens: Maximum number of tokens to generate.
             stream: Whether to stream the response.
+            cacheable_prefix_tokens: Length of the stable message prefix, if known.
+            user_id: ID of the user making the request, for token quotas and analytics.
             **kwargs: Additional parameters to pass to the API.
 
         Returns:
             Response from the LLM.
 
         Raises:
+            TokenQuotaExceededError: If the request would exceed a token quota.
             AzureOpenAIError: If the API call fails.
         """
+        reservation = None
+        usage = None
+        model = None
+        start_time = None
         try:
             # Truncate messages if needed
             if max_tokens:
@@ -241,10 +346,17 @@ class LLMService:
                     preserve_last_messages=1,
                 )
 
+            # Reserve the estimated tokens, possibly moving to a smaller model
+            reservation = token_quota_service.reserve(
+                messages, max_tokens, model_size, user_id=user_id
+            )
+            model_size = reservation.model_size
+
             # Get the model deployment name
             model = self.client.get_model_by_size(model_size)
 
             # Generate the response
+            start_time = time.time()
             response = self.client.chat_completion(
                 messages=messages,
                 model=model,
@@ -260,12 +372,29 @@ class LLMService:
             # Get usage information
             usage = parsed_response.get_token_usage()
 
+            # Record request metrics, including prompt cache usage
+            self._record_request_metrics(
+                model,
+                parsed_response,
+                start_time,
+                cacheable_prefix_tokens=cacheable_prefix_tokens,
+            )
+
+            # Feed model performance statistics
+            self._record_model_usage(
+                model,
+                start_time,
+                usage=usage,
+                conversation_id=kwargs.get("conversation_id"),
+                request_id=kwargs.get("request_id"),
+            )
+
             # Track usage for analytics
             track_llm_usage(
                 usage=usage,
                 model_size=model_size,
                 agent_type="custom",
-                user_id=kwargs.get("user_id"),
+                user_id=user_id,
                 conversation_id=kwargs.get("conversation_id"),
                 request_id=kwargs.get("request_id"),
                 latency_ms=None,
@@ -276,9 +405,22 @@ class LLMService:
                 "content": parsed_response.get_message_content(),
                 "usage": usage,
             }
+        except TokenQuotaExceededError:
+            raise
         except Exception as e:
             logger.error(f"LLM service error: {str(e)}")
+            if start_time is not None:
+                self._record_model_usage(
+                    model,
+                    start_time,
+                    error=e,
+                    conversation_id=kwargs.get("conversation_id"),
+                    request_id=kwargs.get("request_id"),
+                )
             raise map_openai_error(e)
+        finally:
+            if reservation is not None:
+                token_quota_service.reconcile(reservation, usage)
 
     async def generate_custom_response_async(
         self,
@@ -287,6 +429,8 @@ class LLMService:
         temperature: float = 0.7,
         max_tokens: Optional[int] = None,
         stream: bool = False,
+        cacheable_prefix_tokens: Optional[int] = None,
+        user_id: Optional[str] = None,
         **kwargs: Any,
     ) -> Dict[str, Any]:
         """
@@ -298,14 +442,21 @@ class LLMService:
             temperature: Temperature for sampling.
             max_tokens: Maximum number of tokens to generate.
             stream: Whether to stream the response.
+            cacheable_prefix_tokens: Length of the stable message prefix, if known.
+            user_id: ID of the user making the request, for token quotas and analytics.
             **kwargs: Additional parameters to pass to the API.
 
         Returns:
             Response from the LLM.
 
         Raises:
+            TokenQuotaExceededError: If the request would exceed a token quota.
             AzureOpenAIError: If the API call fails.
         """
+        reservation = None
+        usage = None
+        model = None
+        start_time = None
         try:
             # Truncate messages if needed
             if max_tokens:
@@ -316,10 +467,17 @@ class LLMService:
                     preserve_last_messages=1,
                 )
 
+            # Reserve the estimated tokens, possibly moving to a smaller model
+            reservation = await token_quota_service.reserve_async(
+                messages, max_tokens, model_size, user_id=user_id
+            )
+            model_size = reservation.model_size
+
             # Get the model deployment name
             model = self.client.get_model_by_size(model_size)
 
             # Generate the response
+            start_time = time.time()
             response = await self.client.async_chat_completion(
                 messages=messages,
                 model=model,
@@ -335,12 +493,29 @@ class LLMService:
             # Get usage information
             usage = parsed_response.get_token_usage()
 
+            # Record request metrics, including prompt cache usage
+            self._record_request_metrics(
+                model,
+                parsed_response,
+                start_time,
+                cacheable_prefix_tokens=cacheable_prefix_tokens,
+            )
+
+            # Feed model performance statistics
+            self._record_model_usage(
+                model,
+                start_time,
+                usage=usage,
+                conversation_id=kwargs.get("conversation_id"),
+                request_id=kwargs.get("request_id"),
+            )
+
             # Track usage for analytics
             track_llm_usage(
                 usage=usage,
                 model_size=model_size,
                 agent_type="custom_async",
-                user_id=kwargs.get("user_id"),
+                user_id=user_id,
                 conversation_id=kwargs.get("conversation_id"),
                 request_id=kwargs.get("request_id"),
                 latency_ms=None,
@@ -351,9 +526,101 @@ class LLMService:
                 "content": parsed_response.get_message_content(),
                 "usage": usage,
             }
+        except TokenQuotaExceededError:
+            raise
         except Exception as e:
             logger.error(f"LLM service error: {str(e)}")
+            if start_time is not None:
+                self._record_model_usage(
+                    model,
+                    start_time,
+                    error=e,
+                    conversation_id=kwargs.get("conversation_id"),
+                    request_id=kwargs.get("request_id"),
+                )
             raise map_openai_error(e)
+        finally:
+            if reservation is not None:
+                await token_quota_service.reconcile_async(reservation, usage)
+
+    def _record_request_metrics(
+        self,
+        model: str,
+        parsed_response: Any,
+        start_time: float,
+        template_name: Optional[str] = None,
+        cacheable_prefix_tokens: Optional[int] = None,
+    ) -> None:
+        """
+        Record profiling metrics for a completed LLM request.
+
+        Args:
+            model: Model deployment name.
+            parsed_response: Parsed chat completion response.
+            start_time: Request start time from time.time().
+            template_name: Name of the template used, if any.
+            cacheable_prefix_tokens: Length of the stable message prefix, if known.
+        """
+        try:
+            usage = parsed_response.get_token_usage()
+            record_llm_request(
+                model=model,
+                prompt_tokens=usage.get("prompt_tokens", 0),
+                completion_tokens=usage.get("completion_tokens", 0),
+                duration_ms=(time.time() - start_time) * 1000,
+                template_name=template_name,
+                cached_tokens=parsed_response.get_cached_tokens(),
+                cacheable_prefix_tokens=cacheable_prefix_tokens,
+            )
+        except Exception as e:
+            # Log error but don't raise exception to avoid affecting the main flow
+            logger.error(f"Failed to record LLM request metrics: {str(e)}")
+
+    def _record_model_usage(
+        self,
+        model: Optional[str],
+        start_time: float,
+        usage: Optional[Dict[str, int]] = None,
+        error: Optional[Exception] = None,
+        conversation_id: Optional[str] = None,
+        request_id: Optional[str] = None,
+    ) -> None:
+        """
+        Record a completed or failed LLM request with the performance tracker.
+
+        This feeds the live model statistics used by adaptive model selection.
+
+        Args:
+            model: Model deployment name.
+            start_time: Request start time from time.time().
+            usage: Token usage of the response, if the request succeeded.
+            error: Error raised by the request, if it failed.
+            conversation_id: Conversation ID, if any.
+            request_id: Request ID, if any.
+        """
+        try:
+            # Imported here because model selection depends on this module
+            from app.core.model_selection.performance import get_performance_tracker
+
+            tracker = get_performance_tracker()
+            model_info = tracker.registry.get_model_by_deployment_name(model)
+            if not model_info:
+                return
+
+            usage = usage or {}
+            tracker.record_usage(
+                model_id=model_info.id,
+                query_id=request_id or str(uuid.uuid4()),
+                input_tokens=usage.get("prompt_tokens", 0),
+                output_tokens=usage.get("completion_tokens", 0),
+                latency_ms=int((time.time() - start_time) * 1000),
+                success=error is None,
+                error_message=str(error) if error is not None else None,
+                conversation_id=conversation_id,
+            )
+        except Exception as e:
+            # Log error but don't raise exception to avoid affecting the main flow
+            logger.error(f"Failed to record model usage: {str(e)}")
 
 
 # Create a singleton instance
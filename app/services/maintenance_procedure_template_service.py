@@ -7,6 +7,7 @@ including loading, retrieving, and customizing templates based on aircraft confi
 import os
 import json
 import logging
+from functools import lru_cache
 from typing import Dict, List, Any, Optional, Union
 
 logger = logging.getLogger(__name__)
@@ -286,3 +287,15 @@ class MaintenanceProcedureTemplateService:
 
         logger.info(f"Saved customized template to: {file_path}")
         return file_path
+
+
+# Create a singleton instance
+@lru_cache()
+def get_maintenance_procedure_template_service() -> MaintenanceProcedureTemplateService:
+    """
+    Get the maintenance procedure template service instance.
+
+    Returns:
+        MaintenanceProcedureTemplateService: An instance of the MaintenanceProcedureTemplateService.
+    """
+    return MaintenanceProcedureTemplateService()
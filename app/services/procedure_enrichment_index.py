@@ -0,0 +1,326 @@
+"""
+Procedure Enrichment Index for the MAGPIE platform.
+
+This module provides a precomputed index of the tools, parts, equipment,
+safety precautions and regulatory citations that apply to each
+(aircraft type, system, procedure type), so enriching a generated
+procedure takes one dictionary lookup instead of repeated service queries.
+"""
+import logging
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.services.regulatory_requirements_service import get_regulatory_requirements_service
+from app.services.safety_precautions_service import get_safety_precautions_service
+from app.services.tools_and_parts_service import get_tools_and_parts_service
+
+logger = logging.getLogger(__name__)
+
+# Display locations of procedure-level safety precautions, in procedure order
+PRECAUTION_LOCATIONS = ["before_procedure", "during_procedure", "after_procedure"]
+
+# Step references with step-specific safety precautions
+STEP_REFERENCES = ["preparation", "access_panel_removal", "component_removal", "component_inspection"]
+
+# Severities of safety precautions that every procedure must include
+REQUIRED_SEVERITIES = {"high", "critical"}
+
+# Mapping keys that are not systems
+NON_SYSTEM_KEYS = {"general", "specialized", "specific_procedures"}
+
+IndexKey = Tuple[str, str, str]
+
+
+def merge_by_id(*groups: Iterable[Dict]) -> List[Dict]:
+    """
+    Merge lists of resources, keeping the first occurrence of each ID.
+
+    Args:
+        groups: Lists of resources with an "id" key.
+
+    Returns:
+        Merged list of resources in first-seen order.
+    """
+    merged: Dict[Any, Dict] = {}
+    for group in groups:
+        for item in group or []:
+            merged.setdefault(item.get("id"), item)
+    return list(merged.values())
+
+
+class ProcedureEnrichmentIndex:
+    """
+    Index of procedure enrichment data keyed by (aircraft type, system, procedure type).
+
+    Entries are built from the tools and parts, safety precautions and
+    regulatory requirements services on first lookup (or all at once with
+    warm) and discarded when any of the services reloads its data.
+    """
+
+    def __init__(
+        self,
+        tools_and_parts_service: Any,
+        safety_precautions_service: Any,
+        regulatory_service: Any
+    ):
+        """
+        Initialize the procedure enrichment index.
+
+        Args:
+            tools_and_parts_service: Service for tools, parts, and equipment.
+            safety_precautions_service: Service for safety precautions.
+            regulatory_service: Service for regulatory requirements.
+        """
+        self.tools_and_parts_service = tools_and_parts_service
+        self.safety_precautions_service = safety_precautions_service
+        self.regulatory_service = regulatory_service
+
+        self._entries: Dict[IndexKey, Dict[str, Any]] = {}
+        self._precautions_by_description: Optional[Dict[str, Dict]] = None
+        self._data_versions = self._current_data_versions()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(
+        aircraft_type: Optional[str],
+        system: Optional[str],
+        procedure_type: Optional[str]
+    ) -> IndexKey:
+        """
+        Build a normalized index key.
+
+        Args:
+            aircraft_type: Aircraft type (optional).
+            system: System being maintained (optional).
+            procedure_type: Type of procedure (optional).
+
+        Returns:
+            Normalized (aircraft type, system, procedure type) key.
+        """
+        return (
+            (aircraft_type or "").strip(),
+            (system or "").lower().strip().replace(" ", "_"),
+            (procedure_type or "").lower().strip().replace(" ", "_")
+        )
+
+    def get(
+        self,
+        aircraft_type: Optional[str],
+        system: Optional[str],
+        procedure_type: Optional[str]
+    ) -> Dict[str, Any]:
+        """
+        Get the enrichment data for a procedure.
+
+        Args:
+            aircraft_type: Aircraft type (optional).
+            system: System being maintained (optional).
+            procedure_type: Type of procedure (optional).
+
+        Returns:
+            Dictionary with deduplicated tools, parts, equipment, precautions,
+            required_precautions, step_precautions and citations.
+        """
+        self._check_data_versions()
+
+        key = self.make_key(aircraft_type, system, procedure_type)
+        entry = self._entries.get(key)
+        if entry is None:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is None:
+                    entry = self._build_entry(*key)
+                    self._entries[key] = entry
+        return entry
+
+    def find_precaution(self, description: str) -> Optional[Dict]:
+        """
+        Find a safety precaution by its description.
+
+        Args:
+            description: Safety precaution description.
+
+        Returns:
+            The safety precaution dictionary or None if not found.
+        """
+        self._check_data_versions()
+
+        if self._precautions_by_description is None:
+            precautions_by_description = {}
+            for precaution in self.safety_precautions_service.get_all_safety_precautions():
+                precautions_by_description.setdefault(precaution["description"], precaution)
+            self._precautions_by_description = precautions_by_description
+
+        return self._precautions_by_description.get(description)
+
+    def warm(self) -> int:
+        """
+        Build entries for every procedure type and system in the mapping data.
+
+        Entries are built for each known aircraft type and for procedures
+        without an aircraft type.
+
+        Returns:
+            Number of entries in the index.
+        """
+        procedure_systems = set()
+        for mappings in (
+            self._mapping(self.tools_and_parts_service, "procedure_resource_mappings"),
+            self._mapping(self.safety_precautions_service, "procedure_safety_mappings"),
+            self._mapping(self.regulatory_service, "task_mappings"),
+        ):
+            for procedure_type, systems in mappings.items():
+                if procedure_type in NON_SYSTEM_KEYS or not isinstance(systems, dict):
+                    continue
+                procedure_systems.update(
+                    (procedure_type, system) for system in systems if system not in NON_SYSTEM_KEYS
+                )
+
+        aircraft_types = {""}
+        aircraft_types.update(self._mapping(self.tools_and_parts_service, "aircraft_tool_mappings"))
+        aircraft_types.update(self._mapping(self.tools_and_parts_service, "aircraft_part_mappings"))
+
+        for procedure_type, system in sorted(procedure_systems):
+            for aircraft_type in sorted(aircraft_types):
+                self.get(aircraft_type, system, procedure_type)
+
+        logger.info(f"Built procedure enrichment index with {len(self._entries)} entries")
+        return len(self._entries)
+
+    def invalidate(self) -> None:
+        """
+        Discard all entries.
+        """
+        with self._lock:
+            self._entries = {}
+            self._precautions_by_description = None
+            self._data_versions = self._current_data_versions()
+
+    def _check_data_versions(self) -> None:
+        """
+        Discard all entries if any service has reloaded its data.
+        """
+        if self._current_data_versions() != self._data_versions:
+            logger.info("Enrichment data changed, rebuilding procedure enrichment index")
+            self.invalidate()
+
+    def _current_data_versions(self) -> Tuple[Any, ...]:
+        """
+        Get the data versions of the services.
+
+        Returns:
+            Tuple of data versions, with 0 for services that do not track one.
+        """
+        return tuple(
+            getattr(service, "data_version", 0)
+            for service in (self.tools_and_parts_service, self.safety_precautions_service, self.regulatory_service)
+        )
+
+    @staticmethod
+    def _mapping(service: Any, attribute: str) -> Dict:
+        """
+        Get a mapping attribute of a service.
+
+        Args:
+            service: Service holding the mapping.
+            attribute: Attribute name.
+
+        Returns:
+            The mapping, or an empty dictionary if the service has none.
+        """
+        mapping = getattr(service, attribute, None)
+        return mapping if isinstance(mapping, dict) else {}
+
+    def _build_entry(self, aircraft_type: str, system: str, procedure_type: str) -> Dict[str, Any]:
+        """
+        Build the enrichment data for a procedure.
+
+        Args:
+            aircraft_type: Normalized aircraft type.
+            system: Normalized system.
+            procedure_type: Normalized procedure type.
+
+        Returns:
+            Enrichment data for the procedure.
+        """
+        entry: Dict[str, Any] = {
+            "tools": [],
+            "parts": [],
+            "equipment": [],
+            "precautions": [],
+            "required_precautions": [],
+            "step_precautions": {},
+            "citations": []
+        }
+
+        # Resources and precautions are only mapped for a procedure type and system
+        if not procedure_type or not system:
+            return entry
+
+        # Get mapped tools, parts, and equipment
+        resources = self.tools_and_parts_service.get_resources_for_procedure(
+            procedure_type=procedure_type,
+            system=system,
+            aircraft_type=aircraft_type or None
+        )
+        for resource_type in ("tools", "parts", "equipment"):
+            entry[resource_type] = merge_by_id(resources.get(resource_type, []))
+
+        # Get safety precautions in procedure order
+        entry["precautions"] = merge_by_id(*[
+            self.safety_precautions_service.get_safety_precautions_for_procedure(
+                procedure_type=procedure_type,
+                system=system,
+                display_location=location
+            )
+            for location in PRECAUTION_LOCATIONS
+        ])
+
+        # Get safety precautions that must be present in the procedure
+        entry["required_precautions"] = [
+            precaution for precaution in merge_by_id(
+                self.safety_precautions_service.get_safety_precautions_for_procedure(
+                    procedure_type=procedure_type,
+                    system=system
+                )
+            )
+            if precaution.get("severity") in REQUIRED_SEVERITIES
+        ]
+
+        # Get step-specific safety precautions
+        for step_reference in STEP_REFERENCES:
+            step_precautions = merge_by_id(
+                self.safety_precautions_service.get_safety_precautions_for_step(
+                    procedure_type=procedure_type,
+                    system=system,
+                    step_reference=step_reference
+                )
+            )
+            if step_precautions:
+                entry["step_precautions"][step_reference] = step_precautions
+
+        # Get regulatory citations
+        entry["citations"] = list(self.regulatory_service.get_regulatory_citations(
+            procedure_type=procedure_type,
+            system=system,
+            aircraft_type=aircraft_type or None
+        ))
+
+        return entry
+
+
+# Create a singleton instance
+@lru_cache()
+def get_procedure_enrichment_index() -> ProcedureEnrichmentIndex:
+    """
+    Get the procedure enrichment index built on the shared services.
+
+    Returns:
+        ProcedureEnrichmentIndex: The shared procedure enrichment index.
+    """
+    return ProcedureEnrichmentIndex(
+        tools_and_parts_service=get_tools_and_parts_service(),
+        safety_precautions_service=get_safety_precautions_service(),
+        regulatory_service=get_regulatory_requirements_service()
+    )
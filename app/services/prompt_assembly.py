@@ -0,0 +1,241 @@
+"""Prompt assembly for Azure OpenAI service.
+
+Provider-side prompt caching only reuses work for an identical token prefix.
+The assembler orders prompt segments from most to least stable so that agent
+instructions and conversation history form a shared prefix across turns, and
+reports how long that prefix is.
+"""
+
+import json
+import logging
+from enum import IntEnum
+from typing import Any, Dict, Iterable, List, Optional
+
+from pydantic import BaseModel, Field
+
+from app.services.prompt_templates import MessageRole, PromptTemplate
+from app.services.token_utils import count_tokens_approximate
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Azure OpenAI only caches prompts with at least this many tokens
+MIN_CACHEABLE_PROMPT_TOKENS = 1024
+
+# Approximate per-message token overhead (matches count_message_tokens)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+class SegmentStability(IntEnum):
+    """Stability tiers for prompt segments, most stable first."""
+
+    STATIC = 0  # Agent and template instructions, shared by every request
+    SESSION = 1  # Conversation history, append-only within a conversation
+    REQUEST = 2  # Retrieved documents and request context
+    QUERY = 3  # The current user query
+
+
+class PromptSegment(BaseModel):
+    """A piece of a prompt with a known stability tier."""
+
+    role: MessageRole
+    content: str
+    stability: SegmentStability = SegmentStability.REQUEST
+
+
+class AssembledPrompt(BaseModel):
+    """Messages produced by the assembler along with prefix statistics."""
+
+    messages: List[Dict[str, str]] = Field(default_factory=list)
+    cacheable_prefix_tokens: int = 0
+    total_tokens: int = 0
+
+    @property
+    def is_cacheable(self) -> bool:
+        """Whether the stable prefix is long enough for provider caching."""
+        return self.cacheable_prefix_tokens >= MIN_CACHEABLE_PROMPT_TOKENS
+
+
+def canonicalize_context(
+    context: Optional[Dict[str, Any]],
+    exclude: Iterable[str] = (),
+) -> str:
+    """
+    Render a context dictionary deterministically.
+
+    Keys are sorted and nested values are serialized with sorted keys, so the
+    same context always produces the same text regardless of insertion order.
+
+    Args:
+        context: Context dictionary.
+        exclude: Keys to leave out of the rendered context.
+
+    Returns:
+        Context as "key: value" lines.
+    """
+    if not context:
+        return ""
+
+    excluded = set(exclude)
+    lines = []
+
+    for key in sorted(context, key=str):
+        if key in excluded:
+            continue
+
+        value = context[key]
+        if isinstance(value, (set, frozenset)):
+            value = sorted(value, key=str)
+        if isinstance(value, (dict, list, tuple)):
+            value = json.dumps(value, sort_keys=True, default=str)
+
+        lines.append(f"{key}: {value}")
+
+    return "\n".join(lines)
+
+
+class PromptAssembler:
+    """
+    Build chat messages from segments ordered by stability.
+
+    Segments are stably sorted by tier, so insertion order is kept within a
+    tier. Adjacent segments with the same role are joined into one message,
+    except conversation history, where each turn stays its own message.
+    """
+
+    def __init__(self):
+        """Initialize an empty assembler."""
+        self.segments: List[PromptSegment] = []
+
+    def add(
+        self,
+        role: MessageRole,
+        content: str,
+        stability: SegmentStability = SegmentStability.REQUEST,
+    ) -> "PromptAssembler":
+        """
+        Add a segment.
+
+        Args:
+            role: Message role.
+            content: Segment text. Empty segments are ignored.
+            stability: Stability tier of the segment.
+
+        Returns:
+            The assembler, for chaining.
+        """
+        if content:
+            self.segments.append(
+                PromptSegment(role=role, content=content, stability=stability)
+            )
+        return self
+
+    def add_history(self, conversation_history: Optional[List[Dict[str, str]]]) -> "PromptAssembler":
+        """
+        Add conversation history turns as session-stable segments.
+
+        Args:
+            conversation_history: Messages with "role" and "content" keys.
+
+        Returns:
+            The assembler, for chaining.
+        """
+        for message in conversation_history or []:
+            self.add(message["role"], message["content"], SegmentStability.SESSION)
+        return self
+
+    def add_context(
+        self,
+        context: Optional[Dict[str, Any]],
+        header: str = "Additional context:",
+        exclude: Iterable[str] = (),
+    ) -> "PromptAssembler":
+        """
+        Add a canonicalized context block as a request segment.
+
+        Args:
+            context: Context dictionary.
+            header: Line placed before the context entries.
+            exclude: Context keys to leave out.
+
+        Returns:
+            The assembler, for chaining.
+        """
+        context_str = canonicalize_context(context, exclude=exclude)
+        if context_str:
+            self.add(MessageRole.USER, f"{header}\n{context_str}", SegmentStability.REQUEST)
+        return self
+
+    def add_template(self, template: PromptTemplate, **kwargs: Any) -> "PromptAssembler":
+        """
+        Add the messages of a prompt template.
+
+        A system message without variables is treated as static; anything
+        that depends on template variables is treated as request data.
+
+        Args:
+            template: Prompt template.
+            **kwargs: Variables to format the template with.
+
+        Returns:
+            The assembler, for chaining.
+
+        Raises:
+            ValueError: If a required variable is missing.
+        """
+        for message in template.format(**kwargs):
+            source = (
+                template.system_message
+                if message["role"] == MessageRole.SYSTEM
+                else template.user_message_template
+            )
+            stability = (
+                SegmentStability.STATIC
+                if message["content"] == source
+                else SegmentStability.REQUEST
+            )
+            self.add(message["role"], message["content"], stability)
+        return self
+
+    def assemble(self) -> AssembledPrompt:
+        """
+        Order the segments and build the chat messages.
+
+        Returns:
+            Assembled prompt with cacheable prefix statistics.
+        """
+        ordered = sorted(self.segments, key=lambda segment: segment.stability)
+
+        messages: List[Dict[str, str]] = []
+        last_segment: Optional[PromptSegment] = None
+        total_tokens = 0
+        prefix_tokens = 0
+        prefix_open = True
+
+        for segment in ordered:
+            merge = (
+                last_segment is not None
+                and last_segment.role == segment.role
+                and SegmentStability.SESSION not in (last_segment.stability, segment.stability)
+            )
+
+            segment_tokens = count_tokens_approximate(segment.content)
+            if merge:
+                messages[-1]["content"] += f"\n\n{segment.content}"
+            else:
+                messages.append({"role": segment.role.value, "content": segment.content})
+                segment_tokens += MESSAGE_OVERHEAD_TOKENS
+
+            total_tokens += segment_tokens
+            if segment.stability >= SegmentStability.REQUEST:
+                prefix_open = False
+            if prefix_open:
+                prefix_tokens += segment_tokens
+
+            last_segment = segment
+
+        return AssembledPrompt(
+            messages=messages,
+            cacheable_prefix_tokens=prefix_tokens,
+            total_tokens=total_tokens,
+        )
@@ -105,16 +105,19 @@ DOCUMENTATION_SEARCH_TEMPLATE = PromptTemplate(
         "Always cite your sources when providing information. "
         "If the documentation contains safety warnings or cautions, emphasize them in your response. "
         "If there are specific procedures or steps mentioned in the documentation, present them clearly and in order. "
-        "If you're unsure about any information or if the documentation doesn't cover the query, acknowledge this clearly."
+        "If you're unsure about any information or if the documentation doesn't cover the query, acknowledge this clearly.\n\n"
+        "You will be given search results from the documentation database followed by the user's query. "
+        "Provide a comprehensive answer based on these sources. "
+        "Cite specific sources when providing information (e.g., 'According to SOURCE 1...'). "
+        "If the information from different sources conflicts, point this out and explain the differences. "
+        "If the search results don't adequately address the query, acknowledge this."
     ),
+    # Variable parts come last so the instructions above stay a stable,
+    # cacheable prompt prefix across requests
     user_message_template=(
-        "I need to find information about {query} in our technical documentation. "
-        "Below are the search results from our documentation database:\n\n"
+        "Search results from our documentation database:\n\n"
         "{search_results}\n\n"
-        "Please provide a comprehensive answer based on these sources. "
-        "Cite specific sources when providing information (e.g., 'According to SOURCE 1...'). "
-        "If the information from different sources conflicts, point this out and explain the differences. "
-        "If the search results don't adequately address my query, please acknowledge this."
+        "I need to find information about {query} in our technical documentation."
     ),
     variables=["query", "search_results"],
 )
@@ -16,6 +16,17 @@ from app.core.mock.config import MockDataSource
 
 logger = logging.getLogger(__name__)
 
+# Applicability fields indexed for queries, with whether "all" matches any value
+APPLICABILITY_FIELDS = {
+    "aircraft_types": True,
+    "aircraft_categories": False,
+    "operation_categories": True,
+    "jurisdictions": False
+}
+
+# Applicability value matching any queried value
+WILDCARD = "all"
+
 
 class RegulatoryRequirementsService:
     """
@@ -46,6 +57,27 @@ class RegulatoryRequirementsService:
         self.cache_timestamps = {}
         self.cache_ttl = 300  # 5 minutes
 
+        # Incremented on every load so derived indexes can detect data changes
+        self.data_version = 0
+
+        # Inverted indexes over the loaded requirements
+        self._indexed_requirements: Optional[Dict[str, Dict]] = None
+        self._requirement_order: Dict[str, int] = {}
+        self._tag_index: Dict[str, Set[str]] = {}
+        self._applicability_index: Dict[str, Dict[str, Set[str]]] = {}
+        self._match_any: Dict[str, Set[str]] = {}
+
+        self._load_requirements()
+        self._load_task_mappings()
+
+    def reload(self) -> None:
+        """
+        Reload regulatory requirements and task mappings from files.
+        """
+        self.requirements = {}
+        self.task_mappings = {}
+        self.cache = {}
+        self.cache_timestamps = {}
         self._load_requirements()
         self._load_task_mappings()
 
@@ -116,6 +148,113 @@ class RegulatoryRequirementsService:
             logger.info(f"Loaded {len(self.requirements)} regulatory requirements")
         except Exception as e:
             logger.error(f"Error loading regulatory requirements: {str(e)}")
+        finally:
+            self.data_version += 1
+            self._build_indexes()
+
+    def _build_indexes(self) -> None:
+        """
+        Build inverted indexes of requirement IDs by tag and applicability.
+
+        Values are lowercased once here so queries only need set lookups and
+        intersections. For each applicability field, requirements without
+        restrictions on that field and requirements with an "all" wildcard
+        are kept in a single posting that matches any queried value.
+        """
+        requirement_order: Dict[str, int] = {}
+        tag_index: Dict[str, Set[str]] = {}
+        applicability_index: Dict[str, Dict[str, Set[str]]] = {field: {} for field in APPLICABILITY_FIELDS}
+        match_any: Dict[str, Set[str]] = {field: set() for field in APPLICABILITY_FIELDS}
+
+        for position, (req_id, req) in enumerate(self.requirements.items()):
+            requirement_order[req_id] = position
+
+            for tag in req.get("tags", []):
+                tag_index.setdefault(tag.lower(), set()).add(req_id)
+
+            applicability = req.get("applicability") or {}
+            for field, allows_wildcard in APPLICABILITY_FIELDS.items():
+                values = applicability.get(field)
+                if not values:
+                    match_any[field].add(req_id)
+                    continue
+
+                for value in values:
+                    if allows_wildcard and value == WILDCARD:
+                        match_any[field].add(req_id)
+                    else:
+                        applicability_index[field].setdefault(value.lower(), set()).add(req_id)
+
+        self._requirement_order = requirement_order
+        self._tag_index = tag_index
+        self._applicability_index = applicability_index
+        self._match_any = match_any
+        self._indexed_requirements = self.requirements
+
+    def _ensure_indexes(self) -> None:
+        """
+        Rebuild the indexes if the requirements were replaced or changed size.
+        """
+        if (
+            self._indexed_requirements is not self.requirements
+            or len(self._requirement_order) != len(self.requirements)
+        ):
+            self._build_indexes()
+
+    def _match_applicability(
+        self,
+        candidate_ids: Optional[Set[str]] = None,
+        **values: Optional[str]
+    ) -> Set[str]:
+        """
+        Get the IDs of requirements applicable to the given values.
+
+        Args:
+            candidate_ids: IDs to restrict the match to (optional, defaults to all).
+            values: Queried value for each applicability field, None to skip a field.
+
+        Returns:
+            Set of matching requirement IDs.
+        """
+        self._ensure_indexes()
+
+        postings = []
+        for field, value in values.items():
+            if not value:
+                continue
+            postings.append(
+                self._applicability_index[field].get(value.lower(), set()) | self._match_any[field]
+            )
+
+        if candidate_ids is not None:
+            postings.append(candidate_ids)
+        if not postings:
+            return set(self._requirement_order)
+
+        # Intersect from the smallest posting so the work is bounded by it
+        postings.sort(key=len)
+        matching_ids = set(postings[0])
+        for posting in postings[1:]:
+            if not matching_ids:
+                break
+            matching_ids &= posting
+        return matching_ids
+
+    def _get_ordered(self, requirement_ids: Set[str]) -> List[Dict]:
+        """
+        Get requirements by ID in load order.
+
+        Args:
+            requirement_ids: IDs of the requirements.
+
+        Returns:
+            List of requirements, skipping unknown IDs.
+        """
+        order = self._requirement_order
+        return [
+            self.requirements[req_id]
+            for req_id in sorted((req_id for req_id in requirement_ids if req_id in order), key=order.get)
+        ]
 
     def _load_task_mappings(self) -> None:
         """
@@ -146,6 +285,8 @@ class RegulatoryRequirementsService:
                 logger.warning(f"Task mappings file not found: {mappings_file}")
         except Exception as e:
             logger.error(f"Error loading task mappings: {str(e)}")
+        finally:
+            self.data_version += 1
 
     def get_all_requirements(self) -> List[Dict]:
         """
@@ -193,11 +334,12 @@ class RegulatoryRequirementsService:
         Returns:
             List of matching requirements.
         """
-        matching_requirements = []
-        for req in self.requirements.values():
-            if any(tag.lower() in [t.lower() for t in req["tags"]] for tag in tags):
-                matching_requirements.append(req)
-        return matching_requirements
+        self._ensure_indexes()
+
+        requirement_ids: Set[str] = set()
+        for tag in tags:
+            requirement_ids.update(self._tag_index.get(tag.lower(), ()))
+        return self._get_ordered(requirement_ids)
 
     def get_requirements_by_applicability(
         self,
@@ -218,33 +360,13 @@ class RegulatoryRequirementsService:
         Returns:
             List of matching requirements.
         """
-        matching_requirements = []
-        for req in self.requirements.values():
-            applicability = req.get("applicability", {})
-
-            # Check aircraft type
-            if aircraft_type and applicability.get("aircraft_types"):
-                if aircraft_type.lower() not in [t.lower() for t in applicability["aircraft_types"]] and "all" not in applicability["aircraft_types"]:
-                    continue
-
-            # Check aircraft category
-            if aircraft_category and applicability.get("aircraft_categories"):
-                if aircraft_category.lower() not in [c.lower() for c in applicability["aircraft_categories"]]:
-                    continue
-
-            # Check operation category
-            if operation_category and applicability.get("operation_categories"):
-                if operation_category.lower() not in [c.lower() for c in applicability["operation_categories"]] and "all" not in applicability["operation_categories"]:
-                    continue
-
-            # Check jurisdiction
-            if jurisdiction and applicability.get("jurisdictions"):
-                if jurisdiction.lower() not in [j.lower() for j in applicability["jurisdictions"]]:
-                    continue
-
-            matching_requirements.append(req)
-
-        return matching_requirements
+        requirement_ids = self._match_applicability(
+            aircraft_types=aircraft_type,
+            aircraft_categories=aircraft_category,
+            operation_categories=operation_category,
+            jurisdictions=jurisdiction
+        )
+        return self._get_ordered(requirement_ids)
 
     def get_requirements_for_task(
         self,
@@ -290,39 +412,13 @@ class RegulatoryRequirementsService:
             if "general" in self.task_mappings[procedure_type]:
                 requirement_ids.update(self.task_mappings[procedure_type]["general"])
 
-        # Get the actual requirements
-        requirements = [
-            self.requirements[req_id] for req_id in requirement_ids
-            if req_id in self.requirements
-        ]
-
         # Filter by applicability if provided
-        if aircraft_type or aircraft_category or jurisdiction:
-            filtered_requirements = []
-            for req in requirements:
-                applicability = req.get("applicability", {})
-
-                # Check aircraft type
-                if aircraft_type and applicability.get("aircraft_types"):
-                    if aircraft_type.lower() not in [t.lower() for t in applicability["aircraft_types"]] and "all" not in applicability["aircraft_types"]:
-                        continue
-
-                # Check aircraft category
-                if aircraft_category and applicability.get("aircraft_categories"):
-                    if aircraft_category.lower() not in [c.lower() for c in applicability["aircraft_categories"]]:
-                        continue
-
-                # Check jurisdiction
-                if jurisdiction and applicability.get("jurisdictions"):
-                    if jurisdiction.lower() not in [j.lower() for j in applicability["jurisdictions"]]:
-                        continue
-
-                filtered_requirements.append(req)
-
-            # Store in cache
-            self._store_in_cache(cache_key, filtered_requirements)
-
-            return filtered_requirements
+        requirements = self._get_ordered(self._match_applicability(
+            candidate_ids=requirement_ids,
+            aircraft_types=aircraft_type,
+            aircraft_categories=aircraft_category,
+            jurisdictions=jurisdiction
+        ))
 
         # Store in cache
         self._store_in_cache(cache_key, requirements)
@@ -410,16 +506,16 @@ class RegulatoryRequirementsService:
                             validation_results["issues"].append(f"Step {i+1} missing required field: {field}")
 
         # Add recommendations based on applicable requirements
-        for req in applicable_requirements:
-            # Check if the procedure references this requirement
-            if "references" in procedure and isinstance(procedure["references"], list):
-                found = False
-                for ref in procedure["references"]:
-                    if isinstance(ref, dict) and "title" in ref and req["reference_id"] in ref["title"]:
-                        found = True
-                        break
-
-                if not found:
+        if "references" in procedure and isinstance(procedure["references"], list):
+            # Join reference titles once instead of scanning them per requirement
+            reference_titles = "\n".join(
+                ref["title"] for ref in procedure["references"]
+                if isinstance(ref, dict) and isinstance(ref.get("title"), str)
+            )
+
+            for req in applicable_requirements:
+                # Check if the procedure references this requirement
+                if req["reference_id"] not in reference_titles:
                     validation_results["recommendations"].append(
                         f"Consider adding a reference to {req['authority']} {req['reference_id']} - {req['title']}"
                     )
@@ -479,3 +575,15 @@ class RegulatoryRequirementsService:
         self._store_in_cache(cache_key, citations)
 
         return citations
+
+
+# Create a singleton instance
+@lru_cache()
+def get_regulatory_requirements_service() -> RegulatoryRequirementsService:
+    """
+    Get the regulatory requirements service instance.
+
+    Returns:
+        RegulatoryRequirementsService: An instance of the RegulatoryRequirementsService.
+    """
+    return RegulatoryRequirementsService()
@@ -19,7 +19,7 @@ class ChatCompletionResponse(BaseModel):
     created: int
     model: str
     choices: List[Dict[str, Any]]
-    usage: Dict[str, int]
+    usage: Dict[str, Any]
 
     def get_message_content(self) -> str:
         """
@@ -43,6 +43,16 @@ class ChatCompletionResponse(BaseModel):
         """
         return self.usage
 
+    def get_cached_tokens(self) -> int:
+        """
+        Get the number of prompt tokens served from the provider prompt cache.
+
+        Returns:
+            Cached prompt token count, or 0 if the response does not report it.
+        """
+        details = self.usage.get("prompt_tokens_details") or {}
+        return details.get("cached_tokens") or 0
+
 
 def parse_chat_completion(response: Any) -> ChatCompletionResponse:
     """
@@ -7,8 +7,11 @@ warnings, and cautions for aircraft maintenance procedures.
 import json
 import logging
 import os
+from functools import lru_cache
 from typing import Dict, List, Optional, Any, Set, Tuple
 
+from app.core.matching import SubstringMatcher
+
 logger = logging.getLogger(__name__)
 
 
@@ -36,9 +39,24 @@ class SafetyPrecautionsService:
         
         self.safety_precautions: Dict[str, Dict] = {}
         self.procedure_safety_mappings: Dict[str, Dict] = {}
+
+        # Incremented on every load so derived indexes can detect data changes
+        self.data_version = 0
+
+        # Automaton over precaution descriptions and keywords, keyed by precaution ID
+        self._precaution_matcher: Optional[SubstringMatcher] = None
+        self._matched_precautions: Optional[Dict[str, Dict]] = None
         
         self._load_data()
 
+    def reload(self) -> None:
+        """
+        Reload safety precautions data from files.
+        """
+        self.safety_precautions = {}
+        self.procedure_safety_mappings = {}
+        self._load_data()
+
     def _load_data(self) -> None:
         """
         Load safety precautions data from files.
@@ -61,6 +79,51 @@ class SafetyPrecautionsService:
             logger.info(f"Loaded {len(self.safety_precautions)} safety precautions")
         except Exception as e:
             logger.error(f"Error loading safety precautions data: {str(e)}")
+        finally:
+            self.data_version += 1
+            self._build_precaution_matcher()
+
+    def _build_precaution_matcher(self) -> None:
+        """
+        Build the automaton matching precaution descriptions and keywords in text.
+        """
+        self._precaution_matcher = SubstringMatcher({
+            precaution_id: [precaution["description"]] + list(precaution.get("keywords", []))
+            for precaution_id, precaution in self.safety_precautions.items()
+        })
+        self._matched_precautions = self.safety_precautions
+
+    def _get_precaution_matcher(self) -> SubstringMatcher:
+        """
+        Get the precaution automaton, rebuilding it if the precautions changed.
+
+        Returns:
+            Automaton matching precaution descriptions and keywords.
+        """
+        if (
+            self._precaution_matcher is None
+            or self._matched_precautions is not self.safety_precautions
+            or len(self._precaution_matcher.labels) != len(self.safety_precautions)
+        ):
+            self._build_precaution_matcher()
+        return self._precaution_matcher
+
+    def _extract_safety_precautions(self, texts: List[str]) -> List[Dict]:
+        """
+        Extract safety precautions mentioned in any of the texts.
+
+        Args:
+            texts: Texts to analyze.
+
+        Returns:
+            List of unique safety precautions in catalog order.
+        """
+        matcher = self._get_precaution_matcher()
+        return [
+            self.safety_precautions[precaution_id]
+            for precaution_id in matcher.find_all(texts)
+            if precaution_id in self.safety_precautions
+        ]
 
     def get_all_safety_precautions(self) -> List[Dict]:
         """
@@ -263,18 +326,7 @@ class SafetyPrecautionsService:
         Returns:
             List of safety precautions mentioned in the text.
         """
-        mentioned_precautions = []
-        
-        # Get all safety precautions
-        all_precautions = self.get_all_safety_precautions()
-        
-        # Check for each safety precaution description in the text
-        for precaution in all_precautions:
-            description = precaution["description"].lower()
-            if description in text.lower():
-                mentioned_precautions.append(precaution)
-        
-        return mentioned_precautions
+        return self._extract_safety_precautions([text])
 
     def extract_safety_precautions_from_procedure(self, procedure: Dict[str, Any]) -> List[Dict]:
         """
@@ -286,11 +338,11 @@ class SafetyPrecautionsService:
         Returns:
             List of safety precautions mentioned in the procedure.
         """
-        result = []
+        texts = []
         
         # Extract safety precautions from procedure description
         if "description" in procedure:
-            result.extend(self.extract_safety_precautions_from_text(procedure["description"]))
+            texts.append(procedure["description"])
         
         # Extract safety precautions from procedure steps
         steps_field = None
@@ -304,24 +356,18 @@ class SafetyPrecautionsService:
                 if isinstance(step, dict):
                     # Extract from step title
                     if "title" in step:
-                        result.extend(self.extract_safety_precautions_from_text(step["title"]))
+                        texts.append(step["title"])
                     
                     # Extract from step description
                     if "description" in step:
-                        result.extend(self.extract_safety_precautions_from_text(step["description"]))
+                        texts.append(step["description"])
                     
                     # Extract from step cautions
                     if "cautions" in step and isinstance(step["cautions"], list):
-                        for caution in step["cautions"]:
-                            if isinstance(caution, str):
-                                result.extend(self.extract_safety_precautions_from_text(caution))
+                        texts.extend(caution for caution in step["cautions"] if isinstance(caution, str))
         
-        # Remove duplicates by ID
-        unique_precautions = {}
-        for precaution in result:
-            unique_precautions[precaution["id"]] = precaution
-        
-        return list(unique_precautions.values())
+        # Scan all texts with one automaton, deduplicating by ID
+        return self._extract_safety_precautions([text for text in texts if isinstance(text, str)])
 
     def enrich_procedure_with_safety_precautions(
         self,
@@ -546,3 +592,15 @@ class SafetyPrecautionsService:
             markdown += "\n"
         
         return markdown
+
+
+# Create a singleton instance
+@lru_cache()
+def get_safety_precautions_service() -> SafetyPrecautionsService:
+    """
+    Get the safety precautions service instance.
+
+    Returns:
+        SafetyPrecautionsService: An instance of the SafetyPrecautionsService.
+    """
+    return SafetyPrecautionsService()
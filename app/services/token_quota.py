@@ -0,0 +1,367 @@
+"""
+Token quota enforcement for LLM requests.
+
+Requests reserve their estimated token count against daily per-user and
+platform-wide budgets before they are sent, and reconcile the reservation once
+the actual usage has been recorded by usage analytics. Budgets are checked
+against the same daily counters UsageAnalytics maintains, so the quota and
+the analytics reports never disagree.
+"""
+
+import logging
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any, Dict, List, Optional
+
+from app.core.cache.connection import RedisCache, RedisConnectionManager
+from app.core.config import settings
+from app.core.monitoring.analytics import UsageAnalytics
+from app.services.exceptions import TokenQuotaExceededError
+from app.services.token_utils import count_message_tokens
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Completion tokens assumed for requests without max_tokens
+DEFAULT_COMPLETION_TOKENS = 1000
+
+# Model sizes from largest to smallest, by value so any ModelSize enum works
+MODEL_SIZE_ORDER = ["large", "medium", "small"]
+
+# Atomically check the budgets and reserve tokens. KEYS are the user's daily
+# usage hash, the user's reserved counter, the global daily usage hash and the
+# global reserved counter. ARGV are the estimated tokens, the user budget, the
+# global budget (0 for no limit) and the reservation TTL. Returns
+# {allowed, user tokens, global tokens}, including the new reservation.
+RESERVE_SCRIPT = """
+local estimate = tonumber(ARGV[1])
+local user_budget = tonumber(ARGV[2])
+local global_budget = tonumber(ARGV[3])
+local ttl = tonumber(ARGV[4])
+
+local user_total = (tonumber(redis.call('HGET', KEYS[1], 'total_tokens')) or 0)
+    + (tonumber(redis.call('GET', KEYS[2])) or 0)
+local global_total = (tonumber(redis.call('HGET', KEYS[3], 'total_tokens')) or 0)
+    + (tonumber(redis.call('GET', KEYS[4])) or 0)
+
+if user_budget > 0 and user_total + estimate > user_budget then
+    return {0, user_total, global_total}
+end
+if global_budget > 0 and global_total + estimate > global_budget then
+    return {0, user_total, global_total}
+end
+
+redis.call('INCRBY', KEYS[2], estimate)
+redis.call('EXPIRE', KEYS[2], ttl)
+redis.call('INCRBY', KEYS[4], estimate)
+redis.call('EXPIRE', KEYS[4], ttl)
+return {1, user_total + estimate, global_total + estimate}
+"""
+
+
+class TokenReservation:
+    """
+    Tokens reserved for one LLM request.
+    """
+
+    def __init__(
+        self,
+        model_size: Enum,
+        tokens: int = 0,
+        reserved_keys: Optional[List[str]] = None,
+    ):
+        """
+        Initialize the reservation.
+
+        Args:
+            model_size: Model size to use, possibly smaller than requested
+            tokens: Number of tokens reserved
+            reserved_keys: Keys of the reserved counters holding the tokens
+        """
+        self.model_size = model_size
+        self.tokens = tokens
+        self.reserved_keys = reserved_keys or []
+
+
+class TokenQuotaService:
+    """
+    Service for enforcing daily LLM token quotas.
+
+    A reservation fails when it would take the user or the platform over its
+    daily budget. Past the soft limit ratio of either budget, requests are
+    moved to the next smaller model so a heavy user consumes less of the
+    shared capacity before being cut off.
+    """
+
+    def __init__(
+        self,
+        user_daily_budget: int = settings.LLM_USER_DAILY_TOKEN_BUDGET,
+        global_daily_budget: int = settings.LLM_GLOBAL_DAILY_TOKEN_BUDGET,
+        soft_limit_ratio: float = settings.LLM_QUOTA_SOFT_LIMIT_RATIO,
+        reservation_ttl: int = 3600,
+        enabled: Optional[bool] = None,
+    ):
+        """
+        Initialize the token quota service.
+
+        Args:
+            user_daily_budget: Tokens per user per day, 0 for no limit
+            global_daily_budget: Tokens for all users per day, 0 for no limit
+            soft_limit_ratio: Share of a budget after which smaller models are used
+            reservation_ttl: Seconds after which unreconciled reservations expire
+            enabled: Whether quotas are enforced, by default outside testing
+        """
+        self.user_daily_budget = user_daily_budget
+        self.global_daily_budget = global_daily_budget
+        self.soft_limit_ratio = soft_limit_ratio
+        self.reservation_ttl = reservation_ttl
+        self.enabled = settings.ENVIRONMENT != "testing" if enabled is None else enabled
+        self.redis = RedisCache(prefix="token_quota")
+        self.script = self.redis.redis.register_script(RESERVE_SCRIPT)
+
+        # Async client for requests made from the event loop
+        self.async_redis = RedisConnectionManager.get_async_connection()
+        self.async_script = self.async_redis.register_script(RESERVE_SCRIPT)
+
+    def reserve(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: Optional[int],
+        model_size: Enum,
+        user_id: Optional[str] = None,
+    ) -> TokenReservation:
+        """
+        Reserve the estimated tokens for a request.
+
+        Args:
+            messages: Messages to send
+            max_tokens: Maximum number of completion tokens, if set
+            model_size: Requested model size
+            user_id: ID of the user making the request
+
+        Returns:
+            TokenReservation: Reservation with the model size to use
+
+        Raises:
+            TokenQuotaExceededError: If the request would exceed a budget
+        """
+        request = self._prepare_reservation(messages, max_tokens, user_id)
+        if request is None:
+            return TokenReservation(model_size)
+
+        try:
+            result = self.script(keys=request["keys"], args=request["args"])
+        except Exception as e:
+            # If Redis fails, allow the request but log the error
+            logger.error(f"Error reserving tokens: {str(e)}")
+            return TokenReservation(model_size)
+
+        return self._complete_reservation(request, result, model_size, user_id)
+
+    async def reserve_async(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: Optional[int],
+        model_size: Enum,
+        user_id: Optional[str] = None,
+    ) -> TokenReservation:
+        """
+        Reserve the estimated tokens for a request without blocking the event loop.
+
+        Args:
+            messages: Messages to send
+            max_tokens: Maximum number of completion tokens, if set
+            model_size: Requested model size
+            user_id: ID of the user making the request
+
+        Returns:
+            TokenReservation: Reservation with the model size to use
+
+        Raises:
+            TokenQuotaExceededError: If the request would exceed a budget
+        """
+        request = self._prepare_reservation(messages, max_tokens, user_id)
+        if request is None:
+            return TokenReservation(model_size)
+
+        try:
+            result = await self.async_script(keys=request["keys"], args=request["args"])
+        except Exception as e:
+            # If Redis fails, allow the request but log the error
+            logger.error(f"Error reserving tokens: {str(e)}")
+            return TokenReservation(model_size)
+
+        return self._complete_reservation(request, result, model_size, user_id)
+
+    def reconcile(self, reservation: TokenReservation, usage: Optional[Dict[str, int]] = None) -> None:
+        """
+        Reconcile a reservation once the request's usage has been recorded.
+
+        Actual usage is added to the daily counters by UsageAnalytics from the
+        token usage of the response, so the estimate is removed again here.
+
+        Args:
+            reservation: Reservation to reconcile
+            usage: Token usage of the response, or None if the request failed
+        """
+        if not reservation.tokens:
+            return
+
+        try:
+            pipe = self.redis.redis.pipeline(transaction=False)
+            for key in reservation.reserved_keys:
+                pipe.decrby(key, reservation.tokens)
+            pipe.execute()
+            self._log_reconciliation(reservation, usage)
+        except Exception as e:
+            # The reservation expires on its own
+            logger.error(f"Error releasing token reservation: {str(e)}")
+
+    async def reconcile_async(
+        self, reservation: TokenReservation, usage: Optional[Dict[str, int]] = None
+    ) -> None:
+        """
+        Reconcile a reservation without blocking the event loop.
+
+        Args:
+            reservation: Reservation to reconcile
+            usage: Token usage of the response, or None if the request failed
+        """
+        if not reservation.tokens:
+            return
+
+        try:
+            pipe = self.async_redis.pipeline(transaction=False)
+            for key in reservation.reserved_keys:
+                pipe.decrby(key, reservation.tokens)
+            await pipe.execute()
+            self._log_reconciliation(reservation, usage)
+        except Exception as e:
+            # The reservation expires on its own
+            logger.error(f"Error releasing token reservation: {str(e)}")
+
+    def _prepare_reservation(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: Optional[int],
+        user_id: Optional[str],
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Estimate a request's tokens and build the arguments of the reserve script.
+
+        Args:
+            messages: Messages to send
+            max_tokens: Maximum number of completion tokens, if set
+            user_id: ID of the user making the request
+
+        Returns:
+            Optional[Dict[str, Any]]: Estimate, user budget, script keys and
+            arguments and reserved keys, or None if quotas are disabled
+        """
+        if not self.enabled:
+            return None
+
+        estimate = count_message_tokens(messages) + (max_tokens or DEFAULT_COMPLETION_TOKENS)
+        date_str = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+        # Requests without a user share one anonymous budget, so leaving out
+        # the user never bypasses the quota
+        user_budget = self.user_daily_budget
+        user_key = user_id or "anonymous"
+        reserved_keys = [
+            self.redis._get_key(f"user:{user_key}:reserved:{date_str}"),
+            self.redis._get_key(f"global:reserved:{date_str}"),
+        ]
+
+        return {
+            "estimate": estimate,
+            "user_budget": user_budget,
+            "reserved_keys": reserved_keys,
+            "keys": [
+                UsageAnalytics.get_user_daily_key(user_key, date_str),
+                reserved_keys[0],
+                UsageAnalytics.get_global_daily_key(date_str),
+                reserved_keys[1],
+            ],
+            "args": [estimate, user_budget, self.global_daily_budget, self.reservation_ttl],
+        }
+
+    def _complete_reservation(
+        self,
+        request: Dict[str, Any],
+        result: List[Any],
+        model_size: Enum,
+        user_id: Optional[str],
+    ) -> TokenReservation:
+        """
+        Turn the result of the reserve script into a reservation.
+
+        Args:
+            request: Reservation request from _prepare_reservation
+            result: Result of the reserve script
+            model_size: Requested model size
+            user_id: ID of the user making the request
+
+        Returns:
+            TokenReservation: Reservation with the model size to use
+
+        Raises:
+            TokenQuotaExceededError: If the request would exceed a budget
+        """
+        allowed, user_total, global_total = result
+        estimate = request["estimate"]
+        user_budget = request["user_budget"]
+
+        if not allowed:
+            logger.warning(
+                f"Token quota exceeded for user {user_id}: {estimate} tokens requested, "
+                f"{user_total} used today"
+            )
+            raise TokenQuotaExceededError(
+                "Daily token quota exceeded. Please try again tomorrow.",
+                details={"requested_tokens": estimate, "used_tokens": int(user_total)},
+            )
+
+        # Move to a smaller model once a budget is nearly used up
+        usage_ratio = max(
+            int(user_total) / user_budget if user_budget else 0,
+            int(global_total) / self.global_daily_budget if self.global_daily_budget else 0,
+        )
+        if usage_ratio >= self.soft_limit_ratio:
+            model_size = self._get_smaller_model_size(model_size)
+
+        return TokenReservation(model_size, tokens=estimate, reserved_keys=request["reserved_keys"])
+
+    @staticmethod
+    def _log_reconciliation(reservation: TokenReservation, usage: Optional[Dict[str, int]]) -> None:
+        """
+        Log how a reservation compared to the actual usage.
+
+        Args:
+            reservation: Reconciled reservation
+            usage: Token usage of the response, or None if the request failed
+        """
+        if usage is not None:
+            logger.debug(
+                f"Reserved {reservation.tokens} tokens, used {usage.get('total_tokens', 0)}"
+            )
+
+    @staticmethod
+    def _get_smaller_model_size(model_size: Enum) -> Enum:
+        """
+        Get the next smaller model size.
+
+        Args:
+            model_size: Model size
+
+        Returns:
+            Enum: Next smaller model size of the same enum, or the same size if it is the smallest
+        """
+        value = getattr(model_size, "value", model_size)
+        if value not in MODEL_SIZE_ORDER or value == MODEL_SIZE_ORDER[-1]:
+            return model_size
+        return type(model_size)(MODEL_SIZE_ORDER[MODEL_SIZE_ORDER.index(value) + 1])
+
+
+# Create a singleton instance
+token_quota_service = TokenQuotaService()
@@ -8,6 +8,7 @@ import json
 import logging
 import os
 import re
+from functools import lru_cache
 from typing import Dict, List, Optional, Any, Set, Tuple
 
 logger = logging.getLogger(__name__)
@@ -42,6 +43,21 @@ class ToolsAndPartsService:
         self.aircraft_part_mappings: Dict[str, Dict] = {}
         self.procedure_resource_mappings: Dict[str, Dict] = {}
 
+        # Incremented on every load so derived indexes can detect data changes
+        self.data_version = 0
+
+        self._load_data()
+
+    def reload(self) -> None:
+        """
+        Reload tools, parts, and equipment data from files.
+        """
+        self.tools = {}
+        self.parts = {}
+        self.equipment = {}
+        self.aircraft_tool_mappings = {}
+        self.aircraft_part_mappings = {}
+        self.procedure_resource_mappings = {}
         self._load_data()
 
     def _load_data(self) -> None:
@@ -94,6 +110,8 @@ class ToolsAndPartsService:
             logger.info(f"Loaded {len(self.tools)} tools, {len(self.parts)} parts, and {len(self.equipment)} equipment items")
         except Exception as e:
             logger.error(f"Error loading tools and parts data: {str(e)}")
+        finally:
+            self.data_version += 1
 
     def get_all_tools(self) -> List[Dict]:
         """
@@ -627,7 +645,8 @@ class ToolsAndPartsService:
         system: Optional[str] = None,
         aircraft_type: Optional[str] = None,
         specific_procedure: Optional[str] = None,
-        format: str = "json"
+        format: str = "json",
+        mapped_resources: Optional[Dict[str, List[Dict]]] = None
     ) -> Any:
         """
         Generate a consolidated list of resources for a procedure.
@@ -639,6 +658,8 @@ class ToolsAndPartsService:
             aircraft_type: Aircraft type (optional).
             specific_procedure: Specific procedure name (optional).
             format: Output format ("json" or "markdown").
+            mapped_resources: Precomputed resources for the procedure type and system
+                (optional). If None, they are looked up.
 
         Returns:
             Consolidated resource list in the specified format.
@@ -647,38 +668,31 @@ class ToolsAndPartsService:
         extracted_resources = self.extract_resources_from_procedure(procedure)
 
         # Get resources based on procedure type and system
-        mapped_resources = {}
-        if procedure_type and system:
-            mapped_resources = self.get_resources_for_procedure(
-                procedure_type=procedure_type,
-                system=system,
-                aircraft_type=aircraft_type,
-                specific_procedure=specific_procedure
-            )
-
-        # Combine resources
-        combined_resources = {
-            "tools": extracted_resources["tools"] + [
-                tool for tool in mapped_resources.get("tools", [])
-                if tool not in extracted_resources["tools"]
-            ],
-            "parts": extracted_resources["parts"] + [
-                part for part in mapped_resources.get("parts", [])
-                if part not in extracted_resources["parts"]
-            ],
-            "equipment": extracted_resources["equipment"] + [
-                equip for equip in mapped_resources.get("equipment", [])
-                if equip not in extracted_resources["equipment"]
-            ]
-        }
+        if mapped_resources is None:
+            mapped_resources = {}
+            if procedure_type and system:
+                mapped_resources = self.get_resources_for_procedure(
+                    procedure_type=procedure_type,
+                    system=system,
+                    aircraft_type=aircraft_type,
+                    specific_procedure=specific_procedure
+                )
+
+        # Combine resources, keeping the first occurrence of each ID
+        combined_resources = {}
+        for resource_type in ("tools", "parts", "equipment"):
+            combined = {}
+            for resource in extracted_resources[resource_type] + list(mapped_resources.get(resource_type, [])):
+                combined.setdefault(resource["id"], resource)
+            combined_resources[resource_type] = list(combined.values())
 
         # Format the output
         if format.lower() == "markdown":
-            return self._format_resources_as_markdown(combined_resources)
+            return self.format_resources_as_markdown(combined_resources)
         else:
             return combined_resources
 
-    def _format_resources_as_markdown(self, resources: Dict[str, List[Dict]]) -> str:
+    def format_resources_as_markdown(self, resources: Dict[str, List[Dict]]) -> str:
         """
         Format resources as Markdown.
 
@@ -764,3 +778,15 @@ class ToolsAndPartsService:
             markdown += "No specific equipment required.\n\n"
 
         return markdown
+
+
+# Create a singleton instance
+@lru_cache()
+def get_tools_and_parts_service() -> ToolsAndPartsService:
+    """
+    Get the tools and parts service instance.
+
+    Returns:
+        ToolsAndPartsService: An instance of the ToolsAndPartsService.
+    """
+    return ToolsAndPartsService()
@@ -0,0 +1,454 @@
+#!/usr/bin/env python
+"""
+Middleware overhead benchmark for MAGPIE platform.
+
+This script:
+1. Builds a minimal application with no middleware, with the previous
+   BaseHTTPMiddleware stack, with the single InstrumentationMiddleware, and
+   with InstrumentationMiddleware plus body logging for every request. The
+   previous stack uses a frozen copy of the old LoggingMiddleware, so it does
+   not change when the current one does
+2. Sends the same JSON and streaming requests through each one in-process
+3. Prints the mean time per request and the overhead over the bare application
+
+Requests are driven directly through the ASGI interface, so the numbers
+exclude network and server costs. Metrics are not written to Redis and rate
+limiting is disabled, so only the middleware machinery itself is measured.
+
+Usage:
+    python scripts/benchmark_middleware.py [--requests N]
+
+Options:
+    --requests N    Number of requests per scenario (default: 2000)
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Set
+
+# Add the project root directory to the Python path
+project_root = str(Path(__file__).parent.parent.absolute())
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+# Keep metrics and error tracking in memory
+os.environ.setdefault("ENVIRONMENT", "testing")
+
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import StreamingResponse
+from loguru import logger
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp
+from unittest.mock import MagicMock
+
+from app.core.middleware import (
+    ErrorHandlingMiddleware,
+    InstrumentationMiddleware,
+    LoggingMiddleware,
+    ProfilingMiddleware,
+    RequestIdMiddleware,
+)
+from app.core.monitoring.metrics import record_count, record_timing
+from app.core.security.rate_limit import RateLimitMiddleware
+
+
+class PreviousLoggingMiddleware(BaseHTTPMiddleware):
+    """
+    Frozen copy of LoggingMiddleware as it was before the single-pass
+    instrumentation middleware, kept so the previous stack stays comparable.
+
+    Middleware for logging HTTP requests and responses.
+
+    This middleware logs information about incoming requests and outgoing
+    responses, including timing information, status codes, and other metadata.
+    It also collects performance metrics for analysis.
+    """
+
+    # Fields that may contain sensitive information and should be masked in logs
+    SENSITIVE_FIELDS: Set[str] = {
+        "password", "token", "secret", "key", "auth", "credential", "jwt",
+        "api_key", "apikey", "access_token", "refresh_token", "private_key",
+    }
+
+    # Maximum content length to log (to avoid huge logs)
+    MAX_CONTENT_LENGTH: int = 10000
+
+    def __init__(self, app: ASGIApp):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: ASGI application
+        """
+        super().__init__(app)
+        self.logger = logger.bind(name=__name__)
+
+    def _mask_sensitive_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Mask sensitive data in request/response bodies.
+
+        Args:
+            data: Data to mask
+
+        Returns:
+            Dict[str, Any]: Masked data
+        """
+        if not isinstance(data, dict):
+            return data
+
+        masked_data = {}
+        for key, value in data.items():
+            # Check if the key contains sensitive information
+            if any(sensitive in key.lower() for sensitive in self.SENSITIVE_FIELDS):
+                masked_data[key] = "***MASKED***"
+            elif isinstance(value, dict):
+                # Recursively mask nested dictionaries
+                masked_data[key] = self._mask_sensitive_data(value)
+            elif isinstance(value, list):
+                # Recursively mask items in lists
+                masked_data[key] = [
+                    self._mask_sensitive_data(item) if isinstance(item, dict) else item
+                    for item in value
+                ]
+            else:
+                masked_data[key] = value
+
+        return masked_data
+
+    async def _get_request_body(self, request: Request) -> Optional[Dict[str, Any]]:
+        """
+        Get the request body safely.
+
+        Args:
+            request: FastAPI request
+
+        Returns:
+            Optional[Dict[str, Any]]: Request body as a dictionary, or None if not available
+        """
+        try:
+            # Check content type
+            content_type = request.headers.get("content-type", "").lower()
+
+            # Only process JSON content
+            if "application/json" in content_type:
+                # Get request body
+                body = await request.body()
+
+                # Skip if body is too large
+                if len(body) > self.MAX_CONTENT_LENGTH:
+                    return {"message": f"Body too large ({len(body)} bytes)"}
+
+                # Parse JSON body
+                if body:
+                    try:
+                        body_dict = json.loads(body)
+                        # Mask sensitive data
+                        return self._mask_sensitive_data(body_dict)
+                    except json.JSONDecodeError:
+                        return {"message": "Invalid JSON body"}
+
+            return None
+        except Exception as e:
+            self.logger.warning(f"Failed to get request body: {e}")
+            return None
+
+    async def _get_response_body(self, response: Response) -> Optional[Dict[str, Any]]:
+        """
+        Get the response body safely.
+
+        Args:
+            response: FastAPI response
+
+        Returns:
+            Optional[Dict[str, Any]]: Response body as a dictionary, or None if not available
+        """
+        try:
+            # Check content type
+            content_type = response.headers.get("content-type", "").lower()
+
+            # Only process JSON content
+            if "application/json" in content_type:
+                # Get response body
+                body = response.body
+
+                # Skip if body is too large
+                if len(body) > self.MAX_CONTENT_LENGTH:
+                    return {"message": f"Body too large ({len(body)} bytes)"}
+
+                # Parse JSON body
+                if body:
+                    try:
+                        body_dict = json.loads(body)
+                        # Mask sensitive data
+                        return self._mask_sensitive_data(body_dict)
+                    except json.JSONDecodeError:
+                        return {"message": "Invalid JSON body"}
+
+            return None
+        except Exception as e:
+            self.logger.warning(f"Failed to get response body: {e}")
+            return None
+
+    async def dispatch(
+        self, request: Request, call_next: Callable
+    ) -> Response:
+        # Get request ID from state or generate a new one
+        request_id = getattr(request.state, "request_id", str(uuid.uuid4()))
+
+        # Create a logger with request context
+        request_logger = logger.bind(
+            request_id=request_id,
+            method=request.method,
+            path=request.url.path,
+            client=request.client.host if request.client else "unknown",
+        )
+
+        # Log request
+        request_logger.info(f"Request started: {request.method} {request.url.path}")
+
+        # Process request and measure timing
+        start_time = time.time()
+
+        # Record request count metric
+        record_count(
+            name="http_requests_total",
+            tags={
+                "method": request.method,
+                "path": request.url.path,
+            }
+        )
+
+        try:
+            # Get request body for logging if needed
+            request_body = await self._get_request_body(request)
+
+            # Process the request
+            response = await call_next(request)
+
+            # Calculate request processing time
+            process_time = time.time() - start_time
+            process_time_ms = process_time * 1000  # Convert to milliseconds
+
+            # Get response body for logging if needed
+            response_body = await self._get_response_body(response)
+
+            # Record timing metric
+            record_timing(
+                name="http_request_duration_milliseconds",
+                start_time=start_time,
+                tags={
+                    "method": request.method,
+                    "path": request.url.path,
+                    "status": str(response.status_code),
+                }
+            )
+
+            # Record status code metric
+            record_count(
+                name="http_responses_total",
+                tags={
+                    "method": request.method,
+                    "path": request.url.path,
+                    "status": str(response.status_code),
+                }
+            )
+
+            # Log response with additional context
+            log_context = {
+                "status_code": response.status_code,
+                "processing_time_ms": process_time_ms,
+                "content_length": len(response.body) if hasattr(response, "body") else 0,
+            }
+
+            # Add request/response bodies if available
+            if request_body:
+                log_context["request_body"] = request_body
+            if response_body:
+                log_context["response_body"] = response_body
+
+            # Log response
+            request_logger.bind(**log_context).info(
+                f"Request completed: {request.method} {request.url.path} - "
+                f"Status: {response.status_code} - Time: {process_time:.4f}s"
+            )
+
+            # Add custom headers
+            response.headers["X-Process-Time"] = str(process_time)
+            response.headers["X-Request-ID"] = request_id
+
+            return response
+
+        except Exception as e:
+            # Calculate request processing time
+            process_time = time.time() - start_time
+            process_time_ms = process_time * 1000  # Convert to milliseconds
+
+            # Record error metric
+            record_count(
+                name="http_errors_total",
+                tags={
+                    "method": request.method,
+                    "path": request.url.path,
+                    "error": type(e).__name__,
+                }
+            )
+
+            # Log exception with additional context
+            request_logger.bind(
+                processing_time_ms=process_time_ms,
+                exception_type=type(e).__name__,
+                exception_message=str(e),
+            ).exception(f"Request failed: {request.method} {request.url.path}")
+
+            # Re-raise the exception
+            raise
+
+
+def build_app() -> FastAPI:
+    """
+    Build an application with a JSON and a streaming endpoint.
+    """
+    app = FastAPI()
+
+    @app.post("/items")
+    async def create_item(request: Request):
+        return {"id": 1, **(await request.json())}
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for index in range(10):
+                yield f"data: {index}\n\n"
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+    return app
+
+
+def build_previous_stack() -> FastAPI:
+    """
+    Build the application with the previous middleware stack.
+    """
+    app = build_app()
+    app.add_middleware(RequestIdMiddleware)
+    app.add_middleware(PreviousLoggingMiddleware)
+    app.add_middleware(ErrorHandlingMiddleware)
+    app.add_middleware(ProfilingMiddleware, enabled=True)
+    app.add_middleware(RateLimitMiddleware, redis_client=MagicMock(), enabled=False)
+
+    @app.middleware("http")
+    async def audit_logging_middleware(request: Request, call_next):
+        return await call_next(request)
+
+    return app
+
+
+def build_instrumented() -> FastAPI:
+    """
+    Build the application with the single instrumentation middleware.
+    """
+    app = build_app()
+    app.add_middleware(InstrumentationMiddleware, audit_hooks=[lambda request, status_code: None])
+    return app
+
+
+def build_instrumented_with_body_logging() -> FastAPI:
+    """
+    Build the application with instrumentation and body logging for every request.
+    """
+    app = build_app()
+    app.add_middleware(LoggingMiddleware, sample_rate=1.0, min_log_level="DEBUG")
+    app.add_middleware(InstrumentationMiddleware, audit_hooks=[lambda request, status_code: None])
+    return app
+
+
+async def send_request(app: FastAPI, method: str, path: str, body: bytes) -> None:
+    """
+    Send one request through the application's ASGI interface.
+    """
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"content-type", b"application/json"), (b"host", b"benchmark")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("benchmark", 80),
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def benchmark(app: FastAPI, method: str, path: str, requests: int) -> float:
+    """
+    Get the mean time per request in microseconds.
+    """
+    body = b'{"name": "Hydraulic pump", "quantity": 2}' if method == "POST" else b""
+
+    # Warm up the middleware stack and routing
+    for _ in range(50):
+        await send_request(app, method, path, body)
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        await send_request(app, method, path, body)
+    return (time.perf_counter() - start) / requests * 1_000_000
+
+
+async def run(requests: int) -> None:
+    """
+    Run all scenarios and print the results.
+    """
+    apps = {
+        "bare": build_app(),
+        "previous stack": build_previous_stack(),
+        "instrumentation": build_instrumented(),
+        "+ body logging": build_instrumented_with_body_logging(),
+    }
+
+    for method, path in (("POST", "/items"), ("GET", "/stream")):
+        print(f"{method} {path} ({requests} requests)")
+        baseline = None
+        for name, app in apps.items():
+            mean_us = await benchmark(app, method, path, requests)
+            if baseline is None:
+                baseline = mean_us
+                print(f"  {name:<16} {mean_us:9.1f} us/request")
+            else:
+                print(f"  {name:<16} {mean_us:9.1f} us/request  (+{mean_us - baseline:.1f} us overhead)")
+
+
+def main():
+    """
+    Main function.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark MAGPIE middleware overhead")
+    parser.add_argument("--requests", type=int, default=2000, help="Number of requests per scenario")
+    args = parser.parse_args()
+
+    # Request logging would dominate the measurement
+    logger.remove()
+
+    asyncio.run(run(args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+"""
+Partition maintenance script for MAGPIE platform.
+
+This script:
+1. Creates monthly partitions ahead of time for all partitioned tables
+2. Optionally detaches partitions older than the retention period, moving
+   them to an archive schema or dropping them
+
+It is intended to run from a scheduler (e.g. cron) at least once a month.
+
+Usage:
+    python scripts/manage_partitions.py [--months-ahead N] [--retention-months N] [--archive-schema NAME]
+
+Options:
+    --months-ahead N         Number of future months to create partitions for (default: 3)
+    --retention-months N     Detach partitions older than N months
+    --archive-schema NAME    Move detached partitions to this schema instead of dropping them
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Add the project root directory to the Python path
+project_root = str(Path(__file__).parent.parent.absolute())
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from app.core.db.connection import DatabaseConnectionFactory
+from app.core.db.partitioning import PartitionManager
+
+
+def main():
+    """
+    Main function.
+    """
+    parser = argparse.ArgumentParser(description="Maintain MAGPIE table partitions")
+    parser.add_argument("--months-ahead", type=int, default=3, help="Number of future months to create partitions for")
+    parser.add_argument("--retention-months", type=int, default=None, help="Detach partitions older than this many months")
+    parser.add_argument("--archive-schema", default=None, help="Move detached partitions to this schema instead of dropping them")
+    args = parser.parse_args()
+
+    session = DatabaseConnectionFactory.get_session()
+    try:
+        manager = PartitionManager(session)
+        if not manager.is_supported:
+            print("Database does not support partitioning, nothing to do.")
+            return
+
+        results = manager.maintain(
+            months_ahead=args.months_ahead,
+            retention_months=args.retention_months,
+            archive_schema=args.archive_schema
+        )
+        for table, changes in results.items():
+            print(f"{table}: created {len(changes['created'])}, detached {len(changes['detached'])} partitions.")
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+"""
+Model usage rollup script for MAGPIE platform.
+
+This script:
+1. Rolls up new model usage into hourly, daily and monthly buckets
+2. Aggregates performance metrics from the usage
+3. Optionally prunes raw usage records older than the retention period
+
+It is intended to run from a scheduler (e.g. cron) every few minutes; each
+run only processes usage recorded since the previous run.
+
+Usage:
+    python scripts/rollup_usage.py [--prune-days DAYS]
+
+Options:
+    --prune-days DAYS    Delete raw usage records older than DAYS days
+"""
+import argparse
+import sys
+from datetime import timedelta
+from pathlib import Path
+
+# Add the project root directory to the Python path
+project_root = str(Path(__file__).parent.parent.absolute())
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from app.core.db.connection import DatabaseConnectionFactory
+from app.core.model_selection.performance import PerformanceTracker
+
+
+def main():
+    """
+    Main function.
+    """
+    parser = argparse.ArgumentParser(description="Roll up MAGPIE model usage")
+    parser.add_argument("--prune-days", type=int, default=None, help="Delete raw usage records older than this many days")
+    args = parser.parse_args()
+
+    session = DatabaseConnectionFactory.get_session()
+    try:
+        tracker = PerformanceTracker(db=session)
+
+        # Roll up usage and aggregate metrics
+        rows = tracker.rollup_usage()
+        print(f"Wrote {rows} hourly rollup rows.")
+        tracker.aggregate_metrics()
+
+        # Prune raw usage if requested
+        if args.prune_days is not None:
+            deleted = tracker.prune_usage_records(retention=timedelta(days=args.prune_days))
+            print(f"Pruned {deleted} usage records.")
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
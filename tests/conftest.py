@@ -20,6 +20,7 @@ if project_root not in sys.path:
 from app.core.config import settings
 from app.main import app
 from app.core.db.connection import Base
+from app.core.db.search import create_sqlite_search_index
 from app.models.user import User, UserRole
 from app.models.conversation import Conversation, Message, MessageRole, AgentType
 from app.models.agent import AgentConfiguration, ModelSize
@@ -131,8 +132,9 @@ def test_db_engine():
     # Use in-memory SQLite database for testing
     engine = create_engine("sqlite:///:memory:")
 
-    # Create tables
+    # Create tables and full-text search index
     Base.metadata.create_all(engine)
+    create_sqlite_search_index(engine)
 
     yield engine
 
@@ -177,6 +177,7 @@ def mock_conversation_repository():
 
     # Configure mock repository to return appropriate messages
     mock_repo.get_messages.return_value = [user_message, assistant_message]
+    mock_repo.get_messages_page.return_value = ([assistant_message, user_message], None)
 
     # Add delete_conversation method
     mock_repo.delete_conversation = MagicMock(return_value=True)
@@ -331,6 +332,10 @@ def mock_orchestrator():
         user_message,
         assistant_message
     ])
+    mock_conversation_repository.get_messages_page = MagicMock(return_value=(
+        [assistant_message, user_message],
+        None
+    ))
     mock_conversation_repository.delete_conversation = MagicMock(return_value=True)
     mock_orchestrator.conversation_repository = mock_conversation_repository
 
@@ -655,7 +655,7 @@ class TestLogManagement:
                 assert archive_dir.exists()
 
                 # Verify archive files were created (at least one)
-                archive_files = list(archive_dir.glob("*.zip"))
+                archive_files = list(archive_dir.glob("*.gz"))
                 assert len(archive_files) >= 1
         finally:
             # Restore the original retention policy
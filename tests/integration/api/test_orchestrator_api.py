@@ -4,6 +4,8 @@ Integration tests for the orchestrator API endpoints.
 import pytest
 from httpx import AsyncClient
 
+from app.services.exceptions import TokenQuotaExceededError
+
 # Import the orchestrator fixtures
 pytest_plugins = ["tests.conftest_orchestrator"]
 
@@ -155,15 +157,19 @@ class TestOrchestratorAPI:
         assert data["messages"][1]["content"] == "Test response"
         assert data["messages"][1]["agent_type"] == "documentation"
 
+        assert data["next_cursor"] is None
+
         # Verify conversation repository was called correctly
-        mock_orchestrator.conversation_repository.get_messages.assert_called_once_with("test-conversation-id")
+        mock_orchestrator.conversation_repository.get_messages_page.assert_called_once_with(
+            "test-conversation-id", limit=50, cursor=None
+        )
 
     def test_get_conversation_history_not_found(self, orchestrator_client, mock_orchestrator):
         """
         Test getting conversation history when not found.
         """
         # Configure mock to return empty list (conversation not found)
-        mock_orchestrator.conversation_repository.get_messages.return_value = []
+        mock_orchestrator.conversation_repository.get_messages_page.return_value = ([], None)
 
         # Send request
         response = orchestrator_client.get("/api/v1/orchestrator/conversation/nonexistent-conversation-id")
@@ -172,6 +178,17 @@ class TestOrchestratorAPI:
         assert response.status_code == 404
         assert "not found" in response.json()["detail"]
 
+    def test_get_conversation_history_invalid_cursor(self, orchestrator_client, mock_orchestrator):
+        """
+        Test that an invalid cursor is rejected instead of returning an empty page.
+        """
+        mock_orchestrator.conversation_repository.get_messages_page.side_effect = ValueError("Invalid cursor: bad")
+
+        response = orchestrator_client.get("/api/v1/orchestrator/conversation/test-conversation-id?cursor=bad")
+
+        assert response.status_code == 400
+        assert "Invalid cursor" in response.json()["detail"]
+
     def test_delete_conversation_history(self, orchestrator_client, mock_orchestrator):
         """
         Test deleting conversation history.
@@ -219,3 +236,25 @@ class TestOrchestratorAPI:
         # Verify response
         assert response.status_code == 500
         assert "error" in response.json()["detail"].lower()
+
+    def test_quota_exceeded(self, orchestrator_client, mock_orchestrator):
+        """
+        Test that an exhausted token quota is reported as 429.
+        """
+        # Configure mock to raise a quota error
+        mock_orchestrator.process_request.side_effect = TokenQuotaExceededError(
+            "Daily token quota exceeded. Please try again tomorrow."
+        )
+
+        # Test request data
+        request_data = {
+            "query": "What is the maintenance procedure for landing gear?",
+            "user_id": "test-user"
+        }
+
+        # Send request
+        response = orchestrator_client.post("/api/v1/orchestrator/query", json=request_data)
+
+        # Verify response
+        assert response.status_code == 429
+        assert response.json()["detail"] == "Daily token quota exceeded. Please try again tomorrow."
@@ -0,0 +1,88 @@
+"""
+Integration tests for monthly table partitioning on PostgreSQL.
+
+These tests need a PostgreSQL database and are skipped unless
+TEST_POSTGRES_URL is set. Each test works on its own partitioned table,
+which is dropped afterwards.
+"""
+import os
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db.partitioning import PartitionManager
+
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+pytestmark = [
+    pytest.mark.integration,
+    pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL is not set"),
+]
+
+TABLE = "partitiontestrecord"
+
+
+@pytest.fixture
+def session():
+    """
+    Create a session with a partitioned table that has a default partition.
+    """
+    engine = create_engine(POSTGRES_URL)
+    db = sessionmaker(bind=engine)()
+    db.execute(text(f'DROP TABLE IF EXISTS "{TABLE}" CASCADE'))
+    db.execute(text(
+        f'CREATE TABLE "{TABLE}" (id SERIAL, "timestamp" TIMESTAMP NOT NULL, PRIMARY KEY (id, "timestamp")) '
+        'PARTITION BY RANGE ("timestamp")'
+    ))
+    db.execute(text(f'CREATE TABLE "{TABLE}_default" PARTITION OF "{TABLE}" DEFAULT'))
+    db.commit()
+    yield db
+    db.rollback()
+    db.execute(text(f'DROP TABLE IF EXISTS "{TABLE}" CASCADE'))
+    db.commit()
+    db.close()
+    engine.dispose()
+
+
+def _count(db, table: str) -> int:
+    """
+    Count the rows of a table.
+    """
+    return db.execute(text(f'SELECT count(*) FROM "{table}"')).scalar()
+
+
+def test_ensure_partitions_moves_default_rows(session):
+    """
+    Test that creating a partition moves its month's rows out of the default partition.
+    """
+    session.execute(
+        text(f'INSERT INTO "{TABLE}" ("timestamp") VALUES (:march), (:march), (:april)'),
+        {"march": datetime(2025, 3, 10), "april": datetime(2025, 4, 2)}
+    )
+    session.commit()
+
+    manager = PartitionManager(session, tables={TABLE: "timestamp"})
+    created = manager.ensure_partitions(TABLE, months_ahead=1, now=datetime(2025, 3, 15))
+    session.commit()
+
+    assert created == [f"{TABLE}_p202503", f"{TABLE}_p202504"]
+    assert _count(session, f"{TABLE}_default") == 0
+    assert _count(session, f"{TABLE}_p202503") == 2
+    assert _count(session, f"{TABLE}_p202504") == 1
+    assert [name for name, _, _ in manager.list_partitions(TABLE)] == created
+
+
+def test_detach_partitions_uses_caller_transaction(session):
+    """
+    Test that detaching partitions is undone when the caller rolls back.
+    """
+    manager = PartitionManager(session, tables={TABLE: "timestamp"})
+    manager.ensure_partitions(TABLE, months_ahead=1, now=datetime(2025, 1, 15))
+    session.commit()
+
+    assert manager.detach_partitions(TABLE, datetime(2025, 2, 1), archive_schema=None) == [f"{TABLE}_p202501"]
+    session.rollback()
+
+    assert [name for name, _, _ in manager.list_partitions(TABLE)] == [f"{TABLE}_p202501", f"{TABLE}_p202502"]
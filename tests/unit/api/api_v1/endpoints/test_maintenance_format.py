@@ -9,6 +9,7 @@ from fastapi import status, FastAPI
 from fastapi.testclient import TestClient
 
 from app.api.api_v1.endpoints.maintenance import router as maintenance_router
+from app.api.deps import get_current_active_user
 
 
 # Create a test app with the maintenance router
@@ -95,8 +96,12 @@ mock_agent.generate_procedure.return_value = {
 def override_get_maintenance_agent():
     return mock_agent
 
+def override_get_current_active_user():
+    return MagicMock(id=1)
+
 from app.api.api_v1.endpoints.maintenance import get_maintenance_agent
 test_app.dependency_overrides[get_maintenance_agent] = override_get_maintenance_agent
+test_app.dependency_overrides[get_current_active_user] = override_get_current_active_user
 
 
 class TestMaintenanceFormatEndpoints:
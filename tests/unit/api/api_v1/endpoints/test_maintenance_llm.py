@@ -8,6 +8,8 @@ import pytest
 from fastapi import status, FastAPI, Depends
 from fastapi.testclient import TestClient
 
+from app.api.deps import get_current_active_user
+from app.services.exceptions import TokenQuotaExceededError
 from app.services.llm_service import ModelSize
 from app.api.api_v1.endpoints.maintenance import router as maintenance_router, get_maintenance_agent
 from app.core.agents.maintenance_agent import MaintenanceAgent
@@ -18,14 +20,18 @@ mock_agent = AsyncMock()
 mock_agent.generate_procedure_with_llm = AsyncMock()
 mock_agent.enhance_procedure_with_llm = AsyncMock()
 
-# Override the dependency
+# Override the dependencies
 async def override_get_maintenance_agent():
     return mock_agent
 
+async def override_get_current_active_user():
+    return MagicMock(id=1)
+
 # Create a test app with the maintenance router
 test_app = FastAPI()
 test_app.include_router(maintenance_router)
 test_app.dependency_overrides[get_maintenance_agent] = override_get_maintenance_agent
+test_app.dependency_overrides[get_current_active_user] = override_get_current_active_user
 
 client = TestClient(test_app)
 
@@ -73,7 +79,9 @@ class TestMaintenanceLLMEndpoints:
             "configuration": "Standard configuration",
             "regulatory_requirements": "FAA regulations",
             "special_considerations": "None",
-            "use_large_model": True
+            "use_large_model": True,
+            # Ignored, the quota is charged to the authenticated user
+            "user_id": "user-1"
         }
         response = client.post("/maintenance/generate-with-llm", json=request_data)
 
@@ -83,7 +91,7 @@ class TestMaintenanceLLMEndpoints:
         assert data["status"] == "success"
         assert "Maintenance procedure generated successfully" in data["message"]
         assert data["data"]["procedure"] == mock_procedure
-        assert data["data"]["request"] == request_data
+        assert data["data"]["request"] == {k: v for k, v in request_data.items() if k != "user_id"}
 
         # Verify agent was called with correct parameters
         mock_agent.generate_procedure_with_llm.assert_called_once()
@@ -93,6 +101,7 @@ class TestMaintenanceLLMEndpoints:
         assert kwargs["aircraft_model"] == "737-800"
         assert kwargs["system"] == "Hydraulic"
         assert kwargs["components"] == "Pumps, Reservoirs"
+        assert kwargs["user_id"] == "1"
         assert kwargs["configuration"] == "Standard configuration"
         assert kwargs["regulatory_requirements"] == "FAA regulations"
         assert kwargs["special_considerations"] == "None"
@@ -259,3 +268,47 @@ class TestMaintenanceLLMEndpoints:
         assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
         data = response.json()
         assert data["detail"] == "Failed to enhance procedure with LLM"
+
+    def test_generate_procedure_with_llm_quota_exceeded(self):
+        """
+        Test that an exhausted token quota is reported as 429.
+        """
+        # Configure mock
+        mock_agent.generate_procedure_with_llm.side_effect = TokenQuotaExceededError(
+            "Daily token quota exceeded. Please try again tomorrow."
+        )
+
+        # Make request
+        request_data = {
+            "procedure_type": "Inspection",
+            "aircraft_type": "Boeing 737",
+            "aircraft_model": "737-800",
+            "system": "Hydraulic"
+        }
+        try:
+            response = client.post("/maintenance/generate-with-llm", json=request_data)
+        finally:
+            mock_agent.generate_procedure_with_llm.side_effect = None
+
+        # Verify response
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert response.json()["detail"] == "Daily token quota exceeded. Please try again tomorrow."
+
+    def test_generate_procedure_with_llm_requires_user(self):
+        """
+        Test that quota-charged endpoints require an authenticated user.
+        """
+        request_data = {
+            "procedure_type": "Inspection",
+            "aircraft_type": "Boeing 737",
+            "aircraft_model": "737-800",
+            "system": "Hydraulic"
+        }
+        del test_app.dependency_overrides[get_current_active_user]
+        try:
+            response = client.post("/maintenance/generate-with-llm", json=request_data)
+        finally:
+            test_app.dependency_overrides[get_current_active_user] = override_get_current_active_user
+
+        # Verify response
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
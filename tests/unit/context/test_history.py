@@ -0,0 +1,145 @@
+"""
+Unit tests for bounded conversation history.
+"""
+import pytest
+from unittest.mock import MagicMock
+
+from app.core.context.history import (
+    DEFAULT_HISTORY_TOKENS, SUMMARY_HEADER, build_history, history_token_budget, trim_history
+)
+from app.models.context import ContextSummary
+from app.models.conversation import Message, MessageRole
+from app.services.token_utils import count_message_tokens
+
+
+def _message(message_id: int, content: str) -> MagicMock:
+    """
+    Create a mock message, alternating user and assistant roles.
+    """
+    role = MessageRole.USER if message_id % 2 else MessageRole.ASSISTANT
+    return MagicMock(spec=Message, id=message_id, role=role, content=content)
+
+
+def _summary(end_message_id: int, content: str) -> MagicMock:
+    """
+    Create a mock summary ending at a message.
+    """
+    return MagicMock(spec=ContextSummary, end_message_id=end_message_id, summary_content=content)
+
+
+@pytest.fixture
+def messages():
+    """
+    Create ten mock messages of equal size.
+    """
+    return [_message(message_id, f"Hydraulic pressure reading number {message_id}") for message_id in range(11, 21)]
+
+
+class TestHistoryTokenBudget:
+    """
+    Test history token budgets.
+    """
+
+    def test_default_budget(self):
+        """
+        Test the budget without a model.
+        """
+        assert history_token_budget() == DEFAULT_HISTORY_TOKENS
+
+    def test_budget_from_small_context_window(self):
+        """
+        Test that a small context window limits the budget.
+        """
+        assert history_token_budget(8000, reserved_tokens=2000) == 1500
+
+    def test_budget_capped_for_large_context_window(self):
+        """
+        Test that a large context window does not raise the budget above the cap.
+        """
+        assert history_token_budget(128000, reserved_tokens=4000) == DEFAULT_HISTORY_TOKENS
+
+
+class TestBuildHistory:
+    """
+    Test building history from messages and summaries.
+    """
+
+    def test_all_messages_fit(self, messages):
+        """
+        Test that all messages are kept when they fit.
+        """
+        history = build_history(messages, [], 10000)
+
+        assert [entry["content"] for entry in history] == [message.content for message in messages]
+        assert history[0]["role"] == "user"
+        assert history[1]["role"] == "assistant"
+
+    def test_keeps_most_recent_messages(self, messages):
+        """
+        Test that the oldest messages are dropped to fit the budget.
+        """
+        budget = count_message_tokens([{"role": "user", "content": messages[0].content}]) * 3
+
+        history = build_history(messages, [], budget)
+
+        assert [entry["content"] for entry in history] == [message.content for message in messages[-3:]]
+
+    def test_summaries_of_dropped_messages(self, messages):
+        """
+        Test that summaries of dropped messages precede the kept messages.
+        """
+        summaries = [
+            _summary(5, "Pump replaced."),
+            _summary(10, "Pressure checked."),
+            _summary(18, "Overlaps the kept messages."),
+        ]
+        # 75 tokens for three messages, 25 reserved for summaries
+        budget = 100
+
+        history = build_history(messages, summaries, budget)
+
+        assert history[0] == {
+            "role": "system",
+            "content": f"{SUMMARY_HEADER}\n\nPump replaced.\n\nPressure checked."
+        }
+        assert [entry["content"] for entry in history[1:]] == [message.content for message in messages[-3:]]
+        assert count_message_tokens(history) <= budget
+
+    def test_newest_summaries_preferred(self, messages):
+        """
+        Test that older summaries are dropped first when the budget is tight.
+        """
+        summaries = [_summary(5, "Pump replaced. " * 20), _summary(10, "Pressure checked.")]
+        budget = 100
+
+        history = build_history(messages, summaries, budget)
+
+        assert history[0]["content"] == f"{SUMMARY_HEADER}\n\nPressure checked."
+
+    def test_no_messages(self):
+        """
+        Test building history for an empty conversation.
+        """
+        assert build_history([], [], 1000) == []
+
+
+class TestTrimHistory:
+    """
+    Test trimming existing history.
+    """
+
+    def test_trim_to_budget(self):
+        """
+        Test that only the most recent entries within the budget are kept.
+        """
+        history = [{"role": "user", "content": f"Message {index}"} for index in range(5)]
+        budget = count_message_tokens(history[-2:])
+
+        assert trim_history(history, budget) == history[-2:]
+
+    def test_trim_empty_history(self):
+        """
+        Test that missing history is returned unchanged.
+        """
+        assert trim_history(None, 100) is None
+        assert trim_history([], 100) == []
@@ -6,6 +6,7 @@ import json
 from unittest.mock import MagicMock, AsyncMock, patch
 
 from app.core.agents.maintenance_agent import MaintenanceAgent
+from app.services.exceptions import TokenQuotaExceededError
 
 
 class TestMaintenanceAgent:
@@ -886,6 +887,26 @@ class TestMaintenanceAgent:
         # Verify result
         assert procedure is None
 
+    @pytest.mark.asyncio
+    async def test_generate_procedure_with_llm_quota_exceeded(self, agent, mock_llm_service):
+        """
+        Test that quota errors are raised instead of answered with a fallback procedure.
+        """
+        mock_llm_service.generate_response_async.side_effect = TokenQuotaExceededError()
+
+        with pytest.raises(TokenQuotaExceededError):
+            await agent.generate_procedure_with_llm(
+                procedure_type="Inspection",
+                aircraft_type="Boeing 737",
+                aircraft_model="737-800",
+                system="Hydraulic",
+                components="Pumps, Reservoirs",
+                configuration="Standard configuration",
+                regulatory_requirements="FAA regulations",
+                special_considerations="None",
+                user_id="user-1"
+            )
+
     @pytest.mark.asyncio
     async def test_enhance_procedure_with_llm(self, agent, mock_llm_service):
         """
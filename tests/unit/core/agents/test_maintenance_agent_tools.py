@@ -8,6 +8,8 @@ from unittest.mock import patch, MagicMock
 from app.core.agents.maintenance_agent import MaintenanceAgent
 from app.services.tools_and_parts_service import ToolsAndPartsService
 
+MARKDOWN_RESOURCES = "# Required Resources\n\n## Tools\n\n### Socket Set\n\n- **Category:** Hand Tool\n\n### Torque Wrench\n\n- **Category:** Hand Tool\n\n## Parts\n\n### O-ring\n\n- **Category:** Seals\n\n### Hydraulic Fluid\n\n- **Category:** Fluids\n\n## Equipment\n\n### Aircraft Jack\n\n- **Category:** Ground Support Equipment\n"
+
 
 @pytest.fixture
 def mock_llm_service():
@@ -36,7 +38,7 @@ def mock_tools_and_parts_service():
     mock_service = MagicMock(spec=ToolsAndPartsService)
 
     # Mock generate_consolidated_resource_list for JSON format
-    mock_service.generate_consolidated_resource_list.side_effect = lambda procedure, procedure_type, system, aircraft_type, specific_procedure=None, format="json": {
+    mock_service.generate_consolidated_resource_list.side_effect = lambda procedure, procedure_type, system, aircraft_type, specific_procedure=None, format="json", mapped_resources=None: {
         "tools": [
             {
                 "id": "tool-001",
@@ -85,7 +87,10 @@ def mock_tools_and_parts_service():
                 "description": "Hydraulic jack for lifting aircraft during maintenance"
             }
         ]
-    } if format == "json" else "# Required Resources\n\n## Tools\n\n### Socket Set\n\n- **Category:** Hand Tool\n\n### Torque Wrench\n\n- **Category:** Hand Tool\n\n## Parts\n\n### O-ring\n\n- **Category:** Seals\n\n### Hydraulic Fluid\n\n- **Category:** Fluids\n\n## Equipment\n\n### Aircraft Jack\n\n- **Category:** Ground Support Equipment\n"
+    } if format == "json" else MARKDOWN_RESOURCES
+
+    # Mock format_resources_as_markdown
+    mock_service.format_resources_as_markdown.return_value = MARKDOWN_RESOURCES
 
     return mock_service
 
@@ -0,0 +1,216 @@
+"""
+Unit tests for instrumentation middleware.
+"""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+from opentelemetry.instrumentation.propagators import set_global_response_propagator
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import SpanKind, format_trace_id
+from starlette.status import HTTP_429_TOO_MANY_REQUESTS, HTTP_500_INTERNAL_SERVER_ERROR
+
+from app.core.middleware import InstrumentationMiddleware
+from app.core.monitoring.tracing import TraceparentResponsePropagator, set_request_id_attribute
+
+
+def make_scope(path: str = "/test", method: str = "GET") -> dict:
+    """Create an HTTP scope."""
+    return {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "query_string": b"",
+        "headers": [(b"user-agent", b"test-agent")],
+        "client": ("127.0.0.1", 8000),
+        "server": ("testserver", 80),
+        "scheme": "http",
+    }
+
+
+async def streaming_app(scope, receive, send):
+    """ASGI application sending a response in several chunks."""
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/event-stream")]})
+    for chunk in (b"data: 1\n\n", b"data: 2\n\n"):
+        await send({"type": "http.response.body", "body": chunk, "more_body": True})
+    await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+async def failing_app(scope, receive, send):
+    """ASGI application raising before it responds."""
+    raise ValueError("Test exception")
+
+
+async def call(middleware, scope):
+    """Call the middleware and collect the sent messages."""
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    await middleware(scope, AsyncMock(return_value={"type": "http.request", "body": b""}), send)
+    return messages
+
+
+def header(message: dict, name: str) -> str:
+    """Get a header value from a response start message."""
+    return dict(message["headers"]).get(name.lower().encode(), b"").decode()
+
+
+@pytest.fixture
+def mock_record_metrics():
+    """Patch metric recording."""
+    with patch("app.core.middleware.instrumentation_middleware.record_metrics") as mock_record:
+        yield mock_record
+
+
+@pytest.mark.asyncio
+async def test_streaming_response_passes_through(mock_record_metrics):
+    """Test that response chunks are forwarded unchanged with added headers."""
+    middleware = InstrumentationMiddleware(streaming_app)
+    scope = make_scope()
+
+    messages = await call(middleware, scope)
+
+    # Check that every chunk was forwarded as sent
+    assert [message["type"] for message in messages] == [
+        "http.response.start", "http.response.body", "http.response.body", "http.response.body"
+    ]
+    assert messages[1]["body"] == b"data: 1\n\n"
+
+    # Check that the request ID was assigned and returned
+    assert header(messages[0], "X-Request-ID") == scope["state"]["request_id"]
+    assert float(header(messages[0], "X-Process-Time")) >= 0
+
+    # Check that all metrics were recorded in one batch
+    mock_record_metrics.assert_called_once()
+    metrics = {metric.name: metric for metric in mock_record_metrics.call_args[0][0]}
+    assert set(metrics) == {"http_requests_total", "http_responses_total", "http_request_duration_milliseconds"}
+    assert metrics["http_responses_total"].tags == {"method": "GET", "path": "/test", "status": "200"}
+
+
+@pytest.mark.asyncio
+async def test_existing_request_id_is_kept(mock_record_metrics):
+    """Test that a request ID assigned upstream is reused."""
+    middleware = InstrumentationMiddleware(streaming_app)
+    scope = make_scope()
+    scope["state"] = {"request_id": "upstream-id"}
+
+    messages = await call(middleware, scope)
+
+    assert header(messages[0], "X-Request-ID") == "upstream-id"
+
+
+@pytest.mark.asyncio
+async def test_exception_mapped_to_error_response(mock_record_metrics):
+    """Test that unhandled exceptions are tracked and returned as 500 responses."""
+    middleware = InstrumentationMiddleware(failing_app)
+
+    with patch("app.core.middleware.instrumentation_middleware.track_error") as mock_track_error:
+        mock_track_error.return_value = MagicMock(id="error-id")
+
+        messages = await call(middleware, make_scope())
+
+        mock_track_error.assert_called_once()
+
+    assert messages[0]["status"] == HTTP_500_INTERNAL_SERVER_ERROR
+    assert b'"error_id":"error-id"' in messages[1]["body"]
+
+    metrics = {metric.name: metric for metric in mock_record_metrics.call_args[0][0]}
+    assert metrics["http_errors_total"].tags["error"] == "ValueError"
+    assert metrics["http_responses_total"].tags["status"] == "500"
+
+
+@pytest.mark.asyncio
+async def test_exception_after_response_started_is_raised(mock_record_metrics):
+    """Test that exceptions during streaming are re-raised."""
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        raise ValueError("Test exception")
+
+    middleware = InstrumentationMiddleware(app)
+
+    with pytest.raises(ValueError):
+        await call(middleware, make_scope())
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_request(mock_record_metrics):
+    """Test that rate-limited requests never reach the application."""
+    app = AsyncMock()
+    rate_limiter = MagicMock()
+    rate_limiter.check = AsyncMock(return_value=(False, {"X-RateLimit-Limit": "5", "X-RateLimit-Remaining": "0"}))
+    middleware = InstrumentationMiddleware(app, rate_limiter=rate_limiter)
+
+    messages = await call(middleware, make_scope())
+
+    app.assert_not_called()
+    assert messages[0]["status"] == HTTP_429_TOO_MANY_REQUESTS
+    assert header(messages[0], "X-RateLimit-Limit") == "5"
+
+
+@pytest.mark.asyncio
+async def test_audit_hooks(mock_record_metrics):
+    """Test that audit hooks receive the request and status, and failures are contained."""
+    failing_hook = MagicMock(side_effect=RuntimeError("Hook failed"))
+    audit_hook = MagicMock()
+    middleware = InstrumentationMiddleware(streaming_app, audit_hooks=[failing_hook, audit_hook])
+
+    messages = await call(middleware, make_scope("/api/v1/auth/login", "POST"))
+
+    assert messages[0]["status"] == 200
+    request, status_code = audit_hook.call_args[0]
+    assert request.url.path == "/api/v1/auth/login"
+    assert status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_non_http_passthrough(mock_record_metrics):
+    """Test that non-HTTP scopes are passed through untouched."""
+    app = AsyncMock()
+    middleware = InstrumentationMiddleware(app)
+    scope = {"type": "websocket"}
+    receive = AsyncMock()
+    send = AsyncMock()
+
+    await middleware(scope, receive, send)
+
+    app.assert_called_once_with(scope, receive, send)
+    assert "state" not in scope
+    mock_record_metrics.assert_not_called()
+
+
+def test_traced_request_has_traceparent_and_request_id(mock_record_metrics):
+    """Test that traced responses carry traceparent and the server span carries the request ID."""
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+
+    app = FastAPI()
+
+    @app.get("/test")
+    def test_endpoint():
+        return {"message": "test"}
+
+    # Instrumented the same way as setup_tracing, then wrapped like in main.py
+    set_global_response_propagator(TraceparentResponsePropagator())
+    try:
+        FastAPIInstrumentor.instrument_app(
+            app, tracer_provider=provider, server_request_hook=set_request_id_attribute
+        )
+        app.add_middleware(InstrumentationMiddleware)
+
+        response = TestClient(app).get("/test")
+    finally:
+        set_global_response_propagator(None)
+        FastAPIInstrumentor.uninstrument_app(app)
+
+    server_span = next(span for span in exporter.get_finished_spans() if span.kind == SpanKind.SERVER)
+    assert response.status_code == 200
+    assert response.headers["traceparent"].split("-")[1] == format_trace_id(server_span.context.trace_id)
+    assert server_span.attributes["http.request_id"] == response.headers["X-Request-ID"]
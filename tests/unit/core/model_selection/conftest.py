@@ -0,0 +1,29 @@
+"""
+Shared fixtures for model selection tests.
+"""
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.performance import ModelUsageRecord, ModelUsageRollup, PerformanceMetric
+
+
+@pytest.fixture
+def performance_db():
+    """
+    Create a session for an in-memory database with the performance tables.
+    """
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    ModelUsageRecord.metadata.create_all(
+        engine,
+        tables=[ModelUsageRecord.__table__, ModelUsageRollup.__table__, PerformanceMetric.__table__]
+    )
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
@@ -0,0 +1,194 @@
+"""
+Unit tests for live model statistics and adaptive selection.
+"""
+import random
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.core.config import settings
+from app.core.model_selection.adaptive import AdaptiveSelector
+from app.core.model_selection.live_stats import LiveModelStats
+from app.core.model_selection.performance import PerformanceTracker
+from app.models.agent import ModelSize
+from app.models.complexity import ComplexityLevel
+from app.models.model_registry import ModelCapability, ModelCost, ModelInfo
+from app.services.llm_service import LLMService
+
+
+def _model(model_id: str, average_latency: float = 0.0) -> ModelInfo:
+    """
+    Create model information for tests.
+    """
+    return ModelInfo(
+        id=model_id,
+        name=model_id,
+        size=ModelSize.MEDIUM,
+        description="Test model",
+        max_tokens=8000,
+        capabilities={ModelCapability.CHAT_COMPLETION},
+        cost=ModelCost(input_cost_per_1k_tokens=0.001, output_cost_per_1k_tokens=0.002),
+        average_latency=average_latency,
+    )
+
+
+class TestLiveModelStats:
+    """
+    Tests for LiveModelStats.
+    """
+
+    def test_observe_ewma(self):
+        """
+        Test that observations update moving averages.
+        """
+        stats = LiveModelStats(alpha=0.5)
+        stats.observe("model", 1000, success=True, cost=0.02)
+        stats.observe("model", 2000, success=False, cost=0.04)
+
+        model_stats = stats.get("model")
+        assert model_stats.latency_ms == 1500
+        assert model_stats.error_rate == 0.5
+        assert model_stats.success_rate == 0.5
+        assert model_stats.cost == pytest.approx(0.03)
+        assert model_stats.samples == 2
+        assert stats.get("unknown") is None
+
+    def test_counts_are_bounded(self):
+        """
+        Test that success and failure pseudo-counts are capped.
+        """
+        stats = LiveModelStats(max_observations=10)
+        for _ in range(100):
+            stats.observe("model", 100, success=True)
+        for _ in range(5):
+            stats.observe("model", 100, success=False)
+
+        model_stats = stats.get("model")
+        assert model_stats.successes + model_stats.failures == pytest.approx(10)
+        assert model_stats.failures > 2
+
+    def test_expected_latency_and_slo(self):
+        """
+        Test expected latency from live data, registry data and no data.
+        """
+        stats = LiveModelStats()
+        stats.observe("live", 700)
+
+        assert stats.expected_latency_ms(_model("live", average_latency=5.0)) == 700
+        assert stats.expected_latency_ms(_model("registry", average_latency=2.0)) == 2000
+        assert stats.expected_latency_ms(_model("new")) is None
+
+        assert stats.meets_latency_slo(_model("live"), 1000)
+        assert not stats.meets_latency_slo(_model("registry", average_latency=2.0), 1000)
+        assert stats.meets_latency_slo(_model("new"), 1000)
+
+    def test_sample_success_rate(self):
+        """
+        Test Thompson sampling from the success posterior.
+        """
+        stats = LiveModelStats()
+        for _ in range(50):
+            stats.observe("good", 100, success=True)
+            stats.observe("bad", 100, success=False)
+
+        rng = random.Random(42)
+        assert stats.sample_success_rate("good", rng) > stats.sample_success_rate("bad", rng)
+        assert 0.0 <= stats.sample_success_rate("unknown", rng) <= 1.0
+
+
+class TestAdaptiveSelector:
+    """
+    Tests for AdaptiveSelector with live statistics.
+    """
+
+    def setup_method(self):
+        """
+        Set up test fixtures.
+        """
+        self.fast_model = _model("fast")
+        self.slow_model = _model("slow")
+        models = {model.id: model for model in (self.fast_model, self.slow_model)}
+
+        self.mock_registry = MagicMock()
+        self.mock_registry.get_models_by_size.return_value = list(models.values())
+        self.mock_registry.get_model.side_effect = models.get
+
+        self.mock_tracker = MagicMock()
+        self.mock_tracker.get_comparative_performance.return_value = {}
+
+        self.live_stats = LiveModelStats()
+        with patch("app.core.model_selection.adaptive.get_model_registry", return_value=self.mock_registry):
+            self.selector = AdaptiveSelector(self.mock_tracker, live_stats=self.live_stats)
+
+    def test_adapts_to_live_latency(self):
+        """
+        Test that selection follows live latency and meets the SLO.
+        """
+        self.live_stats.observe("fast", 300)
+        self.live_stats.observe("slow", 4000)
+
+        model = self.selector.select_model_adaptively(
+            ComplexityLevel.MEDIUM, set(), explore=False, latency_slo_ms=1000
+        )
+        assert model.id == "fast"
+
+        # Aggregated metrics are fetched once, not per model or per selection
+        assert self.mock_tracker.get_comparative_performance.call_count == 4
+        self.selector.select_model_adaptively(ComplexityLevel.MEDIUM, set(), explore=True)
+        assert self.mock_tracker.get_comparative_performance.call_count == 4
+
+        # The fast deployment becomes slow
+        for _ in range(20):
+            self.live_stats.observe("fast", 4500)
+            self.live_stats.observe("slow", 300)
+
+        model = self.selector.select_model_adaptively(ComplexityLevel.MEDIUM, set(), explore=False)
+        assert model.id == "slow"
+
+    def test_exploration_is_bounded(self):
+        """
+        Test that exploration stays within the exploration rate.
+        """
+        # Both models are equally fast; "slow" fails more, so sampling sometimes prefers it
+        for _ in range(3):
+            self.live_stats.observe("fast", 300, success=True)
+            self.live_stats.observe("slow", 300, success=False)
+
+        random.seed(0)
+        selections = [
+            self.selector.select_model_adaptively(ComplexityLevel.MEDIUM, set()).id
+            for _ in range(200)
+        ]
+
+        assert selections.count("slow") <= 0.1 * len(selections) + 1
+        assert self.selector._exploration_count == selections.count("slow")
+
+
+def test_llm_requests_feed_live_stats():
+    """
+    Test that completed and failed LLM requests are observed once each.
+    """
+    live_stats = LiveModelStats()
+    tracker = PerformanceTracker(live_stats=live_stats)
+    messages = [{"role": "user", "content": "Hydraulic pump inspection interval"}]
+
+    with patch("app.core.model_selection.performance._performance_tracker", tracker), \
+         patch("app.services.llm_service.parse_chat_completion") as mock_parse, \
+         patch("app.services.llm_service.track_llm_usage"):
+        mock_parse.return_value.get_token_usage.return_value = {
+            "prompt_tokens": 100, "completion_tokens": 50, "total_tokens": 150
+        }
+        service = LLMService()
+        service.client = MagicMock()
+        service.client.get_model_by_size.return_value = settings.GPT_4_1_MINI_DEPLOYMENT_NAME
+
+        service.generate_custom_response(messages)
+
+        service.client.chat_completion.side_effect = Exception("Request timed out")
+        with pytest.raises(Exception):
+            service.generate_custom_response(messages)
+
+    stats = live_stats.get("gpt-4.1-mini")
+    assert stats.samples == 2
+    assert stats.failures == 1
+    assert stats.cost > 0
@@ -5,6 +5,8 @@ import pytest
 from datetime import datetime, timedelta
 from unittest.mock import MagicMock, patch
 
+from sqlalchemy import insert
+
 from app.core.model_selection.performance import PerformanceTracker
 from app.models.performance import (
     ModelPerformanceSnapshot, ModelUsageRecord, PerformanceMetric, PerformanceMetricType
@@ -134,36 +136,37 @@ class TestPerformanceTracker:
         # Verify no record was returned
         assert usage_record is None
 
-    def test_get_model_performance(self):
+    def test_get_model_performance(self, performance_db):
         """
         Test getting model performance.
         """
-        # Create mock usage records
-        mock_records = [
-            MagicMock(
-                model_id="test-model",
-                timestamp=datetime.utcnow(),
-                input_tokens=100,
-                output_tokens=50,
-                latency_ms=500,
-                success=True,
-                cost=0.05,
-                quality_score=8.0
-            ),
-            MagicMock(
-                model_id="test-model",
-                timestamp=datetime.utcnow(),
-                input_tokens=200,
-                output_tokens=100,
-                latency_ms=600,
-                success=True,
-                cost=0.1,
-                quality_score=7.0
-            )
-        ]
-
-        # Set up mock db to return records
-        self.mock_db.query.return_value.filter.return_value.all.return_value = mock_records
+        # Add usage records
+        performance_db.execute(insert(ModelUsageRecord.__table__), [
+            {
+                "model_id": "test-model",
+                "timestamp": datetime.utcnow() - timedelta(minutes=5),
+                "query_id": "query-1",
+                "input_tokens": 100,
+                "output_tokens": 50,
+                "latency_ms": 500,
+                "success": True,
+                "cost": 0.05,
+                "quality_score": 8.0
+            },
+            {
+                "model_id": "test-model",
+                "timestamp": datetime.utcnow() - timedelta(minutes=5),
+                "query_id": "query-2",
+                "input_tokens": 200,
+                "output_tokens": 100,
+                "latency_ms": 600,
+                "success": True,
+                "cost": 0.1,
+                "quality_score": 7.0
+            }
+        ])
+        performance_db.commit()
+        self.tracker.db = performance_db
 
         # Get model performance
         performance = self.tracker.get_model_performance(
@@ -171,9 +174,6 @@ class TestPerformanceTracker:
             time_period="day"
         )
 
-        # Verify db was queried
-        self.mock_db.query.assert_called_once()
-
         # Verify performance snapshot
         assert performance.model_id == "test-model"
         assert performance.total_requests == 2
@@ -183,12 +183,11 @@ class TestPerformanceTracker:
         assert round(performance.total_cost, 2) == 0.15
         assert performance.average_quality_score == 7.5
 
-    def test_get_model_performance_no_records(self):
+    def test_get_model_performance_no_records(self, performance_db):
         """
         Test getting model performance with no records.
         """
-        # Set up mock db to return no records
-        self.mock_db.query.return_value.filter.return_value.all.return_value = []
+        self.tracker.db = performance_db
 
         # Get model performance
         performance = self.tracker.get_model_performance(
@@ -0,0 +1,210 @@
+"""
+Unit tests for SQL-side performance metric aggregation.
+"""
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.model_selection.performance import PerformanceTracker
+from app.models.performance import ModelUsageRecord, ModelUsageRollup, PerformanceMetric, PerformanceMetricType
+
+# Reference time, with hourly buckets closing at 12:00
+NOW = datetime(2025, 1, 15, 12, 5)
+
+
+def _usage(model_id: str, timestamp: datetime, success: bool = True, latency_ms: int = 500,
+           quality_score=None) -> dict:
+    """
+    Create usage record values.
+    """
+    return {
+        "model_id": model_id,
+        "timestamp": timestamp,
+        "query_id": "query",
+        "input_tokens": 100,
+        "output_tokens": 50,
+        "latency_ms": latency_ms,
+        "success": success,
+        "cost": 0.05,
+        "quality_score": quality_score,
+    }
+
+
+@pytest.fixture
+def db():
+    """
+    Create a session for an in-memory database with the performance tables.
+    """
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    ModelUsageRecord.metadata.create_all(
+        engine,
+        tables=[ModelUsageRecord.__table__, ModelUsageRollup.__table__, PerformanceMetric.__table__]
+    )
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def tracker(db):
+    """
+    Create a performance tracker on the in-memory database.
+    """
+    with patch("app.core.model_selection.performance.get_model_registry", return_value=MagicMock()):
+        return PerformanceTracker(db=db, live_stats=MagicMock())
+
+
+def _add_usage(db, records) -> None:
+    """
+    Insert usage records.
+    """
+    db.execute(insert(ModelUsageRecord.__table__), records)
+    db.commit()
+
+
+def _metrics(db, time_period: str) -> dict:
+    """
+    Get aggregated metric rows keyed by model, metric type and start time.
+    """
+    table = PerformanceMetric.__table__
+    rows = db.execute(select(table).where(table.c.time_period == time_period)).all()
+    return {(row.model_id, row.metric_type, row.start_time): row for row in rows}
+
+
+def test_aggregate_metrics_hourly_buckets(db, tracker):
+    """
+    Test that usage is rolled up into one bucket per model and hour.
+    """
+    _add_usage(db, [
+        _usage("model-a", datetime(2025, 1, 15, 10, 10), latency_ms=400, quality_score=8.0),
+        _usage("model-a", datetime(2025, 1, 15, 10, 50), latency_ms=600),
+        _usage("model-a", datetime(2025, 1, 15, 10, 55), success=False, latency_ms=5000),
+        _usage("model-a", datetime(2025, 1, 15, 11, 30)),
+        _usage("model-b", datetime(2025, 1, 15, 11, 45), quality_score=6.0),
+        # Open bucket, not aggregated yet
+        _usage("model-a", datetime(2025, 1, 15, 12, 1)),
+    ])
+
+    tracker.aggregate_metrics(now=NOW)
+
+    hourly = _metrics(db, "hourly")
+    bucket = datetime(2025, 1, 15, 10)
+
+    success_rate = hourly[("model-a", PerformanceMetricType.SUCCESS_RATE, bucket)]
+    assert success_rate.value == pytest.approx(2 / 3)
+    assert success_rate.sample_size == 3
+    assert success_rate.end_time == datetime(2025, 1, 15, 11)
+
+    # Latency only counts successful requests
+    latency = hourly[("model-a", PerformanceMetricType.LATENCY, bucket)]
+    assert latency.value == 500.0
+    assert latency.sample_size == 2
+
+    assert hourly[("model-a", PerformanceMetricType.TOKEN_USAGE, bucket)].value == 450
+    assert hourly[("model-a", PerformanceMetricType.COST, bucket)].value == pytest.approx(0.15)
+    assert hourly[("model-a", PerformanceMetricType.QUALITY_SCORE, bucket)].sample_size == 1
+
+    assert ("model-a", PerformanceMetricType.SUCCESS_RATE, datetime(2025, 1, 15, 11)) in hourly
+    assert ("model-b", PerformanceMetricType.QUALITY_SCORE, datetime(2025, 1, 15, 11)) in hourly
+    assert ("model-a", PerformanceMetricType.SUCCESS_RATE, datetime(2025, 1, 15, 12)) not in hourly
+
+
+def test_aggregate_metrics_windows_from_buckets(db, tracker):
+    """
+    Test that longer periods merge hourly buckets with the right weights.
+    """
+    _add_usage(db, [
+        _usage("model-a", datetime(2025, 1, 15, 10, 10), latency_ms=400),
+        _usage("model-a", datetime(2025, 1, 15, 10, 20), success=False, latency_ms=5000),
+        _usage("model-a", datetime(2025, 1, 15, 11, 10), latency_ms=700),
+        _usage("model-a", datetime(2025, 1, 15, 11, 20), latency_ms=1000),
+        _usage("model-a", datetime(2025, 1, 15, 11, 30), quality_score=9.0),
+        # Outside the daily window, inside the weekly window
+        _usage("model-a", datetime(2025, 1, 13, 9, 0), success=False),
+    ])
+
+    tracker.aggregate_metrics(now=NOW)
+
+    window_end = datetime(2025, 1, 15, 12)
+    daily = _metrics(db, "daily")
+    daily_start = window_end - timedelta(days=1)
+
+    success_rate = daily[("model-a", PerformanceMetricType.SUCCESS_RATE, daily_start)]
+    assert success_rate.value == pytest.approx(4 / 5)
+    assert success_rate.sample_size == 5
+    assert success_rate.end_time == window_end
+
+    # (400 + 700 + 1000 + 500) / 4 successful requests
+    assert daily[("model-a", PerformanceMetricType.LATENCY, daily_start)].value == pytest.approx(650.0)
+    assert daily[("model-a", PerformanceMetricType.TOKEN_USAGE, daily_start)].value == 750
+    assert daily[("model-a", PerformanceMetricType.COST, daily_start)].value == pytest.approx(0.25)
+    assert daily[("model-a", PerformanceMetricType.QUALITY_SCORE, daily_start)].value == 9.0
+
+    weekly = _metrics(db, "weekly")
+    weekly_rate = weekly[("model-a", PerformanceMetricType.SUCCESS_RATE, window_end - timedelta(weeks=1))]
+    assert weekly_rate.value == pytest.approx(4 / 6)
+    assert weekly_rate.sample_size == 6
+
+
+def test_aggregate_metrics_incremental(db, tracker):
+    """
+    Test that later runs only aggregate buckets closed since the last run.
+    """
+    _add_usage(db, [
+        _usage("model-a", datetime(2025, 1, 15, 10, 10)),
+        _usage("model-a", datetime(2025, 1, 15, 12, 10)),
+    ])
+    tracker.aggregate_metrics(now=NOW)
+
+    # Running again in the same hour changes nothing
+    tracker.aggregate_metrics(now=NOW + timedelta(minutes=20))
+    table = PerformanceMetric.__table__
+    counts = dict(db.execute(
+        select(table.c.time_period, func.count()).group_by(table.c.time_period)
+    ).all())
+    assert counts == {"hourly": 4, "daily": 4, "weekly": 4, "monthly": 4}
+
+    # The next hour only adds the newly closed bucket
+    tracker.aggregate_metrics(now=NOW + timedelta(hours=1))
+    hourly = _metrics(db, "hourly")
+    buckets = sorted({start for (_, metric_type, start) in hourly
+                      if metric_type == PerformanceMetricType.SUCCESS_RATE})
+    assert buckets == [datetime(2025, 1, 15, 10), datetime(2025, 1, 15, 12)]
+
+    daily = _metrics(db, "daily")
+    latest = daily[("model-a", PerformanceMetricType.SUCCESS_RATE, datetime(2025, 1, 14, 13))]
+    assert latest.sample_size == 2
+
+
+def test_aggregate_metrics_force_update_replaces_window(db, tracker):
+    """
+    Test that forcing an update recomputes the current window without duplicates.
+    """
+    _add_usage(db, [_usage("model-a", datetime(2025, 1, 15, 10, 10))])
+    tracker.aggregate_metrics(now=NOW)
+    tracker.aggregate_metrics(force_update=True, now=NOW)
+
+    table = PerformanceMetric.__table__
+    daily_count = db.execute(
+        select(func.count()).select_from(table).where(table.c.time_period == "daily")
+    ).scalar()
+    assert daily_count == 4
+
+
+def test_aggregate_metrics_no_usage(db, tracker):
+    """
+    Test aggregating with no usage records.
+    """
+    tracker.aggregate_metrics(now=NOW)
+
+    table = PerformanceMetric.__table__
+    assert db.execute(select(func.count()).select_from(table)).scalar() == 0
@@ -4,6 +4,7 @@ Unit tests for model selector module.
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 
+from app.core.model_selection.live_stats import LiveModelStats
 from app.core.model_selection.selector import ModelSelector
 from app.models.agent import ModelSize
 from app.models.complexity import ComplexityLevel, ComplexityScore
@@ -101,8 +102,9 @@ class TestModelSelector:
         ]
 
         # Create selector with mock dependencies
+        self.live_stats = LiveModelStats()
         with patch("app.core.model_selection.selector.get_model_registry", return_value=self.mock_registry):
-            self.selector = ModelSelector(self.mock_complexity_analyzer)
+            self.selector = ModelSelector(self.mock_complexity_analyzer, live_stats=self.live_stats)
 
     @pytest.mark.asyncio
     async def test_select_model_default(self):
@@ -124,7 +126,8 @@ class TestModelSelector:
         # Verify complexity analyzer was called
         self.mock_complexity_analyzer.analyze_complexity.assert_called_once_with(
             query="Test query",
-            conversation_history=None
+            conversation_history=None,
+            user_id=None
         )
 
         # Verify registry was queried for models of the appropriate size
@@ -347,3 +350,47 @@ class TestModelSelector:
             # Verify ValueError is raised
             with pytest.raises(ValueError):
                 self.selector.get_model_deployment_name("unknown-model")
+
+    @pytest.mark.asyncio
+    async def test_select_model_latency_slo(self):
+        """
+        Test routing to the cheapest model that meets a latency SLO.
+        """
+        # Set up mock registry to return all models
+        self.mock_registry.get_models_by_size.return_value = [
+            self.small_model, self.medium_model, self.large_model
+        ]
+
+        # Medium and large models are both fast enough
+        self.live_stats.observe("medium-model", 800)
+        self.live_stats.observe("large-model", 900)
+
+        model, _ = await self.selector.select_model("Test query", latency_slo_ms=1000)
+        assert model.id == "medium-model"
+
+        # Medium model deployment slows down
+        for _ in range(5):
+            self.live_stats.observe("medium-model", 3000)
+
+        model, _ = await self.selector.select_model("Test query", latency_slo_ms=1000)
+        assert model.id == "large-model"
+
+        # Without an SLO, the cheaper medium model is still preferred
+        model, _ = await self.selector.select_model("Test query")
+        assert model.id == "medium-model"
+
+    def test_rank_models_no_model_meets_slo(self):
+        """
+        Test that the fastest model is preferred when no model meets the SLO.
+        """
+        self.live_stats.observe("small-model", 4000)
+        self.live_stats.observe("medium-model", 2000)
+        self.live_stats.observe("large-model", 3000)
+
+        ranked = self.selector._rank_models(
+            [self.small_model, self.medium_model, self.large_model],
+            self.mock_complexity_analyzer.analyze_complexity.return_value,
+            latency_slo_ms=1000
+        )
+
+        assert [model.id for model in ranked] == ["medium-model", "large-model", "small-model"]
@@ -0,0 +1,164 @@
+"""
+Unit tests for the background usage recorder.
+"""
+import threading
+import time
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.model_selection import performance
+from app.core.model_selection.usage_recorder import UsageRecorder
+from app.models.performance import ModelUsageRecord
+
+
+def _record(query_id: str) -> dict:
+    """
+    Create usage record values.
+    """
+    return {
+        "model_id": "test-model",
+        "timestamp": datetime.utcnow(),
+        "query_id": query_id,
+        "conversation_id": None,
+        "input_tokens": 100,
+        "output_tokens": 50,
+        "latency_ms": 500,
+        "success": True,
+        "error_message": None,
+        "cost": 0.05,
+        "quality_score": None,
+        "feedback": None,
+    }
+
+
+@pytest.fixture
+def session_factory():
+    """
+    Create a session factory for an in-memory database with the usage table.
+    """
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    ModelUsageRecord.__table__.create(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def _count(session_factory) -> int:
+    """
+    Count stored usage records.
+    """
+    with session_factory() as session:
+        return session.execute(select(func.count()).select_from(ModelUsageRecord.__table__)).scalar()
+
+
+class TestUsageRecorder:
+    """
+    Tests for UsageRecorder.
+    """
+
+    def test_batches_and_flushes_on_stop(self, session_factory):
+        """
+        Test that records are written in batches and flushed on stop.
+        """
+        recorder = UsageRecorder(session_factory, batch_size=10, flush_interval_ms=10000)
+
+        for i in range(25):
+            assert recorder.enqueue(_record(f"query-{i}"))
+
+        recorder.stop()
+
+        assert _count(session_factory) == 25
+        stats = recorder.get_stats()
+        assert stats["written"] == 25
+        assert stats["batches"] == 3
+        assert stats["queued"] == 0
+        assert not recorder.is_running
+
+    def test_flush_interval(self, session_factory):
+        """
+        Test that a partial batch is written after the flush interval.
+        """
+        recorder = UsageRecorder(session_factory, batch_size=100, flush_interval_ms=50)
+        recorder.enqueue(_record("query"))
+
+        deadline = time.monotonic() + 2
+        while recorder.get_stats()["written"] == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert _count(session_factory) == 1
+        recorder.stop()
+
+    def test_backpressure_drops_when_full(self):
+        """
+        Test that records are dropped when the queue stays full.
+        """
+        recorder = UsageRecorder(MagicMock(), max_queue_size=2)
+        recorder.start = MagicMock()  # Keep the worker from draining the queue
+
+        assert recorder.enqueue(_record("a"))
+        assert recorder.enqueue(_record("b"))
+
+        # A full queue drops at once instead of waiting for space
+        started = time.monotonic()
+        assert not recorder.enqueue(_record("c"))
+        assert time.monotonic() - started < 0.01
+        assert recorder.get_stats()["dropped"] == 1
+
+    def test_write_failure(self):
+        """
+        Test that failed batches are rolled back and counted.
+        """
+        session = MagicMock()
+        session.commit.side_effect = Exception("Test error")
+        recorder = UsageRecorder(lambda: session, flush_interval_ms=10)
+
+        recorder.enqueue(_record("query"))
+        recorder.stop()
+
+        session.rollback.assert_called_once()
+        session.close.assert_called_once()
+        assert recorder.get_stats()["failed"] == 1
+
+    def test_stop_timeout_keeps_worker(self):
+        """
+        Test that a worker still writing after the stop timeout is not replaced.
+        """
+        release = threading.Event()
+        session = MagicMock()
+        session.commit.side_effect = lambda: release.wait(5)
+        recorder = UsageRecorder(lambda: session, flush_interval_ms=10)
+
+        recorder.enqueue(_record("slow"))
+        time.sleep(0.05)
+        recorder.stop(timeout=0.05)
+        worker = recorder._thread
+
+        assert recorder.is_running
+        recorder.enqueue(_record("later"))
+        assert recorder._thread is worker
+
+        release.set()
+        worker.join(5)
+        recorder.stop()
+        assert not recorder.is_running
+
+
+def test_shared_tracker_uses_usage_recorder():
+    """
+    Test that the shared performance tracker writes through the usage recorder.
+    """
+    recorder = MagicMock()
+    with patch.object(performance, "_performance_tracker", None), \
+            patch.object(performance.settings, "ENVIRONMENT", "production"), \
+            patch.object(performance, "get_usage_recorder", return_value=recorder):
+        tracker = performance.get_performance_tracker()
+
+    assert tracker.recorder is recorder
@@ -0,0 +1,207 @@
+"""
+Unit tests for hierarchical model usage rollups.
+"""
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import func, insert, select
+
+from app.core.model_selection.performance import PerformanceTracker
+from app.models.performance import ModelUsageRecord, ModelUsageRollup, PerformanceMetric
+
+# Reference time, with hourly buckets closing at 12:00
+NOW = datetime(2025, 3, 2, 12, 5)
+
+
+def _usage(model_id: str, timestamp: datetime, agent_type="documentation", success: bool = True,
+           latency_ms: int = 500) -> dict:
+    """
+    Create usage record values.
+    """
+    return {
+        "model_id": model_id,
+        "timestamp": timestamp,
+        "query_id": "query",
+        "agent_type": agent_type,
+        "input_tokens": 100,
+        "output_tokens": 50,
+        "latency_ms": latency_ms,
+        "success": success,
+        "cost": 0.05,
+    }
+
+
+@pytest.fixture
+def tracker(performance_db):
+    """
+    Create a performance tracker on the in-memory database.
+    """
+    with patch("app.core.model_selection.performance.get_model_registry", return_value=MagicMock()):
+        return PerformanceTracker(db=performance_db, live_stats=MagicMock())
+
+
+def _add_usage(db, records) -> None:
+    """
+    Insert usage records.
+    """
+    db.execute(insert(ModelUsageRecord.__table__), records)
+    db.commit()
+
+
+def _rollups(db, granularity: str) -> dict:
+    """
+    Get rollup rows keyed by bucket start, model and agent type.
+    """
+    table = ModelUsageRollup.__table__
+    rows = db.execute(select(table).where(table.c.granularity == granularity)).all()
+    return {(row.bucket_start, row.model_id, row.agent_type): row for row in rows}
+
+
+def test_rollup_usage_builds_hierarchy(performance_db, tracker):
+    """
+    Test that usage is rolled up into hourly, daily and monthly buckets.
+    """
+    _add_usage(performance_db, [
+        _usage("model-a", datetime(2025, 2, 27, 9, 10), latency_ms=300),
+        _usage("model-a", datetime(2025, 3, 1, 10, 10), latency_ms=400),
+        _usage("model-a", datetime(2025, 3, 1, 10, 20), success=False, latency_ms=9000),
+        _usage("model-a", datetime(2025, 3, 2, 11, 30), agent_type=None),
+        _usage("model-b", datetime(2025, 3, 2, 11, 45), agent_type="maintenance"),
+        # Open bucket, not rolled up yet
+        _usage("model-a", datetime(2025, 3, 2, 12, 1)),
+    ])
+
+    assert tracker.rollup_usage(now=NOW) == 4
+
+    hourly = _rollups(performance_db, "hour")
+    bucket = hourly[(datetime(2025, 3, 1, 10), "model-a", "documentation")]
+    assert bucket.request_count == 2
+    assert bucket.success_count == 1
+    assert bucket.latency_sum_ms == 400
+    assert bucket.input_tokens == 200
+    assert (datetime(2025, 3, 2, 11), "model-a", "unknown") in hourly
+    assert (datetime(2025, 3, 2, 12), "model-a", "documentation") not in hourly
+
+    daily = _rollups(performance_db, "day")
+    assert daily[(datetime(2025, 3, 1), "model-a", "documentation")].request_count == 2
+    assert daily[(datetime(2025, 2, 27), "model-a", "documentation")].request_count == 1
+
+    monthly = _rollups(performance_db, "month")
+    assert monthly[(datetime(2025, 2, 1), "model-a", "documentation")].request_count == 1
+    assert monthly[(datetime(2025, 3, 1), "model-a", "documentation")].request_count == 2
+    assert monthly[(datetime(2025, 3, 1), "model-b", "maintenance")].request_count == 1
+
+
+def test_rollup_usage_incremental(performance_db, tracker):
+    """
+    Test that later runs extend the open day and month without duplicates.
+    """
+    _add_usage(performance_db, [
+        _usage("model-a", datetime(2025, 3, 2, 10, 10)),
+        _usage("model-a", datetime(2025, 3, 2, 12, 10)),
+    ])
+    tracker.rollup_usage(now=NOW)
+
+    # Nothing new to roll up within the same hour
+    assert tracker.rollup_usage(now=NOW + timedelta(minutes=20)) == 0
+
+    assert tracker.rollup_usage(now=NOW + timedelta(hours=1)) == 1
+    daily = _rollups(performance_db, "day")
+    assert len(daily) == 1
+    assert daily[(datetime(2025, 3, 2), "model-a", "documentation")].request_count == 2
+    assert _rollups(performance_db, "month")[(datetime(2025, 3, 1), "model-a", "documentation")].request_count == 2
+
+
+def test_plan_rollup_segments(tracker):
+    """
+    Test that a range is covered by the coarsest buckets that fit.
+    """
+    segments = tracker._plan_rollup_segments(
+        datetime(2025, 1, 30, 22, 30),
+        datetime(2025, 3, 2, 11, 15)
+    )
+
+    assert segments == [
+        (None, datetime(2025, 1, 30, 22, 30), datetime(2025, 1, 30, 23)),
+        ("hour", datetime(2025, 1, 30, 23), datetime(2025, 1, 31)),
+        ("day", datetime(2025, 1, 31), datetime(2025, 2, 1)),
+        ("month", datetime(2025, 2, 1), datetime(2025, 3, 1)),
+        ("day", datetime(2025, 3, 1), datetime(2025, 3, 2)),
+        ("hour", datetime(2025, 3, 2), datetime(2025, 3, 2, 11)),
+        (None, datetime(2025, 3, 2, 11), datetime(2025, 3, 2, 11, 15)),
+    ]
+
+
+def test_get_usage_summary_combines_rollups_and_raw(performance_db, tracker):
+    """
+    Test that summaries match raw usage when read through rollups.
+    """
+    records = [
+        _usage("model-a", datetime(2025, 2, 10, 8, 0), latency_ms=100),
+        _usage("model-a", datetime(2025, 3, 1, 10, 10), latency_ms=200),
+        _usage("model-a", datetime(2025, 3, 1, 10, 20), success=False),
+        _usage("model-a", datetime(2025, 3, 2, 11, 50), latency_ms=300, agent_type="maintenance"),
+        # After the last rollup, read from raw usage
+        _usage("model-a", datetime(2025, 3, 2, 12, 3), latency_ms=400),
+        _usage("model-b", datetime(2025, 3, 1, 0, 30)),
+    ]
+    _add_usage(performance_db, records)
+    tracker.rollup_usage(now=NOW)
+
+    summary = tracker.get_usage_summary(datetime(2025, 1, 1), datetime(2025, 3, 3))
+
+    model_a = summary["model-a"]
+    assert model_a.total_requests == 5
+    assert model_a.success_rate == pytest.approx(4 / 5)
+    assert model_a.average_latency == pytest.approx(250.0)
+    assert model_a.total_tokens == 750
+    assert summary["model-b"].total_requests == 1
+
+    # Raw rows are no longer needed once rolled up and aggregated
+    tracker.aggregate_metrics(now=NOW)
+    assert tracker.prune_usage_records(retention=timedelta(days=0), now=NOW) == 5
+    pruned_summary = tracker.get_usage_summary(datetime(2025, 1, 1), datetime(2025, 3, 3))
+    assert pruned_summary["model-a"].total_requests == 5
+
+    by_agent = tracker.get_usage_summary(
+        datetime(2025, 1, 1), datetime(2025, 3, 3), model_id="model-a", agent_type="maintenance"
+    )
+    assert by_agent["model-a"].total_requests == 1
+    assert by_agent["model-a"].average_latency == 300.0
+
+
+def test_prune_usage_records_without_rollups(performance_db, tracker):
+    """
+    Test that raw usage is never pruned before it has been rolled up.
+    """
+    _add_usage(performance_db, [_usage("model-a", datetime(2024, 1, 1))])
+
+    assert tracker.prune_usage_records(retention=timedelta(days=1), now=NOW) == 0
+
+    table = ModelUsageRecord.__table__
+    assert performance_db.execute(select(func.count()).select_from(table)).scalar() == 1
+
+
+def test_prune_usage_records_before_metrics(performance_db, tracker):
+    """
+    Test that raw usage is kept until hourly metrics have caught up with the rollups.
+    """
+    _add_usage(performance_db, [
+        _usage("model-a", datetime(2025, 3, 1, 10, 10)),
+        _usage("model-a", datetime(2025, 3, 2, 10, 10)),
+    ])
+    tracker.aggregate_metrics(now=datetime(2025, 3, 1, 12, 5))
+    tracker.rollup_usage(now=NOW)
+
+    # Only usage before the end of the last hourly metric is pruned
+    assert tracker.prune_usage_records(retention=timedelta(days=0), now=NOW) == 1
+
+    table = ModelUsageRecord.__table__
+    remaining = performance_db.execute(select(table.c.timestamp)).scalars().all()
+    assert remaining == [datetime(2025, 3, 2, 10, 10)]
+
+    metrics = PerformanceMetric.__table__
+    assert performance_db.execute(
+        select(func.max(metrics.c.end_time)).where(metrics.c.time_period == "hourly")
+    ).scalar() == datetime(2025, 3, 1, 11)
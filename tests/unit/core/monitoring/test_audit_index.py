@@ -0,0 +1,101 @@
+"""
+Unit tests for the audit log index and indexed audit log queries.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core.monitoring.audit_index import AuditLogIndex
+from app.core.monitoring.audit_writer import get_audit_log_file
+from app.core.monitoring.log_management import AuditLogEvent, AuditLogRecord, LogManager
+
+
+@pytest.fixture
+def log_manager(tmp_path):
+    """Create a log manager writing to a temporary directory."""
+    manager = LogManager(log_dir=str(tmp_path / "logs"), audit_log_dir=str(tmp_path / "audit"))
+    yield manager
+    manager.audit_writer.stop()
+
+
+def record(log_manager, index: int, **fields) -> None:
+    """Record an audit log."""
+    log_manager.record_audit_log(AuditLogRecord(
+        id=f"audit_{index}",
+        timestamp=fields.pop("timestamp", datetime.now(timezone.utc) + timedelta(seconds=index)),
+        event_type=fields.pop("event_type", AuditLogEvent.USER_LOGIN),
+        action=f"Action {index}",
+        **fields,
+    ))
+
+
+def test_query_by_fields(log_manager):
+    """Test that queries return matching records, newest first."""
+    record(log_manager, 0, user_id="alice")
+    record(log_manager, 1, user_id="bob", event_type=AuditLogEvent.RESOURCE_CREATED,
+           resource_type="document", resource_id="doc-1")
+    record(log_manager, 2, user_id="alice", event_type=AuditLogEvent.USER_LOGOUT)
+    log_manager.flush_audit_logs()
+
+    assert [r.id for r in log_manager.get_audit_logs(user_id="alice")] == ["audit_2", "audit_0"]
+    assert [r.id for r in log_manager.get_audit_logs(event_type=AuditLogEvent.USER_LOGOUT)] == ["audit_2"]
+    assert [r.id for r in log_manager.get_audit_logs(resource_type="document", resource_id="doc-1")] == ["audit_1"]
+    assert [r.id for r in log_manager.get_audit_logs(limit=2)] == ["audit_2", "audit_1"]
+
+
+def test_query_by_date_range(log_manager):
+    """Test that date filters are applied in the index."""
+    now = datetime.now(timezone.utc)
+    for index, days in enumerate((-40, -10, -1)):
+        record(log_manager, index, timestamp=now + timedelta(days=days))
+    log_manager.flush_audit_logs()
+
+    logs = log_manager.get_audit_logs(start_date=now - timedelta(days=30), end_date=now - timedelta(days=5))
+
+    assert [r.id for r in logs] == ["audit_1"]
+
+
+def test_existing_files_are_indexed(tmp_path):
+    """Test that records written before the index existed are indexed on query."""
+    audit_log_dir = tmp_path / "audit"
+    audit_log_dir.mkdir()
+    with open(get_audit_log_file(audit_log_dir), "w") as f:
+        for index in range(3):
+            entry = AuditLogRecord(id=f"audit_{index}", event_type=AuditLogEvent.USER_LOGIN,
+                                   action="User login", user_id=f"user{index}")
+            f.write(entry.model_dump_json() + "\n")
+        # A record still being written is left for later
+        f.write('{"id": "audit_3"')
+
+    manager = LogManager(log_dir=str(tmp_path / "logs"), audit_log_dir=str(audit_log_dir))
+
+    assert [r.id for r in manager.get_audit_logs(user_id="user1")] == ["audit_1"]
+    assert manager.get_audit_logs(user_id="user3") == []
+
+
+def test_tampered_records_are_skipped(log_manager):
+    """Test that records failing the integrity check are not returned."""
+    record(log_manager, 0, user_id="alice")
+    record(log_manager, 1, user_id="alice")
+    log_manager.flush_audit_logs()
+
+    path = get_audit_log_file(log_manager.audit_log_dir)
+    path.write_text(path.read_text().replace("Action 1", "Action X"))
+
+    assert [r.id for r in log_manager.get_audit_logs(user_id="alice")] == ["audit_0"]
+
+
+def test_removed_files_are_dropped(tmp_path):
+    """Test that catching up drops the records of removed audit files."""
+    path = tmp_path / "audit_20240101.log"
+    entry = AuditLogRecord(event_type=AuditLogEvent.USER_LOGIN, action="User login", user_id="alice")
+    path.write_text(entry.model_dump_json() + "\n")
+
+    index = AuditLogIndex(tmp_path)
+    index.catch_up()
+    assert len(list(index.search(user_id="alice"))) == 1
+
+    path.unlink()
+    index.catch_up()
+    assert list(index.search(user_id="alice")) == []
@@ -0,0 +1,289 @@
+"""
+Unit tests for the audit log writer and incremental audit log verification.
+"""
+
+import errno
+import json
+import multiprocessing
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.core.monitoring.audit_writer import CHECKPOINT_FILE, AuditLogWriter, get_audit_log_file
+from app.core.monitoring.log_management import AuditLogEvent, AuditLogRecord, LogManager
+
+
+def make_record(index: int) -> AuditLogRecord:
+    """Create an audit log record."""
+    return AuditLogRecord(
+        id=f"audit_{index}",
+        event_type=AuditLogEvent.USER_LOGIN,
+        action=f"User login {index}",
+        user_id=f"user{index}",
+    )
+
+
+@pytest.fixture
+def log_manager(tmp_path):
+    """Create a log manager writing to a temporary directory."""
+    manager = LogManager(log_dir=str(tmp_path / "logs"), audit_log_dir=str(tmp_path / "audit"))
+    yield manager
+    manager.audit_writer.stop()
+
+
+def read_records(log_manager):
+    """Read the records in today's audit file."""
+    path = get_audit_log_file(log_manager.audit_log_dir)
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_records_are_chained(log_manager):
+    """Test that records are written in batches and linked by their hashes."""
+    for index in range(5):
+        assert log_manager.record_audit_log(make_record(index)) is True
+    assert log_manager.flush_audit_logs() is True
+
+    records = read_records(log_manager)
+    assert [record["id"] for record in records] == [f"audit_{index}" for index in range(5)]
+    assert records[0]["prev_hash"] is None
+    for previous, record in zip(records, records[1:]):
+        assert record["prev_hash"] == previous["hash"]
+    assert all(AuditLogRecord.model_validate(record).verify_integrity() for record in records)
+
+
+def test_records_stored_in_redis(tmp_path):
+    """Test that each batch is stored in Redis in one pipeline."""
+    redis_cache = MagicMock()
+    writer = AuditLogWriter(tmp_path, redis_cache=redis_cache, ttl=60)
+    for index in range(3):
+        writer.enqueue(make_record(index))
+    writer.stop()
+
+    pipe = redis_cache.redis.pipeline.return_value
+    assert pipe.set.call_count == 3
+    assert pipe.set.call_args[0][0] == "audit:audit_2"
+    assert pipe.set.call_args[1] == {"ex": 60}
+    pipe.execute.assert_called()
+
+
+def test_chain_continues_after_restart(tmp_path):
+    """Test that a new writer continues the chain from the last checkpoint."""
+    writer = AuditLogWriter(tmp_path, checkpoint_interval=2)
+    for index in range(3):
+        writer.enqueue(make_record(index))
+    writer.stop()
+
+    # Stopping writes a final checkpoint of the chain head
+    checkpoints = [json.loads(line) for line in (tmp_path / CHECKPOINT_FILE).read_text().splitlines()]
+    records = [json.loads(line) for line in get_audit_log_file(tmp_path).read_text().splitlines()]
+    assert checkpoints[-1]["hash"] == records[-1]["hash"]
+    assert checkpoints[-1]["offset"] == get_audit_log_file(tmp_path).stat().st_size
+
+    writer = AuditLogWriter(tmp_path)
+    writer.enqueue(make_record(3))
+    writer.stop()
+
+    records = [json.loads(line) for line in get_audit_log_file(tmp_path).read_text().splitlines()]
+    assert records[3]["prev_hash"] == records[2]["hash"]
+
+
+def write_records(audit_log_dir, worker: int, count: int) -> None:
+    """Write audit log records from a separate process."""
+    writer = AuditLogWriter(audit_log_dir, batch_size=5, flush_interval_ms=5)
+    for index in range(count):
+        writer.enqueue(make_record(worker * 1000 + index))
+        time.sleep(0.001)
+    writer.stop(timeout=30)
+
+
+def test_processes_share_one_chain(tmp_path):
+    """Test that writers in several processes extend a single chain."""
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=write_records, args=(tmp_path, worker, 50)) for worker in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+        assert process.exitcode == 0
+
+    records = [json.loads(line) for line in get_audit_log_file(tmp_path).read_text().splitlines()]
+    assert len(records) == 200
+    assert len({record["id"] for record in records}) == 200
+    assert records[0]["prev_hash"] is None
+    for previous, record in zip(records, records[1:]):
+        assert record["prev_hash"] == previous["hash"]
+
+    manager = LogManager(log_dir=str(tmp_path / "logs"), audit_log_dir=str(tmp_path))
+    result = manager.verify_audit_logs()
+    assert result["total_records"] == 200
+    assert result["valid_records"] == 200
+
+
+def test_failed_write_is_truncated_and_retried(tmp_path):
+    """Test that a batch cut short by a write error is removed and written again."""
+    writer = AuditLogWriter(tmp_path, retry_delay=0.01)
+    write_all = writer._write_all
+    failures = []
+
+    def fail_once(data):
+        if not failures:
+            failures.append(data)
+            write_all(data[:len(data) // 2])
+            raise OSError(errno.ENOSPC, "No space left on device")
+        write_all(data)
+
+    writer._write_all = fail_once
+    for index in range(3):
+        writer.enqueue(make_record(index))
+    assert writer.flush() is True
+    writer.stop()
+
+    records = [json.loads(line) for line in get_audit_log_file(tmp_path).read_text().splitlines()]
+    assert [record["id"] for record in records] == [f"audit_{index}" for index in range(3)]
+    for previous, record in zip(records, records[1:]):
+        assert record["prev_hash"] == previous["hash"]
+
+    stats = writer.get_stats()
+    assert stats["retries"] == 1
+    assert stats["written"] == 3
+    assert stats["failed"] == 0
+
+
+def blocking_index(release: threading.Event) -> MagicMock:
+    """Create an audit log index that blocks the worker until released."""
+    index = MagicMock()
+    index.add.side_effect = lambda *args: release.wait(5)
+    return index
+
+
+def test_full_queue_drops_without_blocking(tmp_path):
+    """Test that records are dropped and counted at once when the queue is full."""
+    release = threading.Event()
+    writer = AuditLogWriter(tmp_path, index=blocking_index(release), flush_interval_ms=10, max_queue_size=1)
+
+    writer.enqueue(make_record(0))
+    time.sleep(0.05)
+    assert writer.enqueue(make_record(1)) is True
+
+    started = time.monotonic()
+    assert writer.enqueue(make_record(2)) is False
+    assert time.monotonic() - started < 0.1
+    assert writer.get_stats()["dropped"] == 1
+
+    release.set()
+    writer.stop()
+
+
+def test_stop_timeout_keeps_worker(tmp_path):
+    """Test that a worker still writing after the stop timeout is not replaced."""
+    release = threading.Event()
+    writer = AuditLogWriter(tmp_path, index=blocking_index(release), flush_interval_ms=10)
+
+    writer.enqueue(make_record(0))
+    time.sleep(0.05)
+    writer.stop(timeout=0.05)
+    worker = writer._thread
+
+    assert writer.is_running
+    writer.enqueue(make_record(1))
+    assert writer._thread is worker
+
+    release.set()
+    worker.join(5)
+    writer.stop()
+    assert not writer.is_running
+
+
+def test_incremental_verification(log_manager):
+    """Test that verification only reads records written since the previous run."""
+    for index in range(3):
+        log_manager.record_audit_log(make_record(index))
+    log_manager.flush_audit_logs()
+
+    result = log_manager.verify_audit_logs()
+    assert result["total_records"] == 3
+    assert result["valid_records"] == 3
+    assert result["new_records"] == 3
+
+    for index in range(3, 5):
+        log_manager.record_audit_log(make_record(index))
+    log_manager.flush_audit_logs()
+
+    result = log_manager.verify_audit_logs()
+    assert result["total_records"] == 5
+    assert result["valid_records"] == 5
+    assert result["new_records"] == 2
+    assert result["integrity_percentage"] == 100
+
+    result = log_manager.verify_audit_logs()
+    assert result["new_records"] == 0
+
+
+def test_verification_detects_removed_record(log_manager):
+    """Test that removing a record breaks the chain."""
+    for index in range(3):
+        log_manager.record_audit_log(make_record(index))
+    log_manager.flush_audit_logs()
+    log_manager.audit_writer.stop()
+
+    path = get_audit_log_file(log_manager.audit_log_dir)
+    lines = path.read_text().splitlines(keepends=True)
+    path.write_text(lines[0] + lines[2])
+
+    result = log_manager.verify_audit_logs()
+
+    assert result["invalid_records"] == 1
+    assert result["invalid_record_ids"] == ["audit_2"]
+
+
+def test_verification_restarts_when_verified_record_changes(log_manager):
+    """Test that tampering with the last verified record triggers full verification."""
+    for index in range(2):
+        log_manager.record_audit_log(make_record(index))
+    log_manager.flush_audit_logs()
+    log_manager.audit_writer.stop()
+    log_manager.verify_audit_logs()
+
+    path = get_audit_log_file(log_manager.audit_log_dir)
+    path.write_text(path.read_text().replace("User login 1", "User login X"))
+
+    result = log_manager.verify_audit_logs()
+
+    assert result["total_records"] == 2
+    assert result["invalid_record_ids"] == ["audit_1"]
+
+
+def test_verification_skips_partial_record(log_manager):
+    """Test that a record still being written is left for the next run."""
+    log_manager.record_audit_log(make_record(0))
+    log_manager.flush_audit_logs()
+    log_manager.audit_writer.stop()
+
+    path = get_audit_log_file(log_manager.audit_log_dir)
+    with open(path, "a") as f:
+        f.write('{"id": "audit_1"')
+
+    result = log_manager.verify_audit_logs()
+
+    assert result["total_records"] == 1
+    assert result["invalid_records"] == 0
+
+
+def test_legacy_records_without_chain(log_manager):
+    """Test that records written before chaining are verified on their own hash."""
+    path = get_audit_log_file(log_manager.audit_log_dir)
+    with open(path, "w") as f:
+        for index in range(2):
+            record = make_record(index)
+            f.write(json.dumps(record.model_dump(exclude={"prev_hash"}), default=str) + "\n")
+
+    # The chain continues from the last legacy record
+    log_manager.record_audit_log(make_record(2))
+    log_manager.flush_audit_logs()
+
+    result = log_manager.verify_audit_logs()
+
+    assert result["total_records"] == 3
+    assert result["valid_records"] == 3
@@ -3,6 +3,7 @@ Unit tests for error tracking module.
 """
 
 import json
+import time
 from datetime import datetime, timezone
 from unittest.mock import MagicMock, patch
 
@@ -91,16 +92,27 @@ def test_error_tracker_init(mock_redis_cache):
     mock_redis_cache.assert_called_once_with(prefix="test_prefix")
 
 
+def to_hash(tracker: ErrorTracker, error: ErrorEvent) -> dict:
+    """Convert an error to the Redis hash the tracker stores."""
+    fields = {
+        **tracker._get_static_fields(error),
+        "count": str(error.count),
+        "first_seen": error.first_seen.isoformat(),
+        "last_seen": error.last_seen.isoformat(),
+        **{f"context:{key}": json.dumps(value) for key, value in error.context.items()},
+    }
+    return {key.encode("utf-8"): value.encode("utf-8") for key, value in fields.items()}
+
+
 @patch("app.core.monitoring.error_tracking.RedisCache")
 def test_error_tracker_track_error_new(mock_redis_cache):
     """Test that ErrorTracker.track_error works correctly for new errors."""
     # Create a mock Redis instance
     mock_redis = MagicMock()
     mock_redis_cache.return_value.redis = mock_redis
-    mock_redis.get.return_value = None
 
     # Create a tracker
-    tracker = ErrorTracker(prefix="test_prefix", ttl=3600)
+    tracker = ErrorTracker(prefix="test_prefix", ttl=3600, enabled=True)
 
     # Track an error
     error = tracker.track_error(
@@ -127,57 +139,44 @@ def test_error_tracker_track_error_new(mock_redis_cache):
     assert error.context == {"test_key": "test_value"}
     assert error.count == 1
 
+    # Check that nothing is written until the tracker flushes
+    mock_redis.pipeline.assert_not_called()
+
+    tracker.flush()
+    tracker.shutdown()
+
     # Check that the error was stored in Redis
-    mock_redis.set.assert_called_once()
-    args, kwargs = mock_redis.set.call_args
-    assert args[0].startswith("test_prefix:")
-    assert "test_component" in args[0]
-    assert "ValueError" in args[0]
-    assert "test_error_message" in args[0]
-    assert kwargs["ex"] == 3600
+    key = "test_prefix:event:test_component_ValueError_test_error_message"
+    pipe = mock_redis.pipeline.return_value
+    pipe.hsetnx.assert_any_call(key, "message", "Test error message")
+    pipe.hincrby.assert_called_once_with(key, "count", 1)
+    pipe.expire.assert_called_once_with(key, 3600)
+    pipe.zadd.assert_called_once()
+    assert pipe.zadd.call_args[0][0] == "test_prefix:last_seen"
+    pipe.execute.assert_called_once()
 
 
 @patch("app.core.monitoring.error_tracking.RedisCache")
 def test_error_tracker_track_error_existing(mock_redis_cache):
-    """Test that ErrorTracker.track_error works correctly for existing errors."""
+    """Test that ErrorTracker.track_error aggregates repeated errors."""
     # Create a mock Redis instance
     mock_redis = MagicMock()
     mock_redis_cache.return_value.redis = mock_redis
 
-    # Create an existing error
-    existing_error = ErrorEvent(
-        id="test_component_ValueError_test_error_message",
-        message="Test error message",
-        exception_type="ValueError",
-        severity=ErrorSeverity.ERROR,
-        category=ErrorCategory.API,
-        component="test_component",
-        user_id="test_user",
-        request_id="test_request",
-        context={"test_key": "test_value"},
-        count=1,
-        first_seen=datetime.now(timezone.utc),
-        last_seen=datetime.now(timezone.utc),
-    )
-
-    # Mock Redis.get to return the existing error
-    mock_redis.get.return_value = existing_error.model_dump_json().encode("utf-8")
-
     # Create a tracker
-    tracker = ErrorTracker(prefix="test_prefix", ttl=3600)
+    tracker = ErrorTracker(prefix="test_prefix", ttl=3600, enabled=True)
 
-    # Track the same error again
-    error = tracker.track_error(
-        message="Test error message",
-        exception=ValueError("Test error"),
-        severity=ErrorSeverity.ERROR,
-        category=ErrorCategory.API,
-        component="test_component",
-        user_id="test_user",
-        request_id="test_request",
-        context={"new_key": "new_value"},
-        alert=False,
-    )
+    # Track the same error twice
+    for context in ({"test_key": "test_value"}, {"new_key": "new_value"}):
+        error = tracker.track_error(
+            message="Test error message",
+            exception=ValueError("Test error"),
+            severity=ErrorSeverity.ERROR,
+            category=ErrorCategory.API,
+            component="test_component",
+            context=context,
+            alert=False,
+        )
 
     # Check that the error was updated
     assert error is not None
@@ -185,8 +184,99 @@ def test_error_tracker_track_error_existing(mock_redis_cache):
     assert error.count == 2
     assert error.context == {"test_key": "test_value", "new_key": "new_value"}
 
-    # Check that the error was stored in Redis
-    mock_redis.set.assert_called_once()
+    tracker.flush()
+    tracker.shutdown()
+
+    # Check that both occurrences were written in one update
+    pipe = mock_redis.pipeline.return_value
+    pipe.hincrby.assert_called_once_with(
+        "test_prefix:event:test_component_ValueError_test_error_message", "count", 2
+    )
+    mapping = pipe.hset.call_args[1]["mapping"]
+    assert mapping["context:test_key"] == '"test_value"'
+    assert mapping["context:new_key"] == '"new_value"'
+
+
+@patch("app.core.monitoring.error_tracking.RedisCache")
+def test_error_tracker_alerts_on_aggregated_errors(mock_redis_cache):
+    """Test that alerts are evaluated once per flush with the total count."""
+    mock_redis = MagicMock()
+    mock_redis_cache.return_value.redis = mock_redis
+
+    tracker = ErrorTracker(prefix="test_prefix", ttl=3600, enabled=True)
+    handler = MagicMock()
+    tracker.register_notification_handler("log", handler)
+
+    for _ in range(3):
+        error = tracker.track_error(message="Test error message", component="test_component")
+    static_fields = len(tracker._get_static_fields(error))
+
+    # The first-seen field was set by this flush and the count is the total
+    mock_redis.pipeline.return_value.execute.return_value = [1] * (1 + static_fields) + [3, 1, 1, 1, 0]
+    tracker.flush()
+
+    handler.assert_called_once()
+    assert handler.call_args[0][0].count == 3
+
+    # Recurrences within the cooldown do not alert again
+    tracker.track_error(message="Test error message", component="test_component")
+    mock_redis.pipeline.return_value.execute.return_value = [0] * (1 + static_fields) + [4, 1, 1, 1, 0]
+    tracker.flush()
+    tracker.shutdown()
+
+    handler.assert_called_once()
+
+
+@patch("app.core.monitoring.error_tracking.RedisCache")
+def test_error_tracker_rate_alerts_shorten_cooldown(mock_redis_cache):
+    """Test that an error above the rate threshold alerts again after the rate window."""
+    mock_redis = MagicMock()
+    mock_redis_cache.return_value.redis = mock_redis
+    config = AlertConfig(cooldown_minutes=15, rate_threshold=5, rate_window_minutes=1)
+
+    tracker = ErrorTracker(prefix="test_prefix", ttl=3600, alert_config=config, enabled=True)
+    handler = MagicMock()
+    tracker.register_notification_handler("log", handler)
+
+    error = tracker.track_error(message="Test error message", component="test_component")
+    static_fields = len(tracker._get_static_fields(error))
+    mock_redis.pipeline.return_value.execute.return_value = [1] * (1 + static_fields) + [1, 1, 1, 1, 0]
+    tracker.flush()
+    handler.assert_called_once()
+
+    # The last alert is past the rate window but within the cooldown
+    tracker._last_alert_times[error.id] = time.monotonic() - 120
+    for _ in range(5):
+        tracker.track_error(message="Test error message", component="test_component")
+    mock_redis.pipeline.return_value.execute.return_value = [0] * (1 + static_fields) + [6, 1, 1, 1, 0]
+    tracker.flush()
+    tracker.shutdown()
+
+    assert handler.call_count == 2
+
+
+@patch("app.core.monitoring.error_tracking.RedisCache")
+def test_error_tracker_failed_flush_keeps_occurrences(mock_redis_cache):
+    """Test that occurrences of a failed flush are written by the next one."""
+    mock_redis = MagicMock()
+    mock_redis_cache.return_value.redis = mock_redis
+    pipe = mock_redis.pipeline.return_value
+
+    tracker = ErrorTracker(prefix="test_prefix", ttl=3600, enabled=True)
+    for _ in range(2):
+        tracker.track_error(message="Test error message", component="test_component", alert=False)
+
+    pipe.execute.side_effect = ConnectionError("Redis unavailable")
+    tracker.flush()
+
+    tracker.track_error(message="Test error message", component="test_component", alert=False)
+    pipe.execute.side_effect = None
+    pipe.hincrby.reset_mock()
+    tracker.flush()
+    tracker.shutdown()
+
+    pipe.hincrby.assert_called_once()
+    assert pipe.hincrby.call_args[0][1:] == ("count", 3)
 
 
 @patch("app.core.monitoring.error_tracking.RedisCache")
@@ -195,28 +285,10 @@ def test_error_tracker_resolve_error(mock_redis_cache):
     # Create a mock Redis instance
     mock_redis = MagicMock()
     mock_redis_cache.return_value.redis = mock_redis
-
-    # Create an existing error
-    existing_error = ErrorEvent(
-        id="test_error_id",
-        message="Test error message",
-        exception_type="ValueError",
-        severity=ErrorSeverity.ERROR,
-        category=ErrorCategory.API,
-        component="test_component",
-        user_id="test_user",
-        request_id="test_request",
-        context={"test_key": "test_value"},
-        count=1,
-        first_seen=datetime.now(timezone.utc),
-        last_seen=datetime.now(timezone.utc),
-    )
-
-    # Mock Redis.get to return the existing error
-    mock_redis.get.return_value = existing_error.model_dump_json().encode("utf-8")
+    mock_redis.exists.return_value = 1
 
     # Create a tracker
-    tracker = ErrorTracker(prefix="test_prefix", ttl=3600)
+    tracker = ErrorTracker(prefix="test_prefix", ttl=3600, enabled=True)
 
     # Resolve the error
     result = tracker.resolve_error("test_error_id")
@@ -224,15 +296,16 @@ def test_error_tracker_resolve_error(mock_redis_cache):
     # Check that the error was resolved
     assert result is True
 
-    # Check that the error was stored in Redis
-    mock_redis.set.assert_called_once()
-    args, kwargs = mock_redis.set.call_args
-    assert args[0] == "test_prefix:test_error_id"
+    # Check that the error was updated in Redis
+    mock_redis.hset.assert_called_once()
+    args, kwargs = mock_redis.hset.call_args
+    assert args[0] == "test_prefix:event:test_error_id"
+    assert kwargs["mapping"]["resolved"] == 1
+    assert kwargs["mapping"]["resolution_time"] is not None
 
-    # Parse the stored error
-    stored_error = json.loads(args[1])
-    assert stored_error["resolved"] is True
-    assert stored_error["resolution_time"] is not None
+    # Check that unknown errors are not resolved
+    mock_redis.exists.return_value = 0
+    assert tracker.resolve_error("unknown_error_id") is False
 
 
 @patch("app.core.monitoring.error_tracking.RedisCache")
@@ -242,6 +315,9 @@ def test_error_tracker_get_errors(mock_redis_cache):
     mock_redis = MagicMock()
     mock_redis_cache.return_value.redis = mock_redis
 
+    # Create a tracker
+    tracker = ErrorTracker(prefix="test_prefix", ttl=3600, enabled=True)
+
     # Create mock errors
     error1 = ErrorEvent(
         id="test_error_id_1",
@@ -273,21 +349,15 @@ def test_error_tracker_get_errors(mock_redis_cache):
         last_seen=datetime.now(timezone.utc),
     )
 
-    # Mock Redis.keys to return the error keys
-    mock_redis.keys.return_value = [
-        b"test_prefix:test_error_id_1",
-        b"test_prefix:test_error_id_2",
-    ]
-
-    # Mock Redis.mget to return the error values
-    mock_redis.mget.return_value = [
-        error1.model_dump_json().encode("utf-8"),
-        error2.model_dump_json().encode("utf-8"),
+    # Mock the last_seen index and the error hashes
+    mock_redis.zrevrangebyscore.side_effect = lambda key, max_score, min_score, start, num: (
+        [b"test_error_id_1", b"test_error_id_2"] if start == 0 else []
+    )
+    mock_redis.pipeline.return_value.execute.return_value = [
+        to_hash(tracker, error1),
+        to_hash(tracker, error2),
     ]
 
-    # Create a tracker
-    tracker = ErrorTracker(prefix="test_prefix", ttl=3600)
-
     # Get all errors
     errors = tracker.get_errors()
 
@@ -295,6 +365,8 @@ def test_error_tracker_get_errors(mock_redis_cache):
     assert len(errors) == 2
     assert errors[0].id == "test_error_id_1"
     assert errors[1].id == "test_error_id_2"
+    assert errors[1].count == 2
+    assert errors[0].context == {"test_key": "test_value"}
 
     # Get errors with filters
     errors = tracker.get_errors(
@@ -307,6 +379,11 @@ def test_error_tracker_get_errors(mock_redis_cache):
     assert len(errors) == 1
     assert errors[0].id == "test_error_id_1"
 
+    # Check that unfiltered counts come from the index
+    mock_redis.zcount.return_value = 2
+    assert tracker.get_error_count() == 2
+    mock_redis.zcount.assert_called_once_with("test_prefix:last_seen", "-inf", "+inf")
+
 
 @patch("app.core.monitoring.error_tracking.error_tracker")
 def test_track_error_function(mock_tracker):
@@ -13,6 +13,7 @@ from app.core.monitoring.metrics import (
     MetricsCollector,
     record_timing,
     record_count,
+    record_metrics,
     get_metrics,
 )
 
@@ -84,6 +85,41 @@ def test_metrics_collector_record_metric(mock_redis_cache):
     assert kwargs["ex"] == 3600
 
 
+@patch("app.core.monitoring.metrics.settings")
+@patch("app.core.monitoring.metrics.RedisCache")
+def test_metrics_collector_record_metrics(mock_redis_cache, mock_settings):
+    """Test that MetricsCollector.record_metrics writes a batch in one pipeline."""
+    # Create a mock Redis instance
+    mock_redis = MagicMock()
+    mock_pipeline = mock_redis.pipeline.return_value
+    mock_redis_cache.return_value.redis = mock_redis
+    mock_settings.ENVIRONMENT = "development"
+
+    # Create a collector
+    collector = MetricsCollector(prefix="test_prefix", ttl=3600)
+
+    # Record a batch of metrics
+    result = collector.record_metrics([
+        PerformanceMetric(name="first_metric", value=1, unit="count"),
+        PerformanceMetric(name="second_metric", value=12.5, unit="ms"),
+    ])
+
+    # Check that both metrics were written in a single round trip
+    assert result is True
+    mock_redis.pipeline.assert_called_once_with(transaction=False)
+    assert mock_pipeline.set.call_count == 2
+    mock_pipeline.execute.assert_called_once()
+    mock_redis.set.assert_not_called()
+
+    args, kwargs = mock_pipeline.set.call_args
+    assert args[0].startswith("test_prefix:second_metric:")
+    assert kwargs["ex"] == 3600
+
+    # Check that an empty batch is not sent
+    assert collector.record_metrics([]) is False
+    mock_pipeline.execute.assert_called_once()
+
+
 @patch("app.core.monitoring.metrics.RedisCache")
 def test_metrics_collector_record_timing(mock_redis_cache):
     """Test that MetricsCollector.record_timing works correctly."""
@@ -224,6 +260,16 @@ def test_record_count_function(mock_collector):
     )
 
 
+@patch("app.core.monitoring.metrics.metrics_collector")
+def test_record_metrics_function(mock_collector):
+    """Test that record_metrics delegates to the collector."""
+    mock_collector.record_metrics.return_value = True
+    metrics = [PerformanceMetric(name="test_metric", value=1, unit="count")]
+
+    assert record_metrics(metrics) is True
+    mock_collector.record_metrics.assert_called_once_with(metrics)
+
+
 @patch("app.core.monitoring.metrics.metrics_collector")
 def test_get_metrics_function(mock_collector):
     """Test that get_metrics function works correctly."""
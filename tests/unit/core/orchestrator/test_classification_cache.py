@@ -0,0 +1,154 @@
+"""
+Unit tests for the classification cache.
+"""
+import pytest
+from unittest.mock import AsyncMock
+
+from app.core.orchestrator.classification_cache import (
+    ClassificationCache,
+    compute_registry_version,
+)
+from app.core.orchestrator.classifier import RequestClassifier
+from app.models.conversation import AgentType
+from app.models.orchestrator import AgentCapability, AgentMetadata, RequestClassification
+
+
+@pytest.fixture
+def classification():
+    """
+    Create a classification result.
+    """
+    return RequestClassification(
+        agent_type=AgentType.TROUBLESHOOTING,
+        confidence=0.9,
+        reasoning="Fault report",
+    )
+
+
+@pytest.fixture
+def agent():
+    """
+    Create agent metadata.
+    """
+    return AgentMetadata(
+        agent_type=AgentType.DOCUMENTATION,
+        name="Documentation Assistant",
+        description="Helps find information in technical documentation",
+        capabilities=[
+            AgentCapability(
+                name="Documentation Search",
+                description="Find information",
+                keywords=["manual"],
+                examples=[],
+            )
+        ],
+        config_id=1,
+    )
+
+
+class TestClassificationCache:
+    """
+    Tests for the ClassificationCache class.
+    """
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self, classification):
+        """
+        Test that the least recently used entry is evicted.
+        """
+        cache = ClassificationCache(max_size=2, use_redis=False)
+        await cache.set("a", classification)
+        await cache.set("b", classification)
+
+        # Touch "a" so "b" becomes least recently used
+        assert await cache.get("a") == classification
+        await cache.set("c", classification)
+
+        assert len(cache) == 2
+        assert await cache.get("b") is None
+        assert await cache.get("a") == classification
+        assert await cache.get("c") == classification
+
+    @pytest.mark.asyncio
+    async def test_redis_tier(self, classification):
+        """
+        Test that local misses fall back to Redis and populate the local tier.
+        """
+        cache = ClassificationCache(use_redis=False, ttl=60)
+        cache.redis = AsyncMock()
+        cache.redis.get.return_value = classification.model_dump_json().encode()
+
+        assert await cache.get("key") == classification
+        assert await cache.get("key") == classification
+        cache.redis.get.assert_awaited_once_with("classification:key")
+
+        await cache.set("other", classification)
+        cache.redis.set.assert_awaited_once_with(
+            "classification:other", classification.model_dump_json(), ex=60
+        )
+
+        stats = cache.get_stats()
+        assert stats["local_hits"] == 1
+        assert stats["local_misses"] == 1
+        assert stats["redis_hits"] == 1
+        assert stats["local_hit_rate"] == 0.5
+
+    @pytest.mark.asyncio
+    async def test_redis_invalid_entry(self):
+        """
+        Test that invalid Redis entries are treated as misses.
+        """
+        cache = ClassificationCache(use_redis=False)
+        cache.redis = AsyncMock()
+        cache.redis.get.return_value = b"not json"
+
+        assert await cache.get("key") is None
+        assert cache.get_stats()["redis_misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_redis_errors_are_misses(self, classification):
+        """
+        Test that Redis errors are treated as misses and do not fail caching.
+        """
+        cache = ClassificationCache(use_redis=False)
+        cache.redis = AsyncMock()
+        cache.redis.get.side_effect = ConnectionError("Redis unavailable")
+        cache.redis.set.side_effect = ConnectionError("Redis unavailable")
+
+        assert await cache.get("key") is None
+        await cache.set("key", classification)
+        assert await cache.get("key") == classification
+
+    def test_registry_version(self, agent):
+        """
+        Test that the registry version tracks agent contents, not order.
+        """
+        other = agent.model_copy(update={"config_id": 2, "name": "Other"})
+        version = compute_registry_version([agent, other])
+
+        assert compute_registry_version([other, agent]) == version
+        assert compute_registry_version([agent]) != version
+        assert compute_registry_version([agent, other.model_copy(update={"description": "Changed"})]) != version
+
+
+@pytest.mark.asyncio
+async def test_classifier_shared_cache(agent):
+    """
+    Test that classifiers share a cache, normalize queries and respect the registry version.
+    """
+    llm_service = AsyncMock()
+    llm_service.generate_custom_response_async.return_value = {
+        "content": '{"agent_type": "troubleshooting", "confidence": 0.9, "reasoning": "Fault"}'
+    }
+    cache = ClassificationCache(use_redis=False)
+
+    await RequestClassifier(llm_service, cache=cache).classify_request("APU bleed valve chatter?", [agent])
+    result = await RequestClassifier(llm_service, cache=cache).classify_request("  apu BLEED valve chatter ", [agent])
+
+    assert result.agent_type == AgentType.TROUBLESHOOTING
+    assert llm_service.generate_custom_response_async.call_count == 1
+
+    # A changed registry misses the cache
+    changed_agent = agent.model_copy(update={"name": "Renamed"})
+    await RequestClassifier(llm_service, cache=cache).classify_request("APU bleed valve chatter", [changed_agent])
+    assert llm_service.generate_custom_response_async.call_count == 2
@@ -327,3 +327,115 @@ class TestRequestClassifier:
         assert result.agent_type == AgentType.DOCUMENTATION
         assert result.confidence > 0.0
         assert result.confidence <= 1.0
+
+    @pytest.mark.asyncio
+    async def test_classify_batch(self, classifier, mock_llm_service, available_agents):
+        """
+        Test batch classification with deduplication and keyword shortcuts.
+        """
+        # Mock LLM response for the two ambiguous queries
+        mock_llm_service.generate_custom_response_async.return_value = {
+            "content": (
+                '[{"id": 2, "agent_type": "troubleshooting", "confidence": 0.8, "reasoning": "Symptom"},'
+                ' {"id": 1, "agent_type": "maintenance", "confidence": 0.6, "reasoning": "Task"}]'
+            )
+        }
+
+        queries = [
+            "Landing gear retraction timing",
+            "How to troubleshoot and fix the hydraulic pump error?",
+            "APU bleed valve chatter",
+            "Landing gear retraction timing",
+        ]
+
+        # Classify batch
+        results = await classifier.classify_batch(queries, available_agents)
+
+        # Verify results are returned in query order
+        assert [result.agent_type for result in results] == [
+            AgentType.MAINTENANCE,
+            AgentType.TROUBLESHOOTING,
+            AgentType.TROUBLESHOOTING,
+            AgentType.MAINTENANCE,
+        ]
+
+        # Verify only the two unique ambiguous queries went to a single LLM call
+        mock_llm_service.generate_custom_response_async.assert_called_once()
+        call_args = mock_llm_service.generate_custom_response_async.call_args[1]
+        assert call_args["model_size"] == "small"
+        assert '"id": 2' in call_args["messages"][1]["content"]
+        assert '"id": 3' not in call_args["messages"][1]["content"]
+
+        # Verify results were cached for single-query classification
+        mock_llm_service.generate_custom_response_async.reset_mock()
+        result = await classifier.classify_request("APU bleed valve chatter", available_agents)
+        assert result.agent_type == AgentType.TROUBLESHOOTING
+        mock_llm_service.generate_custom_response_async.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_classify_batch_chunks_and_errors(self, classifier, mock_llm_service, available_agents):
+        """
+        Test that batches are split into chunks and failed chunks fall back.
+        """
+        # Mock LLM failure
+        mock_llm_service.generate_custom_response_async.side_effect = Exception("Test error")
+
+        queries = [f"Query number {i}" for i in range(5)]
+
+        # Classify batch
+        results = await classifier.classify_batch(queries, available_agents, batch_size=2)
+
+        # Verify one LLM call per chunk and fallback results
+        assert mock_llm_service.generate_custom_response_async.call_count == 3
+        assert all(result.agent_type == AgentType.DOCUMENTATION for result in results)
+        assert all(result.confidence == 0.3 for result in results)
+
+        # Verify failed results were not cached
+        assert len(classifier._classification_cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_classify_batch_invalid_item(self, classifier, mock_llm_service, available_agents):
+        """
+        Test that an invalid item only affects its own query and is not cached.
+        """
+        # Mock LLM response with an invalid confidence for the first query
+        mock_llm_service.generate_custom_response_async.return_value = {
+            "content": (
+                '[{"id": 1, "agent_type": "maintenance", "confidence": "high", "reasoning": "Task"},'
+                ' {"id": 2, "agent_type": "troubleshooting", "confidence": 0.8, "reasoning": "Symptom"}]'
+            )
+        }
+
+        queries = ["Landing gear retraction timing", "APU bleed valve chatter"]
+
+        # Classify batch
+        results = await classifier.classify_batch(queries, available_agents)
+
+        # Verify the valid item was parsed and the invalid one fell back
+        assert results[0].agent_type == AgentType.DOCUMENTATION
+        assert results[0].confidence == 0.3
+        assert results[1].agent_type == AgentType.TROUBLESHOOTING
+
+        # Verify only the parsed result was cached
+        assert len(classifier._classification_cache) == 1
+
+    def test_parse_batch_classification_response(self, classifier):
+        """
+        Test parsing a batch response with missing and invalid items.
+        """
+        response_content = (
+            'Here you go:\n'
+            '[{"agent_type": "maintenance", "confidence": 1.5, "reasoning": "Steps"},'
+            ' "not an object"]'
+        )
+
+        # Parse response
+        results = classifier._parse_classification_response(response_content, expected_count=3)
+
+        # Verify positional matching, clamping and fallbacks
+        assert len(results) == 3
+        assert results[0].agent_type == AgentType.MAINTENANCE
+        assert results[0].confidence == 1.0
+        assert results[1].agent_type == AgentType.DOCUMENTATION
+        assert results[1].confidence == 0.3
+        assert results[2].confidence == 0.3
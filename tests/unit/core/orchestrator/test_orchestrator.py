@@ -58,6 +58,7 @@ def mock_conversation_repository():
     """
     mock_repo = MagicMock()
     mock_repo.get_messages = MagicMock(return_value=[])
+    mock_repo.get_recent_messages = MagicMock(return_value=[])
     mock_repo.add_message = MagicMock()
     return mock_repo
 
@@ -365,3 +366,39 @@ class TestOrchestrator:
         mock_llm_service.generate_custom_response_async.assert_called_once()
         call_args = mock_llm_service.generate_custom_response_async.call_args[1]
         assert len(call_args["messages"]) == 4  # System prompt + 2 history messages + user query
+
+    @pytest.mark.asyncio
+    async def test_get_conversation_history_bounded(self, orchestrator, mock_conversation_repository):
+        """
+        Test that history is limited to recent messages plus summaries of earlier turns.
+        """
+        messages = []
+        for message_id in range(1, 5):
+            message = MagicMock()
+            message.id = message_id
+            message.conversation_id = 7
+            message.role = "user" if message_id % 2 else "assistant"
+            message.content = f"Message {message_id} about the landing gear actuator"
+            messages.append(message)
+        mock_conversation_repository.get_recent_messages.return_value = messages
+
+        summary = MagicMock()
+        summary.end_message_id = 2
+        summary.summary_content = "Actuator leak reported."
+        summary_repository = MagicMock()
+        summary_repository.get_summaries_for_conversation.return_value = [summary]
+        orchestrator.summary_repository = summary_repository
+
+        # Get history with room for two messages and the summary
+        history = await orchestrator._get_conversation_history("test-conversation-id", token_budget=80)
+
+        # Verify only recent messages were requested
+        mock_conversation_repository.get_recent_messages.assert_called_once_with(
+            "test-conversation-id", Orchestrator.HISTORY_MESSAGE_LIMIT
+        )
+        summary_repository.get_summaries_for_conversation.assert_called_once_with(7)
+
+        # Verify the summary replaces the dropped messages
+        assert history[0]["role"] == "system"
+        assert "Actuator leak reported." in history[0]["content"]
+        assert [entry["content"] for entry in history[1:]] == [messages[2].content, messages[3].content]
@@ -0,0 +1,191 @@
+"""
+Unit tests for log rotation.
+"""
+
+import gzip
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.core.log_rotation import LogRotationWorker, SegmentRotation, compress_log_file
+from app.core.monitoring.log_management import LogManager, LogRetentionPolicy
+
+
+class Message(str):
+    """Formatted loguru message with its record."""
+
+    def __new__(cls, text: str, record_time: datetime):
+        message = super().__new__(cls, text)
+        message.record = {"time": record_time}
+        return message
+
+
+def test_segment_rotation_by_size():
+    """Test that a segment is rotated when the message would exceed the size limit."""
+    rotation = SegmentRotation(max_bytes=100)
+    now = datetime.now(timezone.utc)
+    file = MagicMock()
+
+    file.tell.return_value = 50
+    assert rotation(Message("x" * 40, now), file) is False
+
+    file.tell.return_value = 90
+    assert rotation(Message("x" * 40, now), file) is True
+
+
+def test_segment_rotation_at_midnight():
+    """Test that a segment is rotated on the first message after midnight."""
+    rotation = SegmentRotation(max_bytes=0)
+    file = MagicMock()
+    file.tell.return_value = 0
+    evening = datetime(2024, 1, 1, 23, 59, tzinfo=timezone.utc)
+
+    assert rotation(Message("x", evening), file) is False
+    assert rotation(Message("x", evening + timedelta(minutes=2)), file) is True
+    assert rotation(Message("x", evening + timedelta(minutes=3)), file) is False
+
+
+def test_compress_log_file(tmp_path):
+    """Test that a log file is compressed and keeps its modification time."""
+    path = tmp_path / "app.log"
+    path.write_text("line\n" * 1000)
+    os.utime(path, (1_700_000_000, 1_700_000_000))
+
+    compressed = compress_log_file(path)
+
+    assert compressed == tmp_path / "app.log.gz"
+    assert not path.exists()
+    assert gzip.decompress(compressed.read_bytes()) == b"line\n" * 1000
+    assert compressed.stat().st_mtime == 1_700_000_000
+
+    # A segment compressed by another pass is skipped
+    assert compress_log_file(path) is None
+
+
+def test_worker_compresses_in_background(tmp_path):
+    """Test that submitted segments are compressed on the worker thread."""
+    path = tmp_path / "app.log"
+    path.write_text("content")
+    worker = LogRotationWorker()
+
+    try:
+        worker.compress(str(path))
+
+        deadline = time.monotonic() + 5
+        while path.exists() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert (tmp_path / "app.log.gz").exists()
+    finally:
+        worker.stop()
+
+
+def test_worker_runs_scheduled_task():
+    """Test that the scheduled task runs immediately on the worker thread."""
+    ran = threading.Event()
+    threads = []
+
+    def task():
+        threads.append(threading.current_thread().name)
+        ran.set()
+
+    worker = LogRotationWorker()
+    try:
+        worker.schedule(task, interval=3600)
+        assert ran.wait(5)
+        assert threads == ["log-rotation"]
+    finally:
+        worker.stop()
+
+
+def test_worker_run_once_returns_result():
+    """Test that a task run once reports its result and error through a future."""
+    worker = LogRotationWorker()
+
+    def fail():
+        raise OSError("disk full")
+
+    try:
+        assert worker.run_once(lambda: threading.current_thread().name).result(5) == "log-rotation"
+        with pytest.raises(OSError):
+            worker.run_once(fail).result(5)
+    finally:
+        worker.stop()
+
+
+def test_worker_stop_timeout_keeps_worker():
+    """Test that a worker still running a task after the stop timeout is not replaced."""
+    release = threading.Event()
+    worker = LogRotationWorker()
+
+    worker.run_once(lambda: release.wait(5))
+    time.sleep(0.05)
+    worker.stop(timeout=0.05)
+    thread = worker._thread
+
+    assert worker.is_running
+    worker.start()
+    assert worker._thread is thread
+
+    release.set()
+    thread.join(5)
+    assert not worker.is_running
+
+
+@pytest.fixture
+def log_manager(tmp_path):
+    """Create a log manager without archiving."""
+    manager = LogManager(
+        log_dir=str(tmp_path / "logs"),
+        audit_log_dir=str(tmp_path / "logs" / "audit"),
+        retention_policy=LogRetentionPolicy(
+            max_age_days=7,
+            max_size_mb=1,
+            archive_enabled=False,
+        ),
+    )
+    yield manager
+    manager.audit_writer.stop()
+
+
+def write_log(log_manager, name: str, size: int, age_seconds: float):
+    """Write a log file with a given size and age."""
+    path = log_manager.log_dir / name
+    path.write_bytes(b"x" * size)
+    mtime = time.time() - age_seconds
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_rotate_logs_size_limit(log_manager):
+    """Test that the oldest files are removed until the directory fits the size limit."""
+    log_manager.retention_policy.max_size_mb = 1 / 1024
+    oldest = write_log(log_manager, "app.1.log", 600, 3000)
+    older = write_log(log_manager, "app.2.log", 300, 2000)
+    closed = write_log(log_manager, "app.3.log", 100, 1000)
+    active = write_log(log_manager, "app.log", 600, 0)
+
+    assert log_manager.rotate_logs() is True
+
+    assert not oldest.exists()
+    assert not older.exists()
+
+    # The closed segment is compressed and the active one left alone
+    assert not closed.exists()
+    assert (log_manager.log_dir / "app.3.log.gz").exists()
+    assert active.exists()
+
+
+def test_rotate_logs_age_limit(log_manager):
+    """Test that files past the maximum age are removed, compressed or not."""
+    old = write_log(log_manager, "app.1.log.gz", 10, 9 * 86400)
+    recent = write_log(log_manager, "app.2.log.gz", 10, 86400)
+    write_log(log_manager, "app.log", 10, 0)
+
+    log_manager.rotate_logs()
+
+    assert not old.exists()
+    assert recent.exists()
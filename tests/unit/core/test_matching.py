@@ -0,0 +1,168 @@
+"""
+Unit tests for compiled text matchers.
+"""
+import pytest
+
+from app.core.matching import KeywordMatcher, PatternMatcher, SubstringMatcher, tokenize
+
+
+class TestKeywordMatcher:
+    """
+    Tests for KeywordMatcher.
+    """
+
+    @pytest.fixture
+    def matcher(self):
+        """
+        Create a keyword matcher.
+        """
+        return KeywordMatcher({
+            "pneumatic": ["air", "pressure", "valve"],
+            "environmental": ["air conditioning", "temperature"],
+            "hydraulic": ["fluid", "pressure"],
+        })
+
+    def test_count(self, matcher):
+        """
+        Test counting keyword matches per label.
+        """
+        counts = matcher.count("Pressure valve and PRESSURE gauge")
+
+        assert counts["pneumatic"] == 3
+        assert counts["hydraulic"] == 2
+        assert counts["environmental"] == 0
+
+    def test_count_distinct(self, matcher):
+        """
+        Test counting each keyword once.
+        """
+        counts = matcher.count("pressure pressure valve", distinct=True)
+
+        assert counts["pneumatic"] == 2
+        assert counts["hydraulic"] == 1
+
+    def test_overlapping_keywords(self, matcher):
+        """
+        Test that a keyword inside a longer phrase is still matched.
+        """
+        assert matcher.find_labels("check the air conditioning") == {"pneumatic", "environmental"}
+
+    def test_word_boundaries(self, matcher):
+        """
+        Test that keywords only match whole words.
+        """
+        assert matcher.find_labels("aircraft fluidity") == set()
+
+    def test_first_label(self, matcher):
+        """
+        Test that the first label follows declaration order.
+        """
+        assert matcher.first_label("temperature and fluid") == "environmental"
+        assert matcher.first_label("temperature and air") == "pneumatic"
+        assert matcher.first_label("nothing here") is None
+
+    def test_empty(self):
+        """
+        Test matchers without keywords or text.
+        """
+        assert KeywordMatcher({}).count("air") == {}
+        assert KeywordMatcher({"a": ["air"]}).first_label("") is None
+
+
+class TestPatternMatcher:
+    """
+    Tests for PatternMatcher.
+    """
+
+    def test_priority_order(self):
+        """
+        Test that earlier patterns win regardless of position.
+        """
+        matcher = PatternMatcher({
+            "letters": [r'\b[A-Z]{2}\d{4}\b'],
+            "digits": [r'\b\d{3}-\d{4}\b'],
+        })
+
+        assert matcher.first_match("123-4567 and AB1234") == ("letters", "AB1234")
+        assert matcher.first_match("only 123-4567") == ("digits", "123-4567")
+        assert matcher.first_match("none") is None
+
+    def test_same_position(self):
+        """
+        Test that a lower-priority pattern is found when it is the only match.
+        """
+        matcher = PatternMatcher({
+            "long": [r'abc\d'],
+            "short": [r'abc'],
+        })
+
+        assert matcher.first_label("abc abc1") == "long"
+        assert matcher.first_label("abc") == "short"
+
+    def test_anchored_pattern(self):
+        """
+        Test that anchored patterns only match at the start.
+        """
+        matcher = PatternMatcher({"followup": [r'^(and|but)\b']})
+
+        assert matcher.first_label("and then") == "followup"
+        assert matcher.first_label("this and that") is None
+
+
+class TestSubstringMatcher:
+    """
+    Tests for SubstringMatcher.
+    """
+
+    @pytest.fixture
+    def matcher(self):
+        """
+        Create a substring matcher with overlapping phrases.
+        """
+        return SubstringMatcher({
+            "grounding": ["properly grounded", "ground"],
+            "power": ["power is disconnected"],
+            "static": ["anti-static", "static wrist"],
+            "sheet": ["she"],
+            "hers": ["hers"],
+        })
+
+    def test_find_labels(self, matcher):
+        """
+        Test finding phrases anywhere in the text, ignoring case.
+        """
+        assert matcher.find_labels("Ensure POWER is disconnected and the aircraft is Properly Grounded") == {
+            "grounding", "power"
+        }
+        assert matcher.find_labels("background check") == {"grounding"}
+        assert matcher.find_labels("nothing relevant") == set()
+        assert matcher.find_labels("") == set()
+
+    def test_overlapping_phrases(self, matcher):
+        """
+        Test that phrases ending inside other phrases are found.
+        """
+        assert matcher.find_labels("ushers") == {"sheet", "hers"}
+        assert matcher.find_labels("use anti-static wrist straps") == {"static"}
+
+    def test_find_all(self, matcher):
+        """
+        Test scanning several texts, without matching across text boundaries.
+        """
+        assert matcher.find_all(["hers", "power is", " disconnected", "grounded"]) == ["grounding", "hers"]
+
+    def test_case_sensitive(self):
+        """
+        Test case-sensitive matching.
+        """
+        matcher = SubstringMatcher({"ad": ["AD"]}, ignore_case=False)
+
+        assert matcher.find_labels("AD 2024-01") == {"ad"}
+        assert matcher.find_labels("add") == set()
+
+
+def test_tokenize():
+    """
+    Test tokenization.
+    """
+    assert tokenize("Replace the Hydraulic-Pump, now!") == ["replace", "the", "hydraulic", "pump", "now"]
@@ -0,0 +1,206 @@
+"""
+Unit tests for monthly table partitioning.
+"""
+
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.core.db.partitioning import PartitionManager, add_months, month_start, partition_name
+
+
+def _postgres_session(partition_rows=None) -> MagicMock:
+    """
+    Create a mock PostgreSQL session that lists the given partitions.
+    """
+    session = MagicMock()
+    session.get_bind.return_value.dialect.name = "postgresql"
+    session.execute.return_value = partition_rows or []
+    return session
+
+
+def _executed_sql(session: MagicMock) -> list:
+    """
+    Get the SQL text of all executed statements.
+    """
+    return [str(call.args[0]) for call in session.execute.call_args_list]
+
+
+class TestPartitionHelpers:
+    """
+    Test partition naming and month arithmetic.
+    """
+
+    def test_month_start(self):
+        """
+        Test truncating a datetime to the start of its month.
+        """
+        assert month_start(datetime(2025, 3, 17, 13, 45, 12)) == datetime(2025, 3, 1)
+
+    def test_add_months_across_years(self):
+        """
+        Test adding and subtracting months across year boundaries.
+        """
+        assert add_months(datetime(2025, 11, 1), 3) == datetime(2026, 2, 1)
+        assert add_months(datetime(2025, 1, 1), -1) == datetime(2024, 12, 1)
+
+    def test_partition_name(self):
+        """
+        Test partition naming.
+        """
+        assert partition_name("modelusagerecord", datetime(2025, 2, 1)) == "modelusagerecord_p202502"
+
+
+class TestPartitionManager:
+    """
+    Test partition maintenance.
+    """
+
+    def test_unsupported_database_is_noop(self):
+        """
+        Test that all operations are no-ops outside PostgreSQL.
+        """
+        session = MagicMock()
+        session.get_bind.return_value.dialect.name = "sqlite"
+        manager = PartitionManager(session)
+
+        assert manager.list_partitions("modelusagerecord") == []
+        assert manager.ensure_partitions("modelusagerecord") == []
+        assert manager.detach_partitions("modelusagerecord", datetime(2025, 1, 1)) == []
+        session.execute.assert_not_called()
+
+    def test_list_partitions(self):
+        """
+        Test parsing partition bounds and skipping the default partition.
+        """
+        session = _postgres_session([
+            ("modelusagerecord_p202502", "FOR VALUES FROM ('2025-02-01 00:00:00') TO ('2025-03-01 00:00:00')"),
+            ("modelusagerecord_default", "DEFAULT"),
+            ("modelusagerecord_p202501", "FOR VALUES FROM ('2025-01-01 00:00:00') TO ('2025-02-01 00:00:00')"),
+        ])
+
+        partitions = PartitionManager(session).list_partitions("modelusagerecord")
+
+        assert partitions == [
+            ("modelusagerecord_p202501", datetime(2025, 1, 1), datetime(2025, 2, 1)),
+            ("modelusagerecord_p202502", datetime(2025, 2, 1), datetime(2025, 3, 1)),
+        ]
+
+    def test_ensure_partitions_creates_missing_months(self):
+        """
+        Test that only missing partitions for the current and future months are created.
+        """
+        session = _postgres_session([
+            ("modelusagerecord_p202503", "FOR VALUES FROM ('2025-03-01 00:00:00') TO ('2025-04-01 00:00:00')"),
+        ])
+
+        created = PartitionManager(session).ensure_partitions(
+            "modelusagerecord", months_ahead=2, now=datetime(2025, 3, 15)
+        )
+
+        assert created == ["modelusagerecord_p202504", "modelusagerecord_p202505"]
+        statements = _executed_sql(session)
+        assert any(
+            "PARTITION OF \"modelusagerecord\"" in sql
+            and "FROM ('2025-05-01T00:00:00') TO ('2025-06-01T00:00:00')" in sql
+            for sql in statements
+        )
+        session.commit.assert_not_called()
+
+    def test_ensure_partitions_moves_default_rows(self):
+        """
+        Test that rows in the default partition are moved into a new partition for their month.
+        """
+        session = _postgres_session()
+        partition_rows = [("modelusagerecord_default", "DEFAULT")]
+
+        def execute(statement, params=None):
+            sql = str(statement)
+            if "pg_inherits" in sql:
+                return partition_rows
+            result = MagicMock()
+            # Only March has rows in the default partition
+            result.scalar.return_value = params is not None and params["lower"] == datetime(2025, 3, 1)
+            result.rowcount = 2
+            return result
+
+        session.execute.side_effect = execute
+
+        created = PartitionManager(session).ensure_partitions(
+            "modelusagerecord", months_ahead=1, now=datetime(2025, 3, 15)
+        )
+
+        assert created == ["modelusagerecord_p202503", "modelusagerecord_p202504"]
+        statements = _executed_sql(session)
+        march = [sql for sql in statements if "modelusagerecord_p202503" in sql]
+        assert march[0] == 'CREATE TABLE "modelusagerecord_p202503" (LIKE "modelusagerecord" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+        assert march[1].startswith('WITH moved AS (DELETE FROM "modelusagerecord_default"')
+        assert march[1].endswith('INSERT INTO "modelusagerecord_p202503" SELECT * FROM moved')
+        assert march[2] == (
+            'ALTER TABLE "modelusagerecord" ATTACH PARTITION "modelusagerecord_p202503" '
+            "FOR VALUES FROM ('2025-03-01T00:00:00') TO ('2025-04-01T00:00:00')"
+        )
+        assert 'LOCK TABLE "modelusagerecord_default" IN SHARE ROW EXCLUSIVE MODE' in statements
+        assert any(
+            sql.startswith('CREATE TABLE IF NOT EXISTS "modelusagerecord_p202504" PARTITION OF')
+            for sql in statements
+        )
+        session.commit.assert_not_called()
+
+    @pytest.mark.parametrize("archive_schema", [None, "archive"])
+    def test_detach_partitions(self, archive_schema):
+        """
+        Test that only partitions entirely before the cutoff are detached.
+        """
+        session = _postgres_session([
+            ("modelusagerecord_p202501", "FOR VALUES FROM ('2025-01-01 00:00:00') TO ('2025-02-01 00:00:00')"),
+            ("modelusagerecord_p202502", "FOR VALUES FROM ('2025-02-01 00:00:00') TO ('2025-03-01 00:00:00')"),
+        ])
+
+        detached = PartitionManager(session).detach_partitions(
+            "modelusagerecord", datetime(2025, 2, 15), archive_schema=archive_schema
+        )
+
+        assert detached == ["modelusagerecord_p202501"]
+        statements = _executed_sql(session)
+        assert 'ALTER TABLE "modelusagerecord" DETACH PARTITION "modelusagerecord_p202501"' in statements
+        if archive_schema:
+            assert 'ALTER TABLE "modelusagerecord_p202501" SET SCHEMA "archive"' in statements
+        else:
+            assert 'DROP TABLE "modelusagerecord_p202501"' in statements
+        assert not any("modelusagerecord_p202502" in sql for sql in statements[1:])
+        session.commit.assert_not_called()
+
+    def test_maintain_commits_per_table(self):
+        """
+        Test that maintenance commits the partition changes of each table.
+        """
+        session = _postgres_session([
+            ("modelusagerecord_p202501", "FOR VALUES FROM ('2025-01-01 00:00:00') TO ('2025-02-01 00:00:00')"),
+        ])
+
+        results = PartitionManager(session, tables={"modelusagerecord": "timestamp"}).maintain(
+            months_ahead=0, retention_months=1, now=datetime(2025, 3, 15)
+        )
+
+        assert results == {
+            "modelusagerecord": {
+                "created": ["modelusagerecord_p202503"],
+                "detached": ["modelusagerecord_p202501"],
+            }
+        }
+        session.commit.assert_called_once()
+        session.rollback.assert_not_called()
+
+    def test_maintain_logs_errors_per_table(self):
+        """
+        Test that a failing table is rolled back without raising.
+        """
+        session = _postgres_session()
+        session.execute.side_effect = Exception("permission denied")
+
+        results = PartitionManager(session, tables={"modelusagerecord": "timestamp"}).maintain()
+
+        assert results == {}
+        session.rollback.assert_called_once()
@@ -0,0 +1,132 @@
+"""
+Unit tests for full-text search support.
+"""
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.core.db.search import (
+    create_sqlite_search_index, has_sqlite_search_index, is_identifier_term, to_fts5_query
+)
+
+
+@pytest.fixture
+def engine():
+    """
+    Create an in-memory SQLite database with minimal conversation and message tables.
+    """
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE conversation (id INTEGER PRIMARY KEY, title TEXT)"))
+        connection.execute(text(
+            "CREATE TABLE message (id INTEGER PRIMARY KEY, conversation_id INTEGER, content TEXT)"
+        ))
+        connection.execute(text("INSERT INTO conversation (id, title) VALUES (1, 'Hydraulic pump leak')"))
+        connection.execute(text(
+            "INSERT INTO message (id, conversation_id, content) VALUES (1, 1, 'Pressure drops after start')"
+        ))
+    yield engine
+    engine.dispose()
+
+
+def _match(engine, fts_table: str, search_term: str) -> list:
+    """
+    Get the row IDs matching a search term in an FTS5 table.
+    """
+    with engine.connect() as connection:
+        rows = connection.execute(
+            text(f"SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH :query ORDER BY rowid"),
+            {"query": to_fts5_query(search_term)}
+        )
+        return [row[0] for row in rows]
+
+
+class TestSearchTerms:
+    """
+    Test search term handling.
+    """
+
+    @pytest.mark.parametrize("search_term, expected", [
+        ("hydraulic pump", False),
+        ("PN-4471-B", True),
+        ("4471", True),
+        ("ATA 29", True),
+        ("pre-flight", True),
+    ])
+    def test_is_identifier_term(self, search_term, expected):
+        """
+        Test detecting identifier-like search terms.
+        """
+        assert is_identifier_term(search_term) is expected
+
+    def test_to_fts5_query(self):
+        """
+        Test that words are quoted and the last word matches as a prefix.
+        """
+        assert to_fts5_query("Hydraulic PUMP") == '"hydraulic" "pump"*'
+
+    def test_to_fts5_query_escapes_operators(self):
+        """
+        Test that FTS5 syntax in user input is not passed through.
+        """
+        assert to_fts5_query('pump" OR NEAR(') == '"pump" "or" "near"*'
+        assert to_fts5_query('"*()') is None
+
+
+class TestSqliteSearchIndex:
+    """
+    Test the SQLite FTS5 search index.
+    """
+
+    def test_indexes_existing_rows(self, engine):
+        """
+        Test that rows present before the index is created are searchable.
+        """
+        create_sqlite_search_index(engine)
+
+        assert _match(engine, "conversation_fts", "hydraulic") == [1]
+        assert _match(engine, "message_fts", "press") == [1]
+
+    def test_triggers_keep_index_in_sync(self, engine):
+        """
+        Test that inserts, updates and deletes are reflected in the index.
+        """
+        create_sqlite_search_index(engine)
+
+        with engine.begin() as connection:
+            connection.execute(text(
+                "INSERT INTO message (id, conversation_id, content) VALUES (2, 1, 'Actuator is slow')"
+            ))
+            connection.execute(text("UPDATE message SET content = 'Seal replaced' WHERE id = 1"))
+            connection.execute(text("UPDATE conversation SET title = 'Landing gear' WHERE id = 1"))
+
+        assert _match(engine, "message_fts", "actuator") == [2]
+        assert _match(engine, "message_fts", "pressure") == []
+        assert _match(engine, "message_fts", "seal") == [1]
+        assert _match(engine, "conversation_fts", "gear") == [1]
+
+        with engine.begin() as connection:
+            connection.execute(text("DELETE FROM message WHERE id = 2"))
+
+        assert _match(engine, "message_fts", "actuator") == []
+
+    def test_create_is_idempotent(self, engine):
+        """
+        Test that creating the index twice does not duplicate rows.
+        """
+        create_sqlite_search_index(engine)
+        create_sqlite_search_index(engine)
+
+        assert _match(engine, "conversation_fts", "hydraulic") == [1]
+
+    def test_has_sqlite_search_index(self, engine):
+        """
+        Test detecting the search index.
+        """
+        with engine.connect() as connection:
+            assert has_sqlite_search_index(connection) is False
+
+        create_sqlite_search_index(engine)
+
+        with engine.connect() as connection:
+            assert has_sqlite_search_index(connection) is True
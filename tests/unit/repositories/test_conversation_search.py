@@ -0,0 +1,98 @@
+"""
+Unit tests for conversation search.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.db.search import create_sqlite_search_index
+from app.models.conversation import AgentType, Conversation, Message, MessageRole
+from app.models.user import User, UserRole
+from app.repositories.conversation import ConversationRepository
+
+
+@pytest.fixture
+def db():
+    """
+    Create a session for an in-memory database with the conversation tables and search index.
+    """
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    User.metadata.create_all(
+        engine, tables=[User.__table__, Conversation.__table__, Message.__table__]
+    )
+    create_sqlite_search_index(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def user(db):
+    """
+    Create a user.
+    """
+    user = User(
+        email="search@example.com",
+        username="search",
+        hashed_password="hashedpassword",
+        role=UserRole.ENGINEER
+    )
+    db.add(user)
+    db.flush()
+    return user
+
+
+@pytest.fixture
+def conversations(db, user):
+    """
+    Create conversations whose messages match "pump" as a word or only as a substring.
+    """
+    contents = ["Hydraulic pump leak", "Pump noise at idle", "Airpump check", "Second airpump fault"]
+    created = []
+    for index, content in enumerate(contents):
+        conversation = Conversation(
+            title=f"Conversation {index}",
+            user_id=user.id,
+            agent_type=AgentType.MAINTENANCE,
+            updated_at=datetime(2025, 1, 1) + timedelta(hours=index)
+        )
+        conversation.messages.append(Message(role=MessageRole.USER, content=content))
+        db.add(conversation)
+        created.append(conversation)
+    db.flush()
+    return created
+
+
+def test_search_pages_stay_in_full_text_mode(db, user, conversations):
+    """
+    Test that a page past the full-text matches is empty instead of switching to substring matching.
+    """
+    repository = ConversationRepository(db)
+
+    first_page = repository.search_conversations(user.id, "pump", limit=2, offset=0)
+    second_page = repository.search_conversations(user.id, "pump", limit=2, offset=2)
+
+    assert {conversation.id for conversation in first_page} == {conversations[0].id, conversations[1].id}
+    assert second_page == []
+
+
+def test_search_falls_back_to_substring_without_word_matches(db, user, conversations):
+    """
+    Test that substring matching is used for every page when no words match.
+    """
+    repository = ConversationRepository(db)
+
+    first_page = repository.search_conversations(user.id, "irpum", limit=1, offset=0)
+    second_page = repository.search_conversations(user.id, "irpum", limit=1, offset=1)
+
+    assert [conversation.id for conversation in first_page] == [conversations[3].id]
+    assert [conversation.id for conversation in second_page] == [conversations[2].id]
@@ -0,0 +1,128 @@
+"""
+Unit tests for keyset pagination helpers.
+"""
+
+from datetime import datetime, timedelta
+
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import Column, DateTime, Integer, MetaData, Table, create_engine, select
+
+from app.repositories.conversation import ConversationRepository
+from app.repositories.pagination import (
+    apply_keyset, decode_cursor, encode_cursor, paginate
+)
+
+metadata = MetaData()
+
+item_table = Table(
+    "item",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("created_at", DateTime, nullable=False),
+)
+
+START = datetime(2025, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def engine():
+    """
+    Create an in-memory SQLite database with rows sharing creation times.
+    """
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    with engine.begin() as connection:
+        # Two rows per timestamp, so ties must be broken by ID
+        connection.execute(item_table.insert(), [
+            {"id": row_id, "created_at": START + timedelta(minutes=(row_id - 1) // 2)}
+            for row_id in range(1, 8)
+        ])
+    yield engine
+    engine.dispose()
+
+
+def _collect_pages(engine, limit: int, descending: bool = False) -> list:
+    """
+    Walk through all pages and return the row IDs of each page.
+    """
+    pages = []
+    cursor = None
+    with engine.connect() as connection:
+        while True:
+            query = apply_keyset(
+                select(item_table),
+                item_table.c.created_at,
+                item_table.c.id,
+                cursor=cursor,
+                descending=descending,
+                limit=limit
+            )
+            page, cursor = paginate(connection.execute(query).all(), limit)
+            pages.append([row.id for row in page])
+            if cursor is None:
+                return pages
+
+
+class TestCursor:
+    """
+    Test cursor encoding.
+    """
+
+    def test_round_trip(self):
+        """
+        Test that a cursor decodes to the position it was created from.
+        """
+        cursor = encode_cursor(START, 42)
+
+        assert "=" not in cursor
+        assert decode_cursor(cursor) == (START, 42)
+
+    @pytest.mark.parametrize("cursor", ["", "not-a-cursor", encode_cursor(START, 1)[:-4]])
+    def test_invalid_cursor(self, cursor):
+        """
+        Test that malformed cursors are rejected.
+        """
+        with pytest.raises(ValueError):
+            decode_cursor(cursor)
+
+    def test_invalid_message_cursor_is_raised(self):
+        """
+        Test that a malformed message cursor is raised instead of returning an empty last page.
+        """
+        session = MagicMock()
+
+        with pytest.raises(ValueError):
+            ConversationRepository(session).get_messages_page(1, cursor="not-a-cursor")
+        session.execute.assert_not_called()
+
+
+class TestKeysetPagination:
+    """
+    Test keyset pagination queries.
+    """
+
+    def test_ascending_pages(self, engine):
+        """
+        Test paging from oldest to newest.
+        """
+        assert _collect_pages(engine, limit=3) == [[1, 2, 3], [4, 5, 6], [7]]
+
+    def test_descending_pages(self, engine):
+        """
+        Test paging from newest to oldest.
+        """
+        assert _collect_pages(engine, limit=3, descending=True) == [[7, 6, 5], [4, 3, 2], [1]]
+
+    def test_exact_last_page_has_no_cursor(self, engine):
+        """
+        Test that a page ending on the last row has no next cursor.
+        """
+        assert _collect_pages(engine, limit=7) == [[1, 2, 3, 4, 5, 6, 7]]
+
+    def test_paginate_short_page(self):
+        """
+        Test that a page with fewer rows than the limit is the last page.
+        """
+        assert paginate([], 10) == ([], None)
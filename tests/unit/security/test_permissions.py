@@ -5,9 +5,13 @@ import pytest
 from unittest.mock import MagicMock
 
 from app.core.security.permissions import (
+    PERMISSION_BITS,
+    ROLE_PERMISSION_MASKS,
     Permission,
+    get_permission_mask,
     get_permissions_for_role,
     has_permission,
+    require_permissions,
 )
 from app.models.user import User, UserRole
 
@@ -186,3 +190,41 @@ def test_superuser_has_all_permissions():
     assert has_permission(superuser, Permission.VIEW_MAINTENANCE)
     assert has_permission(superuser, Permission.MANAGE_SYSTEM)
     assert has_permission(superuser, Permission.VIEW_SYSTEM)
+
+
+def test_permission_masks():
+    """Test that role bitmasks match the role permission sets."""
+    for role in UserRole:
+        mask = ROLE_PERMISSION_MASKS[role]
+        for permission in Permission:
+            assert bool(mask & PERMISSION_BITS[permission]) == (permission in get_permissions_for_role(role))
+
+    # Precomputed masks take precedence over the role
+    user = MagicMock(spec=User)
+    user.role = UserRole.GUEST
+    user.is_superuser = False
+    user.permission_mask = PERMISSION_BITS[Permission.MANAGE_SYSTEM]
+    assert get_permission_mask(user) == PERMISSION_BITS[Permission.MANAGE_SYSTEM]
+
+
+@pytest.mark.asyncio
+async def test_require_permissions():
+    """Test requiring all or any of several permissions."""
+    from fastapi import HTTPException
+
+    technician = MagicMock(spec=User)
+    technician.role = UserRole.TECHNICIAN
+    technician.is_superuser = False
+
+    permissions = [Permission.VIEW_MAINTENANCE, Permission.MANAGE_MAINTENANCE]
+    require_all = require_permissions(permissions)
+    require_any = require_permissions(permissions, require_all=False)
+
+    assert await require_any(current_user=technician) is technician
+    with pytest.raises(HTTPException) as exc_info:
+        await require_all(current_user=technician)
+    assert exc_info.value.status_code == 403
+
+    # Superusers pass every check
+    technician.is_superuser = True
+    assert await require_all(current_user=technician) is technician
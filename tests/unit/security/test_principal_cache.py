@@ -0,0 +1,153 @@
+"""
+Unit tests for the principal cache.
+"""
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.api.deps import resolve_principal
+from app.core.security.jwt import create_access_token
+from app.core.security.permissions import ROLE_PERMISSION_MASKS
+from app.core.security.principal_cache import PRINCIPAL_INVALIDATION_CHANNEL, PrincipalCache
+from app.models.user import User, UserRole
+
+
+def make_user(user_id: int = 1, role: UserRole = UserRole.ENGINEER) -> MagicMock:
+    """Create a user."""
+    return MagicMock(
+        spec=User,
+        id=user_id,
+        email=f"user{user_id}@example.com",
+        username=f"user{user_id}",
+        hashed_password="hashed",
+        role=role,
+        is_active=True,
+        is_superuser=False,
+    )
+
+
+def test_principal_snapshot():
+    """Test that principals hold a detached copy and the role's permissions."""
+    cache = PrincipalCache()
+    user = make_user()
+
+    principal = cache.set("token", user)
+    user.role = UserRole.ADMIN
+
+    assert principal.user is not user
+    assert principal.user.role == UserRole.ENGINEER
+    assert principal.permission_mask == ROLE_PERMISSION_MASKS[UserRole.ENGINEER]
+    assert principal.user.permission_mask == principal.permission_mask
+    assert cache.get("token") is principal
+
+
+def test_expiry():
+    """Test that principals expire after the TTL or with their token."""
+    cache = PrincipalCache(ttl=60)
+
+    cache.set("expired-token", make_user(), token_expires_at=time.time() - 1)
+    cache.set("token", make_user())
+
+    assert cache.get("expired-token") is None
+    with patch("app.core.security.principal_cache.time.monotonic", return_value=time.monotonic() + 61):
+        assert cache.get("token") is None
+
+
+def test_lru_eviction():
+    """Test that the least recently used tokens are evicted."""
+    cache = PrincipalCache(max_size=2)
+    cache.set("token-1", make_user(1))
+    cache.set("token-2", make_user(2))
+    cache.get("token-1")
+
+    cache.set("token-3", make_user(3))
+
+    assert cache.get("token-2") is None
+    assert cache.get("token-1") is not None
+    assert cache.get("token-3") is not None
+
+
+def test_invalidation():
+    """Test that invalidations drop all of a user's tokens and are published."""
+    cache = PrincipalCache()
+    cache.set("token-1", make_user(1))
+    cache.set("token-2", make_user(1))
+    cache.set("token-3", make_user(2))
+    redis_client = MagicMock()
+
+    cache.publish_invalidation(1, redis_client)
+
+    assert cache.get("token-1") is None
+    assert cache.get("token-2") is None
+    assert cache.get("token-3") is not None
+    redis_client.publish.assert_called_once_with(PRINCIPAL_INVALIDATION_CHANNEL, "1")
+
+    # Messages from other instances are handled the same way
+    cache._handle_message({"data": b"2"})
+    assert cache.get("token-3") is None
+
+
+def test_invalidation_waits_for_commit():
+    """Test that invalidations queued on a session are published only when it commits."""
+    engine = create_engine("sqlite://")
+    session = sessionmaker(bind=engine)()
+    cache = PrincipalCache()
+    cache.set("token-1", make_user(1))
+    cache.set("token-2", make_user(2))
+
+    with patch.object(cache, "publish_invalidation", wraps=cache.publish_invalidation) as publish:
+        with patch("app.core.security.principal_cache.shared_redis_client", MagicMock()):
+            cache.publish_invalidation_after_commit(session, 1)
+            session.execute(text("SELECT 1"))
+            assert cache.get("token-1") is not None
+
+            session.commit()
+            publish.assert_called_once_with(1)
+            assert cache.get("token-1") is None
+
+            # Invalidations of a rolled back transaction are dropped
+            cache.publish_invalidation_after_commit(session, 2)
+            session.execute(text("SELECT 1"))
+            session.rollback()
+            session.execute(text("SELECT 1"))
+            session.commit()
+
+    publish.assert_called_once_with(1)
+    assert cache.get("token-2") is not None
+    session.close()
+    engine.dispose()
+
+
+def test_resolve_principal_uses_cache():
+    """Test that cached tokens are resolved without loading the user."""
+    token = create_access_token(subject=1)
+    user_repo = MagicMock()
+    user_repo.get_by_id.return_value = make_user(1)
+
+    with patch("app.api.deps.principal_cache", PrincipalCache()):
+        first = resolve_principal(token, user_repo)
+        second = resolve_principal(token, user_repo)
+
+    assert first is second
+    assert first.user.username == "user1"
+    user_repo.get_by_id.assert_called_once_with(1)
+
+
+def test_resolve_principal_unknown_user():
+    """Test that tokens for unknown users are rejected and not cached."""
+    from fastapi import HTTPException
+
+    token = create_access_token(subject=1)
+    user_repo = MagicMock()
+    user_repo.get_by_id.return_value = None
+    cache = PrincipalCache()
+
+    with patch("app.api.deps.principal_cache", cache):
+        with pytest.raises(HTTPException) as exc_info:
+            resolve_principal(token, user_repo)
+
+    assert exc_info.value.status_code == 401
+    assert cache.get(token) is None
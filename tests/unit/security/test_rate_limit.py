@@ -0,0 +1,138 @@
+"""
+Unit tests for rate limiting.
+"""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import Request
+
+from app.core.security.jwt import create_access_token
+from app.core.security.rate_limit import RateLimitGroup, RateLimiter, get_rate_limit_principal
+
+
+def make_request(path: str = "/api/v1/chat", headers: dict = None, client: str = "10.0.0.1") -> Request:
+    """Create a request."""
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "query_string": b"",
+        "headers": [(key.lower().encode(), value.encode()) for key, value in (headers or {}).items()],
+        "client": (client, 8000),
+        "server": ("testserver", 80),
+        "scheme": "http",
+    })
+
+
+@pytest.fixture
+def script():
+    """Rate limit script granting every requested token."""
+    return AsyncMock(side_effect=lambda keys, args: [args[2], 50, 1000, 0])
+
+
+@pytest.fixture
+def rate_limiter(script):
+    """Rate limiter over a mock Redis client."""
+    redis_client = MagicMock()
+    redis_client.register_script.return_value = script
+    return RateLimiter(redis_client=redis_client, rate_limit_per_minute=100, auth_rate_limit_per_minute=5)
+
+
+def test_principal_from_token_or_ip():
+    """Test that requests are limited per user when authenticated and per IP otherwise."""
+    token = create_access_token(subject=42)
+
+    assert get_rate_limit_principal(make_request(headers={"Authorization": f"Bearer {token}"})) == "user:42"
+    assert get_rate_limit_principal(make_request(headers={"Authorization": "Bearer invalid"})) == "ip:10.0.0.1"
+    assert get_rate_limit_principal(make_request(headers={"X-Forwarded-For": "1.2.3.4, 10.0.0.2"})) == "ip:1.2.3.4"
+
+
+def test_route_groups(rate_limiter):
+    """Test selecting route groups by path and prefix."""
+    limiter = RateLimiter(
+        redis_client=MagicMock(),
+        groups=[
+            RateLimitGroup("auth", 5, paths=["/api/v1/auth/login"]),
+            RateLimitGroup("chat", 20, prefixes=["/api/v1/chat"]),
+            RateLimitGroup("default", 60),
+        ],
+    )
+
+    assert limiter.get_group("/api/v1/auth/login").name == "auth"
+    assert limiter.get_group("/api/v1/chat/messages").name == "chat"
+    assert limiter.get_group("/api/v1/users").name == "default"
+    assert rate_limiter.get_group("/api/v1/auth/register").name == "auth"
+
+
+@pytest.mark.asyncio
+async def test_tokens_are_leased(rate_limiter, script):
+    """Test that leases grow while used up and spare tokens skip Redis."""
+    for _ in range(7):
+        allowed, headers = await rate_limiter.check(make_request())
+        assert allowed
+
+    # Leases of 1, 2 and 4 tokens cover seven requests
+    assert [call.kwargs["args"][2] for call in script.call_args_list] == [1, 2, 4]
+    assert script.call_args.kwargs["keys"] == ["rate_limit:default:ip:10.0.0.1"]
+    assert headers["X-RateLimit-Limit"] == "100"
+    assert headers["X-RateLimit-Remaining"] == "50"
+
+
+@pytest.mark.asyncio
+async def test_expired_lease_is_refunded(rate_limiter, script):
+    """Test that unused tokens are returned to Redis when a lease expires."""
+    with patch("app.core.security.rate_limit.time.monotonic") as mock_monotonic:
+        mock_monotonic.return_value = 100.0
+        for _ in range(2):
+            await rate_limiter.check(make_request())
+
+        # One of the two leased tokens is left when the lease expires
+        mock_monotonic.return_value = 102.0
+        await rate_limiter.check(make_request())
+
+    interval, tolerance, requested, refund = script.call_args.kwargs["args"]
+    assert (interval, tolerance) == (600, 60000)
+    assert (requested, refund) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_denial_is_cached(rate_limiter, script):
+    """Test that denied principals are not checked in Redis until the retry time."""
+    script.side_effect = None
+    script.return_value = [0, 0, 60000, 12000]
+
+    allowed, headers = await rate_limiter.check(make_request("/api/v1/auth/login"))
+    assert not allowed
+    assert headers["Retry-After"] == "12"
+    assert headers["X-RateLimit-Limit"] == "5"
+
+    allowed, _ = await rate_limiter.check(make_request("/api/v1/auth/login"))
+    assert not allowed
+    assert script.call_count == 1
+
+    # Other groups and principals are unaffected
+    script.return_value = [1, 4, 1000, 0]
+    assert (await rate_limiter.check(make_request()))[0]
+    assert (await rate_limiter.check(make_request("/api/v1/auth/login", client="10.0.0.2")))[0]
+
+
+@pytest.mark.asyncio
+async def test_redis_failure_allows_request(rate_limiter, script):
+    """Test that requests are allowed when Redis is unavailable."""
+    script.side_effect = ConnectionError("Redis unavailable")
+
+    assert await rate_limiter.check(make_request()) == (True, {})
+
+
+@pytest.mark.asyncio
+async def test_local_entries_are_bounded(script):
+    """Test that the least recently used principals are evicted."""
+    redis_client = MagicMock()
+    redis_client.register_script.return_value = script
+    limiter = RateLimiter(redis_client=redis_client, max_local_entries=2)
+
+    for client in ("10.0.0.1", "10.0.0.2", "10.0.0.3"):
+        await limiter.check(make_request(client=client))
+
+    assert list(limiter._buckets) == ["default:ip:10.0.0.2", "default:ip:10.0.0.3"]
@@ -95,6 +95,25 @@ class TestLLMService:
             assert response["content"] == "Test response"
             assert response["usage"] == {"total_tokens": 100}
 
+    def test_generate_response_reports_cacheable_prefix(self):
+        """Test that template requests report the template's fixed instructions as the cacheable prefix."""
+        with patch("app.services.llm_service.parse_chat_completion") as mock_parse, \
+             patch.object(LLMService, "_record_request_metrics") as mock_record:
+            mock_client = MagicMock()
+            mock_client.get_model_by_size.return_value = "gpt-4-1"
+            mock_parse.return_value.get_token_usage.return_value = {"total_tokens": 100}
+
+            service = LLMService()
+            service.client = mock_client
+            service.generate_response(
+                template_name="documentation_search",
+                variables={"query": "hydraulic pump", "search_results": "SOURCE 1: ..."},
+            )
+
+            messages = mock_client.chat_completion.call_args[1]["messages"]
+            assert [message["role"] for message in messages] == ["system", "user"]
+            assert mock_record.call_args[1]["cacheable_prefix_tokens"] > 0
+
     def test_generate_response_error(self):
         """Test generate_response with error."""
         with patch("app.services.llm_service.get_template") as mock_get_template, \
@@ -0,0 +1,181 @@
+"""
+Unit tests for the ProcedureEnrichmentIndex.
+"""
+import pytest
+from unittest.mock import MagicMock
+
+from app.core.agents.maintenance_agent import MaintenanceAgent
+from app.services.procedure_enrichment_index import (
+    ProcedureEnrichmentIndex, get_procedure_enrichment_index, merge_by_id
+)
+
+
+PRECAUTIONS = {
+    "before_procedure": [
+        {"id": "sp-001", "severity": "high", "description": "Depressurize the hydraulic system"},
+        {"id": "sp-002", "severity": "medium", "description": "Wear eye protection"}
+    ],
+    "during_procedure": [
+        {"id": "sp-002", "severity": "medium", "description": "Wear eye protection"},
+        {"id": "sp-003", "severity": "critical", "description": "Keep clear of control surfaces"}
+    ],
+    "after_procedure": []
+}
+
+
+@pytest.fixture
+def tools_and_parts_service():
+    """Mock tools and parts service."""
+    service = MagicMock()
+    service.data_version = 1
+    service.get_resources_for_procedure.return_value = {
+        "tools": [{"id": "tool-001", "name": "Torque Wrench"}, {"id": "tool-001", "name": "Torque Wrench"}],
+        "parts": [{"id": "part-001", "name": "O-ring"}],
+        "equipment": []
+    }
+    service.procedure_resource_mappings = {
+        "inspection": {"hydraulic": {}, "general": {}},
+        "specific_procedures": {}
+    }
+    service.aircraft_tool_mappings = {"Boeing 737": {}}
+    service.aircraft_part_mappings = {}
+    return service
+
+
+@pytest.fixture
+def safety_precautions_service():
+    """Mock safety precautions service."""
+    service = MagicMock()
+    service.data_version = 1
+    service.get_safety_precautions_for_procedure.side_effect = (
+        lambda procedure_type, system, display_location=None:
+        PRECAUTIONS[display_location] if display_location
+        else PRECAUTIONS["before_procedure"] + PRECAUTIONS["during_procedure"]
+    )
+    service.get_safety_precautions_for_step.side_effect = (
+        lambda procedure_type, system, step_reference:
+        [PRECAUTIONS["before_procedure"][0]] if step_reference == "preparation" else []
+    )
+    service.get_all_safety_precautions.return_value = PRECAUTIONS["before_procedure"] + PRECAUTIONS["during_procedure"]
+    service.procedure_safety_mappings = {"repair": {"hydraulic": {}}}
+    return service
+
+
+@pytest.fixture
+def regulatory_service():
+    """Mock regulatory requirements service."""
+    service = MagicMock()
+    service.data_version = 1
+    service.get_regulatory_citations.return_value = [
+        {"authority": "FAA", "reference_id": "14 CFR 43.13", "title": "Performance rules", "description": "General"}
+    ]
+    service.task_mappings = {}
+    return service
+
+
+@pytest.fixture
+def index(tools_and_parts_service, safety_precautions_service, regulatory_service):
+    """Procedure enrichment index over mock services."""
+    return ProcedureEnrichmentIndex(
+        tools_and_parts_service=tools_and_parts_service,
+        safety_precautions_service=safety_precautions_service,
+        regulatory_service=regulatory_service
+    )
+
+
+class TestProcedureEnrichmentIndex:
+    """Tests for the ProcedureEnrichmentIndex."""
+
+    def test_merge_by_id(self):
+        """Test merging resources by ID."""
+        merged = merge_by_id([{"id": "a", "n": 1}, {"id": "b"}], None, [{"id": "a", "n": 2}])
+
+        assert merged == [{"id": "a", "n": 1}, {"id": "b"}]
+
+    def test_get_entry(self, index, tools_and_parts_service):
+        """Test building an entry."""
+        entry = index.get("Boeing 737", "Hydraulic", "Inspection")
+
+        # Verify deduplicated resources
+        assert [tool["id"] for tool in entry["tools"]] == ["tool-001"]
+        assert [part["id"] for part in entry["parts"]] == ["part-001"]
+        assert entry["equipment"] == []
+
+        # Verify precautions in procedure order and required precautions
+        assert [p["id"] for p in entry["precautions"]] == ["sp-001", "sp-002", "sp-003"]
+        assert [p["id"] for p in entry["required_precautions"]] == ["sp-001", "sp-003"]
+        assert list(entry["step_precautions"]) == ["preparation"]
+        assert entry["citations"][0]["reference_id"] == "14 CFR 43.13"
+
+        # Verify normalized arguments
+        tools_and_parts_service.get_resources_for_procedure.assert_called_once_with(
+            procedure_type="inspection",
+            system="hydraulic",
+            aircraft_type="Boeing 737"
+        )
+
+    def test_get_entry_is_memoized(self, index, tools_and_parts_service, regulatory_service):
+        """Test that repeated lookups do not query the services."""
+        first = index.get("Boeing 737", "hydraulic", "inspection")
+        second = index.get(" Boeing 737 ", "HYDRAULIC", "inspection ")
+
+        assert first is second
+        assert tools_and_parts_service.get_resources_for_procedure.call_count == 1
+        assert regulatory_service.get_regulatory_citations.call_count == 1
+
+    def test_get_entry_without_system(self, index, tools_and_parts_service):
+        """Test that procedures without a system get an empty entry."""
+        entry = index.get("Boeing 737", None, "inspection")
+
+        assert entry["tools"] == []
+        assert entry["citations"] == []
+        tools_and_parts_service.get_resources_for_procedure.assert_not_called()
+
+    def test_invalidated_on_data_change(self, index, safety_precautions_service, tools_and_parts_service):
+        """Test that entries are rebuilt after a service reloads its data."""
+        first = index.get("Boeing 737", "hydraulic", "inspection")
+
+        safety_precautions_service.data_version += 1
+        second = index.get("Boeing 737", "hydraulic", "inspection")
+
+        assert first is not second
+        assert tools_and_parts_service.get_resources_for_procedure.call_count == 2
+
+    def test_find_precaution(self, index, safety_precautions_service):
+        """Test finding precautions by description."""
+        assert index.find_precaution("Wear eye protection")["id"] == "sp-002"
+        assert index.find_precaution("Keep clear of control surfaces")["id"] == "sp-003"
+        assert index.find_precaution("Unknown precaution") is None
+        safety_precautions_service.get_all_safety_precautions.assert_called_once()
+
+    def test_warm(self, index, tools_and_parts_service):
+        """Test building entries for all mapped procedures."""
+        count = index.warm()
+
+        # Two procedure type and system pairs, with and without an aircraft type
+        assert count == 4
+        assert tools_and_parts_service.get_resources_for_procedure.call_count == 4
+
+
+class TestSharedProcedureEnrichmentIndex:
+    """Test sharing the procedure enrichment index across agents."""
+
+    def test_agents_share_index(self):
+        """Test that agents with default services use the process-wide index."""
+        first = MaintenanceAgent(llm_service=MagicMock(), maintenance_service=MagicMock())
+        second = MaintenanceAgent(llm_service=MagicMock(), maintenance_service=MagicMock())
+
+        assert first.enrichment_index is get_procedure_enrichment_index()
+        assert second.enrichment_index is first.enrichment_index
+        assert first.tools_and_parts_service is first.enrichment_index.tools_and_parts_service
+
+    def test_agent_with_given_services_builds_own_index(self, tools_and_parts_service):
+        """Test that an agent given its own services does not use the shared index."""
+        agent = MaintenanceAgent(
+            llm_service=MagicMock(),
+            maintenance_service=MagicMock(),
+            tools_and_parts_service=tools_and_parts_service
+        )
+
+        assert agent.enrichment_index is not get_procedure_enrichment_index()
+        assert agent.enrichment_index.tools_and_parts_service is tools_and_parts_service
@@ -0,0 +1,127 @@
+"""Tests for prompt assembly."""
+
+from app.services.prompt_assembly import (
+    MIN_CACHEABLE_PROMPT_TOKENS,
+    PromptAssembler,
+    SegmentStability,
+    canonicalize_context,
+)
+from app.services.prompt_templates import (
+    DOCUMENTATION_SEARCH_TEMPLATE,
+    MessageRole,
+)
+
+
+class TestCanonicalizeContext:
+    """Tests for canonicalize_context."""
+
+    def test_sorted_keys(self):
+        """Test that context keys are rendered in sorted order."""
+        first = canonicalize_context({"b": 2, "a": 1})
+        second = canonicalize_context({"a": 1, "b": 2})
+
+        assert first == second == "a: 1\nb: 2"
+
+    def test_nested_values(self):
+        """Test that nested values are serialized deterministically."""
+        context = {"filters": {"system": "hydraulic", "aircraft": "B737"}, "tags": {"y", "x"}}
+
+        assert canonicalize_context(context) == (
+            'filters: {"aircraft": "B737", "system": "hydraulic"}\n'
+            'tags: ["x", "y"]'
+        )
+
+    def test_exclude_and_empty(self):
+        """Test excluded keys and empty context."""
+        assert canonicalize_context({"keywords": ["a"], "x": 1}, exclude=["keywords"]) == "x: 1"
+        assert canonicalize_context(None) == ""
+        assert canonicalize_context({}) == ""
+
+
+class TestPromptAssembler:
+    """Tests for PromptAssembler."""
+
+    def test_orders_segments_by_stability(self):
+        """Test that stable segments come first regardless of insertion order."""
+        prompt = (
+            PromptAssembler()
+            .add(MessageRole.USER, "query", SegmentStability.QUERY)
+            .add_context({"aircraft_type": "Boeing 737"})
+            .add(MessageRole.SYSTEM, "instructions", SegmentStability.STATIC)
+            .assemble()
+        )
+
+        assert prompt.messages == [
+            {"role": "system", "content": "instructions"},
+            {"role": "user", "content": "Additional context:\naircraft_type: Boeing 737\n\nquery"},
+        ]
+
+    def test_history_turns_stay_separate(self):
+        """Test that conversation history keeps one message per turn."""
+        history = [
+            {"role": "user", "content": "first question"},
+            {"role": "user", "content": "follow-up"},
+            {"role": "assistant", "content": "answer"},
+        ]
+
+        prompt = (
+            PromptAssembler()
+            .add(MessageRole.SYSTEM, "instructions", SegmentStability.STATIC)
+            .add_history(history)
+            .add(MessageRole.USER, "query", SegmentStability.QUERY)
+            .assemble()
+        )
+
+        assert [message["content"] for message in prompt.messages] == [
+            "instructions",
+            "first question",
+            "follow-up",
+            "answer",
+            "query",
+        ]
+
+    def test_prefix_is_stable_across_requests(self):
+        """Test that context and query changes leave the prefix untouched."""
+        def build(context, query):
+            return (
+                PromptAssembler()
+                .add(MessageRole.SYSTEM, "instructions " * 50, SegmentStability.STATIC)
+                .add_history([{"role": "user", "content": "earlier turn"}])
+                .add_context(context)
+                .add(MessageRole.USER, query, SegmentStability.QUERY)
+                .assemble()
+            )
+
+        first = build({"b": 1, "a": 2}, "first query")
+        second = build({"a": 3}, "a much longer second query")
+
+        assert first.messages[:2] == second.messages[:2]
+        assert first.cacheable_prefix_tokens == second.cacheable_prefix_tokens
+        assert 0 < first.cacheable_prefix_tokens < first.total_tokens
+        assert not first.is_cacheable
+
+    def test_cacheable_threshold(self):
+        """Test the provider minimum for cacheable prompts."""
+        prompt = (
+            PromptAssembler()
+            .add(MessageRole.SYSTEM, "word " * MIN_CACHEABLE_PROMPT_TOKENS, SegmentStability.STATIC)
+            .assemble()
+        )
+
+        assert prompt.is_cacheable
+
+    def test_add_template(self):
+        """Test that a template's fixed system message is treated as static."""
+        assembler = PromptAssembler().add_template(
+            DOCUMENTATION_SEARCH_TEMPLATE,
+            query="hydraulic pump",
+            search_results="SOURCE 1: ...",
+        )
+
+        assert [segment.stability for segment in assembler.segments] == [
+            SegmentStability.STATIC,
+            SegmentStability.REQUEST,
+        ]
+        prompt = assembler.assemble()
+        assert prompt.messages[0]["content"] == DOCUMENTATION_SEARCH_TEMPLATE.system_message
+        assert "hydraulic pump" in prompt.messages[1]["content"]
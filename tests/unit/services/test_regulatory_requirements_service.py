@@ -386,3 +386,71 @@ class TestRegulatoryRequirementsService:
         assert len(requirements1) == len(requirements2)
         assert all(req1["id"] == req2["id"] for req1, req2 in zip(sorted(requirements1, key=lambda x: x["id"]),
                                                                  sorted(requirements2, key=lambda x: x["id"])))
+
+    def test_applicability_indexes(self, service):
+        """
+        Test that applicability queries match wildcards, case and unrestricted fields.
+        """
+        # Add a requirement restricted to one aircraft type, without jurisdictions
+        service.requirements["reg-faa-003"] = {
+            "id": "reg-faa-003",
+            "authority": "FAA",
+            "reference_id": "AD 2024-01-01",
+            "title": "Airworthiness directive",
+            "description": "Directive for a single aircraft type",
+            "applicability": {
+                "aircraft_types": ["Boeing 737"],
+                "aircraft_categories": ["commercial"],
+                "operation_categories": ["IFR"]
+            },
+            "tags": ["Directive"]
+        }
+
+        # Wildcards and case-insensitive values match
+        boeing = service.get_requirements_by_applicability(aircraft_type="boeing 737")
+        assert [req["id"] for req in boeing] == ["reg-faa-001", "reg-faa-002", "reg-easa-001", "reg-faa-003"]
+
+        airbus = service.get_requirements_by_applicability(aircraft_type="Airbus A320")
+        assert [req["id"] for req in airbus] == ["reg-faa-001", "reg-faa-002", "reg-easa-001"]
+
+        # Missing fields do not restrict, other fields are intersected
+        eu_ifr = service.get_requirements_by_applicability(
+            operation_category="ifr",
+            jurisdiction="european union"
+        )
+        assert [req["id"] for req in eu_ifr] == ["reg-easa-001", "reg-faa-003"]
+
+        private = service.get_requirements_by_applicability(
+            aircraft_type="Boeing 737",
+            aircraft_category="Private"
+        )
+        assert [req["id"] for req in private] == ["reg-faa-001", "reg-faa-002", "reg-easa-001"]
+
+        # Tags are indexed case-insensitively
+        directives = service.get_requirements_by_tags(["directive", "organization"])
+        assert [req["id"] for req in directives] == ["reg-easa-001", "reg-faa-003"]
+
+    def test_validate_procedure_recommendations(self, service):
+        """
+        Test that recommendations list only requirements missing from the references.
+        """
+        procedure = {
+            "title": "Test Procedure",
+            "description": "Test procedure description",
+            "steps": [{"step_number": 1, "title": "Test Step", "description": "Test step description"}],
+            "safety_precautions": ["Test safety precaution"],
+            "references": [
+                {"title": "EASA Part-145 - Maintenance Organisation Approvals"},
+                "not a reference"
+            ]
+        }
+
+        result = service.validate_procedure_against_regulations(
+            procedure=procedure,
+            procedure_type="repair",
+            system="fuel_system"
+        )
+
+        assert result["requirements"] == ["14 CFR 43.13", "AC 43.13-1B", "Part-145"]
+        assert len(result["recommendations"]) == 2
+        assert not any("Part-145" in recommendation for recommendation in result["recommendations"])
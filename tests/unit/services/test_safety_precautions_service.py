@@ -196,6 +196,25 @@ class TestSafetyPrecautionsService:
         assert any(p["id"] == "sp-001" for p in precautions)
         assert any(p["id"] == "sp-003" for p in precautions)
 
+    def test_extract_safety_precautions_with_keywords(self, mock_service):
+        """Test extracting safety precautions by keyword, in catalog order, across steps."""
+        mock_service.safety_precautions["sp-004"] = {
+            "id": "sp-004",
+            "type": "warning",
+            "severity": "critical",
+            "description": "Relieve hydraulic pressure before disconnecting lines",
+            "keywords": ["residual pressure"]
+        }
+        procedure = {
+            "procedure_steps": [
+                {"title": "Check for residual pressure", "description": "Open the bleed valve."},
+                {"title": "Grounding", "cautions": ["USE ANTI-STATIC WRIST STRAPS when handling avionics components", 42]},
+                {"title": "Repeat", "description": "Check for residual pressure again."}
+            ]
+        }
+        precautions = mock_service.extract_safety_precautions_from_procedure(procedure)
+        assert [p["id"] for p in precautions] == ["sp-003", "sp-004"]
+
     def test_enrich_procedure_with_safety_precautions(self, mock_service):
         """Test enriching a procedure with safety precautions."""
         procedure = {
@@ -0,0 +1,231 @@
+"""Tests for token quota enforcement."""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.core.orchestrator.orchestrator import Orchestrator
+from app.models.conversation import AgentType
+from app.models.orchestrator import OrchestratorRequest
+from app.services.exceptions import TokenQuotaExceededError
+from app.services.llm_service import LLMService, ModelSize
+from app.services.token_quota import TokenQuotaService, TokenReservation
+
+
+MESSAGES = [{"role": "user", "content": "Generate the hydraulic pump replacement procedure"}]
+
+
+@pytest.fixture
+def quota_service():
+    """Token quota service over a mock Redis client."""
+    with patch("app.services.token_quota.RedisCache") as mock_cache_class:
+        mock_cache = MagicMock()
+        mock_cache._get_key.side_effect = lambda key: f"token_quota:{key}"
+        mock_cache_class.return_value = mock_cache
+
+        service = TokenQuotaService(user_daily_budget=10000, global_daily_budget=0, enabled=True)
+        service.script = MagicMock(return_value=[1, 2000, 2000])
+        service.async_script = AsyncMock(return_value=[1, 2000, 2000])
+        service.async_redis = MagicMock()
+        service.async_redis.pipeline.return_value.execute = AsyncMock()
+        yield service
+
+
+class TestTokenQuotaService:
+    """Tests for TokenQuotaService."""
+
+    def test_reserve(self, quota_service):
+        """Test reserving tokens against the analytics counters."""
+        reservation = quota_service.reserve(MESSAGES, 500, ModelSize.LARGE, user_id="user-1")
+
+        assert reservation.model_size == ModelSize.LARGE
+        assert reservation.tokens > 500
+
+        # Check that the budget is checked against the shared daily usage keys
+        keys = quota_service.script.call_args.kwargs["keys"]
+        args = quota_service.script.call_args.kwargs["args"]
+        assert keys[0].startswith("user:user-1:daily:")
+        assert keys[2].startswith("global:daily:")
+        assert args[:3] == [reservation.tokens, 10000, 0]
+
+    def test_reserve_near_quota_downgrades(self, quota_service):
+        """Test that requests move to a smaller model past the soft limit."""
+        quota_service.script.return_value = [1, 8500, 8500]
+
+        assert quota_service.reserve(MESSAGES, 500, ModelSize.LARGE, user_id="user-1").model_size == ModelSize.MEDIUM
+        assert quota_service.reserve(MESSAGES, 500, ModelSize.SMALL, user_id="user-1").model_size == ModelSize.SMALL
+
+    def test_reserve_over_quota(self, quota_service):
+        """Test that requests over the budget are rejected."""
+        quota_service.script.return_value = [0, 9900, 9900]
+
+        with pytest.raises(TokenQuotaExceededError) as exc_info:
+            quota_service.reserve(MESSAGES, 500, ModelSize.MEDIUM, user_id="user-1")
+
+        assert exc_info.value.status_code == 429
+
+    def test_reserve_without_user(self, quota_service):
+        """Test that anonymous requests share one budget."""
+        reservation = quota_service.reserve(MESSAGES, 500, ModelSize.MEDIUM)
+
+        assert reservation.tokens > 500
+        keys = quota_service.script.call_args.kwargs["keys"]
+        args = quota_service.script.call_args.kwargs["args"]
+        assert keys[0].startswith("user:anonymous:daily:")
+        assert args[1] == 10000
+
+    def test_reserve_redis_failure(self, quota_service):
+        """Test that requests are allowed when Redis is unavailable."""
+        quota_service.script.side_effect = ConnectionError("Redis unavailable")
+
+        reservation = quota_service.reserve(MESSAGES, 500, ModelSize.MEDIUM, user_id="user-1")
+
+        assert reservation.model_size == ModelSize.MEDIUM
+        assert reservation.tokens == 0
+
+    def test_reconcile(self, quota_service):
+        """Test that reconciling removes the reserved tokens."""
+        reservation = quota_service.reserve(MESSAGES, 500, ModelSize.MEDIUM, user_id="user-1")
+        pipe = quota_service.redis.redis.pipeline.return_value
+
+        quota_service.reconcile(reservation, {"total_tokens": 300})
+
+        assert [call.args for call in pipe.decrby.call_args_list] == [
+            (key, reservation.tokens) for key in reservation.reserved_keys
+        ]
+        pipe.execute.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_reserve_async(self, quota_service):
+        """Test reserving and reconciling tokens on the async client."""
+        quota_service.async_script.return_value = [1, 8500, 8500]
+
+        reservation = await quota_service.reserve_async(MESSAGES, 500, ModelSize.LARGE, user_id="user-1")
+
+        assert reservation.model_size == ModelSize.MEDIUM
+        quota_service.script.assert_not_called()
+        keys = quota_service.async_script.call_args.kwargs["keys"]
+        assert keys[0].startswith("user:user-1:daily:")
+
+        await quota_service.reconcile_async(reservation, {"total_tokens": 300})
+
+        pipe = quota_service.async_redis.pipeline.return_value
+        assert [call.args for call in pipe.decrby.call_args_list] == [
+            (key, reservation.tokens) for key in reservation.reserved_keys
+        ]
+        pipe.execute.assert_awaited_once()
+        quota_service.redis.redis.pipeline.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_reserve_async_over_quota(self, quota_service):
+        """Test that async requests over the budget are rejected."""
+        quota_service.async_script.return_value = [0, 9900, 9900]
+
+        with pytest.raises(TokenQuotaExceededError):
+            await quota_service.reserve_async(MESSAGES, 500, ModelSize.MEDIUM, user_id="user-1")
+
+
+def test_llm_service_applies_quota():
+    """Test that LLM requests use the reserved model size and reconcile the reservation."""
+    with patch("app.services.llm_service.token_quota_service") as mock_quota, \
+         patch("app.services.llm_service.parse_chat_completion") as mock_parse, \
+         patch("app.services.llm_service.track_llm_usage"):
+        mock_quota.reserve.return_value = TokenReservation(ModelSize.SMALL, tokens=600)
+        mock_parse.return_value.get_token_usage.return_value = {"total_tokens": 300}
+
+        service = LLMService()
+        service.client = MagicMock()
+        service.generate_custom_response(MESSAGES, model_size=ModelSize.LARGE, user_id="user-1")
+
+        service.client.get_model_by_size.assert_called_once_with(ModelSize.SMALL)
+        mock_quota.reconcile.assert_called_once_with(
+            mock_quota.reserve.return_value, {"total_tokens": 300}
+        )
+
+
+def test_llm_service_quota_exceeded():
+    """Test that quota errors are raised unchanged."""
+    with patch("app.services.llm_service.token_quota_service") as mock_quota:
+        mock_quota.reserve.side_effect = TokenQuotaExceededError()
+
+        service = LLMService()
+        service.client = MagicMock()
+        with pytest.raises(TokenQuotaExceededError):
+            service.generate_custom_response(MESSAGES, user_id="user-1")
+
+        service.client.chat_completion.assert_not_called()
+        mock_quota.reconcile.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_orchestrator_requests_count_against_user_quota():
+    """Test that every LLM call made for an orchestrator request reserves against the user's quota."""
+    with patch("app.services.llm_service.token_quota_service") as mock_quota, \
+         patch("app.services.llm_service.parse_chat_completion") as mock_parse, \
+         patch("app.services.llm_service.track_llm_usage"):
+        mock_quota.reserve_async = AsyncMock(side_effect=lambda messages, max_tokens, model_size, user_id=None:
+                                             TokenReservation(model_size))
+        mock_quota.reconcile_async = AsyncMock()
+        mock_parse.return_value.get_message_content.return_value = "Inspect the pump seals."
+        mock_parse.return_value.get_token_usage.return_value = {"total_tokens": 300}
+
+        llm_service = LLMService()
+        llm_service.client = MagicMock()
+        llm_service.client.async_chat_completion = AsyncMock(return_value={})
+
+        agent_config = MagicMock(
+            agent_type=AgentType.MAINTENANCE,
+            system_prompt="You are a maintenance assistant.",
+            model_size=ModelSize.MEDIUM,
+            temperature=0.7,
+            max_tokens=500,
+        )
+        agent_config.name = "Maintenance Assistant"
+        agent_repository = MagicMock()
+        agent_repository.get_by_id.return_value = agent_config
+
+        orchestrator = Orchestrator(llm_service=llm_service, agent_repository=agent_repository)
+        orchestrator._registry_initialized = True
+        orchestrator.agent_registry = MagicMock()
+        orchestrator.agent_registry.get_all_agents.return_value = []
+        orchestrator.router = AsyncMock()
+        orchestrator.router.route_request.return_value = MagicMock(agent_config_id=1)
+
+        response = await orchestrator.process_request(
+            OrchestratorRequest(query="Quota test: hydraulic pump chatter at idle", user_id="user-1")
+        )
+
+        assert response.response == "Inspect the pump seals."
+        # Classification, complexity analysis and the agent response all reserve for the user
+        assert mock_quota.reserve_async.await_count >= 2
+        assert {call.kwargs["user_id"] for call in mock_quota.reserve_async.await_args_list} == {"user-1"}
+        assert mock_quota.reconcile_async.await_count == mock_quota.reserve_async.await_count
+
+
+@pytest.mark.asyncio
+async def test_orchestrator_raises_quota_errors():
+    """Test that quota errors reach the caller instead of the fallback response."""
+    llm_service = MagicMock()
+    llm_service.generate_custom_response_async = AsyncMock(side_effect=TokenQuotaExceededError())
+
+    agent_config = MagicMock(
+        agent_type=AgentType.MAINTENANCE,
+        system_prompt="You are a maintenance assistant.",
+        model_size=ModelSize.MEDIUM,
+        temperature=0.7,
+        max_tokens=500,
+    )
+    agent_repository = MagicMock()
+    agent_repository.get_by_id.return_value = agent_config
+
+    orchestrator = Orchestrator(llm_service=llm_service, agent_repository=agent_repository)
+    orchestrator._registry_initialized = True
+    orchestrator.agent_registry = MagicMock()
+    orchestrator.agent_registry.get_all_agents.return_value = []
+    orchestrator.classifier = AsyncMock()
+    orchestrator.router = AsyncMock()
+    orchestrator.router.route_request.return_value = MagicMock(agent_config_id=1)
+    orchestrator.model_selector = AsyncMock()
+    orchestrator.model_selector.select_model.return_value = (None, None)
+
+    with pytest.raises(TokenQuotaExceededError):
+        await orchestrator.process_request(OrchestratorRequest(query="Hydraulic pump chatter", user_id="user-1"))